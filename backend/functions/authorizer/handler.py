@@ -78,9 +78,46 @@ def verify_token(token: str) -> dict | None:
         return None
 
 
+def websocket_handler(event: dict[str, Any]) -> dict:
+    """
+    WebSocket API ($connect) の認証 (REQUEST Authorizer, IAMポリシー形式)
+
+    ブラウザのWebSocketはヘッダーを付けられないため、IDトークンはクエリパラメータ token で受け取る。
+
+    Args:
+        event: API Gateway WebSocket API からのイベント
+
+    Returns:
+        IAMポリシー: {"principalId": str, "policyDocument": dict, "context": dict}
+    """
+    token = (event.get("queryStringParameters") or {}).get("token", "")
+    claims = verify_token(token) if token else None
+
+    effect = "Allow" if claims else "Deny"
+    user_context = {
+        "userId": claims.get("sub", "") if claims else "",
+        "email": claims.get("email", "") if claims else "",
+    }
+    print(f"WebSocket authorization {effect} for user: {user_context['userId'] or 'unknown'}")
+
+    return {
+        "principalId": user_context["userId"] or "anonymous",
+        "policyDocument": {
+            "Version": "2012-10-17",
+            "Statement": [{
+                "Action": "execute-api:Invoke",
+                "Effect": effect,
+                "Resource": event.get("methodArn", ""),
+            }],
+        },
+        "context": user_context,
+    }
+
+
 def handler(event: dict[str, Any], context: Any) -> dict:
     """
     Lambda Authorizer ハンドラー (HTTP API v2 Simple Response Format)
+    WebSocket API の $connect（methodArn を含むイベント）は websocket_handler で認証する
 
     Args:
         event: API Gateway HTTP API v2からのイベント
@@ -91,6 +128,10 @@ def handler(event: dict[str, Any], context: Any) -> dict:
     """
     print(f"Authorizer event: {json.dumps(event)}")
 
+    # WebSocket API の $connect（トークンの検証に失敗した場合は Deny のポリシーを返す）
+    if event.get("methodArn"):
+        return websocket_handler(event)
+
     try:
         # HTTP API v2 の場合、ヘッダーは identitySource から取得
         # または headers オブジェクトから直接取得
@@ -26,6 +26,7 @@ from validators import (
 from prompt_builder import (
     build_chat_edit_system_prompt,
     build_chat_edit_prompt,
+    build_chat_edit_prompt_fragments,
     build_section_edit_prompt,
     build_follow_up_prompt
 )
@@ -36,6 +37,10 @@ from diff_utils import (
     apply_text_replacement,
     split_markdown_sections
 )
+from claude_api import create_message
+from plan_rules import get_effective_plan
+from model_router import resolve_model, TASK_CHAT_EDIT
+from markdown_stats import get_markdown_stats
 from utils import (
     generate_conversation_id,
     generate_message_id,
@@ -54,16 +59,16 @@ from utils import (
 
 
 # 環境変数
-CLAUDE_API_KEY = os.environ.get('CLAUDE_API_KEY', '')
 DYNAMODB_TABLE_ARTICLES = os.environ.get('DYNAMODB_TABLE_ARTICLES', 'blog-agent-articles')
 DYNAMODB_TABLE_CONVERSATIONS = os.environ.get('DYNAMODB_TABLE_CONVERSATIONS', 'blog-agent-conversations')
-CLAUDE_MODEL = os.environ.get('CLAUDE_MODEL', 'claude-sonnet-4-20250514')
+DYNAMODB_TABLE_SETTINGS = os.environ.get('DYNAMODB_TABLE_SETTINGS', 'blog-agent-settings')
 MAX_REVISIONS = 10
 
 # クライアント初期化
 dynamodb = boto3.resource('dynamodb')
 articles_table = dynamodb.Table(DYNAMODB_TABLE_ARTICLES)
 conversations_table = dynamodb.Table(DYNAMODB_TABLE_CONVERSATIONS)
+settings_table = dynamodb.Table(DYNAMODB_TABLE_SETTINGS)
 
 
 class DecimalEncoder(json.JSONEncoder):
@@ -74,11 +79,6 @@ class DecimalEncoder(json.JSONEncoder):
         return super().default(obj)
 
 
-def get_claude_client() -> anthropic.Anthropic:
-    """Claude APIクライアントを取得"""
-    return anthropic.Anthropic(api_key=CLAUDE_API_KEY)
-
-
 def get_article(user_id: str, article_id: str) -> Optional[Dict[str, Any]]:
     """
     記事をDynamoDBから取得
@@ -100,6 +100,27 @@ def get_article(user_id: str, article_id: str) -> Optional[Dict[str, Any]]:
         return None
 
 
+def get_user_plan(user_id: str) -> str:
+    """
+    ユーザーの有効プランを取得（モデルの振り分けに使用）
+
+    Args:
+        user_id: ユーザーID
+
+    Returns:
+        有効プラン（取得に失敗した場合は'starter'）
+    """
+    try:
+        response = settings_table.get_item(
+            Key={'userId': user_id},
+            ProjectionExpression='subscription_status, plan_type'
+        )
+        return get_effective_plan(response.get('Item') or {})
+    except Exception as e:
+        log_warning('Failed to get user plan', user_id=user_id, error=str(e))
+        return 'starter'
+
+
 def get_conversation(user_id: str, article_id: str) -> Optional[Dict[str, Any]]:
     """
     会話履歴をDynamoDBから取得
@@ -156,7 +177,8 @@ def update_article(user_id: str, article_id: str, markdown: str) -> bool:
     try:
         articles_table.update_item(
             Key={'userId': user_id, 'articleId': article_id},
-            UpdateExpression='SET markdown = :md, updatedAt = :ua',
+            # 編集後は別形式の描画結果（dualFormat生成時）と内容が一致しなくなるため削除する
+            UpdateExpression='SET markdown = :md, updatedAt = :ua REMOVE alternateContents',
             ExpressionAttributeValues={
                 ':md': markdown,
                 ':ua': get_current_timestamp()
@@ -168,6 +190,21 @@ def update_article(user_id: str, article_id: str, markdown: str) -> bool:
         return False
 
 
+def build_content_stats(markdown: str) -> Dict[str, Any]:
+    """
+    編集後の本文の統計（文字数・読了時間・見出し数・構造上の問題点）
+
+    同じ本文の統計はプロセス内で再利用されるため、差分計算などと重複して走査しない。
+    """
+    stats = get_markdown_stats(markdown)
+    return {
+        'charCount': stats['charCount'],
+        'readingTime': stats['readingTime'],
+        'headingCount': stats['headingCount'],
+        'issues': list(stats['issues'])
+    }
+
+
 def parse_ai_response(response_text: str) -> Optional[Dict[str, Any]]:
     """
     AI応答からJSONを抽出してパース
@@ -270,21 +307,27 @@ def chat_edit(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
             prompt = build_follow_up_prompt(instruction, current_content, previous_changes)
         else:
             prompt = build_chat_edit_prompt(instruction, current_content, conversation_history, edit_context)
+        prompt_fragments = build_chat_edit_prompt_fragments(
+            instruction, current_content, conversation_history,
+            edit_context if not previous_changes else None, previous_changes
+        )
 
         # Claude APIで編集
         start_time = datetime.now()
-        claude_client = get_claude_client()
 
         # 会話履歴を含めてリクエスト
         messages = conversation_history.copy() if conversation_history else []
         messages.append({'role': 'user', 'content': prompt})
 
-        message = claude_client.messages.create(
-            model=CLAUDE_MODEL,
+        model = resolve_model(TASK_CHAT_EDIT, get_user_plan(user_id))
+        message, call_metrics = create_message(
+            'chat_edit',
+            model=model,
             max_tokens=8000,
             temperature=0.3,  # 編集は一貫性重視
             system=build_chat_edit_system_prompt(),
-            messages=messages
+            messages=messages,
+            prompt_fragments=prompt_fragments
         )
 
         generation_time = (datetime.now() - start_time).total_seconds()
@@ -409,8 +452,12 @@ def chat_edit(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
             'conversationId': conversation_id,
             'metadata': {
                 'generationTime': round(generation_time, 2),
+                'model': model,
                 'inputTokens': message.usage.input_tokens,
-                'outputTokens': message.usage.output_tokens
+                'outputTokens': message.usage.output_tokens,
+                'apiLatencyMs': call_metrics['latencyMs'],
+                'apiRetries': call_metrics['retries'],
+                'contentStats': build_content_stats(new_content)
             }
         })
 
@@ -0,0 +1,234 @@
+"""
+Claude APIクライアント共通モジュール
+
+ウォームコンテナ内でクライアントとHTTPコネクションプールを使い回し、同時呼び出し数をプールの大きさで制限して、
+API呼び出しごとのレイテンシ（TTFT・総時間・トークン/秒・リトライ回数）を計測する。
+プロンプトの断片が渡された場合は、入力トークンの内訳（prompt_tokens）もログに出力する。
+anthropic のimport（1秒以上かかる）はクライアントの生成時まで遅らせ、Claudeを呼ばないルートでは読み込まない。
+
+generate-article/claude_api.py と chat-edit/claude_api.py は同一内容。
+Lambda関数ごとにデプロイされるため、同じファイルを配置する。
+"""
+
+import os
+import threading
+import time
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional, Tuple
+
+from prompt_tokens import log_prompt_token_breakdown
+from utils import log_info
+
+if TYPE_CHECKING:
+    import anthropic
+
+
+# 環境変数
+CLAUDE_API_KEY = os.environ.get('CLAUDE_API_KEY', '')
+CLAUDE_CONNECT_TIMEOUT = float(os.environ.get('CLAUDE_CONNECT_TIMEOUT', '5'))
+CLAUDE_READ_TIMEOUT = float(os.environ.get('CLAUDE_READ_TIMEOUT', '280'))
+CLAUDE_MAX_RETRIES = int(os.environ.get('CLAUDE_MAX_RETRIES', '2'))
+CLAUDE_MAX_CONNECTIONS = int(os.environ.get('CLAUDE_MAX_CONNECTIONS', '10'))
+CLAUDE_KEEPALIVE_EXPIRY = float(os.environ.get('CLAUDE_KEEPALIVE_EXPIRY', '60'))
+
+# SDKが各リクエストに付与するリトライ回数ヘッダー
+RETRY_COUNT_HEADER = 'x-stainless-retry-count'
+
+_client: Optional['anthropic.Anthropic'] = None
+_client_lock = threading.Lock()
+# コンテナ内の同時API呼び出し数の上限（SQSバッチの並行処理 × 並列生成のスレッドの合計）
+# コネクションプールの大きさに合わせ、プールの空き待ちでタイムアウトしないようにする
+_call_slots = threading.BoundedSemaphore(CLAUDE_MAX_CONNECTIONS)
+
+
+def get_claude_client() -> 'anthropic.Anthropic':
+    """
+    Claude APIクライアントを取得（コンテナ内で共有）
+
+    keep-alive付きのコネクションプールを持つクライアントを1度だけ生成し、
+    以降の呼び出し（並列生成のスレッドを含む）で再利用する。
+    """
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                import anthropic
+
+                timeout = anthropic.Timeout(CLAUDE_READ_TIMEOUT, connect=CLAUDE_CONNECT_TIMEOUT)
+                # SDKが利用するHTTPライブラリのLimits型をそのまま使う
+                limits_class = type(anthropic.DEFAULT_CONNECTION_LIMITS)
+                http_client = anthropic.DefaultHttpxClient(
+                    timeout=timeout,
+                    limits=limits_class(
+                        max_connections=CLAUDE_MAX_CONNECTIONS,
+                        max_keepalive_connections=CLAUDE_MAX_CONNECTIONS,
+                        keepalive_expiry=CLAUDE_KEEPALIVE_EXPIRY,
+                    ),
+                )
+                _client = anthropic.Anthropic(
+                    api_key=CLAUDE_API_KEY,
+                    timeout=timeout,
+                    max_retries=CLAUDE_MAX_RETRIES,
+                    http_client=http_client,
+                )
+    return _client
+
+
+def get_retry_count(request: Any) -> int:
+    """最終リクエストのヘッダーからSDK内部のリトライ回数を取得"""
+    try:
+        return int(request.headers.get(RETRY_COUNT_HEADER, 0))
+    except (AttributeError, TypeError, ValueError):
+        return 0
+
+
+def build_call_metrics(
+    task: str,
+    message: Any,
+    started_at: float,
+    first_token_at: Optional[float] = None,
+    retries: int = 0
+) -> Dict[str, Any]:
+    """
+    1回のAPI呼び出しの計測値を組み立てる
+
+    Args:
+        task: 呼び出し種別（structure, titles など）
+        message: Claude APIのレスポンスメッセージ
+        started_at: 呼び出し開始時刻（time.monotonic）
+        first_token_at: 最初のテキスト受信時刻（ストリーミング時のみ）
+        retries: SDK内部のリトライ回数
+
+    Returns:
+        計測値の辞書（JSONシリアライズ可能な値のみ）
+    """
+    elapsed = time.monotonic() - started_at
+    usage = message.usage
+    output_tokens = usage.output_tokens
+
+    # 生成速度はTTFT以降の時間で算出（非ストリーミング時は総時間）
+    generation_seconds = elapsed - (first_token_at - started_at) if first_token_at else elapsed
+
+    return {
+        'task': task,
+        'model': getattr(message, 'model', ''),
+        'latencyMs': int(elapsed * 1000),
+        'timeToFirstTokenMs': int((first_token_at - started_at) * 1000) if first_token_at else None,
+        'outputTokensPerSecond': round(output_tokens / generation_seconds, 1) if generation_seconds > 0 else 0.0,
+        'retries': retries,
+        'stopReason': getattr(message, 'stop_reason', None),
+        'inputTokens': usage.input_tokens,
+        'outputTokens': output_tokens,
+        'cacheCreationInputTokens': getattr(usage, 'cache_creation_input_tokens', None) or 0,
+        'cacheReadInputTokens': getattr(usage, 'cache_read_input_tokens', None) or 0,
+    }
+
+
+def create_message(
+    task: str,
+    prompt_fragments: Optional[Dict[str, str]] = None,
+    **kwargs
+) -> Tuple[Any, Dict[str, Any]]:
+    """
+    messages.create を計測付きで実行
+
+    Args:
+        task: 呼び出し種別（ログ・メトリクス用）
+        prompt_fragments: プロンプトの断片（断片名 -> テキスト）。指定した場合はトークン内訳をログに出力
+        **kwargs: messages.create に渡す引数
+
+    Returns:
+        (レスポンスメッセージ, 計測値)
+    """
+    client = get_claude_client()
+    with _call_slots:
+        started_at = time.monotonic()
+        raw_response = client.messages.with_raw_response.create(**kwargs)
+        message = raw_response.parse()
+
+    metrics = build_call_metrics(
+        task, message, started_at,
+        retries=get_retry_count(raw_response.http_request)
+    )
+    log_info('Claude API call completed', **metrics)
+    if prompt_fragments is not None:
+        log_prompt_token_breakdown(task, kwargs, prompt_fragments, metrics)
+    return message, metrics
+
+
+def stream_message(
+    task: str,
+    on_text: Optional[Callable[[str], None]] = None,
+    prompt_fragments: Optional[Dict[str, str]] = None,
+    **kwargs
+) -> Tuple[Any, Dict[str, Any]]:
+    """
+    messages.stream を計測付きで実行
+
+    Args:
+        task: 呼び出し種別（ログ・メトリクス用）
+        on_text: テキスト断片（ツール使用時は入力JSONの断片）を受信するたびに呼ばれるコールバック
+        prompt_fragments: プロンプトの断片（断片名 -> テキスト）。指定した場合はトークン内訳をログに出力
+        **kwargs: messages.stream に渡す引数
+
+    Returns:
+        (最終メッセージ, 計測値)
+    """
+    client = get_claude_client()
+    first_token_at = None
+
+    with _call_slots:
+        started_at = time.monotonic()
+        with client.messages.stream(**kwargs) as stream:
+            for event in stream:
+                if event.type == 'text':
+                    chunk = event.text
+                elif event.type == 'input_json':
+                    chunk = event.partial_json
+                else:
+                    continue
+                if first_token_at is None:
+                    first_token_at = time.monotonic()
+                if on_text:
+                    on_text(chunk)
+            message = stream.get_final_message()
+            retries = get_retry_count(stream.response.request)
+
+    metrics = build_call_metrics(task, message, started_at, first_token_at, retries)
+    log_info('Claude API call completed', **metrics)
+    if prompt_fragments is not None:
+        log_prompt_token_breakdown(task, kwargs, prompt_fragments, metrics)
+    return message, metrics
+
+
+def summarize_call_metrics(calls: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    複数回のAPI呼び出しの計測値を記事メタデータ用に集計
+
+    DynamoDBに保存するため整数値のみで構成する。
+    """
+    summary = {
+        'inputTokens': 0,
+        'outputTokens': 0,
+        'cacheCreationInputTokens': 0,
+        'cacheReadInputTokens': 0,
+        'apiCalls': len(calls),
+        'apiRetries': 0,
+        'apiLatencyMs': 0,
+        'truncatedCalls': 0,
+        'models': {},
+    }
+    for call in calls:
+        for key in ('inputTokens', 'outputTokens', 'cacheCreationInputTokens', 'cacheReadInputTokens'):
+            summary[key] += call.get(key, 0)
+        summary['apiRetries'] += call.get('retries', 0)
+        summary['apiLatencyMs'] = max(summary['apiLatencyMs'], call.get('latencyMs', 0))
+        if call.get('stopReason') == 'max_tokens':
+            summary['truncatedCalls'] += 1
+        if call.get('task') and call.get('model'):
+            summary['models'][call['task']] = call['model']
+
+    first_token_times = [c['timeToFirstTokenMs'] for c in calls if c.get('timeToFirstTokenMs') is not None]
+    if first_token_times:
+        summary['timeToFirstTokenMs'] = min(first_token_times)
+
+    return summary
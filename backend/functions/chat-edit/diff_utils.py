@@ -7,6 +7,8 @@ import difflib
 import re
 from typing import Any, Dict, List, Optional, Tuple
 
+from markdown_stats import get_markdown_stats
+
 
 class DiffType:
     """差分タイプの定数"""
@@ -37,11 +39,12 @@ def split_markdown_sections(markdown: str) -> List[Dict[str, Any]]:
         'lines': []
     }
 
-    heading_pattern = re.compile(r'^(#{1,6})\s+(.+)$')
+    # 見出しの位置は統計の走査結果を使う（コードブロック内の # 行は見出しとして扱わない）
+    headings = {heading['line'] - 1: heading for heading in get_markdown_stats(markdown)['headings']}
 
     for i, line in enumerate(lines):
-        match = heading_pattern.match(line)
-        if match:
+        heading = headings.get(i)
+        if heading:
             # 前のセクションを保存
             if current_section['lines'] or current_section['heading']:
                 current_section['content'] = '\n'.join(current_section['lines'])
@@ -50,8 +53,8 @@ def split_markdown_sections(markdown: str) -> List[Dict[str, Any]]:
             # 新しいセクションを開始
             current_section = {
                 'heading': line,
-                'heading_text': match.group(2),
-                'level': len(match.group(1)),
+                'heading_text': heading['text'],
+                'level': heading['level'],
                 'content': '',
                 'start_line': i,
                 'lines': []
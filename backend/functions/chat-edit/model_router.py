@@ -0,0 +1,93 @@
+"""
+タスク別のモデルルーティング
+
+タスク（タイトル・メタ・アウトライン・本文・チャット編集）とプランごとに使用モデルを決める。
+レイテンシ重視の小さなタスクは高速・低コストなモデルへ、長文の執筆は大きなモデルへ振り分ける。
+
+generate-article/model_router.py と chat-edit/model_router.py は同一内容。
+Lambda関数ごとにデプロイされるため、同じファイルを配置する。
+"""
+
+import json
+import os
+from typing import Dict
+
+from plan_rules import PLAN_RULES
+from utils import log_warning
+
+
+# 環境変数
+LARGE_MODEL = os.environ.get('CLAUDE_MODEL', 'claude-sonnet-4-20250514')
+FAST_MODEL = os.environ.get('CLAUDE_FAST_MODEL', 'claude-3-5-haiku-20241022')
+# 例: {"pro": {"outline": "claude-sonnet-4-20250514"}}
+MODEL_ROUTING_OVERRIDES = os.environ.get('MODEL_ROUTING_OVERRIDES', '')
+
+# タスク名（claude_api の task と共通）
+TASK_TITLES = 'titles'
+TASK_META = 'meta'
+TASK_OUTLINE = 'outline'
+TASK_SECTION = 'section'
+TASK_STRUCTURE = 'structure'
+TASK_MARKDOWN = 'markdown'
+TASK_CHAT_EDIT = 'chat_edit'
+
+# 全プラン共通のルーティング
+DEFAULT_ROUTES = {
+    TASK_TITLES: FAST_MODEL,
+    TASK_META: FAST_MODEL,
+    TASK_OUTLINE: FAST_MODEL,
+    TASK_SECTION: LARGE_MODEL,
+    TASK_STRUCTURE: LARGE_MODEL,
+    TASK_MARKDOWN: LARGE_MODEL,
+    TASK_CHAT_EDIT: LARGE_MODEL,
+}
+
+# プランごとの差分（記事全体の構成を決めるアウトラインはproのみ大きなモデル）
+PLAN_ROUTE_OVERRIDES = {
+    'pro': {
+        TASK_OUTLINE: LARGE_MODEL,
+    },
+}
+
+
+def _load_overrides() -> Dict[str, Dict[str, str]]:
+    """環境変数からルーティングの上書き設定を読み込む"""
+    if not MODEL_ROUTING_OVERRIDES:
+        return {}
+    try:
+        overrides = json.loads(MODEL_ROUTING_OVERRIDES)
+    except json.JSONDecodeError as e:
+        log_warning('Invalid MODEL_ROUTING_OVERRIDES, ignored', error=str(e))
+        return {}
+    return overrides if isinstance(overrides, dict) else {}
+
+
+def build_routing_table() -> Dict[str, Dict[str, str]]:
+    """プラン×タスクのルーティング表を構築"""
+    env_overrides = _load_overrides()
+    table = {}
+    for plan in PLAN_RULES:
+        routes = dict(DEFAULT_ROUTES)
+        routes.update(PLAN_ROUTE_OVERRIDES.get(plan, {}))
+        routes.update(env_overrides.get('default', {}))
+        routes.update(env_overrides.get(plan, {}))
+        table[plan] = routes
+    return table
+
+
+MODEL_ROUTES = build_routing_table()
+
+
+def resolve_model(task: str, plan: str = 'starter') -> str:
+    """
+    タスクとプランから使用モデルを決定
+
+    Args:
+        task: タスク名（TASK_* のいずれか）
+        plan: 有効プラン（plan_rules.get_effective_plan の戻り値）
+
+    Returns:
+        モデルID（未定義のタスクは大きなモデル）
+    """
+    routes = MODEL_ROUTES.get(plan) or MODEL_ROUTES['canceled']
+    return routes.get(task, LARGE_MODEL)
@@ -100,6 +100,39 @@ def build_chat_edit_prompt(
     return '\n'.join(prompt_parts)
 
 
+def build_chat_edit_prompt_fragments(
+    instruction: str,
+    current_article: str,
+    conversation_history: Optional[List[Dict[str, str]]] = None,
+    edit_context: Optional[Dict[str, Any]] = None,
+    previous_changes: Optional[List[Dict[str, Any]]] = None
+) -> Dict[str, str]:
+    """
+    チャット修正のリクエストを断片ごとに分ける（トークン内訳の集計用）
+
+    Args:
+        instruction: ユーザーの編集指示
+        current_article: 現在の記事内容（Markdown）
+        conversation_history: messagesに含める会話履歴
+        edit_context: 編集コンテキスト（選択範囲など）
+        previous_changes: フォローアップ用の直近の変更履歴
+
+    Returns:
+        {断片名: テキスト}
+    """
+    history = [message.get('content', '') for message in conversation_history or []]
+    # build_follow_up_prompt と同じく最新3件の説明を含める
+    history.extend(change.get('explanation', '') for change in (previous_changes or [])[-3:])
+
+    return {
+        'instructions': build_chat_edit_system_prompt(),
+        'article': current_article,
+        'selection': (edit_context or {}).get('selected_text', ''),
+        'instruction': instruction,
+        'history': '\n'.join(history),
+    }
+
+
 def build_section_edit_prompt(
     instruction: str,
     section_heading: str,
@@ -3,28 +3,36 @@
 非同期SQSパターン対応版
 """
 
+import hashlib
 import json
+import math
 import os
+import re
+import time
 import uuid
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime, timedelta
 from decimal import Decimal
-from typing import Dict, Any, Optional
+from typing import Callable, Dict, Any, List, Optional, Tuple, Union
 
-import boto3
-import anthropic
-from boto3.dynamodb.conditions import Key
-
-from validators import validate_article_input, validate_settings, sanitize_body
+from validators import validate_article_input, validate_settings, sanitize_body, to_int
 from prompt_builder import (
     build_prompt,
     build_title_generation_prompt,
     build_meta_generation_prompt,
-    build_structure_prompt,
+    build_structure_prompt_parts,
     build_output_prompt,
-    build_markdown_prompt
+    build_markdown_prompt_parts,
+    build_outline_prompt_parts,
+    build_section_prompt_parts,
+    build_structure_tail_prompt_parts,
+    build_longform_outline_prompt_parts,
+    build_longform_chunk_prompt_parts,
+    STRUCTURE_TOOL,
+    STRUCTURE_TOOL_NAME,
+    join_prompt_parts
 )
 from utils import (
-    generate_article_id,
     get_current_timestamp,
     log_info,
     log_error,
@@ -32,40 +40,125 @@ from utils import (
     create_response,
     parse_event_body,
     get_user_id,
+    get_header,
+    get_query_parameter,
     count_characters,
     estimate_reading_time,
     validate_markdown_structure
 )
+from aws_clients import is_conditional_check_failed, lazy_client, lazy_table
+from job_events import (
+    JOB_EVENT_SECTION_READY,
+    STATUS_EVENTS,
+    add_subscriber,
+    build_job_event,
+    publish_job_event,
+    send_to_connection,
+)
+from structure_parser import SectionStreamParser, salvage_section, salvage_structure
+from decoration_registry import DecorationRegistry, get_decoration_registry
+from article_ast import parse_structure, parse_section
+from article_metrics import build_structure_validation
+from article_renderer import (
+    GutenbergRenderer,
+    PlainMarkdownRenderer,
+    render_article,
+    render_article_with_metrics,
+    structure_to_wordpress,
+    block_to_wordpress,
+    structure_to_markdown,
+    block_to_markdown_plain,
+)
+from claude_api import create_message, stream_message, summarize_call_metrics
+from result_cache import build_cache_key, get_cached_result, put_cached_result
+from token_budget import plan_output_tokens, get_calibrated_chars_per_token
+from retry_policy import (
+    MAX_CIRCUIT_DEFERRALS,
+    MAX_GENERATION_ATTEMPTS,
+    circuit_breaker,
+    compute_backoff,
+    get_retry_after,
+    is_overload_error,
+    is_retryable_api_error,
+)
+from plan_rules import get_plan_rules, get_effective_plan
+from longform import (
+    LONGFORM_CHUNK_CHARS,
+    LONGFORM_MAX_CHUNK_ATTEMPTS,
+    LONGFORM_MIN_CHUNK_SECONDS,
+    LONGFORM_SUMMARY_MAX_CHARS,
+    compact_call_metrics,
+    merge_chunk_sections,
+    plan_chunks,
+    plan_section_range,
+    restore_call_metrics,
+    LongformChunkError,
+    section_target_chars,
+    to_dynamodb_value,
+    trim_summary,
+)
+from model_router import (
+    resolve_model,
+    TASK_TITLES,
+    TASK_META,
+    TASK_OUTLINE,
+    TASK_SECTION,
+    TASK_STRUCTURE,
+    TASK_MARKDOWN,
+)
 
 # 環境変数
-CLAUDE_API_KEY = os.environ.get('CLAUDE_API_KEY', '')
 DYNAMODB_TABLE_ARTICLES = os.environ.get('DYNAMODB_TABLE_ARTICLES', 'blog-agent-articles')
 DYNAMODB_TABLE_SETTINGS = os.environ.get('DYNAMODB_TABLE_SETTINGS', 'blog-agent-settings')
 DYNAMODB_TABLE_JOBS = os.environ.get('DYNAMODB_TABLE_JOBS', 'blog-agent-jobs')
 SQS_QUEUE_URL = os.environ.get('SQS_QUEUE_URL', '')
 CLAUDE_MODEL = os.environ.get('CLAUDE_MODEL', 'claude-sonnet-4-20250514')
 LOCAL_DEV = os.environ.get('LOCAL_DEV', 'false').lower() == 'true'
-
-# クライアント初期化
+# 構造生成をストリーミングで受信し、完成したセクションから順にジョブへ反映する
+STREAM_STRUCTURE = os.environ.get('STREAM_STRUCTURE', 'true').lower() == 'true'
+# 構造の出力方式（tool: ツール入力として構造化出力 / text: JSONテキスト）
+STRUCTURE_OUTPUT_MODE = os.environ.get('STRUCTURE_OUTPUT_MODE', 'tool')
+# 生成モード（single: 一括構造生成 / parallel: アウトライン→セクション並列生成 / longform: 長文の分割生成）
+DEFAULT_GENERATION_MODE = os.environ.get('DEFAULT_GENERATION_MODE', 'single')
+# 並列生成でセクションを同時に生成する数と、1セクションあたりの生成の試行回数
+PARALLEL_SECTION_WORKERS = int(os.environ.get('PARALLEL_SECTION_WORKERS', '6'))
+PARALLEL_SECTION_MAX_ATTEMPTS = int(os.environ.get('PARALLEL_SECTION_MAX_ATTEMPTS', '2'))
+# 出力が max_tokens で途切れた場合に続きを生成する最大回数
+MAX_CONTINUATIONS = int(os.environ.get('MAX_CONTINUATIONS', '2'))
+# SQSバッチ内のレコードを同時に処理する数と、一時的エラー時の再配信上限
+# （再配信上限はキューのDLQの maxReceiveCount と同じ値を設定する）
+SQS_RECORD_WORKERS = int(os.environ.get('SQS_RECORD_WORKERS', '4'))
+SQS_MAX_RECEIVE_COUNT = int(os.environ.get('SQS_MAX_RECEIVE_COUNT', '5'))
+SQS_MAX_DELAY_SECONDS = 900
+# この秒数以下の待ちはその場で再試行し、超える場合は遅延付きでSQSに再投入する
+INLINE_RETRY_MAX_SECONDS = float(os.environ.get('INLINE_RETRY_MAX_SECONDS', '20'))
+# その場で再試行する場合に残しておく生成用の実行時間
+MIN_GENERATION_SECONDS = float(os.environ.get('MIN_GENERATION_SECONDS', '180'))
+# ジョブ状態のロングポーリング（wait）で待つ最大秒数（API Gatewayの統合タイムアウト30秒未満）
+JOB_STATUS_MAX_WAIT_SECONDS = float(os.environ.get('JOB_STATUS_MAX_WAIT_SECONDS', '20'))
+# ロングポーリング中にジョブを読み直す間隔（初回 → 倍々 → 上限）
+JOB_STATUS_POLL_INITIAL_SECONDS = float(os.environ.get('JOB_STATUS_POLL_INITIAL_SECONDS', '1'))
+JOB_STATUS_POLL_MAX_SECONDS = float(os.environ.get('JOB_STATUS_POLL_MAX_SECONDS', '4'))
+# 応答を返すために残しておくLambdaの実行時間
+JOB_STATUS_RESPONSE_MARGIN_SECONDS = 2
+
+# これ以上状態が変わらないジョブのステータス
+TERMINAL_JOB_STATUSES = ('completed', 'failed')
+
+# クライアント初期化（初回の利用時に生成し、ルートごとに使うものだけを初期化する）
+# anthropic もClaudeを呼ぶルートの関数内でimportする
 if not LOCAL_DEV:
-    dynamodb = boto3.resource('dynamodb')
-    sqs = boto3.client('sqs')
-    articles_table = dynamodb.Table(DYNAMODB_TABLE_ARTICLES)
-    settings_table = dynamodb.Table(DYNAMODB_TABLE_SETTINGS)
-    jobs_table = dynamodb.Table(DYNAMODB_TABLE_JOBS)
+    sqs = lazy_client('sqs')
+    articles_table = lazy_table(DYNAMODB_TABLE_ARTICLES)
+    settings_table = lazy_table(DYNAMODB_TABLE_SETTINGS)
+    jobs_table = lazy_table(DYNAMODB_TABLE_JOBS)
 else:
-    dynamodb = None
     sqs = None
     articles_table = None
     settings_table = None
     jobs_table = None
 
 
-def get_claude_client() -> anthropic.Anthropic:
-    """Claude APIクライアントを取得"""
-    return anthropic.Anthropic(api_key=CLAUDE_API_KEY)
-
-
 def get_default_settings() -> Dict[str, Any]:
     """ローカル開発時のデフォルト設定を取得（新スキーマ：roles対応）"""
     from sample_articles import get_default_sample_article
@@ -170,395 +263,787 @@ def get_default_settings() -> Dict[str, Any]:
     }
 
 
-def validate_and_filter_decorations(structure: Dict[str, Any], decorations: list) -> Dict[str, Any]:
+def validate_and_filter_decorations(
+    structure: Dict[str, Any],
+    decorations: Union[list, DecorationRegistry]
+) -> Dict[str, Any]:
     """
     Claudeが直接指定したdecorationIdを検証し、無効な装飾を除去する
 
     - 有効な装飾のみを通す（enabled=True）
     - 存在しないdecorationIdは除去
     """
-    # 有効な装飾IDのセットを作成
-    enabled_decoration_ids = {
-        dec['id'] for dec in decorations
-        if dec.get('enabled', True)
-    }
+    return parse_structure(structure, decorations).to_dict()
 
-    def process_block(block: Dict[str, Any]) -> Dict[str, Any]:
-        decoration_id = block.get('decorationId')
 
-        # decorationIdが無効な場合は除去
-        if decoration_id and decoration_id not in enabled_decoration_ids:
-            log_warning(f'Invalid or disabled decorationId: {decoration_id}')
-            new_block = {k: v for k, v in block.items() if k not in ('decorationId', 'title')}
-        else:
-            new_block = dict(block)
+def render_section_wordpress(section: Dict[str, Any], decorations: DecorationRegistry) -> str:
+    """完成した1セクションを装飾検証のうえWordPress形式に変換（途中結果の反映用）"""
+    section_node = parse_section(section, decorations)
+    return ''.join(GutenbergRenderer(decorations).iter_sections([section_node]))
 
-        # 入れ子のblocksを処理
-        if 'blocks' in new_block:
-            new_block['blocks'] = [process_block(b) for b in new_block['blocks']]
 
-        return new_block
+def get_user_settings(user_id: str) -> Optional[Dict[str, Any]]:
+    """ユーザー設定をDynamoDBから取得"""
+    if LOCAL_DEV:
+        return get_default_settings()
+    try:
+        response = settings_table.get_item(Key={'userId': user_id})
+        return response.get('Item')
+    except Exception as e:
+        log_warning('Failed to get user settings', user_id=user_id, error=str(e))
+        return None
 
-    # 構造全体を処理
-    validated_structure = {
-        'title': structure.get('title', ''),
-        'sections': []
-    }
 
-    for section in structure.get('sections', []):
-        new_section = {
-            'heading': section.get('heading', ''),
-            'blocks': [process_block(b) for b in section.get('blocks', [])]
-        }
-        validated_structure['sections'].append(new_section)
+def create_job(user_id: str, request_body: Dict[str, Any]) -> str:
+    """ジョブを作成してJobsテーブルに保存"""
+    job_id = f"job_{uuid.uuid4().hex[:16]}"
+    current_time = get_current_timestamp()
+    ttl = int((datetime.now() + timedelta(hours=24)).timestamp())
 
-    if 'meta' in structure:
-        validated_structure['meta'] = structure['meta']
+    job = {
+        'jobId': job_id,
+        'userId': user_id,
+        'status': 'pending',
+        'title': request_body.get('title', ''),
+        'createdAt': current_time,
+        'updatedAt': current_time,
+        'ttl': ttl,
+    }
 
-    return validated_structure
+    jobs_table.put_item(Item=job)
+    log_info('Job created', job_id=job_id, user_id=user_id)
+    return job_id
 
 
-def structure_to_markdown(validated_structure: Dict[str, Any], decorations: list) -> str:
+def get_job(job_id: str) -> Optional[Dict[str, Any]]:
     """
-    マッピング済み構造から純粋なMarkdownを生成
-    装飾は無視し、通常のMarkdown記法のみを使用
+    ジョブを取得
+
+    ジョブテーブルにはジョブと並べて結果・途中結果・チャンク・購読者の項目（{jobId}#...）も
+    保存しているため、それらのキーやステータスのない項目はジョブとして扱わない。
     """
-    lines = []
+    if '#' in job_id:
+        return None
+    job = jobs_table.get_item(Key={'jobId': job_id}).get('Item')
+    return job if job and 'status' in job else None
 
-    for section in validated_structure.get('sections', []):
-        # H2見出し
-        lines.append(f"## {section.get('heading', '')}")
-        lines.append('')
 
-        for block in section.get('blocks', []):
-            lines.extend(block_to_markdown_plain(block))
-            lines.append('')
+def job_payload_key(job_id: str, name: str) -> str:
+    """ジョブの結果・途中結果の保存先のキー（ジョブテーブルにジョブと並べて保存する）"""
+    return f'{job_id}#{name}'
 
-    return '\n'.join(lines)
 
+def put_job_payload(job_id: str, name: str, payload: Dict[str, Any]):
+    """
+    ジョブの結果・途中結果（記事本文を含む大きな値）をジョブとは別の項目に保存
 
-def block_to_markdown(block: Dict[str, Any], decorations: list, indent: int = 0) -> list:
-    """ブロックをMarkdown行に変換（WordPress用装飾タグ付き）"""
-    lines = []
-    block_type = block.get('type', 'paragraph')
-    content = block.get('content', '')
-    decoration_id = block.get('decorationId')
-    title = block.get('title', '')  # boxスキーマ用のタイトル
+    ステータスの取得はジョブの項目のみを読み、本文は状態が変わったときだけ読む。
+    DynamoDBの読み込み容量は項目全体のサイズで決まるため、ポーリングの読み込みを小さく保てる。
+    """
+    jobs_table.put_item(Item={
+        'jobId': job_payload_key(job_id, name),
+        'payload': payload,
+        'ttl': int((datetime.now() + timedelta(hours=24)).timestamp()),
+    })
+
+
+def get_job_payload(job_id: str, name: str) -> Optional[Dict[str, Any]]:
+    """ジョブの結果・途中結果を取得（ジョブの更新より先に書き込むため強い整合性で読む）"""
+    item = jobs_table.get_item(Key={'jobId': job_payload_key(job_id, name)}, ConsistentRead=True).get('Item')
+    return item.get('payload') if item else None
+
+
+def update_job_status(
+    job_id: str,
+    status: str,
+    result: Optional[Dict[str, Any]] = None,
+    error: Optional[str] = None,
+    unless_completed: bool = False
+) -> bool:
+    """
+    ジョブのステータスを更新（結果は別の項目に保存してからステータスを更新する）
 
-    if block_type == 'paragraph':
-        if decoration_id:
-            # タイトルがある場合はtitle属性も追加
-            title_attr = f' title="{title}"' if title else ''
-            lines.append(f':::box id="{decoration_id}"{title_attr}')
-            lines.append(content)
-            lines.append(':::')
-        else:
-            lines.append(content)
-
-    elif block_type == 'list':
-        list_type = block.get('listType', 'unordered')
-        items = block.get('items', [])
-
-        if decoration_id:
-            title_attr = f' title="{title}"' if title else ''
-            lines.append(f':::box id="{decoration_id}"{title_attr}')
-
-        for item in items:
-            prefix = '- ' if list_type == 'unordered' else '1. '
-            lines.append(f'{prefix}{item}')
-
-        if decoration_id:
-            lines.append(':::')
-
-    elif block_type == 'subsection':
-        # H3見出し
-        lines.append(f"### {block.get('heading', '')}")
-        lines.append('')
-        for sub_block in block.get('blocks', []):
-            lines.extend(block_to_markdown(sub_block, decorations))
-            lines.append('')
-
-    return lines
-
-
-def block_to_markdown_plain(block: Dict[str, Any]) -> list:
-    """ブロックを純粋なMarkdown行に変換（装飾は無視）"""
-    lines = []
-    block_type = block.get('type', 'paragraph')
-    content = block.get('content', '')
-    title = block.get('title', '')
-    decoration_id = block.get('decorationId')
-
-    if block_type == 'paragraph':
-        # boxスキーマの装飾がある場合は引用ブロックとして表現
-        if decoration_id and title:
-            lines.append(f'> **{title}**')
-            lines.append(f'> ')
-            lines.append(f'> {content}')
-        else:
-            # 通常の段落（ハイライトも含む）
-            lines.append(content)
+    Args:
+        unless_completed: 完了済みのジョブは更新しない（再配信されたメッセージで生成し直さないため）
 
-    elif block_type == 'list':
-        list_type = block.get('listType', 'unordered')
-        items = block.get('items', [])
+    Returns:
+        更新した場合はTrue、unless_completed で完了済みのため更新しなかった場合はFalse
+    """
+    current_time = get_current_timestamp()
+    update_expr = 'SET #status = :status, updatedAt = :updated'
+    expr_names = {'#status': 'status'}
+    expr_values = {':status': status, ':updated': current_time}
 
-        # タイトルがある場合は太字で表示
-        if title:
-            lines.append(f'**{title}**')
-            lines.append('')
+    if result:
+        put_job_payload(job_id, 'result', result)
+        update_expr += ', hasResult = :has_result'
+        expr_values[':has_result'] = True
 
-        for i, item in enumerate(items):
-            if list_type == 'unordered':
-                lines.append(f'- {item}')
-            else:
-                lines.append(f'{i + 1}. {item}')
+    if error:
+        update_expr += ', #error = :error'
+        expr_names['#error'] = 'error'
+        expr_values[':error'] = error
 
-    elif block_type == 'subsection':
-        # H3見出し
-        lines.append(f"### {block.get('heading', '')}")
-        lines.append('')
-        for sub_block in block.get('blocks', []):
-            lines.extend(block_to_markdown_plain(sub_block))
-            lines.append('')
+    if status in TERMINAL_JOB_STATUSES:
+        # 途中結果は最終結果で置き換わるため参照しない
+        update_expr += ' REMOVE hasPartialResult'
 
-    return lines
+    condition = {}
+    if unless_completed:
+        condition['ConditionExpression'] = '#status <> :completed'
+        expr_values[':completed'] = 'completed'
 
+    try:
+        jobs_table.update_item(
+            Key={'jobId': job_id},
+            UpdateExpression=update_expr,
+            ExpressionAttributeNames=expr_names,
+            ExpressionAttributeValues=expr_values,
+            **condition
+        )
+    except Exception as e:
+        if unless_completed and is_conditional_check_failed(e):
+            log_info('Job already completed, status not updated', job_id=job_id, status=status)
+            return False
+        raise
+    log_info('Job status updated', job_id=job_id, status=status)
 
-def structure_to_wordpress(validated_structure: Dict[str, Any], decorations: list) -> str:
-    """
-    マッピング済み構造からWordPress Gutenbergブロック形式を生成
-    decorationId → 装飾divタグ変換
-    """
-    blocks = []
+    if status in STATUS_EVENTS:
+        publish_job_event(
+            job_id, STATUS_EVENTS[status],
+            articleId=(result or {}).get('articleId'),
+            error=error,
+        )
+    return True
 
-    for section in validated_structure.get('sections', []):
-        # H2見出し
-        heading = section.get('heading', '')
-        blocks.append(f'<!-- wp:heading -->\n<h2 class="wp-block-heading">{html_escape(heading)}</h2>\n<!-- /wp:heading -->')
 
-        for block in section.get('blocks', []):
-            blocks.extend(block_to_wordpress(block, decorations))
+def record_job_retry(job_id: str, attempt: int, error: str, delay_seconds: float):
+    """再試行待ちの状態と試行回数をジョブに記録"""
+    next_retry_at = (datetime.now() + timedelta(seconds=delay_seconds)).isoformat()
+    try:
+        jobs_table.update_item(
+            Key={'jobId': job_id},
+            UpdateExpression='SET #status = :status, attempts = :attempts, lastError = :error, '
+                             'nextRetryAt = :next_retry_at, updatedAt = :updated REMOVE hasPartialResult',
+            ExpressionAttributeNames={'#status': 'status'},
+            ExpressionAttributeValues={
+                ':status': 'pending',
+                ':attempts': attempt,
+                ':error': error[:500],
+                ':next_retry_at': next_retry_at,
+                ':updated': get_current_timestamp(),
+            }
+        )
+    except Exception as e:
+        log_warning('Failed to record job retry', job_id=job_id, error=str(e))
 
-    return '\n\n'.join(blocks)
 
+def update_job_progress(job_id: str, partial_result: Dict[str, Any]):
+    """生成途中の結果（完成済みセクション）を保存し、ジョブの更新時刻を進める"""
+    put_job_payload(job_id, 'partial', partial_result)
+    jobs_table.update_item(
+        Key={'jobId': job_id},
+        UpdateExpression='SET hasPartialResult = :has_partial, updatedAt = :updated',
+        ExpressionAttributeValues={
+            ':has_partial': True,
+            ':updated': get_current_timestamp()
+        }
+    )
+    log_info('Job progress updated', job_id=job_id, sections_completed=partial_result.get('sectionsCompleted'))
+    publish_section_ready(job_id, partial_result)
 
-def html_escape(text: str) -> str:
-    """HTMLエスケープ"""
-    return text.replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;').replace('"', '&quot;')
 
+def publish_section_ready(job_id: str, partial_result: Dict[str, Any]):
+    """途中結果の更新を section_ready イベントとして配信（本文は含めない）"""
+    publish_job_event(
+        job_id, JOB_EVENT_SECTION_READY,
+        sectionsCompleted=partial_result.get('sectionsCompleted'),
+        sectionsTotal=partial_result.get('sectionsTotal'),
+    )
 
-def convert_inline_markdown(text: str) -> str:
-    """インラインMarkdown記法をHTMLに変換"""
-    import re
 
-    # リンク [text](url) → <a href="url">text</a>
-    def replace_link(match):
-        link_text = match.group(1)
-        url = match.group(2)
-        # セキュリティ: 許可されたURLスキームのみ
-        if not (url.startswith('http://') or url.startswith('https://') or url.startswith('/')):
-            return match.group(0)
-        return f'<a href="{url}">{link_text}</a>'
+def publish_section_progress(job_id: str, rendered_sections: List[str]):
+    """完成済みセクションのWordPress HTMLを途中結果としてジョブに反映"""
+    try:
+        update_job_progress(job_id, {
+            'sectionsCompleted': len(rendered_sections),
+            'markdown': '\n\n'.join(rendered_sections),
+            'outputFormat': 'wordpress'
+        })
+    except Exception as e:
+        # 途中経過の反映失敗は生成自体を止めない
+        log_warning('Failed to update job progress', job_id=job_id, error=str(e))
+
+
+def parse_json_response(response_text: str) -> Any:
+    """Claudeの応答からJSONを抽出してパース（```json ブロックを優先）"""
+    json_match = re.search(r'```json\s*(\{.*?\})\s*```', response_text, re.DOTALL)
+    if json_match:
+        return json.loads(json_match.group(1))
+    return json.loads(response_text)
+
+
+def resolve_generation_mode(body: Dict[str, Any], plan_rules: Dict[str, Any]) -> str:
+    """リクエストとプランから生成モードを決定"""
+    mode = body.get('generationMode') or DEFAULT_GENERATION_MODE
+    if mode == 'longform' and not LOCAL_DEV and not plan_rules['features'].get('longform_generation'):
+        log_info('Longform generation is not available for this plan, falling back to parallel')
+        mode = 'parallel'
+    if mode == 'parallel' and not LOCAL_DEV and not plan_rules['features'].get('parallel_generation'):
+        log_info('Parallel generation is not available for this plan, falling back to single')
+        return 'single'
+    return mode
+
+
+def generate_text_with_continuation(
+    task: str,
+    prompt_parts: Dict[str, Any],
+    max_tokens: int,
+    temperature: float = 0.7,
+    on_text: Optional[Callable[[str], None]] = None,
+    model: Optional[str] = None
+) -> Tuple[str, List[Dict[str, Any]]]:
+    """
+    テキストを生成し、max_tokens で途切れた場合は続きを生成して連結する
+    途中までの出力をassistantの先頭に置き（プレフィル）、その続きから書かせる
+
+    Args:
+        task: 呼び出し種別（ログ・メトリクス用）
+        prompt_parts: {'system': システムブロック, 'prompt': ユーザープロンプト}
+        max_tokens: 1回の呼び出しの出力トークン上限
+        temperature: 生成温度
+        on_text: 指定した場合はストリーミングで受信し、断片ごとに呼び出す
+        model: 使用モデル（未指定時はCLAUDE_MODEL）
+
+    Returns:
+        (連結した出力テキスト, 各API呼び出しの計測値リスト)
+    """
+    text = ''
+    calls = []
+
+    for attempt in range(MAX_CONTINUATIONS + 1):
+        messages = [{"role": "user", "content": prompt_parts['prompt']}]
+        if text:
+            # 末尾が空白のプレフィルはAPIが受け付けないため除去する
+            text = text.rstrip()
+            messages.append({"role": "assistant", "content": text})
+
+        params = {
+            'model': model or CLAUDE_MODEL,
+            'max_tokens': max_tokens,
+            'temperature': temperature,
+            'system': prompt_parts['system'],
+            'messages': messages,
+            'prompt_fragments': prompt_parts.get('fragments'),
+        }
+        if on_text:
+            response, metrics = stream_message(task, on_text=on_text, **params)
+        else:
+            response, metrics = create_message(task, **params)
 
-    text = re.sub(r'\[([^\]]+)\]\(([^)]+)\)', replace_link, text)
+        calls.append(metrics)
+        text += response.content[0].text if response.content else ''
 
-    # 太字 **text** → <strong>text</strong>
-    text = re.sub(r'\*\*([^*]+)\*\*', r'<strong>\1</strong>', text)
+        if response.stop_reason != 'max_tokens':
+            break
 
-    # イタリック *text* → <em>text</em>
-    text = re.sub(r'(?<!\*)\*([^*]+)\*(?!\*)', r'<em>\1</em>', text)
+        log_warning('Output reached max_tokens',
+                    task=task,
+                    attempt=attempt + 1,
+                    max_tokens=max_tokens,
+                    will_continue=attempt < MAX_CONTINUATIONS)
 
-    return text
+    return text, calls
 
 
-def block_to_wordpress(block: Dict[str, Any], decorations: list) -> list:
-    """ブロックをWordPress Gutenbergブロック形式に変換"""
-    blocks = []
-    block_type = block.get('type', 'paragraph')
-    content = block.get('content', '')
-    decoration_id = block.get('decorationId')
-    title = block.get('title', '')  # boxスキーマ用のタイトル
+def build_section_progress_callback(
+    job_id: str,
+    decorations: DecorationRegistry,
+    rendered_sections: List[str]
+) -> Callable[[str], None]:
+    """
+    受信テキストから完成したセクションを取り出すコールバックを作成
+    セクションが閉じるたびにWordPress形式へ変換し、途中結果をジョブに反映する
+    """
+    parser = SectionStreamParser()
 
-    # 装飾情報を取得
-    decoration = None
-    if decoration_id:
-        decoration = next((d for d in decorations if d.get('id') == decoration_id), None)
+    def on_text(text: str):
+        for section in parser.feed(text):
+            rendered_sections.append(render_section_wordpress(section, decorations))
+            publish_section_progress(job_id, rendered_sections)
 
-    if block_type == 'paragraph':
-        if decoration:
-            dec_class = decoration.get('class', decoration_id)
-            schema = decoration.get('schema', 'paragraph')
+    return on_text
 
-            if schema == 'paragraph':
-                # インライン装飾（paragraph schema）→ 段落内にspan
-                blocks.append(
-                    f'<!-- wp:paragraph -->\n'
-                    f'<p><span class="{dec_class}">{convert_inline_markdown(content)}</span></p>\n'
-                    f'<!-- /wp:paragraph -->'
-                )
-            else:
-                # ボックス装飾（box等のschema）→ divで囲む、タイトルがあれば追加
-                title_html = f'<p class="box-title">{html_escape(title)}</p>\n' if title else ''
-                blocks.append(
-                    f'<!-- wp:html -->\n'
-                    f'<div class="{dec_class}">\n'
-                    f'{title_html}'
-                    f'<p>{convert_inline_markdown(content)}</p>\n'
-                    f'</div>\n'
-                    f'<!-- /wp:html -->'
-                )
-        else:
-            # 通常の段落
-            blocks.append(f'<!-- wp:paragraph -->\n<p>{convert_inline_markdown(content)}</p>\n<!-- /wp:paragraph -->')
 
-    elif block_type == 'list':
-        list_type = block.get('listType', 'unordered')
-        items = block.get('items', [])
+def extract_tool_input(response: Any) -> Optional[Dict[str, Any]]:
+    """レスポンスから構造化出力ツールの入力を取り出す"""
+    for block in response.content:
+        if getattr(block, 'type', None) == 'tool_use' and block.name == STRUCTURE_TOOL_NAME:
+            return block.input
+    return None
 
-        if list_type == 'ordered':
-            tag = 'ol'
-            block_name = 'list'
-            attrs = ' {"ordered":true}'
-        else:
-            tag = 'ul'
-            block_name = 'list'
-            attrs = ''
-
-        items_html = '\n'.join(f'<li>{convert_inline_markdown(item)}</li>' for item in items)
-
-        if decoration:
-            # 装飾付きリスト → カスタムHTMLブロック、タイトルがあれば追加
-            dec_class = decoration.get('class', decoration_id)
-            title_html = f'<p class="box-title">{html_escape(title)}</p>\n' if title else ''
-            blocks.append(
-                f'<!-- wp:html -->\n'
-                f'<div class="{dec_class}">\n'
-                f'{title_html}'
-                f'<{tag}>\n{items_html}\n</{tag}>\n'
-                f'</div>\n'
-                f'<!-- /wp:html -->'
-            )
-        else:
-            # 通常のリスト
-            blocks.append(
-                f'<!-- wp:{block_name}{attrs} -->\n'
-                f'<{tag} class="wp-block-list">\n{items_html}\n</{tag}>\n'
-                f'<!-- /wp:{block_name} -->'
-            )
 
-    elif block_type == 'subsection':
-        # H3見出し
-        heading = block.get('heading', '')
-        blocks.append(
-            f'<!-- wp:heading {{"level":3}} -->\n'
-            f'<h3 class="wp-block-heading">{html_escape(heading)}</h3>\n'
-            f'<!-- /wp:heading -->'
-        )
-        for sub_block in block.get('blocks', []):
-            blocks.extend(block_to_wordpress(sub_block, decorations))
-
-    elif block_type == 'table':
-        # テーブルブロック
-        headers = block.get('headers', [])
-        rows = block.get('rows', [])
-        dec_class = decoration.get('class', decoration_id) if decoration else 'ba-table'
-
-        # ヘッダー行
-        header_cells = ''.join(f'<th>{html_escape(h)}</th>' for h in headers)
-        header_row = f'<tr>{header_cells}</tr>'
-
-        # データ行
-        data_rows = []
-        for row in rows:
-            cells = ''.join(f'<td>{convert_inline_markdown(cell)}</td>' for cell in row)
-            data_rows.append(f'<tr>{cells}</tr>')
-
-        blocks.append(
-            f'<!-- wp:html -->\n'
-            f'<div class="{dec_class}">\n'
-            f'<table>\n{header_row}\n' + '\n'.join(data_rows) + '\n</table>\n'
-            f'</div>\n'
-            f'<!-- /wp:html -->'
-        )
+def request_structure_json(
+    task: str,
+    prompt_parts: Dict[str, Any],
+    max_tokens: int,
+    on_text: Optional[Callable[[str], None]] = None,
+    model: Optional[str] = None
+) -> Tuple[str, bool, List[Dict[str, Any]]]:
+    """
+    構造JSONのテキストを生成
 
-    elif block_type == 'callout':
-        # コールアウトブロック（アクションボタン）
-        button_text = block.get('buttonText', 'クリック')
-        button_url = block.get('buttonUrl', '#')
-        dec_class = decoration.get('class', decoration_id) if decoration else 'ba-callout'
-        title_html = f'<p class="box-title">{html_escape(title)}</p>\n' if title else ''
-
-        blocks.append(
-            f'<!-- wp:html -->\n'
-            f'<div class="{dec_class}">\n'
-            f'{title_html}'
-            f'<p>{convert_inline_markdown(content)}</p>\n'
-            f'<a href="{button_url}" class="callout-button">{html_escape(button_text)}</a>\n'
-            f'</div>\n'
-            f'<!-- /wp:html -->'
-        )
+    tool モードでは構造化出力ツールを強制し、その入力JSONを受け取る。
+    途中で途切れた場合に回収できるよう、入力JSONは常にストリーミングで受信する。
+    text モードでは応答テキストをそのまま返す（max_tokens時は続きを生成）。
 
-    return blocks
+    Returns:
+        (JSONテキスト, 出力が途中で途切れたか, 各API呼び出しの計測値リスト)
+    """
+    if STRUCTURE_OUTPUT_MODE != 'tool':
+        text, calls = generate_text_with_continuation(task, prompt_parts, max_tokens, on_text=on_text, model=model)
+        return text, calls[-1].get('stopReason') == 'max_tokens', calls
+
+    chunks = []
+
+    def collect(chunk: str):
+        chunks.append(chunk)
+        if on_text:
+            on_text(chunk)
+
+    response, metrics = stream_message(
+        task,
+        on_text=collect,
+        model=model or CLAUDE_MODEL,
+        max_tokens=max_tokens,
+        temperature=0.7,
+        system=prompt_parts['system'],
+        messages=[{"role": "user", "content": prompt_parts['prompt']}],
+        prompt_fragments=prompt_parts.get('fragments'),
+        tools=[STRUCTURE_TOOL],
+        tool_choice={'type': 'tool', 'name': STRUCTURE_TOOL_NAME}
+    )
 
+    truncated = response.stop_reason == 'max_tokens'
+    text = ''.join(chunks)
+    tool_input = None if truncated else extract_tool_input(response)
+    if tool_input is not None:
+        text = json.dumps(tool_input, ensure_ascii=False)
+
+    return text, truncated, [metrics]
+
+
+def generate_structure(
+    body: Dict[str, Any],
+    user_settings: Dict[str, Any],
+    prompt_parts: Dict[str, Any],
+    job_id: str,
+    decorations: DecorationRegistry,
+    max_tokens: int,
+    stream_progress: bool = True,
+    plan: str = 'starter'
+) -> Tuple[Dict[str, Any], List[Dict[str, Any]]]:
+    """
+    記事構造を一括生成
 
-def get_user_settings(user_id: str) -> Optional[Dict[str, Any]]:
-    """ユーザー設定をDynamoDBから取得"""
-    if LOCAL_DEV:
-        return get_default_settings()
-    try:
-        response = settings_table.get_item(Key={'userId': user_id})
-        return response.get('Item')
-    except Exception as e:
-        log_warning('Failed to get user settings', user_id=user_id, error=str(e))
-        return None
+    出力が途切れた・壊れた場合は完成済みのセクションを回収し、
+    欠けている末尾のセクションのみを追加で生成する。
 
+    Returns:
+        (構造JSON, 各API呼び出しの計測値リスト)
+    """
+    rendered_sections: List[str] = []
+    on_text = build_section_progress_callback(job_id, decorations, rendered_sections) if stream_progress else None
 
-def create_job(user_id: str, request_body: Dict[str, Any]) -> str:
-    """ジョブを作成してJobsテーブルに保存"""
-    job_id = f"job_{uuid.uuid4().hex[:16]}"
-    current_time = get_current_timestamp()
-    ttl = int((datetime.now() + timedelta(hours=24)).timestamp())
+    model = resolve_model(TASK_STRUCTURE, plan)
+    text, truncated, calls = request_structure_json('structure', prompt_parts, max_tokens, on_text, model)
 
-    job = {
-        'jobId': job_id,
-        'userId': user_id,
-        'status': 'pending',
-        'title': request_body.get('title', ''),
-        'createdAt': current_time,
-        'updatedAt': current_time,
-        'ttl': ttl,
+    if not truncated:
+        try:
+            structure = parse_json_response(text)
+            if isinstance(structure, dict) and isinstance(structure.get('sections'), list):
+                return structure, calls
+        except json.JSONDecodeError:
+            pass
+
+    structure, complete = salvage_structure(text)
+    if not structure['sections']:
+        raise json.JSONDecodeError('No complete section could be recovered', text, 0)
+
+    log_warning('Structure output salvaged',
+                job_id=job_id,
+                recovered_sections=len(structure['sections']),
+                truncated=truncated,
+                sections_closed=complete)
+
+    if not complete:
+        # 欠けている末尾のセクションのみを生成して結合
+        tail_prompt = build_structure_tail_prompt_parts(body, user_settings, structure['sections'])
+        tail_on_text = build_section_progress_callback(job_id, decorations, rendered_sections) if stream_progress else None
+        tail_text, _, tail_calls = request_structure_json(
+            'structure_tail', tail_prompt, max_tokens, tail_on_text, model
+        )
+        calls.extend(tail_calls)
+
+        try:
+            tail = parse_json_response(tail_text)
+        except json.JSONDecodeError:
+            tail = None
+        if not isinstance(tail, dict) or not isinstance(tail.get('sections', []), list):
+            # オブジェクト以外（配列・文字列など）の応答も完成済みのセクションを回収する
+            tail, _ = salvage_structure(tail_text)
+
+        tail_sections = [section for section in tail.get('sections', []) if isinstance(section, dict)]
+        structure['sections'].extend(tail_sections)
+        if isinstance(tail.get('meta'), dict):
+            structure['meta'] = tail['meta']
+
+        log_info('Structure tail regenerated',
+                 job_id=job_id,
+                 added_sections=len(tail_sections))
+
+    structure.setdefault('title', body.get('title', ''))
+    return structure, calls
+
+
+def generate_structure_parallel(
+    body: Dict[str, Any],
+    user_settings: Dict[str, Any],
+    job_id: str,
+    decorations: DecorationRegistry,
+    chars_per_token: Optional[float] = None,
+    plan: str = 'starter'
+) -> Tuple[Dict[str, Any], List[Any]]:
+    """
+    アウトライン生成後、各セクション本文を並列に生成して構造JSONにマージ
+    所要時間は最も遅いセクションの生成時間で決まる
+
+    Returns:
+        (構造JSON, 各API呼び出しの計測値リスト)
+    """
+    # Step 1: アウトライン生成（見出しと概要のみ）
+    outline_prompt = build_outline_prompt_parts(body, user_settings)
+    outline_response, outline_metrics = create_message(
+        'outline',
+        model=resolve_model(TASK_OUTLINE, plan),
+        max_tokens=2000,
+        temperature=0.7,
+        system=outline_prompt['system'],
+        messages=[{"role": "user", "content": outline_prompt['prompt']}],
+        prompt_fragments=outline_prompt['fragments']
+    )
+    outline = parse_json_response(outline_response.content[0].text)
+    outline_sections = outline.get('sections', [])
+    if not outline_sections:
+        raise ValueError('アウトラインの生成に失敗しました')
+
+    log_info('Outline generated',
+             job_id=job_id,
+             sections_count=len(outline_sections))
+
+    word_count = to_int(body.get('wordCount', 1500))
+    article_type = body.get('articleType', 'info')
+
+    def generate_section(index: int) -> Tuple[Dict[str, Any], List[Dict[str, Any]]]:
+        section_prompt = build_section_prompt_parts(body, user_settings, outline, index)
+        target_chars = outline_sections[index].get('targetChars') or word_count // len(outline_sections)
+        max_tokens = plan_output_tokens(
+            to_int(target_chars), 'wordpress', article_type, chars_per_token, include_overhead=False
+        )
+        section_calls: List[Dict[str, Any]] = []
+        for attempt in range(1, PARALLEL_SECTION_MAX_ATTEMPTS + 1):
+            text, attempt_calls = generate_text_with_continuation(
+                'section', section_prompt, max_tokens, model=resolve_model(TASK_SECTION, plan)
+            )
+            section_calls.extend(attempt_calls)
+            section = parse_section_response(text)
+            if section['blocks']:
+                break
+            # 回収できるブロックがない場合はこのセクションのみ生成し直す
+            log_warning('Section output has no usable blocks',
+                        job_id=job_id,
+                        section=index + 1,
+                        attempt=attempt,
+                        will_retry=attempt < PARALLEL_SECTION_MAX_ATTEMPTS)
+        else:
+            raise ValueError(f'セクション{index + 1}の生成に失敗しました')
+
+        # 見出しはアウトラインのものを正とする
+        return {
+            'heading': outline_sections[index].get('heading') or section.get('heading', ''),
+            'blocks': section['blocks']
+        }, section_calls
+
+    # Step 2: セクション本文を並列生成
+    sections: List[Optional[Dict[str, Any]]] = [None] * len(outline_sections)
+    calls = [outline_metrics]
+    rendered_sections = []
+
+    with ThreadPoolExecutor(max_workers=min(PARALLEL_SECTION_WORKERS, len(outline_sections))) as executor:
+        futures = {executor.submit(generate_section, i): i for i in range(len(outline_sections))}
+        for future in as_completed(futures):
+            index = futures[future]
+            sections[index], section_calls = future.result()
+            calls.extend(section_calls)
+
+            # 先頭から連続して完成したセクションを途中結果として反映
+            published = len(rendered_sections)
+            while len(rendered_sections) < len(sections) and sections[len(rendered_sections)] is not None:
+                rendered_sections.append(render_section_wordpress(sections[len(rendered_sections)], decorations))
+            if len(rendered_sections) > published:
+                publish_section_progress(job_id, rendered_sections)
+
+    structure = {
+        'title': outline.get('title', body.get('title', '')),
+        'sections': sections
     }
+    if 'meta' in outline:
+        structure['meta'] = outline['meta']
 
-    jobs_table.put_item(Item=job)
-    log_info('Job created', job_id=job_id, user_id=user_id)
-    return job_id
+    return structure, calls
 
 
-def update_job_status(job_id: str, status: str, result: Optional[Dict[str, Any]] = None, error: Optional[str] = None):
-    """ジョブのステータスを更新"""
-    current_time = get_current_timestamp()
-    update_expr = 'SET #status = :status, updatedAt = :updated'
-    expr_names = {'#status': 'status'}
-    expr_values = {':status': status, ':updated': current_time}
+def load_longform_state(job_id: str) -> Optional[Dict[str, Any]]:
+    """ジョブに保存した長文モードの状態を取得（未開始ならNone）"""
+    response = jobs_table.get_item(Key={'jobId': job_id}, ConsistentRead=True)
+    return response.get('Item', {}).get('longform')
 
-    if result:
-        update_expr += ', #result = :result'
-        expr_names['#result'] = 'result'
-        expr_values[':result'] = result
 
-    if error:
-        update_expr += ', #error = :error'
-        expr_names['#error'] = 'error'
-        expr_values[':error'] = error
+def save_longform_progress(job_id: str, state: Dict[str, Any], partial_result: Optional[Dict[str, Any]] = None):
+    """長文モードの状態（と途中結果）をジョブに保存"""
+    update_expr = 'SET longform = :state, updatedAt = :updated'
+    expr_values = {':state': to_dynamodb_value(state), ':updated': get_current_timestamp()}
+    if partial_result:
+        put_job_payload(job_id, 'partial', partial_result)
+        update_expr += ', hasPartialResult = :has_partial'
+        expr_values[':has_partial'] = True
 
     jobs_table.update_item(
         Key={'jobId': job_id},
         UpdateExpression=update_expr,
-        ExpressionAttributeNames=expr_names,
         ExpressionAttributeValues=expr_values
     )
-    log_info('Job status updated', job_id=job_id, status=status)
+    if partial_result:
+        publish_section_ready(job_id, partial_result)
+
+
+def longform_chunk_key(job_id: str, chunk_index: int) -> str:
+    """チャンクの保存先のキー（ジョブテーブルにジョブと並べて保存する）"""
+    return f'{job_id}#chunk#{chunk_index:03d}'
+
+
+def save_longform_chunk(
+    job_id: str,
+    user_id: str,
+    chunk_index: int,
+    sections: List[Dict[str, Any]],
+    calls: List[Dict[str, Any]]
+):
+    """執筆済みチャンクのセクションと計測値を保存（1件のサイズはチャンクの大きさで頭打ち）"""
+    jobs_table.put_item(Item={
+        'jobId': longform_chunk_key(job_id, chunk_index),
+        'userId': user_id,
+        'sections': to_dynamodb_value(sections),
+        'calls': [compact_call_metrics(call) for call in calls],
+        'createdAt': get_current_timestamp(),
+        'ttl': int((datetime.now() + timedelta(hours=24)).timestamp()),
+    })
+
+
+def load_longform_chunks(job_id: str, chunk_count: int) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """保存済みチャンクを順に読み込み、セクションと計測値を結合"""
+    sections: List[Dict[str, Any]] = []
+    calls: List[Dict[str, Any]] = []
+    for chunk_index in range(chunk_count):
+        item = jobs_table.get_item(
+            Key={'jobId': longform_chunk_key(job_id, chunk_index)},
+            ConsistentRead=True
+        ).get('Item')
+        if not item:
+            raise ValueError(f'長文モードのチャンク{chunk_index + 1}が見つかりません')
+        sections.extend(item.get('sections', []))
+        calls.extend(restore_call_metrics(call) for call in item.get('calls', []))
+    return sections, calls
+
+
+def parse_section_response(text: str) -> Dict[str, Any]:
+    """並列生成のセクションの出力をパース（途切れた・壊れたJSONは完成済みのブロックを回収する）"""
+    try:
+        section = parse_json_response(text)
+        if isinstance(section, dict) and isinstance(section.get('blocks'), list):
+            return {**section, 'blocks': [block for block in section['blocks'] if isinstance(block, dict)]}
+    except json.JSONDecodeError:
+        pass
+    return salvage_section(text)
+
+
+def parse_longform_chunk(text: str) -> Dict[str, Any]:
+    """チャンクの出力をパース（途切れた・壊れたJSONは完成済みのセクションを回収する）"""
+    try:
+        chunk = parse_json_response(text)
+        if isinstance(chunk, dict):
+            return chunk
+    except json.JSONDecodeError:
+        pass
+    salvaged, _ = salvage_structure(text)
+    return {'sections': salvaged.get('sections', [])}
+
+
+def has_time_for_longform_chunk(context: Any) -> bool:
+    """次のチャンクを同じ実行内で書き終えられるだけの残り時間があるか"""
+    if context is None or not hasattr(context, 'get_remaining_time_in_millis'):
+        return True
+    return context.get_remaining_time_in_millis() / 1000 >= LONGFORM_MIN_CHUNK_SECONDS
+
+
+def chain_longform_step(job_id: str, user_id: str, body: Dict[str, Any], next_chunk: int):
+    """長文モードの続きをSQSの次のステップとして投入"""
+    sqs.send_message(
+        QueueUrl=SQS_QUEUE_URL,
+        MessageBody=json.dumps({
+            'jobId': job_id,
+            'userId': user_id,
+            'body': body,
+            'longformChunk': next_chunk,
+        }, ensure_ascii=False, default=str)
+    )
+    log_info('Longform generation continued in next step', job_id=job_id, next_chunk=next_chunk)
+
+
+def generate_structure_longform(
+    job_id: str,
+    user_id: str,
+    body: Dict[str, Any],
+    user_settings: Dict[str, Any],
+    decorations: DecorationRegistry,
+    chars_per_token: Optional[float] = None,
+    plan: str = 'starter',
+    context: Any = None
+) -> Optional[Tuple[Dict[str, Any], List[Any]]]:
+    """
+    長文モード: アウトライン生成後、連続するセクションのチャンクを前から順に執筆して結合
+
+    各チャンクには生成済みの本文の代わりに要約を渡し、執筆結果はチャンクごとにジョブテーブルへ保存する。
+    Lambdaの残り時間が足りなくなった場合は状態を保存してSQSの次のステップへ引き継ぐ。
+    API呼び出しが失敗した場合も、再試行時は保存済みの状態から再開する。
+
+    Returns:
+        (構造JSON, 各API呼び出しの計測値リスト)。次のステップへ引き継いだ場合はNone
+    """
+    word_count = to_int(body.get('wordCount', 1500))
+    article_type = body.get('articleType', 'info')
+    # この実行で1単位以上進めてから引き継ぐ（タイムアウトが短すぎても進捗が止まらないようにする）
+    progressed = False
+
+    state = load_longform_state(job_id)
+    if state is None:
+        # Step 1: アウトライン生成
+        min_sections, max_sections = plan_section_range(word_count)
+        outline_prompt = build_longform_outline_prompt_parts(body, user_settings, min_sections, max_sections)
+        outline_response, outline_metrics = create_message(
+            'outline',
+            model=resolve_model(TASK_OUTLINE, plan),
+            max_tokens=4000,
+            temperature=0.7,
+            system=outline_prompt['system'],
+            messages=[{"role": "user", "content": outline_prompt['prompt']}],
+            prompt_fragments=outline_prompt['fragments']
+        )
+        outline = parse_json_response(outline_response.content[0].text)
+        if not outline.get('sections'):
+            raise ValueError('アウトラインの生成に失敗しました')
+
+        state = {
+            'outline': outline,
+            'chunks': plan_chunks(outline['sections'], word_count),
+            'nextChunk': 0,
+            'summary': '',
+            'calls': [compact_call_metrics(outline_metrics)],
+        }
+        save_longform_progress(job_id, state)
+        progressed = True
+        log_info('Longform outline generated',
+                 job_id=job_id,
+                 sections_count=len(outline['sections']),
+                 chunks_count=len(state['chunks']))
+
+    outline = state['outline']
+    outline_sections = outline.get('sections', [])
+    chunks = [(int(start), int(end)) for start, end in state['chunks']]
+    default_chars = word_count // max(len(outline_sections), 1)
+
+    # Step 2: チャンクを順に執筆（要約を引き継ぐ）
+    while int(state['nextChunk']) < len(chunks):
+        chunk_index = int(state['nextChunk'])
+        if progressed and not has_time_for_longform_chunk(context):
+            chain_longform_step(job_id, user_id, body, chunk_index)
+            return None
+
+        start, end = chunks[chunk_index]
+        chunk_chars = sum(section_target_chars(outline_sections[i], default_chars) for i in range(start, end))
+        chunk_prompt = build_longform_chunk_prompt_parts(
+            body, user_settings, outline, start, end, state['summary'], LONGFORM_SUMMARY_MAX_CHARS
+        )
+        max_tokens = plan_output_tokens(
+            chunk_chars + LONGFORM_SUMMARY_MAX_CHARS, 'wordpress', article_type, chars_per_token,
+            include_overhead=False
+        )
+        text, chunk_calls = generate_text_with_continuation(
+            'section', chunk_prompt, max_tokens, model=resolve_model(TASK_SECTION, plan)
+        )
+        chunk = parse_longform_chunk(text)
+        try:
+            sections = merge_chunk_sections(outline_sections, start, end, chunk.get('sections'))
+        except LongformChunkError as e:
+            # 書き終えたチャンクは保存済みのため、このチャンクだけを書き直す（時間が足りなければ次のステップで）
+            attempts = int(state.get('chunkAttempts', 0)) + 1
+            if attempts < LONGFORM_MAX_CHUNK_ATTEMPTS:
+                state['chunkAttempts'] = attempts
+                state['calls'] = state.get('calls', []) + [compact_call_metrics(call) for call in chunk_calls]
+                save_longform_progress(job_id, state)
+                progressed = True
+                log_warning('Longform chunk output is incomplete, retrying',
+                            job_id=job_id, chunk=chunk_index + 1, attempt=attempts, error=str(e))
+                continue
+            if not e.sections:
+                raise
+            # 上限に達した場合は出力に含まれていたセクションのみで続ける
+            sections = e.sections
+            log_warning('Longform chunk output is incomplete, using salvaged sections',
+                        job_id=job_id, chunk=chunk_index + 1,
+                        sections_salvaged=len(sections), sections_expected=end - start)
+        save_longform_chunk(job_id, user_id, chunk_index, sections, chunk_calls)
+
+        # 途切れて要約がない場合は直前の要約を引き継ぐ
+        state['summary'] = trim_summary(chunk.get('summary')) or state['summary']
+        state['nextChunk'] = chunk_index + 1
+        state['chunkAttempts'] = 0
+        save_longform_progress(job_id, state, {
+            'sectionsCompleted': end,
+            'sectionsTotal': len(outline_sections),
+            # 記事全体ではなく直近のチャンクのみ（ジョブのサイズを一定に保つ）
+            'markdown': '\n\n'.join(render_section_wordpress(section, decorations) for section in sections),
+            'outputFormat': 'wordpress'
+        })
+        progressed = True
+        log_info('Longform chunk generated',
+                 job_id=job_id,
+                 chunk=chunk_index + 1,
+                 chunks_count=len(chunks),
+                 target_chars=chunk_chars,
+                 summary_chars=len(state['summary']))
+
+    # Step 3: 結合
+    sections, chunk_calls = load_longform_chunks(job_id, len(chunks))
+    structure = {
+        'title': outline.get('title', body.get('title', '')),
+        'sections': sections
+    }
+    if 'meta' in outline:
+        structure['meta'] = outline['meta']
+
+    calls = [restore_call_metrics(call) for call in state.get('calls', [])] + chunk_calls
+    return structure, calls
 
 
 def submit_article_job(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
@@ -577,6 +1062,12 @@ def submit_article_job(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
         if validation_error:
             return create_response(400, error_code='VALIDATION_002', error_message=validation_error)
 
+        # 長文モードは上限文字数が大きいため、投入時にプランを確認する
+        if body.get('generationMode') == 'longform' and not LOCAL_DEV:
+            plan_rules = get_plan_rules(get_user_settings(user_id) or {})
+            if not plan_rules['features'].get('longform_generation'):
+                return create_response(403, error_code='FORBIDDEN', error_message='長文モードはご利用のプランでは利用できません')
+
         # ジョブを作成
         job_id = create_job(user_id, body)
 
@@ -604,227 +1095,581 @@ def submit_article_job(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
         return create_response(500, error_code='SERVER_001', error_message='ジョブの投入に失敗しました')
 
 
-def process_sqs_message(event: Dict[str, Any], context: Any):
-    """SQSメッセージを処理して記事を生成"""
-    import re
+def process_sqs_message(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
+    """
+    SQSメッセージのバッチを並行処理して記事を生成
 
-    for record in event.get('Records', []):
-        try:
-            message = json.loads(record['body'])
-            job_id = message['jobId']
-            user_id = message['userId']
-            body = message['body']
+    各レコードはI/O待ちが中心のため、上限付きのスレッドプールで同時に処理する。
+    再試行すべきレコードのみを batchItemFailures として返し、SQSに再配信させる。
+    """
+    records = event.get('Records', [])
+    batch_item_failures = []
+    if not records:
+        return {'batchItemFailures': batch_item_failures}
+
+    with ThreadPoolExecutor(max_workers=min(SQS_RECORD_WORKERS, len(records))) as executor:
+        futures = {executor.submit(process_sqs_record, record, context): record for record in records}
+        for future in as_completed(futures):
+            record = futures[future]
+            try:
+                succeeded = future.result()
+            except Exception as e:
+                log_error('Unhandled error in SQS record worker', e, message_id=record.get('messageId'))
+                succeeded = False
+            if not succeeded:
+                batch_item_failures.append({'itemIdentifier': record['messageId']})
+
+    log_info('SQS batch processed',
+             records=len(records),
+             failures=len(batch_item_failures))
+    return {'batchItemFailures': batch_item_failures}
+
+
+def process_sqs_record(record: Dict[str, Any], context: Any = None) -> bool:
+    """
+    SQSレコード1件を処理して記事を生成
+
+    一時的なAPIエラーはバックオフして再試行する。待ち時間が短ければその場で待ち、
+    長ければ遅延付きでSQSに再投入する。サーキットが開いている間はClaudeを呼ばずに再投入する。
+    バッチ内の他のレコードの処理で実行時間が残り少ない場合は、生成を始めずにSQSへ戻す
+    （実行がタイムアウトすると、処理を終えたレコードを含むバッチ全体が再配信されるため）。
+
+    Returns:
+        処理を終えた場合はTrue（失敗をジョブに記録した場合・再投入した場合を含む）、
+        SQSに再配信させる場合はFalse
+    """
+    import anthropic
+
+    job_id = None
+    try:
+        message = json.loads(record['body'])
+        job_id = message['jobId']
+        user_id = message['userId']
+        body = message['body']
+        attempt = int(message.get('attempt', 0))
+
+        while True:
+            if not has_time_for_retry(context, 0):
+                remaining_seconds = round(context.get_remaining_time_in_millis() / 1000, 1)
+                if get_receive_count(record) >= SQS_MAX_RECEIVE_COUNT:
+                    # これ以上戻すとDLQに移り、ジョブが処理中のまま残るため失敗にする
+                    log_warning('Not enough time left on the last receive, failing job',
+                                job_id=job_id,
+                                remaining_seconds=remaining_seconds)
+                    update_job_status(job_id, 'failed', error='AI記事生成サービスでエラーが発生しました')
+                    return True
+                log_warning('Not enough time left in this invocation, returning record to queue',
+                            job_id=job_id,
+                            remaining_seconds=remaining_seconds)
+                release_record(record)
+                return False
+
+            open_seconds = circuit_breaker.remaining_open_seconds()
+            if open_seconds > 0:
+                deferrals = int(message.get('deferrals', 0)) + 1
+                if deferrals > MAX_CIRCUIT_DEFERRALS:
+                    log_warning('Circuit breaker stayed open, giving up job',
+                                job_id=job_id,
+                                deferrals=deferrals - 1)
+                    update_job_status(job_id, 'failed', error='AI記事生成サービスが混雑しています。時間をおいて再度お試しください')
+                    return True
+                log_warning('Circuit breaker is open, deferring job',
+                            job_id=job_id,
+                            deferrals=deferrals,
+                            open_seconds=round(open_seconds, 1))
+                return requeue_job(record, {**message, 'deferrals': deferrals}, attempt, open_seconds,
+                                   'APIの混雑により待機しています')
+
+            try:
+                run_article_generation(job_id, user_id, body, attempt, context)
+                circuit_breaker.record_success()
+                return True
+            except anthropic.APIError as e:
+                if not is_retryable_api_error(e):
+                    raise
+
+                retry_after = get_retry_after(e)
+                if is_overload_error(e):
+                    circuit_breaker.record_failure(retry_after)
+
+                attempt += 1
+                if attempt >= MAX_GENERATION_ATTEMPTS:
+                    raise
+
+                delay = compute_backoff(attempt, retry_after)
+                log_warning('Transient Claude API error, retrying',
+                            job_id=job_id,
+                            attempt=attempt,
+                            delay_seconds=round(delay, 1),
+                            retry_after=retry_after,
+                            error=str(e))
+
+                if delay <= INLINE_RETRY_MAX_SECONDS and has_time_for_retry(context, delay):
+                    record_job_retry(job_id, attempt, str(e), delay)
+                    time.sleep(delay)
+                    continue
+
+                return requeue_job(record, message, attempt, delay, str(e))
+
+    except json.JSONDecodeError as e:
+        log_error('Failed to parse structure JSON', e)
+        if job_id:
+            update_job_status(job_id, 'failed', error='記事構造のパースに失敗しました')
+
+    except anthropic.APIError as e:
+        log_error('Claude API Error', e)
+        if job_id:
+            update_job_status(job_id, 'failed', error='AI記事生成サービスでエラーが発生しました')
+
+    except Exception as e:
+        log_error('Failed to process SQS message', e)
+        if job_id:
+            update_job_status(job_id, 'failed', error=str(e))
+
+    return True
+
+
+def has_time_for_retry(context: Any, delay: float) -> bool:
+    """その場で待って再試行しても生成に十分な実行時間が残るか"""
+    if context is None or not hasattr(context, 'get_remaining_time_in_millis'):
+        return True
+    remaining_seconds = context.get_remaining_time_in_millis() / 1000
+    return remaining_seconds - delay >= MIN_GENERATION_SECONDS
+
+
+def get_receive_count(record: Dict[str, Any]) -> int:
+    """レコードの受信回数（DLQの maxReceiveCount と比較する値）"""
+    return int(record.get('attributes', {}).get('ApproximateReceiveCount', '1'))
+
+
+def release_record(record: Dict[str, Any]):
+    """レコードをすぐに再配信させる（可視性タイムアウトの経過を待たない）"""
+    try:
+        sqs.change_message_visibility(
+            QueueUrl=SQS_QUEUE_URL,
+            ReceiptHandle=record['receiptHandle'],
+            VisibilityTimeout=0
+        )
+    except Exception as e:
+        log_warning('Failed to release SQS record', message_id=record.get('messageId'), error=str(e))
+
+
+def requeue_job(
+    record: Dict[str, Any],
+    message: Dict[str, Any],
+    attempt: int,
+    delay: float,
+    reason: str
+) -> bool:
+    """
+    ジョブを遅延付きでSQSに再投入
+
+    Returns:
+        再投入できた場合はTrue。失敗した場合は受信回数の上限まで
+        SQSの再配信に任せる（False）か、ジョブを失敗にする（True）
+    """
+    delay_seconds = min(int(math.ceil(delay)), SQS_MAX_DELAY_SECONDS)
+    job_id = message['jobId']
+    try:
+        sqs.send_message(
+            QueueUrl=SQS_QUEUE_URL,
+            MessageBody=json.dumps({**message, 'attempt': attempt}, ensure_ascii=False),
+            DelaySeconds=delay_seconds
+        )
+    except Exception as e:
+        log_error('Failed to requeue job', e, job_id=job_id)
+        if get_receive_count(record) < SQS_MAX_RECEIVE_COUNT:
+            return False
+        update_job_status(job_id, 'failed', error='AI記事生成サービスでエラーが発生しました')
+        return True
+
+    record_job_retry(job_id, attempt, reason, delay_seconds)
+    log_info('Job requeued with delay',
+             job_id=job_id,
+             attempt=attempt,
+             delay_seconds=delay_seconds)
+    return True
+
+
+def article_id_for_job(job_id: str) -> str:
+    """ジョブから記事IDを決める（job_xxx → art_xxx）"""
+    return 'art_' + job_id.removeprefix('job_')
+
+
+def save_article_once(article: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    記事を保存（同じ記事IDが保存済みの場合は上書きしない）
+
+    Returns:
+        保存した記事。保存済みだった場合は保存済みの記事
+    """
+    try:
+        articles_table.put_item(Item=article, ConditionExpression='attribute_not_exists(articleId)')
+        return article
+    except Exception as e:
+        if not is_conditional_check_failed(e):
+            raise
+    log_info('Article already saved for job', article_id=article['articleId'])
+    existing = articles_table.get_item(
+        Key={'userId': article['userId'], 'articleId': article['articleId']}
+    ).get('Item')
+    return existing or article
+
+
+def run_article_generation(
+    job_id: str,
+    user_id: str,
+    body: Dict[str, Any],
+    attempt: int = 0,
+    context: Any = None
+):
+    """
+    ジョブ1件分の記事を生成して保存し、ジョブを完了にする
+
+    長文モードで次のステップへ引き継いだ場合は、ジョブを完了にせずに戻る。
+    """
+    # 出力形式を最初に取得
+    output_format = body.get('outputFormat', 'wordpress')
+    # 両形式が必要な場合は構造を1回だけ生成し、WordPressとMarkdownをローカルで描画する
+    dual_format = bool(body.get('dualFormat'))
+    # 長文モードはチャンクごとに構造を生成して結合するため、出力形式によらず構造から描画する
+    longform_requested = body.get('generationMode') == 'longform'
+    generation_format = 'wordpress' if dual_format or longform_requested else output_format
+
+    log_info('Processing SQS message',
+             job_id=job_id,
+             user_id=user_id,
+             output_format=output_format,
+             dual_format=dual_format,
+             attempt=attempt)
+
+    # ステータスを処理中に更新（タイムアウト後に再配信されたメッセージで、完了済みのジョブは生成し直さない）
+    if not update_job_status(job_id, 'processing', unless_completed=True):
+        log_info('Skipping redelivered message for completed job', job_id=job_id)
+        return
+
+    # ユーザー設定を取得
+    user_settings = get_user_settings(user_id)
+    plan_rules = get_plan_rules(user_settings or {})
+    plan = get_effective_plan(user_settings or {})
+    if user_settings:
+        settings_error = validate_settings(user_settings)
+        if settings_error:
+            log_warning('Invalid user settings', user_id=user_id, error=settings_error)
+            user_settings = get_default_settings()
+    else:
+        user_settings = get_default_settings()
+
+    # サンプル記事がない場合はデフォルトを使用
+    if not user_settings.get('sampleArticles'):
+        from sample_articles import get_default_sample_article
+        sample_wp = get_default_sample_article('wordpress')
+        sample_md = get_default_sample_article('markdown')
+        user_settings['sampleArticles'] = [sample_wp, sample_md]
+        # 保存済みのダイジェストはサンプル記事がない状態のものなので使わない
+        user_settings.pop('sampleDigest', None)
+        log_info('Using default sample articles', job_id=job_id)
+
+    start_time = datetime.now()
+
+    # 依頼文字数と記事タイプから出力トークン予算を決定（ユーザーの実績で補正）
+    target_chars = to_int(body.get('wordCount', 1500))
+    chars_per_token = get_calibrated_chars_per_token(articles_table, user_id, generation_format)
+    max_tokens = plan_output_tokens(
+        target_chars, generation_format, body.get('articleType', 'info'), chars_per_token
+    )
+    log_info('Output token budget planned',
+             job_id=job_id,
+             target_chars=target_chars,
+             max_tokens=max_tokens,
+             calibrated=chars_per_token is not None)
+
+    # ==========================================
+    # 出力形式によってフローを完全に分岐
+    # ==========================================
+    alternate_contents = {}
+    article_metrics = None
+    if generation_format == 'markdown':
+        # ==========================================
+        # Markdown: Claudeが直接Markdownを生成
+        # ==========================================
+        markdown_prompt = build_markdown_prompt_parts(body, user_settings)
+
+        log_info('Markdown direct generation',
+                 job_id=job_id,
+                 prompt_length=len(join_prompt_parts(markdown_prompt)))
+
+        content, calls = generate_text_with_continuation(
+            'markdown', markdown_prompt, max_tokens, model=resolve_model(TASK_MARKDOWN, plan)
+        )
+
+        # コードブロックで囲まれている場合は除去
+        if content.startswith('```markdown'):
+            content = re.sub(r'^```markdown\s*', '', content)
+            content = re.sub(r'\s*```$', '', content)
+        elif content.startswith('```'):
+            content = re.sub(r'^```\s*', '', content)
+            content = re.sub(r'\s*```$', '', content)
+
+        usage_metadata = summarize_call_metrics(calls)
+
+        log_info('Markdown generated directly',
+                 job_id=job_id,
+                 **usage_metadata)
+
+        generation_time = (datetime.now() - start_time).total_seconds()
+
+        # 生成結果の検証
+        structure_validation = validate_markdown_structure(content)
+        if not structure_validation['valid']:
+            log_warning('Generated article has structure issues', issues=structure_validation['issues'])
+
+        # メタデータ（Markdown用）
+        prompt_metadata = {
+            'model': resolve_model(TASK_MARKDOWN, plan),
+            'plan': plan,
+            'temperature': Decimal('0.7'),
+            **usage_metadata
+        }
 
-            # 出力形式を最初に取得
-            output_format = body.get('outputFormat', 'wordpress')
+    else:
+        # ==========================================
+        # WordPress: 2段階生成（JSON構造 → HTML変換）
+        # ==========================================
+        # 装飾設定を取得（新スキーマ：list形式）
+        decoration_list = user_settings.get('decorations', [])
+        if not isinstance(decoration_list, list):
+            decoration_list = get_default_settings()['decorations']
+        # 設定のバージョンごとにコンパイル済みのものを再利用する
+        decorations = get_decoration_registry(decoration_list)
+
+        generation_mode = resolve_generation_mode(body, plan_rules)
+
+        # Step 1: 構造生成
+        if generation_mode == 'longform':
+            log_info('WordPress Step 1: Longform chunked generation', job_id=job_id)
+            longform_result = generate_structure_longform(
+                job_id, user_id, body, user_settings, decorations, chars_per_token, plan, context
+            )
+            if longform_result is None:
+                # 続きはSQSの次のステップで生成する
+                return
+            structure, calls = longform_result
+        elif generation_mode == 'parallel':
+            log_info('WordPress Step 1: Outline and parallel section generation', job_id=job_id)
+            structure, calls = generate_structure_parallel(
+                body, user_settings, job_id, decorations, chars_per_token, plan
+            )
+        else:
+            structure_prompt = build_structure_prompt_parts(body, user_settings)
 
-            log_info('Processing SQS message',
+            log_info('WordPress Step 1: Structure generation',
                      job_id=job_id,
-                     user_id=user_id,
-                     output_format=output_format)
-
-            # ステータスを処理中に更新
-            update_job_status(job_id, 'processing')
-
-            # ユーザー設定を取得
-            user_settings = get_user_settings(user_id)
-            if user_settings:
-                settings_error = validate_settings(user_settings)
-                if settings_error:
-                    log_warning('Invalid user settings', user_id=user_id, error=settings_error)
-                    user_settings = get_default_settings()
-            else:
-                user_settings = get_default_settings()
-
-            # サンプル記事がない場合はデフォルトを使用
-            if not user_settings.get('sampleArticles'):
-                from sample_articles import get_default_sample_article
-                sample_wp = get_default_sample_article('wordpress')
-                sample_md = get_default_sample_article('markdown')
-                user_settings['sampleArticles'] = [sample_wp, sample_md]
-                log_info('Using default sample articles', job_id=job_id)
-
-            start_time = datetime.now()
-            claude_client = get_claude_client()
-
-            # ==========================================
-            # 出力形式によってフローを完全に分岐
-            # ==========================================
-            if output_format == 'markdown':
-                # ==========================================
-                # Markdown: Claudeが直接Markdownを生成
-                # ==========================================
-                markdown_prompt = build_markdown_prompt(body, user_settings)
-
-                log_info('Markdown direct generation',
-                         job_id=job_id,
-                         prompt_length=len(markdown_prompt))
-
-                markdown_response = claude_client.messages.create(
-                    model=CLAUDE_MODEL,
-                    max_tokens=20000,
-                    temperature=0.7,
-                    messages=[{"role": "user", "content": markdown_prompt}]
-                )
-
-                content = markdown_response.content[0].text
-
-                # コードブロックで囲まれている場合は除去
-                if content.startswith('```markdown'):
-                    content = re.sub(r'^```markdown\s*', '', content)
-                    content = re.sub(r'\s*```$', '', content)
-                elif content.startswith('```'):
-                    content = re.sub(r'^```\s*', '', content)
-                    content = re.sub(r'\s*```$', '', content)
-
-                log_info('Markdown generated directly',
-                         job_id=job_id,
-                         input_tokens=markdown_response.usage.input_tokens,
-                         output_tokens=markdown_response.usage.output_tokens)
-
-                generation_time = (datetime.now() - start_time).total_seconds()
-
-                # 生成結果の検証
-                structure_validation = validate_markdown_structure(content)
-                if not structure_validation['valid']:
-                    log_warning('Generated article has structure issues', issues=structure_validation['issues'])
-
-                # メタデータ（Markdown用）
-                prompt_metadata = {
-                    'model': CLAUDE_MODEL,
-                    'temperature': Decimal('0.7'),
-                    'inputTokens': markdown_response.usage.input_tokens,
-                    'outputTokens': markdown_response.usage.output_tokens
-                }
+                     prompt_length=len(join_prompt_parts(structure_prompt)))
 
+            structure, calls = generate_structure(
+                body, user_settings, structure_prompt, job_id, decorations,
+                max_tokens, stream_progress=STREAM_STRUCTURE, plan=plan
+            )
+
+        usage_metadata = summarize_call_metrics(calls)
+
+        log_info('WordPress Step 1 completed: Structure parsed',
+                 job_id=job_id,
+                 generation_mode=generation_mode,
+                 sections_count=len(structure.get('sections', [])),
+                 **usage_metadata)
+
+        # ASTへの変換（DecorationIdの検証とフィルタリングを含む）
+        article_tree = parse_structure(structure, decorations)
+        log_info('Decoration validation completed', job_id=job_id)
+
+        # Step 2: WordPress HTML生成（文字数・見出し数などは同じ走査でASTから集計）
+        content, article_metrics = render_article_with_metrics(article_tree, GutenbergRenderer(decorations))
+        log_info('WordPress HTML generated', job_id=job_id, **article_metrics)
+
+        # 構造の検証はASTの集計値で行う（出力形式によらないため、dualFormat・Markdown出力でも
+        # 描画後の本文を検証し直さない）
+        # 長文モードはアウトラインのセクション数（12〜20程度）が通常の推奨数を超える
+        structure_validation = build_structure_validation(
+            article_metrics,
+            expected_sections=len(structure.get('sections', [])) if generation_mode == 'longform' else None
+        )
+        if not structure_validation['valid']:
+            log_warning('Generated article has structure issues', issues=structure_validation['issues'])
+
+        if dual_format or output_format == 'markdown':
+            # 同じASTからMarkdownも描画し、指定された出力形式を本文にする
+            markdown_content = render_article(article_tree, PlainMarkdownRenderer())
+            if output_format == 'markdown':
+                if dual_format:
+                    alternate_contents['wordpress'] = content
+                content = markdown_content
             else:
-                # ==========================================
-                # WordPress: 2段階生成（JSON構造 → HTML変換）
-                # ==========================================
-                # 装飾設定を取得（新スキーマ：list形式）
-                decorations = user_settings.get('decorations', [])
-                if not isinstance(decorations, list):
-                    decorations = get_default_settings()['decorations']
-
-                # Step 1: 構造生成
-                structure_prompt = build_structure_prompt(body, user_settings)
-
-                log_info('WordPress Step 1: Structure generation',
-                         job_id=job_id,
-                         prompt_length=len(structure_prompt))
-
-                structure_response = claude_client.messages.create(
-                    model=CLAUDE_MODEL,
-                    max_tokens=20000,
-                    temperature=0.7,
-                    messages=[{"role": "user", "content": structure_prompt}]
-                )
-
-                structure_text = structure_response.content[0].text
-
-                # JSONをパース
-                json_match = re.search(r'```json\s*(\{.*?\})\s*```', structure_text, re.DOTALL)
-                if json_match:
-                    structure = json.loads(json_match.group(1))
-                else:
-                    structure = json.loads(structure_text)
-
-                log_info('WordPress Step 1 completed: Structure parsed',
-                         job_id=job_id,
-                         sections_count=len(structure.get('sections', [])))
-
-                # DecorationIdの検証とフィルタリング
-                validated_structure = validate_and_filter_decorations(structure, decorations)
-                log_info('Decoration validation completed', job_id=job_id)
-
-                # Step 2: WordPress HTML生成
-                content = structure_to_wordpress(validated_structure, decorations)
-                log_info('WordPress HTML generated', job_id=job_id)
-
-                generation_time = (datetime.now() - start_time).total_seconds()
-                structure_validation = {'valid': True, 'issues': [], 'headingCount': 0, 'h2Count': 0}
-
-                # メタデータ（WordPress用）
-                prompt_metadata = {
-                    'model': CLAUDE_MODEL,
-                    'temperature': Decimal('0.7'),
-                    'inputTokens': structure_response.usage.input_tokens,
-                    'outputTokens': structure_response.usage.output_tokens
-                }
-
-            # 記事ID生成
-            article_id = generate_article_id()
-            current_time = get_current_timestamp()
-            word_count = count_characters(content)
-            reading_time = estimate_reading_time(content)
-
-            # DynamoDBに記事を保存
-            generation_method = 'direct' if output_format == 'markdown' else 'two-step'
-            article = {
-                'userId': user_id,
-                'articleId': article_id,
-                'title': body['title'],
-                'markdown': content,  # WordPress HTMLまたはMarkdown
-                'outputFormat': output_format,
-                'status': 'draft',
-                'createdAt': current_time,
-                'updatedAt': current_time,
-                'metadata': {
-                    'wordCount': word_count,
-                    'readingTime': reading_time,
-                    'targetAudience': body.get('targetAudience', ''),
-                    'purpose': body.get('purpose', ''),
-                    'keywords': body.get('keywords', []),
-                    'articleType': body.get('articleType', 'info'),
-                    'outputFormat': output_format,
-                    'generationTime': Decimal(str(round(generation_time, 2))),
-                    'structureValidation': structure_validation,
-                    'generationMethod': generation_method,
-                    'prompt': prompt_metadata
-                }
-            }
-            articles_table.put_item(Item=article)
-
-            # ジョブを完了に更新
-            result = {
-                'articleId': article_id,
-                'title': body['title'],
-                'markdown': content,  # WordPress HTMLまたはMarkdown
-                'outputFormat': output_format,
-                'metadata': {
-                    'wordCount': word_count,
-                    'readingTime': reading_time,
-                    'generationTime': Decimal(str(round(generation_time, 2))),
-                    'structureValidation': structure_validation
-                }
+                alternate_contents['markdown'] = markdown_content
+            log_info('Markdown rendered from structure', job_id=job_id)
+
+        generation_time = (datetime.now() - start_time).total_seconds()
+
+        # メタデータ（WordPress用）
+        body_task = TASK_SECTION if generation_mode in ('parallel', 'longform') else TASK_STRUCTURE
+        prompt_metadata = {
+            'model': resolve_model(body_task, plan),
+            'plan': plan,
+            'temperature': Decimal('0.7'),
+            'generationMode': generation_mode,
+            **usage_metadata
+        }
+
+    # 記事ID（ジョブごとに1つに決め、再配信で同じジョブを処理しても記事を重複させない）
+    article_id = article_id_for_job(job_id)
+    current_time = get_current_timestamp()
+    if article_metrics is not None:
+        word_count = article_metrics['bodyChars']
+        reading_time = article_metrics['readingTime']
+    else:
+        word_count = count_characters(content)
+        reading_time = estimate_reading_time(content)
+
+    # DynamoDBに記事を保存
+    if generation_format == 'markdown':
+        generation_method = 'direct'
+    elif prompt_metadata.get('generationMode') == 'parallel':
+        generation_method = 'outline-parallel'
+    elif prompt_metadata.get('generationMode') == 'longform':
+        generation_method = 'longform-chunked'
+    else:
+        generation_method = 'two-step'
+    article = {
+        'userId': user_id,
+        'articleId': article_id,
+        'title': body['title'],
+        'markdown': content,  # WordPress HTMLまたはMarkdown
+        'outputFormat': output_format,
+        'status': 'draft',
+        'createdAt': current_time,
+        'updatedAt': current_time,
+        'metadata': {
+            'wordCount': word_count,
+            'readingTime': reading_time,
+            'targetAudience': body.get('targetAudience', ''),
+            'purpose': body.get('purpose', ''),
+            'keywords': body.get('keywords', []),
+            'articleType': body.get('articleType', 'info'),
+            'outputFormat': output_format,
+            'generationTime': Decimal(str(round(generation_time, 2))),
+            'structureValidation': structure_validation,
+            'generationMethod': generation_method,
+            'prompt': prompt_metadata,
+            # 次回以降の出力トークン予算の補正に使う実績
+            'tokenBudget': {
+                'generationFormat': generation_format,
+                'articleType': body.get('articleType', 'info'),
+                'targetChars': target_chars,
+                'plannedTokens': max_tokens,
+                'outputTokens': prompt_metadata['outputTokens'],
+                'truncatedCalls': prompt_metadata['truncatedCalls'],
             }
-            update_job_status(job_id, 'completed', result=result)
+        }
+    }
+    if article_metrics is not None:
+        # 構造から集計した見出し・リンク・装飾の使用数
+        article['metadata']['articleMetrics'] = {
+            'headingCount': article_metrics['headingCount'],
+            'h2Count': article_metrics['h2Count'],
+            'h3Count': article_metrics['h3Count'],
+            'linkCount': article_metrics['linkCount'],
+            'decorationUsage': article_metrics['decorationUsage'],
+        }
+    if alternate_contents:
+        # 本文と別形式の描画結果（dualFormat指定時）
+        article['alternateContents'] = alternate_contents
+    saved = save_article_once(article)
+    if saved is not article:
+        # 先に処理した配信で保存済みの場合は、保存済みの記事をジョブの結果にする
+        content = saved.get('markdown', content)
+        alternate_contents = saved.get('alternateContents') or {}
+
+    # ジョブを完了に更新
+    result = {
+        'articleId': article_id,
+        'title': body['title'],
+        'markdown': content,  # WordPress HTMLまたはMarkdown
+        'outputFormat': output_format,
+        'metadata': {
+            'wordCount': word_count,
+            'readingTime': reading_time,
+            'generationTime': Decimal(str(round(generation_time, 2))),
+            'structureValidation': structure_validation
+        }
+    }
+    if alternate_contents:
+        result['alternateContents'] = alternate_contents
+    update_job_status(job_id, 'completed', result=result)
 
-            log_info('Article generated successfully',
-                     job_id=job_id,
-                     article_id=article_id,
-                     output_format=output_format,
-                     generation_method=generation_method,
-                     word_count=word_count)
+    log_info('Article generated successfully',
+             job_id=job_id,
+             article_id=article_id,
+             output_format=output_format,
+             generation_method=generation_method,
+             word_count=word_count)
+
+
+def build_job_etag(job: Dict[str, Any]) -> str:
+    """ジョブの状態からETagを作成（ステータス・更新時刻・試行回数のいずれかが変わると変わる）"""
+    key = '|'.join(str(job.get(name, '')) for name in ('jobId', 'status', 'updatedAt', 'attempts'))
+    return '"' + hashlib.sha256(key.encode('utf-8')).hexdigest()[:32] + '"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """If-None-Match ヘッダーのいずれかのETagが一致するか（弱いETagの W/ は無視する）"""
+    if not if_none_match:
+        return False
+    candidates = [value.strip() for value in if_none_match.split(',')]
+    return any(value.removeprefix('W/') == etag for value in candidates)
 
-        except json.JSONDecodeError as e:
-            log_error('Failed to parse structure JSON', e)
-            if 'job_id' in locals():
-                update_job_status(job_id, 'failed', error='記事構造のパースに失敗しました')
 
-        except anthropic.APIError as e:
-            log_error('Claude API Error', e)
-            if 'job_id' in locals():
-                update_job_status(job_id, 'failed', error='AI記事生成サービスでエラーが発生しました')
+def get_wait_seconds(event: Dict[str, Any], context: Any) -> float:
+    """wait パラメータから待ち時間を決める（上限とLambdaの残り時間で切り詰める）"""
+    try:
+        wait = float(get_query_parameter(event, 'wait') or 0)
+    except ValueError:
+        return 0.0
+    wait = min(max(wait, 0.0), JOB_STATUS_MAX_WAIT_SECONDS)
+    if context is not None and hasattr(context, 'get_remaining_time_in_millis'):
+        wait = min(wait, context.get_remaining_time_in_millis() / 1000 - JOB_STATUS_RESPONSE_MARGIN_SECONDS)
+    return max(wait, 0.0)
+
+
+def wait_for_job_change(job_id: str, etag: str, wait_seconds: float) -> Optional[Dict[str, Any]]:
+    """
+    ジョブの状態が変わるまで待つ（ロングポーリング）
+
+    ETagが変わる・終了状態になる・待ち時間が尽きるのいずれかまで、間隔を倍々に広げながら読み直す。
 
-        except Exception as e:
-            log_error('Failed to process SQS message', e)
-            if 'job_id' in locals():
-                update_job_status(job_id, 'failed', error=str(e))
+    Returns:
+        最後に読んだジョブ（削除された場合はNone）
+    """
+    deadline = time.monotonic() + wait_seconds
+    delay = JOB_STATUS_POLL_INITIAL_SECONDS
+    while True:
+        time.sleep(min(delay, max(deadline - time.monotonic(), 0)))
+        delay = min(delay * 2, JOB_STATUS_POLL_MAX_SECONDS)
+
+        job = get_job(job_id)
+        if job is None or build_job_etag(job) != etag or job.get('status') in TERMINAL_JOB_STATUSES:
+            return job
+        if time.monotonic() >= deadline:
+            return job
 
 
 def get_job_status(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
-    """ジョブのステータスを取得"""
+    """
+    ジョブのステータスを取得
+
+    If-None-Match がジョブのETagと一致する場合は 304 を返す。
+    wait（秒）を指定した場合は、一致している間は状態が変わるまで最大その秒数だけ待ってから返す。
+    """
     try:
         user_id = get_user_id(event)
         if not user_id:
@@ -843,9 +1688,8 @@ def get_job_status(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
         if not job_id:
             return create_response(400, error_code='VALIDATION_001', error_message='ジョブIDが必要です')
 
-        # ジョブを取得
-        response = jobs_table.get_item(Key={'jobId': job_id})
-        job = response.get('Item')
+        # ジョブを取得（結果の本文は別の項目のため、ここで読むのは小さな項目のみ）
+        job = get_job(job_id)
 
         if not job:
             return create_response(404, error_code='NOT_FOUND', error_message='ジョブが見つかりません')
@@ -854,6 +1698,25 @@ def get_job_status(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
         if job.get('userId') != user_id:
             return create_response(403, error_code='FORBIDDEN', error_message='このジョブへのアクセス権がありません')
 
+        # クライアントが最新の状態を持っている場合は、変わるまで待つ
+        if_none_match = get_header(event, 'If-None-Match')
+        etag = build_job_etag(job)
+        if etag_matches(if_none_match, etag) and job['status'] not in TERMINAL_JOB_STATUSES:
+            wait_seconds = get_wait_seconds(event, context)
+            if wait_seconds > 0:
+                job = wait_for_job_change(job_id, etag, wait_seconds)
+                if not job:
+                    return create_response(404, error_code='NOT_FOUND', error_message='ジョブが見つかりません')
+                etag = build_job_etag(job)
+
+        etag_headers = {
+            'ETag': etag,
+            'Cache-Control': 'no-cache',
+            'Access-Control-Expose-Headers': 'ETag',
+        }
+        if etag_matches(if_none_match, etag):
+            return create_response(304, extra_headers=etag_headers)
+
         # レスポンスを構築
         result = {
             'jobId': job['jobId'],
@@ -863,12 +1726,27 @@ def get_job_status(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
             'updatedAt': job.get('updatedAt', ''),
         }
 
-        if job['status'] == 'completed' and 'result' in job:
-            result['result'] = job['result']
+        # 結果・途中結果は別の項目から読む（以前の形式でジョブに含まれている場合はそれを使う）
+        if job['status'] == 'completed':
+            job_result = job.get('result') or (get_job_payload(job_id, 'result') if job.get('hasResult') else None)
+            if job_result:
+                result['result'] = job_result
+        elif job['status'] == 'processing':
+            partial_result = job.get('partialResult') or (
+                get_job_payload(job_id, 'partial') if job.get('hasPartialResult') else None
+            )
+            if partial_result:
+                result['partialResult'] = partial_result
         elif job['status'] == 'failed' and 'error' in job:
             result['error'] = job['error']
 
-        return create_response(200, data=result)
+        # 再試行の状況（一時的なAPIエラーで待機中の場合など）
+        if job.get('attempts'):
+            result['attempts'] = job['attempts']
+            if job['status'] == 'pending' and 'nextRetryAt' in job:
+                result['nextRetryAt'] = job['nextRetryAt']
+
+        return create_response(200, data=result, extra_headers=etag_headers)
 
     except Exception as e:
         log_error('Failed to get job status', e)
@@ -877,6 +1755,8 @@ def get_job_status(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
 
 def generate_titles(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
     """タイトル案を3つ生成（同期処理）"""
+    import anthropic
+
     try:
         user_id = get_user_id(event)
         if not user_id:
@@ -895,26 +1775,31 @@ def generate_titles(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
 
         user_settings = get_user_settings(user_id)
         prompt = build_title_generation_prompt(body, user_settings)
-        claude_client = get_claude_client()
-
-        message = claude_client.messages.create(
-            model=CLAUDE_MODEL,
-            max_tokens=1000,
-            temperature=0.8,
-            messages=[{"role": "user", "content": prompt}]
+        params = {'max_tokens': 1000, 'temperature': 0.8}
+        model = resolve_model(TASK_TITLES, get_effective_plan(user_settings or {}))
+
+        # 同一入力の結果はキャッシュから返す（regenerate指定時は再生成）
+        cache_key = build_cache_key('titles', user_id, model, prompt, params)
+        if not body.get('regenerate'):
+            cached = get_cached_result(cache_key)
+            if cached is not None:
+                return create_response(200, data={**cached, 'cached': True})
+
+        message, _ = create_message(
+            'titles',
+            model=model,
+            messages=[{"role": "user", "content": prompt}],
+            prompt_fragments={'contentPoints': body.get('contentPoints', '')},
+            **params
         )
 
         response_text = message.content[0].text
 
-        import re
-        json_match = re.search(r'```json\s*(\{.*?\})\s*```', response_text, re.DOTALL)
-        if json_match:
-            titles_data = json.loads(json_match.group(1))
-        else:
-            titles_data = json.loads(response_text)
+        titles_data = parse_json_response(response_text)
+        put_cached_result(cache_key, 'titles', titles_data)
 
         log_info('Titles generated successfully', user_id=user_id, count=len(titles_data.get('titles', [])))
-        return create_response(200, data=titles_data)
+        return create_response(200, data={**titles_data, 'cached': False})
 
     except json.JSONDecodeError as e:
         log_error('Failed to parse title response', e)
@@ -931,6 +1816,8 @@ def generate_titles(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
 
 def generate_meta(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
     """記事からメタ情報を生成（同期処理）"""
+    import anthropic
+
     try:
         user_id = get_user_id(event)
         if not user_id:
@@ -952,26 +1839,33 @@ def generate_meta(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
         user_settings = get_user_settings(user_id)
         seo_settings = user_settings.get('seo', {}) if user_settings else {}
         prompt = build_meta_generation_prompt(markdown_content, seo_settings)
-        claude_client = get_claude_client()
-
-        message = claude_client.messages.create(
-            model=CLAUDE_MODEL,
-            max_tokens=500,
-            temperature=0.3,
-            messages=[{"role": "user", "content": prompt}]
+        params = {'max_tokens': 500, 'temperature': 0.3}
+        model = resolve_model(TASK_META, get_effective_plan(user_settings or {}))
+
+        # 同一入力の結果はキャッシュから返す（regenerate指定時は再生成）
+        cache_key = build_cache_key('meta', user_id, model, prompt, params)
+        if not body.get('regenerate'):
+            cached = get_cached_result(cache_key)
+            if cached is not None:
+                return create_response(200, data={**cached, 'cached': True})
+
+        message, _ = create_message(
+            'meta',
+            model=model,
+            messages=[{"role": "user", "content": prompt}],
+            prompt_fragments={'article': markdown_content[:5000]},
+            **params
         )
 
         response_text = message.content[0].text
 
-        import re
-        json_match = re.search(r'```json\s*(\{.*?\})\s*```', response_text, re.DOTALL)
-        if json_match:
-            meta_data = json.loads(json_match.group(1))
-        else:
-            meta_data = json.loads(response_text)
+        meta_data = parse_json_response(response_text)
+        # 読了時間はモデルの推定ではなく本文の統計から算出する
+        meta_data['estimatedReadingTime'] = estimate_reading_time(markdown_content)
+        put_cached_result(cache_key, 'meta', meta_data)
 
         log_info('Meta generated successfully', user_id=user_id)
-        return create_response(200, data=meta_data)
+        return create_response(200, data={**meta_data, 'cached': False})
 
     except json.JSONDecodeError as e:
         log_error('Failed to parse meta response', e)
@@ -986,15 +1880,58 @@ def generate_meta(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
         return create_response(500, error_code='SERVER_001', error_message='サーバーエラーが発生しました')
 
 
+def handle_job_events_connection(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
+    """
+    ジョブイベントのWebSocket API（$connect / $disconnect / subscribe）
+
+    接続時の認証はAuthorizer（クエリパラメータ token）で行う。
+    subscribe（{"action": "subscribe", "jobId": "..."}）で自分のジョブのイベントを購読する。
+    購読の直前に状態が変わっている場合があるため、クライアントは subscribed を受けたら状態を1回取得する。
+    """
+    request_context = event.get('requestContext', {})
+    route_key = request_context.get('routeKey', '')
+    connection_id = request_context.get('connectionId', '')
+
+    # 切断済みの接続は配信時に購読者から削除する（GoneException）
+    if route_key in ('$connect', '$disconnect'):
+        return {'statusCode': 200}
+
+    try:
+        user_id = get_user_id(event)
+        if not user_id:
+            return {'statusCode': 401}
+
+        job_id = (parse_event_body(event) or {}).get('jobId', '')
+        if not job_id:
+            return {'statusCode': 400}
+
+        job = get_job(job_id)
+        if not job or job.get('userId') != user_id:
+            return {'statusCode': 403}
+
+        add_subscriber(job_id, connection_id)
+        send_to_connection(connection_id, build_job_event('subscribed', job_id, status=job['status']))
+        log_info('Job events subscribed', job_id=job_id, connection_id=connection_id)
+        return {'statusCode': 200}
+
+    except Exception as e:
+        log_error('Failed to subscribe job events', e)
+        return {'statusCode': 500}
+
+
 def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
     """
     Lambda関数のエントリーポイント
-    SQSトリガーとAPI Gatewayの両方に対応
+    SQSトリガー・API Gateway（HTTP API / ジョブイベントのWebSocket API）に対応
     """
     # SQSトリガーの場合
     if 'Records' in event and event['Records'][0].get('eventSource') == 'aws:sqs':
         return process_sqs_message(event, context)
 
+    # WebSocket API の場合
+    if event.get('requestContext', {}).get('eventType') in ('CONNECT', 'DISCONNECT', 'MESSAGE'):
+        return handle_job_events_connection(event, context)
+
     # API Gatewayの場合
     http_method = event.get('httpMethod', '') or event.get('requestContext', {}).get('http', {}).get('method', '')
     if http_method == 'OPTIONS':
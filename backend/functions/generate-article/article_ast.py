@@ -0,0 +1,284 @@
+"""
+記事構造の型付きAST
+
+Claudeが出力した構造JSON（title / sections / blocks）を1度だけ解析し、
+__slots__ を使った軽量なノードに変換する。描画は article_renderer の
+ビジターが accept() 経由で行うため、出力形式ごとに辞書を走査し直す必要がない。
+
+- parse_structure(): 構造全体を解析（装飾レジストリを渡すと無効な装飾を除去）
+- parse_section() / parse_block(): セクション・ブロック単位で解析
+- Article.digest: 内容のハッシュ（描画結果のメモ化キー）
+"""
+
+import hashlib
+import json
+from abc import ABC, abstractmethod
+from typing import Any, Dict, Iterator, List, Optional, Union
+
+from decoration_registry import DecorationRegistry, get_decoration_registry
+from utils import log_warning
+
+
+class Node(ABC):
+    """ASTノードの基底クラス"""
+
+    __slots__ = ()
+    kind = ''
+
+    @abstractmethod
+    def accept(self, visitor: Any) -> Iterator[str]:
+        """ビジターの visit_<kind>() を呼び出す"""
+
+    @abstractmethod
+    def to_dict(self) -> Dict[str, Any]:
+        """構造JSONと同じ形式の辞書に戻す"""
+
+
+class Paragraph(Node):
+    """段落（装飾IDとボックスタイトルは任意）"""
+
+    __slots__ = ('content', 'decoration_id', 'title')
+    kind = 'paragraph'
+
+    def __init__(self, content: str = '', decoration_id: Optional[str] = None, title: str = ''):
+        self.content = content
+        self.decoration_id = decoration_id
+        self.title = title
+
+    def accept(self, visitor: Any) -> Iterator[str]:
+        return visitor.visit_paragraph(self)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return _with_decoration({'type': self.kind, 'content': self.content}, self)
+
+
+class ListBlock(Node):
+    """箇条書き・番号付きリスト"""
+
+    __slots__ = ('items', 'ordered', 'decoration_id', 'title')
+    kind = 'list'
+
+    def __init__(self, items: List[str], ordered: bool = False, decoration_id: Optional[str] = None, title: str = ''):
+        self.items = items
+        self.ordered = ordered
+        self.decoration_id = decoration_id
+        self.title = title
+
+    def accept(self, visitor: Any) -> Iterator[str]:
+        return visitor.visit_list(self)
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = {
+            'type': self.kind,
+            'listType': 'ordered' if self.ordered else 'unordered',
+            'items': list(self.items),
+        }
+        return _with_decoration(data, self)
+
+
+class Subsection(Node):
+    """H3見出しと子ブロック"""
+
+    __slots__ = ('heading', 'blocks')
+    kind = 'subsection'
+
+    def __init__(self, heading: str, blocks: List[Node]):
+        self.heading = heading
+        self.blocks = blocks
+
+    def accept(self, visitor: Any) -> Iterator[str]:
+        return visitor.visit_subsection(self)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {'type': self.kind, 'heading': self.heading, 'blocks': [b.to_dict() for b in self.blocks]}
+
+
+class Table(Node):
+    """テーブル（ヘッダー行とデータ行）"""
+
+    __slots__ = ('headers', 'rows', 'decoration_id', 'title')
+    kind = 'table'
+
+    def __init__(self, headers: List[str], rows: List[List[str]], decoration_id: Optional[str] = None, title: str = ''):
+        self.headers = headers
+        self.rows = rows
+        self.decoration_id = decoration_id
+        self.title = title
+
+    def accept(self, visitor: Any) -> Iterator[str]:
+        return visitor.visit_table(self)
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = {'type': self.kind, 'headers': list(self.headers), 'rows': [list(row) for row in self.rows]}
+        return _with_decoration(data, self)
+
+
+class Callout(Node):
+    """コールアウト（本文とアクションボタン）"""
+
+    __slots__ = ('content', 'button_text', 'button_url', 'decoration_id', 'title')
+    kind = 'callout'
+
+    def __init__(
+        self,
+        content: str = '',
+        button_text: str = 'クリック',
+        button_url: str = '#',
+        decoration_id: Optional[str] = None,
+        title: str = ''
+    ):
+        self.content = content
+        self.button_text = button_text
+        self.button_url = button_url
+        self.decoration_id = decoration_id
+        self.title = title
+
+    def accept(self, visitor: Any) -> Iterator[str]:
+        return visitor.visit_callout(self)
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = {
+            'type': self.kind,
+            'content': self.content,
+            'buttonText': self.button_text,
+            'buttonUrl': self.button_url,
+        }
+        return _with_decoration(data, self)
+
+
+class Section(Node):
+    """H2見出しとブロック群"""
+
+    __slots__ = ('heading', 'blocks')
+    kind = 'section'
+
+    def __init__(self, heading: str, blocks: List[Node]):
+        self.heading = heading
+        self.blocks = blocks
+
+    def accept(self, visitor: Any) -> Iterator[str]:
+        return visitor.visit_section(self)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {'heading': self.heading, 'blocks': [b.to_dict() for b in self.blocks]}
+
+
+class Article(Node):
+    """記事全体（タイトル・セクション・メタ情報）"""
+
+    __slots__ = ('title', 'sections', 'meta', '_digest')
+    kind = 'article'
+
+    def __init__(self, title: str, sections: List[Section], meta: Optional[Dict[str, Any]] = None):
+        self.title = title
+        self.sections = sections
+        self.meta = meta
+        self._digest: Optional[str] = None
+
+    def accept(self, visitor: Any) -> Iterator[str]:
+        return visitor.visit_article(self)
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = {'title': self.title, 'sections': [s.to_dict() for s in self.sections]}
+        if self.meta is not None:
+            data['meta'] = self.meta
+        return data
+
+    @property
+    def digest(self) -> str:
+        """内容のハッシュ（初回アクセス時に算出）"""
+        if self._digest is None:
+            payload = json.dumps(self.to_dict(), sort_keys=True, ensure_ascii=False, default=str)
+            self._digest = hashlib.sha256(payload.encode('utf-8')).hexdigest()
+        return self._digest
+
+
+Block = Union[Paragraph, ListBlock, Subsection, Table, Callout]
+
+
+def _with_decoration(data: Dict[str, Any], block: Node) -> Dict[str, Any]:
+    """装飾IDとタイトルがあれば辞書に追加"""
+    if block.decoration_id:
+        data['decorationId'] = block.decoration_id
+    if block.title:
+        data['title'] = block.title
+    return data
+
+
+def parse_block(block: Dict[str, Any], registry: Optional[DecorationRegistry] = None) -> Optional[Block]:
+    """
+    ブロック辞書をASTノードに変換
+
+    Args:
+        block: 構造JSONのブロック
+        registry: 指定時は無効・存在しないdecorationIdをタイトルごと除去する
+
+    Returns:
+        ASTノード（未知のブロックタイプはNone）
+    """
+    block_type = block.get('type', 'paragraph')
+    decoration_id = block.get('decorationId')
+    title = block.get('title', '')
+
+    # decorationIdが無効な場合は除去
+    if decoration_id and registry is not None and not registry.is_enabled(decoration_id):
+        log_warning(f'Invalid or disabled decorationId: {decoration_id}')
+        decoration_id = None
+        title = ''
+
+    if block_type == 'paragraph':
+        return Paragraph(block.get('content', ''), decoration_id, title)
+
+    if block_type == 'list':
+        return ListBlock(block.get('items', []), block.get('listType', 'unordered') == 'ordered', decoration_id, title)
+
+    if block_type == 'subsection':
+        return Subsection(block.get('heading', ''), parse_blocks(block.get('blocks', []), registry))
+
+    if block_type == 'table':
+        return Table(block.get('headers', []), block.get('rows', []), decoration_id, title)
+
+    if block_type == 'callout':
+        return Callout(
+            block.get('content', ''),
+            block.get('buttonText', 'クリック'),
+            block.get('buttonUrl', '#'),
+            decoration_id,
+            title
+        )
+
+    return None
+
+
+def parse_blocks(blocks: List[Dict[str, Any]], registry: Optional[DecorationRegistry] = None) -> List[Block]:
+    """ブロック辞書のリストを解析（未知のブロックタイプは除外）"""
+    nodes = []
+    for block in blocks:
+        node = parse_block(block, registry)
+        if node is not None:
+            nodes.append(node)
+    return nodes
+
+
+def parse_section(section: Dict[str, Any], registry: Optional[DecorationRegistry] = None) -> Section:
+    """セクション辞書をASTノードに変換"""
+    return Section(section.get('heading', ''), parse_blocks(section.get('blocks', []), registry))
+
+
+def parse_structure(
+    structure: Dict[str, Any],
+    decorations: Union[list, DecorationRegistry, None] = None
+) -> Article:
+    """
+    構造JSON全体をASTに変換
+
+    Args:
+        structure: Claudeが出力した構造（title / sections / meta）
+        decorations: 装飾リストまたはレジストリ（指定時は無効な装飾を除去）
+
+    Returns:
+        Article
+    """
+    registry = get_decoration_registry(decorations) if decorations is not None else None
+    sections = [parse_section(section, registry) for section in structure.get('sections', [])]
+    return Article(structure.get('title', ''), sections, structure.get('meta'))
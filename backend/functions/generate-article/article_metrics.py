@@ -0,0 +1,130 @@
+"""
+記事ASTの計測
+
+レンダラーがノードを描画する際に同じ走査の中で observe() を呼び、
+本文の文字数・読了時間・見出し数・装飾ごとの使用数・リンク数を集計する。
+描画後のHTMLを正規表現で走査し直す必要がなく、タグや属性の文字も数えない。
+
+- ArticleMetrics: 集計器（ArticleRenderer.metrics に設定して描画する）
+- build_structure_validation(): 集計結果から構造の検証結果を作成
+"""
+
+from typing import Any, Dict, Optional, Tuple
+
+from inline_markdown import INLINE_TOKEN_PATTERN
+from markdown_stats import H2_MAX_COUNT, check_h2_count, reading_time_for_characters
+
+
+def inline_text_stats(text: str) -> Tuple[int, int]:
+    """
+    インラインMarkdown記法を除いた文字数（空白を除く）とリンク数を算出
+
+    Returns:
+        (文字数, リンク数)
+    """
+    if not text:
+        return 0, 0
+
+    link_count = 0
+    if '*' in text or '[' in text:
+        parts = []
+        position = 0
+        for match in INLINE_TOKEN_PATTERN.finditer(text):
+            parts.append(text[position:match.start()])
+            position = match.end()
+            if match.group('delim') is None:
+                # リンクは表示テキストのみ数える
+                link_count += 1
+                parts.append(match.group('text').replace('*', ''))
+        parts.append(text[position:])
+        text = ''.join(parts)
+
+    return len(''.join(text.split())), link_count
+
+
+class ArticleMetrics:
+    """
+    記事の計測値の集計器
+
+    observe() にノードを1件ずつ渡す（子ノードはレンダラーの走査で別途渡される）。
+    """
+
+    __slots__ = ('body_chars', 'h2_count', 'h3_count', 'link_count', 'decoration_usage')
+
+    def __init__(self):
+        self.body_chars = 0
+        self.h2_count = 0
+        self.h3_count = 0
+        self.link_count = 0
+        self.decoration_usage: Dict[str, int] = {}
+
+    def _add_text(self, text: str):
+        chars, links = inline_text_stats(text)
+        self.body_chars += chars
+        self.link_count += links
+
+    def observe(self, node: Any):
+        """ノード1件を集計"""
+        kind = node.kind
+
+        if kind == 'article':
+            # 記事全体の値はセクション・ブロックの集計から求める
+            return
+        if kind == 'section':
+            self.h2_count += 1
+            self._add_text(node.heading)
+            return
+        if kind == 'subsection':
+            self.h3_count += 1
+            self._add_text(node.heading)
+            return
+
+        if node.decoration_id:
+            self.decoration_usage[node.decoration_id] = self.decoration_usage.get(node.decoration_id, 0) + 1
+        self._add_text(node.title)
+
+        if kind == 'paragraph':
+            self._add_text(node.content)
+        elif kind == 'list':
+            for item in node.items:
+                self._add_text(item)
+        elif kind == 'table':
+            for header in node.headers:
+                self._add_text(header)
+            for row in node.rows:
+                for cell in row:
+                    self._add_text(cell)
+        elif kind == 'callout':
+            # アクションボタンもリンクとして数える
+            self._add_text(node.content)
+            self._add_text(node.button_text)
+            self.link_count += 1
+
+    def to_dict(self) -> Dict[str, Any]:
+        """集計結果を辞書で返す"""
+        return {
+            'bodyChars': self.body_chars,
+            'readingTime': reading_time_for_characters(self.body_chars),
+            'headingCount': self.h2_count + self.h3_count,
+            'h2Count': self.h2_count,
+            'h3Count': self.h3_count,
+            'linkCount': self.link_count,
+            'decorationUsage': dict(self.decoration_usage),
+        }
+
+
+def build_structure_validation(metrics: Dict[str, Any], expected_sections: Optional[int] = None) -> Dict[str, Any]:
+    """
+    計測結果から構造の検証結果を作成（validate_markdown_structure と同じ形式）
+
+    構造JSONの見出しはH2とその配下のH3のみのため、H1と階層の飛びは発生しない。
+    長文モードのようにアウトラインでセクション数を決めた場合は expected_sections を渡し、
+    その数まではH2が多すぎるとしない。
+    """
+    issues = check_h2_count(metrics['h2Count'], max(H2_MAX_COUNT, expected_sections or 0))
+    return {
+        'valid': len(issues) == 0,
+        'issues': issues,
+        'headingCount': metrics['headingCount'],
+        'h2Count': metrics['h2Count']
+    }
@@ -0,0 +1,517 @@
+"""
+記事ASTのレンダラー
+
+article_ast のノードをビジターで描画し、WordPress Gutenbergブロック形式・
+Markdown（装飾ボックス記法付き）・純粋なMarkdown・プレーンHTMLを生成する。
+出力はジェネレーターで断片（チャンク）ごとに返すため、記事全体を文字列のリストとして
+保持せずに、HTTPレスポンス・S3マルチパートアップロード・ハッシュ計算などへそのまま流し込める。
+
+- GutenbergRenderer / MarkdownRenderer / PlainMarkdownRenderer / PlainHtmlRenderer: ビジター
+- render_article(): AST1件の描画結果を内容のハッシュごとにメモ化して返す
+- render_article_with_metrics(): 描画と同じ走査で集計した計測値（article_metrics）も返す
+- iter_wordpress() / iter_markdown(): チャンクを順に返す（構造の辞書も受け付ける）
+- render_into(): チャンクを呼び出し側の書き込み関数（StringIO.write など）へ渡す
+- structure_to_wordpress() / structure_to_markdown() ほか: 従来の辞書ベースの呼び出し口
+"""
+
+import os
+import threading
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+from inline_markdown import convert_inline_markdown
+from article_metrics import ArticleMetrics
+from decoration_registry import DecorationRegistry, get_decoration_registry
+from article_ast import (
+    Article,
+    Callout,
+    ListBlock,
+    Node,
+    Paragraph,
+    Section,
+    Subsection,
+    Table,
+    parse_block,
+    parse_section,
+)
+
+
+# 環境変数
+RENDER_CACHE_MAX_ENTRIES = int(os.environ.get('RENDER_CACHE_MAX_ENTRIES', '32'))
+
+# ブロック間・行間の区切り
+WORDPRESS_BLOCK_SEPARATOR = '\n\n'
+MARKDOWN_LINE_SEPARATOR = '\n'
+
+
+def html_escape(text: str) -> str:
+    """HTMLエスケープ"""
+    return text.replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;').replace('"', '&quot;')
+
+
+def join_chunks(parts: Iterable[str], separator: str) -> Iterator[str]:
+    """区切り文字を挟みながら断片を順に返す（separator.join(parts) のストリーミング版）"""
+    first = True
+    for part in parts:
+        if first:
+            first = False
+        else:
+            yield separator
+        yield part
+
+
+def render_into(chunks: Iterable[str], write: Callable[[str], Any]) -> int:
+    """
+    チャンクを呼び出し側の書き込み関数へ渡す
+
+    Args:
+        chunks: iter_wordpress() / iter_markdown() の戻り値
+        write: チャンクを受け取る関数（io.StringIO.write、ハッシュ更新、アップロードバッファなど）
+
+    Returns:
+        書き込んだ文字数
+    """
+    written = 0
+    for chunk in chunks:
+        write(chunk)
+        written += len(chunk)
+    return written
+
+
+
+# ==========================================
+# ビジター
+# ==========================================
+
+class ArticleRenderer(ABC):
+    """
+    レンダラーの基底クラス
+
+    visit_<kind>() はノードを描画した断片（行またはブロック）を順に返す
+    （visit_article() のみ、セクションの間に separator を挟んだチャンクを返す）。
+    iter_sections() は断片の間に separator を挟んだチャンクを返す。
+    metrics を設定すると、visit() で描画する各ノードを集計する。
+    """
+
+    separator = MARKDOWN_LINE_SEPARATOR
+    metrics: Optional[ArticleMetrics] = None
+
+    @property
+    def cache_key(self) -> str:
+        """描画結果のメモ化キー（出力が変わる設定を含める）"""
+        return type(self).__name__
+
+    def iter_sections(self, sections: Iterable[Section]) -> Iterator[str]:
+        """セクション群をチャンクごとに返す"""
+        parts = (part for section in sections for part in self.visit(section))
+        return join_chunks(parts, self.separator)
+
+    def iter_article(self, article: Article) -> Iterator[str]:
+        """記事全体をチャンクごとに返す"""
+        return self.iter_sections(article.sections)
+
+    def iter_blocks(self, blocks: Iterable[Node]) -> Iterator[str]:
+        """ブロック群を順に描画"""
+        for block in blocks:
+            yield from self.visit(block)
+
+    def visit(self, node: Node) -> Iterator[str]:
+        """ノード1件を描画（計測中はノードを集計）"""
+        if self.metrics is not None:
+            self.metrics.observe(node)
+        return node.accept(self)
+
+    def visit_article(self, node: Article) -> Iterator[str]:
+        """記事全体を描画（Article.accept() から呼ばれる）"""
+        return self.iter_article(node)
+
+    @abstractmethod
+    def visit_section(self, node: Section) -> Iterator[str]:
+        """セクション（H2見出し＋ブロック群）を描画"""
+
+    @abstractmethod
+    def visit_paragraph(self, node: Paragraph) -> Iterator[str]:
+        """段落を描画"""
+
+    @abstractmethod
+    def visit_list(self, node: ListBlock) -> Iterator[str]:
+        """リストを描画"""
+
+    @abstractmethod
+    def visit_subsection(self, node: Subsection) -> Iterator[str]:
+        """小見出し（H3見出し＋ブロック群）を描画"""
+
+    @abstractmethod
+    def visit_table(self, node: Table) -> Iterator[str]:
+        """表を描画"""
+
+    @abstractmethod
+    def visit_callout(self, node: Callout) -> Iterator[str]:
+        """コールアウト（アクションボタン）を描画"""
+
+
+class GutenbergRenderer(ArticleRenderer):
+    """WordPress Gutenbergブロック形式（decorationId → 装飾divタグ）"""
+
+    separator = WORDPRESS_BLOCK_SEPARATOR
+
+    def __init__(self, decorations: Union[list, DecorationRegistry]):
+        self.registry = get_decoration_registry(decorations)
+
+    @property
+    def cache_key(self) -> str:
+        return f'gutenberg:{self.registry.version}'
+
+    def visit_section(self, node: Section) -> Iterator[str]:
+        # H2見出し
+        yield f'<!-- wp:heading -->\n<h2 class="wp-block-heading">{html_escape(node.heading)}</h2>\n<!-- /wp:heading -->'
+        yield from self.iter_blocks(node.blocks)
+
+    def visit_paragraph(self, node: Paragraph) -> Iterator[str]:
+        decoration = self.registry.get(node.decoration_id)
+
+        if not decoration:
+            # 通常の段落
+            yield f'<!-- wp:paragraph -->\n<p>{convert_inline_markdown(node.content)}</p>\n<!-- /wp:paragraph -->'
+        elif decoration['inline']:
+            # インライン装飾（paragraph schema）→ 段落内にspan
+            yield f"{decoration['spanOpen']}{convert_inline_markdown(node.content)}{decoration['spanClose']}"
+        else:
+            # ボックス装飾（box等のschema）→ divで囲む、タイトルがあれば追加
+            yield (
+                f"{decoration['boxOpen']}"
+                f'{self._box_title(node.title)}'
+                f'<p>{convert_inline_markdown(node.content)}</p>\n'
+                f"{decoration['boxClose']}"
+            )
+
+    def visit_list(self, node: ListBlock) -> Iterator[str]:
+        decoration = self.registry.get(node.decoration_id)
+        tag = 'ol' if node.ordered else 'ul'
+        items_html = '\n'.join(f'<li>{convert_inline_markdown(item)}</li>' for item in node.items)
+
+        if decoration:
+            # 装飾付きリスト → カスタムHTMLブロック、タイトルがあれば追加
+            yield (
+                f"{decoration['boxOpen']}"
+                f'{self._box_title(node.title)}'
+                f'<{tag}>\n{items_html}\n</{tag}>\n'
+                f"{decoration['boxClose']}"
+            )
+        else:
+            # 通常のリスト
+            attrs = ' {"ordered":true}' if node.ordered else ''
+            yield (
+                f'<!-- wp:list{attrs} -->\n'
+                f'<{tag} class="wp-block-list">\n{items_html}\n</{tag}>\n'
+                f'<!-- /wp:list -->'
+            )
+
+    def visit_subsection(self, node: Subsection) -> Iterator[str]:
+        # H3見出し
+        yield (
+            f'<!-- wp:heading {{"level":3}} -->\n'
+            f'<h3 class="wp-block-heading">{html_escape(node.heading)}</h3>\n'
+            f'<!-- /wp:heading -->'
+        )
+        yield from self.iter_blocks(node.blocks)
+
+    def visit_table(self, node: Table) -> Iterator[str]:
+        decoration = self.registry.get(node.decoration_id)
+        dec_class = decoration['class'] if decoration else 'ba-table'
+
+        header_cells = ''.join(f'<th>{html_escape(h)}</th>' for h in node.headers)
+        data_rows = '\n'.join(
+            '<tr>' + ''.join(f'<td>{convert_inline_markdown(cell)}</td>' for cell in row) + '</tr>'
+            for row in node.rows
+        )
+
+        yield (
+            f'<!-- wp:html -->\n'
+            f'<div class="{dec_class}">\n'
+            f'<table>\n<tr>{header_cells}</tr>\n{data_rows}\n</table>\n'
+            f'</div>\n'
+            f'<!-- /wp:html -->'
+        )
+
+    def visit_callout(self, node: Callout) -> Iterator[str]:
+        # コールアウトブロック（アクションボタン）
+        decoration = self.registry.get(node.decoration_id)
+        dec_class = decoration['class'] if decoration else 'ba-callout'
+
+        yield (
+            f'<!-- wp:html -->\n'
+            f'<div class="{dec_class}">\n'
+            f'{self._box_title(node.title)}'
+            f'<p>{convert_inline_markdown(node.content)}</p>\n'
+            f'<a href="{node.button_url}" class="callout-button">{html_escape(node.button_text)}</a>\n'
+            f'</div>\n'
+            f'<!-- /wp:html -->'
+        )
+
+    @staticmethod
+    def _box_title(title: str) -> str:
+        return f'<p class="box-title">{html_escape(title)}</p>\n' if title else ''
+
+
+class PlainMarkdownRenderer(ArticleRenderer):
+    """純粋なMarkdown（装飾は無視し、通常のMarkdown記法のみを使用）"""
+
+    def visit_section(self, node: Section) -> Iterator[str]:
+        # H2見出し
+        yield f'## {node.heading}'
+        yield ''
+        for block in node.blocks:
+            yield from self.visit(block)
+            yield ''
+
+    def visit_paragraph(self, node: Paragraph) -> Iterator[str]:
+        # boxスキーマの装飾がある場合は引用ブロックとして表現
+        if node.decoration_id and node.title:
+            yield f'> **{node.title}**'
+            yield '> '
+            yield f'> {node.content}'
+        else:
+            # 通常の段落（ハイライトも含む）
+            yield node.content
+
+    def visit_list(self, node: ListBlock) -> Iterator[str]:
+        # タイトルがある場合は太字で表示
+        if node.title:
+            yield f'**{node.title}**'
+            yield ''
+
+        for i, item in enumerate(node.items):
+            yield f'{i + 1}. {item}' if node.ordered else f'- {item}'
+
+    def visit_subsection(self, node: Subsection) -> Iterator[str]:
+        # H3見出し
+        yield f'### {node.heading}'
+        yield ''
+        for block in node.blocks:
+            yield from self.visit(block)
+            yield ''
+
+    def visit_table(self, node: Table) -> Iterator[str]:
+        yield '| ' + ' | '.join(node.headers) + ' |'
+        yield '|' + ' --- |' * len(node.headers)
+        for row in node.rows:
+            yield '| ' + ' | '.join(row) + ' |'
+
+    def visit_callout(self, node: Callout) -> Iterator[str]:
+        if node.title:
+            yield f'**{node.title}**'
+            yield ''
+        yield node.content
+        yield ''
+        yield f'[{node.button_text}]({node.button_url})'
+
+
+class MarkdownRenderer(PlainMarkdownRenderer):
+    """Markdown（装飾を :::box 記法で表現）"""
+
+    def visit_paragraph(self, node: Paragraph) -> Iterator[str]:
+        if node.decoration_id:
+            yield self._box_open(node)
+            yield node.content
+            yield ':::'
+        else:
+            yield node.content
+
+    def visit_list(self, node: ListBlock) -> Iterator[str]:
+        if node.decoration_id:
+            yield self._box_open(node)
+
+        prefix = '1. ' if node.ordered else '- '
+        for item in node.items:
+            yield f'{prefix}{item}'
+
+        if node.decoration_id:
+            yield ':::'
+
+    @staticmethod
+    def _box_open(node: Union[Paragraph, ListBlock]) -> str:
+        # タイトルがある場合はtitle属性も追加
+        title_attr = f' title="{node.title}"' if node.title else ''
+        return f':::box id="{node.decoration_id}"{title_attr}'
+
+
+class PlainHtmlRenderer(ArticleRenderer):
+    """プレーンHTML（Gutenbergのブロックコメント・装飾クラスなし）"""
+
+    def visit_section(self, node: Section) -> Iterator[str]:
+        yield f'<h2>{html_escape(node.heading)}</h2>'
+        yield from self.iter_blocks(node.blocks)
+
+    def visit_paragraph(self, node: Paragraph) -> Iterator[str]:
+        if node.decoration_id and node.title:
+            yield (
+                f'<blockquote>\n<p><strong>{html_escape(node.title)}</strong></p>\n'
+                f'<p>{convert_inline_markdown(node.content)}</p>\n</blockquote>'
+            )
+        else:
+            yield f'<p>{convert_inline_markdown(node.content)}</p>'
+
+    def visit_list(self, node: ListBlock) -> Iterator[str]:
+        if node.title:
+            yield f'<p><strong>{html_escape(node.title)}</strong></p>'
+        tag = 'ol' if node.ordered else 'ul'
+        items_html = '\n'.join(f'<li>{convert_inline_markdown(item)}</li>' for item in node.items)
+        yield f'<{tag}>\n{items_html}\n</{tag}>'
+
+    def visit_subsection(self, node: Subsection) -> Iterator[str]:
+        yield f'<h3>{html_escape(node.heading)}</h3>'
+        yield from self.iter_blocks(node.blocks)
+
+    def visit_table(self, node: Table) -> Iterator[str]:
+        header_cells = ''.join(f'<th>{html_escape(h)}</th>' for h in node.headers)
+        data_rows = ''.join(
+            '\n<tr>' + ''.join(f'<td>{convert_inline_markdown(cell)}</td>' for cell in row) + '</tr>'
+            for row in node.rows
+        )
+        yield f'<table>\n<tr>{header_cells}</tr>{data_rows}\n</table>'
+
+    def visit_callout(self, node: Callout) -> Iterator[str]:
+        title_html = f'<p><strong>{html_escape(node.title)}</strong></p>\n' if node.title else ''
+        yield (
+            f'<div>\n{title_html}'
+            f'<p>{convert_inline_markdown(node.content)}</p>\n'
+            f'<p><a href="{node.button_url}">{html_escape(node.button_text)}</a></p>\n</div>'
+        )
+
+
+# ==========================================
+# 描画結果のメモ化
+# ==========================================
+
+_render_cache: 'OrderedDict[Tuple[str, str], Tuple[str, ArticleMetrics]]' = OrderedDict()
+_render_cache_lock = threading.Lock()
+
+
+def _render_with_cache(article: Article, renderer: ArticleRenderer) -> Tuple[str, ArticleMetrics]:
+    """描画結果と計測値をメモ化して返す"""
+    key = (article.digest, renderer.cache_key)
+    with _render_cache_lock:
+        cached = _render_cache.get(key)
+        if cached is not None:
+            _render_cache.move_to_end(key)
+            return cached
+
+    metrics = ArticleMetrics()
+    renderer.metrics = metrics
+    try:
+        rendered = ''.join(renderer.iter_article(article))
+    finally:
+        renderer.metrics = None
+
+    entry = (rendered, metrics)
+    with _render_cache_lock:
+        _render_cache[key] = entry
+        while len(_render_cache) > RENDER_CACHE_MAX_ENTRIES:
+            _render_cache.popitem(last=False)
+    return entry
+
+
+def render_article(article: Article, renderer: ArticleRenderer) -> str:
+    """
+    記事ASTを描画（同じ内容・同じレンダラー設定の結果はメモ化して再利用）
+
+    Args:
+        article: parse_structure() の戻り値
+        renderer: 使用するレンダラー
+
+    Returns:
+        描画結果の文字列
+    """
+    return _render_with_cache(article, renderer)[0]
+
+
+def render_article_with_metrics(article: Article, renderer: ArticleRenderer) -> Tuple[str, Dict[str, Any]]:
+    """
+    記事ASTを描画し、同じ走査で集計した計測値とともに返す
+
+    Args:
+        article: parse_structure() の戻り値
+        renderer: 使用するレンダラー
+
+    Returns:
+        (描画結果の文字列, 計測値 {'bodyChars', 'readingTime', 'headingCount', 'h2Count',
+        'h3Count', 'linkCount', 'decorationUsage'})
+    """
+    rendered, metrics = _render_with_cache(article, renderer)
+    return rendered, metrics.to_dict()
+
+
+def clear_render_cache():
+    """描画結果のキャッシュを破棄（テスト用）"""
+    with _render_cache_lock:
+        _render_cache.clear()
+
+
+# ==========================================
+# 構造の辞書を受け付ける呼び出し口
+# ==========================================
+
+def _iter_parsed_sections(structure: Union[Dict[str, Any], Article]) -> Iterable[Section]:
+    """ASTのセクション、または辞書のセクションを1件ずつ解析して返す（全体を一度に展開しない）"""
+    if isinstance(structure, Article):
+        return structure.sections
+    return (parse_section(section) for section in structure.get('sections', []))
+
+
+def iter_wordpress(
+    structure: Union[Dict[str, Any], Article],
+    decorations: Union[list, DecorationRegistry]
+) -> Iterator[str]:
+    """構造からWordPress Gutenbergブロック形式をチャンクごとに返す"""
+    return GutenbergRenderer(decorations).iter_sections(_iter_parsed_sections(structure))
+
+
+def iter_markdown(structure: Union[Dict[str, Any], Article]) -> Iterator[str]:
+    """構造から純粋なMarkdownをチャンクごとに返す"""
+    return PlainMarkdownRenderer().iter_sections(_iter_parsed_sections(structure))
+
+
+def structure_to_wordpress(
+    validated_structure: Union[Dict[str, Any], Article],
+    decorations: Union[list, DecorationRegistry]
+) -> str:
+    """
+    マッピング済み構造からWordPress Gutenbergブロック形式を生成
+    decorationId → 装飾divタグ変換
+    """
+    return ''.join(iter_wordpress(validated_structure, decorations))
+
+
+def structure_to_markdown(validated_structure: Union[Dict[str, Any], Article]) -> str:
+    """
+    マッピング済み構造から純粋なMarkdownを生成
+    装飾は無視し、通常のMarkdown記法のみを使用
+    """
+    return ''.join(iter_markdown(validated_structure))
+
+
+def section_to_wordpress(section: Dict[str, Any], decorations: Union[list, DecorationRegistry]) -> List[str]:
+    """セクション（H2見出し＋ブロック群）をWordPress Gutenbergブロック形式に変換"""
+    return list(parse_section(section).accept(GutenbergRenderer(decorations)))
+
+
+def _render_block(block: Dict[str, Any], renderer: ArticleRenderer) -> List[str]:
+    node: Optional[Node] = parse_block(block)
+    return list(node.accept(renderer)) if node is not None else []
+
+
+def block_to_wordpress(block: Dict[str, Any], decorations: Union[list, DecorationRegistry]) -> List[str]:
+    """ブロックをWordPress Gutenbergブロック形式に変換"""
+    return _render_block(block, GutenbergRenderer(decorations))
+
+
+def block_to_markdown(block: Dict[str, Any]) -> List[str]:
+    """ブロックをMarkdown行に変換（WordPress用装飾タグ付き）"""
+    return _render_block(block, MarkdownRenderer())
+
+
+def block_to_markdown_plain(block: Dict[str, Any]) -> List[str]:
+    """ブロックを純粋なMarkdown行に変換（装飾は無視）"""
+    return _render_block(block, PlainMarkdownRenderer())
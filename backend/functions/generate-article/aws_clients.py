@@ -0,0 +1,85 @@
+"""
+AWSクライアントの遅延初期化
+
+boto3のimport（数百ms）とリソース・クライアントの生成（サービスモデルの読み込み）を
+モジュールの読み込み時ではなく初回の利用時に行う。ルートごとに必要なものだけを初期化するため、
+ジョブ状態の取得などテーブルを1つしか使わないルートのコールドスタートが短くなる。
+
+app.py などのモジュール変数（jobs_table など）は代理オブジェクトのまま置き換えずに使う。
+属性に初めてアクセスした時点で実体を生成し、以降はコンテナ内で共有する。
+
+boto3のリソース（Table）はスレッド間で共有できないため、テーブルの代理オブジェクトは
+スレッドごとに別のセッションからリソースを生成する（SQSバッチの並行処理・並列生成のスレッド）。
+低レベルのクライアント（SQSなど）はスレッドセーフのため、コンテナ内で1つを共有する。
+"""
+
+import threading
+from typing import Any, Callable
+
+
+_thread_local = threading.local()
+
+
+def get_dynamodb_resource() -> Any:
+    """DynamoDBリソースを取得（スレッドごとに生成し、同じスレッドのテーブルで共有する）"""
+    resource = getattr(_thread_local, 'dynamodb', None)
+    if resource is None:
+        import boto3
+        resource = boto3.session.Session().resource('dynamodb')
+        _thread_local.dynamodb = resource
+    return resource
+
+
+class LazyClient:
+    """
+    初回の属性アクセスで実体を生成する boto3 リソース・クライアントの代理オブジェクト
+
+    per_thread=True の場合はスレッドごとに実体を生成する（スレッドセーフでないリソース用）。
+    """
+
+    def __init__(self, name: str, factory: Callable[[], Any], per_thread: bool = False):
+        self._name = name
+        self._factory = factory
+        self._per_thread = per_thread
+        self._instance = None
+        self._instance_lock = threading.Lock()
+        self._local = threading.local()
+
+    def _resolve(self) -> Any:
+        if self._per_thread:
+            instance = getattr(self._local, 'instance', None)
+            if instance is None:
+                instance = self._local.instance = self._factory()
+            return instance
+        if self._instance is None:
+            with self._instance_lock:
+                if self._instance is None:
+                    self._instance = self._factory()
+        return self._instance
+
+    def __getattr__(self, attr: str) -> Any:
+        return getattr(self._resolve(), attr)
+
+    def __repr__(self) -> str:
+        initialized = getattr(self._local, 'instance', None) if self._per_thread else self._instance
+        state = 'initialized' if initialized is not None else 'deferred'
+        return f'<LazyClient {self._name} ({state})>'
+
+
+def lazy_table(table_name: str) -> LazyClient:
+    """DynamoDBテーブルの代理オブジェクトを作成（スレッドごとに生成）"""
+    return LazyClient(table_name, lambda: get_dynamodb_resource().Table(table_name), per_thread=True)
+
+
+def lazy_client(service_name: str, **client_kwargs: Any) -> LazyClient:
+    """boto3クライアントの代理オブジェクトを作成（client_kwargs は boto3.client に渡す）"""
+    def create():
+        import boto3
+        return boto3.client(service_name, **client_kwargs)
+    return LazyClient(service_name, create)
+
+
+def is_conditional_check_failed(error: Exception) -> bool:
+    """DynamoDBの条件付き書き込みが条件を満たさなかったエラーか（botocoreをimportせずに判定）"""
+    code = (getattr(error, 'response', None) or {}).get('Error', {}).get('Code')
+    return code == 'ConditionalCheckFailedException'
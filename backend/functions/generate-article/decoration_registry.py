@@ -0,0 +1,120 @@
+"""
+装飾レジストリ
+
+ユーザー設定の装飾リストを、装飾ID → 描画テンプレートの辞書にコンパイルする。
+ブロックごとの装飾検索と有効判定がO(1)になり、描画コストは装飾の定義数に依存しない。
+
+コンパイル結果は装飾リストの内容のハッシュ（設定のバージョン）をキーに
+プロセス内LRUで保持し、ウォームコンテナ内の後続SQSレコードで再利用する。
+"""
+
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, FrozenSet, Optional, Union
+
+
+# 環境変数
+DECORATION_REGISTRY_MAX_ENTRIES = int(os.environ.get('DECORATION_REGISTRY_MAX_ENTRIES', '64'))
+
+
+def compile_decoration(decoration: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    装飾1件を描画テンプレートにコンパイル
+
+    schemaが paragraph の装飾は段落内のspan、それ以外はdivで囲むボックスとして描画する。
+    リスト・テーブル・コールアウトはschemaに関わらずdivで囲む。
+    """
+    dec_class = decoration.get('class', decoration.get('id'))
+    schema = decoration.get('schema', 'paragraph')
+
+    return {
+        'class': dec_class,
+        'schema': schema,
+        'inline': schema == 'paragraph',
+        'spanOpen': f'<!-- wp:paragraph -->\n<p><span class="{dec_class}">',
+        'spanClose': '</span></p>\n<!-- /wp:paragraph -->',
+        'boxOpen': f'<!-- wp:html -->\n<div class="{dec_class}">\n',
+        'boxClose': '</div>\n<!-- /wp:html -->',
+    }
+
+
+class DecorationRegistry:
+    """
+    コンパイル済みの装飾定義
+
+    - get(): 装飾IDから描画テンプレートを取得（同じIDが複数ある場合は先頭の定義）
+    - is_enabled(): 装飾IDが有効（enabled=True）か
+    - version: 装飾リストの内容のハッシュ（描画結果のキャッシュキーに使う）
+    """
+
+    def __init__(self, decorations: list, version: Optional[str] = None):
+        self.version = version or get_decorations_version(decorations)
+        self.enabled_ids: FrozenSet[str] = frozenset(
+            dec['id'] for dec in decorations
+            if dec.get('enabled', True)
+        )
+        self._entries: Dict[str, Dict[str, Any]] = {}
+        for dec in decorations:
+            dec_id = dec.get('id')
+            if dec_id and dec_id not in self._entries:
+                self._entries[dec_id] = compile_decoration(dec)
+
+    def get(self, decoration_id: Optional[str]) -> Optional[Dict[str, Any]]:
+        """装飾IDの描画テンプレートを取得"""
+        if not decoration_id:
+            return None
+        return self._entries.get(decoration_id)
+
+    def is_enabled(self, decoration_id: str) -> bool:
+        """装飾IDが有効か"""
+        return decoration_id in self.enabled_ids
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+def get_decorations_version(decorations: list) -> str:
+    """装飾リストの内容からバージョン（ハッシュ）を算出"""
+    payload = json.dumps(decorations, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+_registries: 'OrderedDict[str, DecorationRegistry]' = OrderedDict()
+_registries_lock = threading.Lock()
+
+
+def get_decoration_registry(decorations: Union[list, DecorationRegistry]) -> DecorationRegistry:
+    """
+    装飾リストに対応するレジストリを取得（同じ内容の設定ではコンパイル済みのものを再利用）
+
+    Args:
+        decorations: ユーザー設定の装飾リスト（コンパイル済みのレジストリはそのまま返す）
+
+    Returns:
+        DecorationRegistry
+    """
+    if isinstance(decorations, DecorationRegistry):
+        return decorations
+
+    version = get_decorations_version(decorations)
+    with _registries_lock:
+        registry = _registries.get(version)
+        if registry is not None:
+            _registries.move_to_end(version)
+            return registry
+
+    registry = DecorationRegistry(decorations, version)
+    with _registries_lock:
+        _registries[version] = registry
+        while len(_registries) > DECORATION_REGISTRY_MAX_ENTRIES:
+            _registries.popitem(last=False)
+    return registry
+
+
+def clear_registry_cache():
+    """プロセス内のレジストリキャッシュを破棄（テスト用）"""
+    with _registries_lock:
+        _registries.clear()
@@ -0,0 +1,137 @@
+"""
+インラインMarkdown記法のHTML変換
+
+段落・リスト項目・表のセルごとに呼ばれるため、正規表現はモジュール読み込み時に1度だけ
+コンパイルし、1回の走査でリンクと強調（太字・イタリック）をトークン化してHTMLを組み立てる。
+
+- リンク [text](url) は http(s):// または / で始まるURLのみ変換する（それ以外は文字列のまま）
+- 強調は * の連続（区切り文字列）を開き・閉じの対で解決するため、
+  **太字の中の *イタリック*** のような入れ子や ***太字イタリック*** も扱える
+- リンク文字列の中の強調も変換する。URL内の * は強調として扱わない
+"""
+
+import re
+from typing import Dict, List, Tuple, Union
+
+
+# リンク（許可スキームのみ）または * の連続
+INLINE_TOKEN_PATTERN = re.compile(
+    r'\[(?P<text>[^\]]+)\]\((?P<url>(?:https?://|/)[^)]*)\)'
+    r'|(?P<delim>\*+)'
+)
+
+# 強調の種類（使用する * の数 → 開きタグ・閉じタグ）
+EMPHASIS_TAGS = {
+    1: ('<em>', '</em>'),
+    2: ('<strong>', '</strong>'),
+}
+
+class Delimiter:
+    """
+    * の連続（区切り文字列）1件
+
+    対になった * の分だけ count を減らし、タグを open_tags・close_tags に積む。
+    描画時は close_tags、残った *、open_tags の順に出力する。
+    """
+
+    __slots__ = ('count', 'length', 'can_open', 'can_close', 'position', 'open_tags', 'close_tags')
+
+    def __init__(self, length: int, can_open: bool, can_close: bool, position: int):
+        self.count = length
+        self.length = length
+        self.can_open = can_open
+        self.can_close = can_close
+        self.position = position
+        self.open_tags = ''
+        self.close_tags = ''
+
+    def render(self) -> str:
+        """タグと未使用の * を出力"""
+        return self.close_tags + '*' * self.count + self.open_tags
+
+
+def _can_pair(opener: Delimiter, closer: Delimiter) -> bool:
+    """
+    CommonMark の「3の規則」: 開き・閉じの両方になれる区切りを含む組は、* の数の合計が3の倍数なら対にしない
+    （ただし両方とも3の倍数の場合は対にする）。*a**b**c* の ** が外側の * を閉じないようにする
+    """
+    if not (opener.can_close or closer.can_open):
+        return True
+    total = opener.length + closer.length
+    return total % 3 != 0 or (opener.length % 3 == 0 and closer.length % 3 == 0)
+
+
+def _resolve_emphasis(closer: Delimiter, openers: List[Delimiter], openers_bottom: Dict[Tuple[int, bool], int]):
+    """
+    閉じ区切りに対応する開き区切りをスタックから探し、使用した * をタグに置き換える
+
+    対になる開きが見つからなかった場合は、同じ種類（* の数を3で割った余り・開きになれるか）の
+    閉じ区切りが同じ範囲を再度探さないよう、探索の下限を記録する。
+    """
+    bottom_key = (closer.length % 3, closer.can_open)
+    while closer.count:
+        bottom = openers_bottom.get(bottom_key, -1)
+        index = len(openers) - 1
+        while index >= 0 and openers[index].position > bottom and not _can_pair(openers[index], closer):
+            index -= 1
+        if index < 0 or openers[index].position <= bottom:
+            if openers:
+                openers_bottom[bottom_key] = openers[-1].position
+            return
+
+        # 対になった開きと閉じの間の開きは使われない（そのまま * として残す）
+        del openers[index + 1:]
+        opener = openers[index]
+        use = 2 if opener.count >= 2 and closer.count >= 2 else 1
+        open_tag, close_tag = EMPHASIS_TAGS[use]
+
+        # 内側の強調から順に解決するため、開きタグは左へ、閉じタグは右へ積む
+        opener.open_tags = open_tag + opener.open_tags
+        closer.close_tags += close_tag
+        opener.count -= use
+        closer.count -= use
+
+        if not opener.count:
+            openers.pop()
+
+
+def convert_inline_markdown(text: str) -> str:
+    """インラインMarkdown記法をHTMLに変換"""
+    # 記法を含まないテキスト（大半の段落）は走査しない
+    if not text or ('*' not in text and '[' not in text):
+        return text
+
+    pieces: List[Union[str, Delimiter]] = []
+    openers: List[Delimiter] = []
+    openers_bottom: Dict[Tuple[int, bool], int] = {}
+    position = 0
+    length = len(text)
+
+    for match in INLINE_TOKEN_PATTERN.finditer(text):
+        start, end = match.span()
+        if start > position:
+            pieces.append(text[position:start])
+        position = end
+
+        run = match.group('delim')
+        if run is None:
+            link_text = convert_inline_markdown(match.group('text'))
+            pieces.append(f'<a href="{match.group("url")}">{link_text}</a>')
+            continue
+
+        # 前後が空白でなければ、それぞれ閉じ・開きになれる
+        can_close = start > 0 and not text[start - 1].isspace()
+        can_open = end < length and not text[end].isspace()
+        delimiter = Delimiter(len(run), can_open, can_close, start)
+        pieces.append(delimiter)
+
+        if can_close and openers:
+            _resolve_emphasis(delimiter, openers, openers_bottom)
+        if delimiter.count and can_open:
+            openers.append(delimiter)
+
+    if position < length:
+        pieces.append(text[position:])
+
+    # 未使用の * はそのまま残す
+    return ''.join(piece if isinstance(piece, str) else piece.render() for piece in pieces)
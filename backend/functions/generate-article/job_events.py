@@ -0,0 +1,197 @@
+"""
+ジョブイベントの配信（WebSocketへのプッシュ）
+
+生成ワーカーがジョブの状態を更新した時点で、購読中のクライアントにイベントを送る。
+クライアントはポーリングの代わりにイベントを受けてからジョブ状態を1回取得するため、
+状態の取得はポーリングの回数ではなく状態の変化の回数に比例する。
+
+イベント:
+- processing: 生成を開始した
+- section_ready: セクションが完成した（途中結果が更新された）
+- completed: 生成が完了した
+- failed: 生成に失敗した
+
+イベントは通知のみで記事本文は含めない（API GatewayのWebSocketのメッセージ上限は128KB）。
+本文は GET /articles/jobs/{jobId} で取得する。
+
+配信方式（JOB_EVENTS_TRANSPORT）:
+- websocket: API Gateway WebSocket API の接続に送る。購読中の接続IDは
+  ジョブテーブルの {jobId}#subscribers の項目に保持する
+- local: プロセス内のキューに送る（ローカル開発・テスト用のWebSocketの代わり）
+- none: 配信しない（クライアントはロングポーリングで状態を取得する）
+
+配信はジョブの処理とは独立しており、失敗してもジョブは継続する（ポーリングで取得できる）。
+"""
+
+import json
+import os
+import queue
+import threading
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+from aws_clients import lazy_client, lazy_table
+from utils import get_current_timestamp, log_info, log_warning
+
+
+# 環境変数
+DYNAMODB_TABLE_JOBS = os.environ.get('DYNAMODB_TABLE_JOBS', 'blog-agent-jobs')
+# WebSocket API の接続管理エンドポイント（https://{apiId}.execute-api.{region}.amazonaws.com/{stage}）
+WEBSOCKET_CALLBACK_URL = os.environ.get('WEBSOCKET_CALLBACK_URL', '')
+LOCAL_DEV = os.environ.get('LOCAL_DEV', 'false').lower() == 'true'
+JOB_EVENTS_TRANSPORT = os.environ.get(
+    'JOB_EVENTS_TRANSPORT',
+    'local' if LOCAL_DEV else ('websocket' if WEBSOCKET_CALLBACK_URL else 'none')
+)
+# 購読情報の保持期間（ジョブと同じ24時間）
+SUBSCRIPTION_TTL_HOURS = 24
+
+# イベントの種類
+JOB_EVENT_PROCESSING = 'processing'
+JOB_EVENT_SECTION_READY = 'section_ready'
+JOB_EVENT_COMPLETED = 'completed'
+JOB_EVENT_FAILED = 'failed'
+
+# ジョブのステータス -> 送るイベント（再試行待ちの pending は送らない）
+STATUS_EVENTS = {
+    'processing': JOB_EVENT_PROCESSING,
+    'completed': JOB_EVENT_COMPLETED,
+    'failed': JOB_EVENT_FAILED,
+}
+
+# クライアント初期化（WebSocketで配信する場合のみ、初回の利用時に生成）
+if JOB_EVENTS_TRANSPORT == 'websocket' and not LOCAL_DEV:
+    subscriptions_table = lazy_table(DYNAMODB_TABLE_JOBS)
+    management_api = lazy_client('apigatewaymanagementapi', endpoint_url=WEBSOCKET_CALLBACK_URL)
+else:
+    subscriptions_table = None
+    management_api = None
+
+
+class LocalJobEventBroker:
+    """プロセス内のイベント配信（ローカル開発・テスト用のWebSocketの代わり）"""
+
+    def __init__(self):
+        self._queues: Dict[str, List['queue.Queue[Dict[str, Any]]']] = {}
+        self._lock = threading.Lock()
+
+    def subscribe(self, job_id: str) -> 'queue.Queue[Dict[str, Any]]':
+        """ジョブのイベントを受け取るキューを登録"""
+        events: 'queue.Queue[Dict[str, Any]]' = queue.Queue()
+        with self._lock:
+            self._queues.setdefault(job_id, []).append(events)
+        return events
+
+    def unsubscribe(self, job_id: str, events: 'queue.Queue[Dict[str, Any]]'):
+        """キューの登録を解除"""
+        with self._lock:
+            queues = self._queues.get(job_id, [])
+            if events in queues:
+                queues.remove(events)
+            if not queues:
+                self._queues.pop(job_id, None)
+
+    def publish(self, job_id: str, event: Dict[str, Any]) -> int:
+        """登録中のキューにイベントを送る（送った数を返す）"""
+        with self._lock:
+            queues = list(self._queues.get(job_id, []))
+        for events in queues:
+            events.put(event)
+        return len(queues)
+
+
+local_broker = LocalJobEventBroker()
+
+
+def build_job_event(event_type: str, job_id: str, **data: Any) -> Dict[str, Any]:
+    """イベントのメッセージを作成"""
+    return {
+        'type': event_type,
+        'jobId': job_id,
+        'at': get_current_timestamp(),
+        **{key: value for key, value in data.items() if value is not None},
+    }
+
+
+def subscriptions_key(job_id: str) -> str:
+    """購読中の接続IDの保存先のキー（ジョブテーブルにジョブと並べて保存する）"""
+    return f'{job_id}#subscribers'
+
+
+def add_subscriber(job_id: str, connection_id: str):
+    """WebSocketの接続をジョブの購読者に追加"""
+    subscriptions_table.update_item(
+        Key={'jobId': subscriptions_key(job_id)},
+        UpdateExpression='ADD connectionIds :ids SET #ttl = :ttl',
+        ExpressionAttributeNames={'#ttl': 'ttl'},
+        ExpressionAttributeValues={
+            ':ids': {connection_id},
+            ':ttl': int((datetime.now() + timedelta(hours=SUBSCRIPTION_TTL_HOURS)).timestamp()),
+        }
+    )
+
+
+def remove_subscriber(job_id: str, connection_id: str):
+    """切断済みの接続をジョブの購読者から削除"""
+    subscriptions_table.update_item(
+        Key={'jobId': subscriptions_key(job_id)},
+        UpdateExpression='DELETE connectionIds :ids',
+        ExpressionAttributeValues={':ids': {connection_id}}
+    )
+
+
+def get_subscribers(job_id: str) -> List[str]:
+    """ジョブを購読中の接続IDを取得"""
+    item = subscriptions_table.get_item(Key={'jobId': subscriptions_key(job_id)}).get('Item')
+    return sorted(item.get('connectionIds') or []) if item else []
+
+
+def send_to_connection(connection_id: str, event: Dict[str, Any]) -> bool:
+    """
+    WebSocketの接続にイベントを送る
+
+    Returns:
+        送れた場合はTrue、接続が既に切れている場合はFalse
+    """
+    try:
+        management_api.post_to_connection(
+            ConnectionId=connection_id,
+            Data=json.dumps(event, ensure_ascii=False, default=str).encode('utf-8')
+        )
+        return True
+    except management_api.exceptions.GoneException:
+        return False
+
+
+def publish_job_event(job_id: str, event_type: str, **data: Any) -> Optional[Dict[str, Any]]:
+    """
+    ジョブのイベントを購読中のクライアントに配信
+
+    Args:
+        job_id: ジョブID
+        event_type: イベントの種類（JOB_EVENT_*）
+        **data: イベントに含める値（Noneの値は含めない）
+
+    Returns:
+        配信したイベント（配信しない設定・失敗時はNone）
+    """
+    if JOB_EVENTS_TRANSPORT not in ('websocket', 'local'):
+        return None
+
+    event = build_job_event(event_type, job_id, **data)
+    try:
+        if JOB_EVENTS_TRANSPORT == 'local':
+            delivered = local_broker.publish(job_id, event)
+        else:
+            delivered = 0
+            for connection_id in get_subscribers(job_id):
+                if send_to_connection(connection_id, event):
+                    delivered += 1
+                else:
+                    remove_subscriber(job_id, connection_id)
+    except Exception as e:
+        log_warning('Failed to publish job event', job_id=job_id, event_type=event_type, error=str(e))
+        return None
+
+    log_info('Job event published', job_id=job_id, event_type=event_type, delivered=delivered)
+    return event
@@ -0,0 +1,159 @@
+"""
+長文モードの分割計画
+
+3万〜5万文字の記事を、アウトライン → 連続するセクションのチャンクごとの執筆 → 結合の順に生成する。
+チャンクの執筆には生成済みの本文ではなく要約（ローリングサマリー）を渡すため、
+1回のAPI呼び出しのプロンプト・出力・メモリはチャンクの大きさで頭打ちになる。
+Lambdaの残り時間が足りない場合は、状態をジョブに保存してSQSの次のステップへ引き継ぐ。
+
+- plan_section_range(): 目標文字数からアウトラインのセクション数の範囲を決定
+- plan_chunks(): アウトラインを執筆単位（連続するセクション）に分割
+- merge_chunk_sections(): チャンクの出力をアウトラインの見出しに合わせて整える（不足時は LongformChunkError）
+- compact_call_metrics() / restore_call_metrics() / to_dynamodb_value(): ジョブへの保存・読み込み用の変換
+"""
+
+import json
+import math
+import os
+from decimal import Decimal
+from typing import Any, Dict, List, Tuple
+
+
+# 環境変数
+# 1セクションあたりの目安の文字数
+LONGFORM_SECTION_CHARS = int(os.environ.get('LONGFORM_SECTION_CHARS', '2500'))
+# 1回のAPI呼び出しで執筆する文字数の上限（1セクションがこれを超える場合はそのセクションのみ）
+LONGFORM_CHUNK_CHARS = int(os.environ.get('LONGFORM_CHUNK_CHARS', '3000'))
+# 要約の最大文字数
+LONGFORM_SUMMARY_MAX_CHARS = int(os.environ.get('LONGFORM_SUMMARY_MAX_CHARS', '1200'))
+# 次のチャンクを同じ実行内で書き始めるのに必要な残り時間（足りなければSQSの次のステップへ）
+LONGFORM_MIN_CHUNK_SECONDS = float(os.environ.get('LONGFORM_MIN_CHUNK_SECONDS', '150'))
+# 出力が不足・途切れたチャンクを書き直す回数の上限（最後の回は回収できたセクションで続ける）
+LONGFORM_MAX_CHUNK_ATTEMPTS = int(os.environ.get('LONGFORM_MAX_CHUNK_ATTEMPTS', '3'))
+
+# アウトラインのセクション数の範囲
+LONGFORM_MIN_SECTIONS = 4
+LONGFORM_MAX_SECTIONS = 30
+
+# ジョブに保存する計測値の項目（整数・文字列のみ）
+CALL_METRIC_KEYS = (
+    'task', 'model', 'inputTokens', 'outputTokens', 'cacheCreationInputTokens', 'cacheReadInputTokens',
+    'retries', 'latencyMs', 'timeToFirstTokenMs', 'stopReason',
+)
+
+
+def plan_section_range(word_count: int) -> Tuple[int, int]:
+    """
+    目標文字数からアウトラインのセクション数の範囲を決定
+
+    Returns:
+        (最小セクション数, 最大セクション数)
+    """
+    target = max(1, round(word_count / LONGFORM_SECTION_CHARS))
+    min_sections = max(LONGFORM_MIN_SECTIONS, math.floor(target * 0.8))
+    max_sections = min(LONGFORM_MAX_SECTIONS, max(min_sections, math.ceil(target * 1.2)))
+    return min(min_sections, max_sections), max_sections
+
+
+def plan_chunks(outline_sections: List[Dict[str, Any]], word_count: int) -> List[List[int]]:
+    """
+    アウトラインを連続するセクションのチャンクに分割
+
+    各チャンクの targetChars の合計が LONGFORM_CHUNK_CHARS 以下になるように先頭から詰める。
+    同じアウトラインからは常に同じ分割になるため、ステップをまたいで再計算しても一致する。
+
+    Returns:
+        [[開始インデックス, 終了インデックス（含まない）], ...]
+    """
+    default_chars = word_count // max(len(outline_sections), 1)
+    chunks: List[List[int]] = []
+    start = 0
+    chunk_chars = 0
+    for i, section in enumerate(outline_sections):
+        chars = section_target_chars(section, default_chars)
+        if i > start and chunk_chars + chars > LONGFORM_CHUNK_CHARS:
+            chunks.append([start, i])
+            start = i
+            chunk_chars = 0
+        chunk_chars += chars
+    if start < len(outline_sections):
+        chunks.append([start, len(outline_sections)])
+    return chunks
+
+
+def section_target_chars(section: Dict[str, Any], default_chars: int) -> int:
+    """アウトラインのセクションの目標文字数（未指定・不正な値は既定値）"""
+    value = section.get('targetChars')
+    if isinstance(value, (int, float, Decimal)) and value > 0:
+        return int(value)
+    return default_chars
+
+
+class LongformChunkError(ValueError):
+    """チャンクの出力が指定セクション数に満たない（同じチャンクを書き直す）"""
+
+    def __init__(self, message: str, sections: List[Dict[str, Any]]):
+        super().__init__(message)
+        # 出力に含まれていたセクション（書き直しの上限に達した場合に使う）
+        self.sections = sections
+
+
+def merge_chunk_sections(
+    outline_sections: List[Dict[str, Any]],
+    start: int,
+    end: int,
+    generated: Any
+) -> List[Dict[str, Any]]:
+    """
+    チャンクの出力をアウトラインのセクションに対応付ける
+
+    見出しはアウトラインのものを正とし、出力が足りない場合はエラーにする
+    （呼び出し元が同じチャンクを書き直す）。
+
+    Raises:
+        LongformChunkError: 指定したセクション数に出力が満たない場合（出力に含まれていた分を保持）
+    """
+    if not isinstance(generated, list):
+        generated = []
+
+    sections = []
+    for offset, index in enumerate(range(start, min(end, start + len(generated)))):
+        section = generated[offset] if isinstance(generated[offset], dict) else {}
+        sections.append({
+            'heading': outline_sections[index].get('heading') or section.get('heading', ''),
+            'blocks': section.get('blocks', []),
+        })
+    if len(sections) < end - start:
+        raise LongformChunkError(f'長文モードのセクション{start + 1}〜{end}の生成結果が不足しています', sections)
+    return sections
+
+
+def trim_summary(summary: Any) -> str:
+    """要約を最大文字数に収める（超えた場合は末尾を残す＝直近の内容を優先）"""
+    if not isinstance(summary, str):
+        return ''
+    summary = summary.strip()
+    if len(summary) > LONGFORM_SUMMARY_MAX_CHARS:
+        summary = summary[-LONGFORM_SUMMARY_MAX_CHARS:]
+    return summary
+
+
+def compact_call_metrics(call: Dict[str, Any]) -> Dict[str, Any]:
+    """API呼び出しの計測値から集計に使う項目のみを残す（ジョブに保存するため浮動小数点数を含めない）"""
+    return {key: call[key] for key in CALL_METRIC_KEYS if call.get(key) is not None}
+
+
+def restore_call_metrics(call: Dict[str, Any]) -> Dict[str, Any]:
+    """ジョブから読み込んだ計測値のDecimalを整数に戻す"""
+    return {key: int(value) if isinstance(value, Decimal) else value for key, value in call.items()}
+
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, Decimal):
+        return int(value) if value % 1 == 0 else float(value)
+    return str(value)
+
+
+def to_dynamodb_value(value: Any) -> Any:
+    """JSON由来の値の浮動小数点数をDecimalに変換（DynamoDBはfloatを受け付けない）"""
+    return json.loads(json.dumps(value, ensure_ascii=False, default=_json_default), parse_float=Decimal)
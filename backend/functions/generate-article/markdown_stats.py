@@ -0,0 +1,228 @@
+"""
+Markdownの統計（1回の走査）
+
+文字数・読了時間・見出しの一覧と階層・構造上の問題点・コードブロックの範囲を
+行単位の1回の走査で求める。結果は内容のハッシュをキーにプロセス内LRUで保持し、
+同じ本文を検証・メタ生成・チャット編集で繰り返し解析しないようにする。
+
+- コードブロック（``` または ~~~ で囲まれた範囲）は文字数・見出しの対象外
+- 見出し記号・リスト記号・引用記号・強調記号・インラインコード・画像・装飾ボックスの
+  区切り行（:::）は文字数に含めず、リンクは表示テキストのみ数える
+
+generate-article/markdown_stats.py と chat-edit/markdown_stats.py は同一内容。
+Lambda関数ごとにデプロイされるため、同じファイルを配置する。
+"""
+
+import hashlib
+import os
+import re
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List
+
+
+# 環境変数
+MARKDOWN_STATS_MAX_ENTRIES = int(os.environ.get('MARKDOWN_STATS_MAX_ENTRIES', '64'))
+
+# 1分あたりの読み文字数
+CHARS_PER_MINUTE = 400
+# 推奨するH2見出しの最大数（通常の記事）
+H2_MAX_COUNT = 8
+
+HEADING_PATTERN = re.compile(r'(#{1,6})\s+(.+)')
+# 行頭の引用記号・リスト記号
+LINE_PREFIX_PATTERN = re.compile(r'^(?:>[ \t]*)+(?:[-+*][ \t]+|\d+\.[ \t]+)?|^(?:[-+*]|\d+\.)[ \t]+', re.MULTILINE)
+# インラインコード・画像（除去）
+INLINE_CODE_IMAGE_PATTERN = re.compile(r'`[^`]+`|!\[[^\]]*\]\([^)]+\)')
+# リンク（表示テキストに置換）
+LINK_PATTERN = re.compile(r'\[([^\]]+)\]\([^)]+\)')
+FENCES = ('```', '~~~')
+# 行単位の判定が必要な行の先頭文字（コードブロック・見出し・装飾ボックス）
+SPECIAL_LINE_STARTS = frozenset('`~#:')
+
+
+def reading_time_for_characters(char_count: int, chars_per_minute: int = CHARS_PER_MINUTE) -> int:
+    """
+    文字数から読了時間を推定（分単位）
+
+    Args:
+        char_count: 本文の文字数
+        chars_per_minute: 1分あたりの読み文字数
+
+    Returns:
+        推定読了時間（分）
+    """
+    minutes = char_count / chars_per_minute
+    return max(1, round(minutes))
+
+
+def check_h2_count(h2_count: int, max_h2: int = H2_MAX_COUNT) -> List[str]:
+    """
+    H2見出しの数を検証
+
+    Args:
+        h2_count: H2見出しの数
+        max_h2: 推奨するH2見出しの最大数（長文モードなどアウトラインで見出し数を決めた場合はその数）
+
+    Returns:
+        問題点のリスト
+    """
+    if h2_count < 2:
+        return ['H2見出しは最低2つ必要です']
+    if h2_count > max_h2:
+        return [f'H2見出しが多すぎます（{max_h2}個以下推奨）']
+    return []
+
+
+def _count_body_characters(body_lines: List[str]) -> int:
+    """本文の行（行頭の空白は除去済み）から記法と空白を除いた文字数を求める"""
+    text = LINE_PREFIX_PATTERN.sub('', '\n'.join(body_lines))
+    if '`' in text or '![' in text:
+        text = INLINE_CODE_IMAGE_PATTERN.sub('', text)
+    if '](' in text:
+        text = LINK_PATTERN.sub(r'\1', text)
+    # 強調記号を除去
+    text = text.replace('*', '').replace('_', '')
+    return len(''.join(text.split()))
+
+
+def _scan(markdown: str) -> Dict[str, Any]:
+    """
+    Markdownを1行ずつ走査して統計を求める
+
+    行ごとの判定はコードブロック・見出しの検出のみとし、文字数は本文の行をまとめて数える。
+    """
+    body_lines: List[str] = []
+    headings: List[Dict[str, Any]] = []
+    heading_tree: List[Dict[str, Any]] = []
+    code_blocks: List[Dict[str, int]] = []
+    issues: List[str] = []
+
+    # 見出しの階層（各レベルの直近の見出しノード）
+    stack: List[Dict[str, Any]] = []
+    prev_level = 1
+    has_h1 = False
+    h2_count = 0
+    fence = None
+    fence_start = 0
+
+    lines = markdown.split('\n')
+    for line_number, line in enumerate(lines, 1):
+        stripped = line.lstrip()
+
+        # コードブロックの終了
+        if fence is not None:
+            if stripped.startswith(fence):
+                code_blocks.append({'startLine': fence_start, 'endLine': line_number})
+                fence = None
+            continue
+
+        # 大半を占める通常の行
+        if not stripped:
+            continue
+        if stripped[0] not in SPECIAL_LINE_STARTS:
+            body_lines.append(stripped)
+            continue
+
+        # コードブロックの開始
+        if stripped.startswith(FENCES):
+            fence = stripped[:3]
+            fence_start = line_number
+            continue
+        if stripped.startswith(':::'):
+            continue
+
+        if stripped[0] == '#':
+            match = HEADING_PATTERN.fullmatch(line.rstrip())
+            if match:
+                level = len(match.group(1))
+                text = match.group(2).strip()
+                body_lines.append(text)
+
+                heading = {'level': level, 'text': text, 'line': line_number}
+                headings.append(heading)
+
+                if level == 1:
+                    has_h1 = True
+                elif level == 2:
+                    h2_count += 1
+                if level > prev_level + 1:
+                    issues.append(f'見出し階層がスキップされています: {text}')
+                prev_level = level
+
+                node = {**heading, 'children': []}
+                while stack and stack[-1]['level'] >= level:
+                    stack.pop()
+                (stack[-1]['children'] if stack else heading_tree).append(node)
+                stack.append(node)
+                continue
+
+        body_lines.append(stripped)
+
+    if fence is not None:
+        # 閉じられていないコードブロックは末尾まで
+        code_blocks.append({'startLine': fence_start, 'endLine': len(lines)})
+
+    # 問題点は validate_markdown_structure と同じ順序（H1 → H2の数 → 階層）
+    head_issues = ['H1見出しは使用しないでください'] if has_h1 else []
+    issues = head_issues + check_h2_count(h2_count) + issues
+    char_count = _count_body_characters(body_lines)
+
+    return {
+        'charCount': char_count,
+        'readingTime': reading_time_for_characters(char_count),
+        'headings': headings,
+        'headingTree': heading_tree,
+        'headingCount': len(headings),
+        'h2Count': h2_count,
+        'issues': issues,
+        'valid': len(issues) == 0,
+        'codeBlocks': code_blocks,
+    }
+
+
+_stats_cache: 'OrderedDict[str, Dict[str, Any]]' = OrderedDict()
+_stats_cache_lock = threading.Lock()
+
+
+def get_markdown_stats(markdown: str) -> Dict[str, Any]:
+    """
+    Markdownの統計を取得（同じ内容の結果は再利用する）
+
+    返り値はキャッシュと共有するため、呼び出し側で変更しないこと。
+
+    Args:
+        markdown: Markdownテキスト
+
+    Returns:
+        {
+            'charCount': 文字数,
+            'readingTime': 読了時間（分）,
+            'headings': [{'level', 'text', 'line'}, ...],
+            'headingTree': [{'level', 'text', 'line', 'children': [...]}, ...],
+            'headingCount': 見出し数,
+            'h2Count': H2見出し数,
+            'issues': 構造上の問題点,
+            'valid': 問題がないか,
+            'codeBlocks': [{'startLine', 'endLine'}, ...]
+        }
+    """
+    key = hashlib.sha256(markdown.encode('utf-8')).hexdigest()
+    with _stats_cache_lock:
+        cached = _stats_cache.get(key)
+        if cached is not None:
+            _stats_cache.move_to_end(key)
+            return cached
+
+    stats = _scan(markdown)
+    with _stats_cache_lock:
+        _stats_cache[key] = stats
+        while len(_stats_cache) > MARKDOWN_STATS_MAX_ENTRIES:
+            _stats_cache.popitem(last=False)
+    return stats
+
+
+def clear_stats_cache():
+    """統計のキャッシュを破棄（テスト用）"""
+    with _stats_cache_lock:
+        _stats_cache.clear()
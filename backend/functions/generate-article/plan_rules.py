@@ -0,0 +1,71 @@
+"""
+プランルール定義（Source of Truth）- 記事生成用コピー
+
+subscription/plan_rules.py と同一内容。
+Lambda関数ごとにデプロイされるため、同じファイルを配置する。
+"""
+
+PLAN_RULES = {
+    "trialing": {
+        "article_limit": 10,
+        "decoration_limit": 20,
+        "features": {
+            "export": True,
+            "advanced_prompt": False,
+            "parallel_generation": False,
+            "longform_generation": False,
+        },
+    },
+    "starter": {
+        "article_limit": 20,
+        "decoration_limit": 50,
+        "features": {
+            "export": True,
+            "advanced_prompt": False,
+            "parallel_generation": True,
+            "longform_generation": False,
+        },
+    },
+    "pro": {
+        "article_limit": 150,
+        "decoration_limit": -1,  # 無制限
+        "features": {
+            "export": True,
+            "advanced_prompt": True,
+            "parallel_generation": True,
+            "longform_generation": True,
+        },
+    },
+    "canceled": {
+        "article_limit": 0,
+        "decoration_limit": 0,
+        "features": {
+            "export": True,  # 閲覧・エクスポートは可能
+            "advanced_prompt": False,
+            "parallel_generation": False,
+            "longform_generation": False,
+        },
+    },
+}
+
+
+def get_effective_plan(user: dict) -> str:
+    """
+    ユーザーの課金状態から有効プランを判定する。
+
+    - trialing → 'trialing'
+    - active / past_due → user['plan_type'] ('starter' or 'pro')
+    - canceled / unpaid / その他 → 'canceled'
+    """
+    status = user.get("subscription_status", "")
+    if status == "trialing":
+        return "trialing"
+    if status in ("active", "past_due"):
+        return user.get("plan_type", "starter")
+    return "canceled"
+
+
+def get_plan_rules(user: dict) -> dict:
+    """ユーザーの有効プランに対応するルールを返す"""
+    plan = get_effective_plan(user)
+    return PLAN_RULES.get(plan, PLAN_RULES["canceled"])
@@ -5,6 +5,9 @@ Phase 2: P2-01〜P2-04のプロンプト設計を実装
 
 from typing import TypedDict, List, Optional, Literal
 
+from prompt_fragments import get_prompt_fragment
+from style_digest import get_format_digest
+
 
 # 型定義
 class ArticleStyleSettings(TypedDict, total=False):
@@ -78,6 +81,9 @@ class UserSettings(TypedDict, total=False):
     decorations: DecorationSettings
     seo: SeoSettings
     sampleArticles: List[SampleArticle]
+    # digest: サンプル記事のダイジェストを参照（既定） / full: サンプル記事の全文を参照
+    sampleArticleMode: Literal['digest', 'full']
+    sampleDigest: dict
 
 
 class ArticleInput(TypedDict, total=False):
@@ -290,6 +296,75 @@ def build_sample_article_context(
 上記のサンプル記事と同様の雰囲気・文体で新しい記事を生成してください。"""
 
 
+def build_sample_digest_context(digest: Optional[dict], output_format: str = 'wordpress') -> str:
+    """
+    サンプル記事のダイジェスト（文体の分析結果と抜粋）から参考スタイルの指示を構築
+    全文を渡す build_sample_article_context より大幅に短い
+    """
+    if not digest:
+        return ""
+
+    sentences = digest.get('sentences', {})
+    paragraphs = digest.get('paragraphs', {})
+    sample_count = max(int(digest.get('sampleCount', 1)), 1)
+    structure = digest.get('structure', {})
+
+    endings = ' / '.join(f"{e['ending']} {e['percent']}%" for e in digest.get('endings', []))
+    lines = [
+        "## 参考スタイル（重要）",
+        f"以下はサンプル記事{sample_count}件の文体を分析した結果と抜粋です。同様の文体・構成で記事を生成してください。",
+        "",
+        "### 文の長さ",
+        f"- 一文の平均: {sentences.get('avgChars', 0)}文字"
+        f"（中央値{sentences.get('medianChars', 0)}文字、9割が{sentences.get('p90Chars', 0)}文字以内）",
+        f"- 30文字以下の短い文: {sentences.get('shortPercent', 0)}% / 60文字を超える長い文: {sentences.get('longPercent', 0)}%",
+        f"- 1段落あたり平均{paragraphs.get('avgSentences', 0)}文",
+        "",
+        "### 文末表現の割合",
+        f"- {endings or 'なし'}",
+        f"- 疑問文: {sentences.get('questionPercent', 0)}% / 感嘆文: {sentences.get('exclamationPercent', 0)}%",
+        "",
+        "### 構成（1記事あたり）",
+        f"- H2見出し: {round(int(structure.get('h2', 0)) / sample_count)}個 / "
+        f"H3見出し: {round(int(structure.get('h3', 0)) / sample_count)}個 / "
+        f"リスト: {round(int(structure.get('lists', 0)) / sample_count)}個 / "
+        f"表: {round(int(structure.get('tables', 0)) / sample_count)}個",
+    ]
+
+    # Markdown用は装飾の使い方を除外
+    decorations = digest.get('decorations', [])
+    if output_format != 'markdown' and decorations:
+        lines += ["", "### 装飾の使い方"]
+        for dec in decorations:
+            example = f"（例: {dec['example']}）" if dec.get('example') else ''
+            lines.append(f"- {dec['name']}: {dec['count']}回{example}")
+
+    lines += ["", "### 抜粋"]
+    for i, excerpt in enumerate(digest.get('excerpts', []), 1):
+        lines.append(f"""#### サンプル記事{i}: {excerpt.get('title', '')}
+導入:
+```
+{excerpt.get('intro', '')}
+```
+まとめ:
+```
+{excerpt.get('closing', '')}
+```""")
+
+    lines += ["", "上記のサンプル記事と同様の雰囲気・文体で新しい記事を生成してください。"]
+    return '\n'.join(lines)
+
+
+def build_sample_style_context(settings: UserSettings, output_format: str = 'wordpress') -> str:
+    """
+    ユーザー設定から参考スタイルの指示を構築
+    既定ではダイジェストを使い、sampleArticleMode が full の場合はサンプル記事の全文を使う
+    """
+    if settings.get('sampleArticleMode') == 'full':
+        return build_sample_article_context(settings.get('sampleArticles', []), output_format)
+    return build_sample_digest_context(get_format_digest(settings, output_format), output_format)
+
+
 def build_internal_links_instructions(links: List[InternalLink]) -> str:
     """
     P2-04: 内部リンク挿入プロンプト
@@ -596,147 +671,95 @@ def get_enabled_decorations(decorations: List[DecorationWithRoles]) -> List[dict
     return enabled
 
 
-def build_structure_prompt(body: ArticleInput, settings: Optional[UserSettings] = None) -> str:
-    """
-    Step 1: 記事構造をJSON形式で生成
-    Claudeは利用可能な装飾の中から適切なものを選び、decorationIdを直接指定する
-    boxスキーマの装飾にはtitleを付ける
-    """
-    settings = settings or {}
-
-    # 基本情報
-    title = body.get('title', '')
-    target_audience = body.get('targetAudience', '一般')
-    purpose = body.get('purpose', '情報提供')
-    keywords = body.get('keywords', [])
-    content_points = body.get('contentPoints', '')
-    word_count = body.get('wordCount', 1500)
-    article_type = body.get('articleType', 'info')
-    internal_links = body.get('internalLinks', [])
-
-    # 設定から取得
-    article_style = settings.get('articleStyle', {})
-    decorations = settings.get('decorations', [])
-    sample_articles = settings.get('sampleArticles', [])
-
-    # 有効な装飾の詳細を取得
-    enabled_decorations = get_enabled_decorations(decorations) if isinstance(decorations, list) else []
-
-    # 文体指示
-    style_instructions = build_style_instructions(article_style)
-
-    # サンプル記事コンテキスト
-    sample_context = build_sample_article_context(sample_articles, 'wordpress')
-
-    # 記事タイプ指示
-    article_type_instructions = build_article_type_instructions(article_type)
-
-    # 内部リンク指示
-    internal_link_instructions = build_internal_links_instructions(internal_links)
-
-    # 利用可能な装飾の説明
-    decorations_explanation = ""
-    if enabled_decorations:
-        decoration_list = []
-        for dec in enabled_decorations:
-            schema = dec.get('schema', 'paragraph')
-            schema_desc = SCHEMA_DESCRIPTIONS.get(schema, '')
-            roles = ', '.join(dec.get('roles', []))
-            decoration_list.append(f'''- **{dec["id"]}** ({dec["label"]})
-  - スキーマ: {schema} - {schema_desc}
-  - 用途: {roles}''')
-
-        decorations_explanation = f"""## 利用可能な装飾（重要）
-以下の装飾のみ使用できます。**これ以外の装飾IDは使用禁止です。**
-
-{chr(10).join(decoration_list)}
-
-### 装飾使用のガイドライン
-- 装飾を使う場合は、上記リストのdecorationIdを指定する
-- スキーマの種類に応じて適切に使い分ける:
-  - paragraph（ハイライト）: **文中の強調したいフレーズやキーワードのみに適用**（一文全体ではなく、数語〜10語程度の短い表現）
-  - box: まとまった情報をボックスで囲みたい場合
-- 同じdecorationIdを連続して使わない
-- 1記事内で同じdecorationIdは最大3回まで
-- 装飾が不要な通常の段落はdecorationIdを省略する
-
-### boxスキーマの装飾について（重要）
-- **title**: 内容を短く要約した見出し（10〜20文字程度）
-- **content**: ボックス内の本文。**2〜3文で簡潔にまとめる、または箇条書きで整理する**
-  - 長々と書かず、要点を絞って記述する
-  - 箇条書きの場合は3〜5項目程度"""
-
-    prompt = f"""あなたはブログ記事生成の専門家です。以下の情報をもとに、記事の構造をJSON形式で生成してください。
-
-## 記事情報
-- タイトル: {title}
-- 対象読者: {target_audience}
-- 記事の目的: {purpose}
-- キーワード: {', '.join(keywords) if keywords else 'なし'}
-- 目標文字数: {word_count}文字程度
-
-## 内容要件
-{content_points}
-
-## 文体・スタイル
-{style_instructions}
-
-{article_type_instructions}
+# ============================================================
+# プロンプトキャッシュ対応
+# 固定プレフィックス（system）とリクエスト固有のサフィックス（user）に分割する
+# system[0]: 全ユーザー共通の固定指示
+# system[1]: ユーザー設定由来の指示（装飾・文体・サンプル記事）
+# ============================================================
 
-{decorations_explanation}
+# ブロックタイプと装飾の指定方法（構造生成・セクション生成で共通）
+BLOCK_FORMAT_INSTRUCTIONS = """## ブロックタイプ
+- "paragraph": 通常の段落（decorationIdで装飾可能）
+- "list": リスト（listType: "unordered" または "ordered"、decorationIdで装飾可能）
+- "subsection": H3小見出しセクション（blocks配列を含む）
+- "table": 表（headers: 列見出しの配列、rows: 行データの2次元配列、decorationIdで装飾可能）
+- "callout": コールアウト（content: 本文、buttonText: ボタンテキスト、buttonUrl: ボタンURL、decorationIdで装飾可能）
 
-{sample_context}
+## 装飾の指定方法
+- paragraphへのbox装飾:
+  - decorationIdとtitleを両方指定
+  - title: 短い見出し（10〜20文字）
+  - content: **2〜3文で簡潔にまとめる**
+- listへのbox装飾（まとめリストなど）:
+  - decorationIdとtitleを両方指定
+  - title: 短い見出し（10〜20文字）
+  - items: リスト項目の配列
+- paragraphスキーマの装飾（ハイライト）:
+  - decorationIdのみ指定（titleは不要）
+  - content: **文中の強調したいフレーズのみ**（一文全体ではなく、数語〜10語程度）
+- tableへの装飾:
+  - decorationId: "ba-table"
+  - headers: 列見出しの配列（例: ["項目", "内容", "備考"]）
+  - rows: 行データの2次元配列（例: [["項目1", "説明1", "補足1"], ["項目2", "説明2", "補足2"]]）
+- calloutへの装飾:
+  - decorationId: "ba-callout"
+  - content: コールアウトの本文
+  - buttonText: ボタンに表示するテキスト
+  - buttonUrl: ボタンのリンク先URL
+  - title: オプションで見出しを付けられる
+- 装飾なし: decorationIdを省略"""
 
-{internal_link_instructions}
+STRUCTURE_SYSTEM_PROMPT = """あなたはブログ記事生成の専門家です。ユーザーから与えられる記事情報をもとに、記事の構造をJSON形式で生成してください。
 
 ## 出力形式（JSON）
 以下の形式で記事構造を出力してください。**必ずJSONのみを出力し、他の説明は不要です。**
 
 ```json
-{{
+{
   "title": "記事タイトル",
   "sections": [
-    {{
+    {
       "heading": "H2見出し",
       "blocks": [
-        {{
+        {
           "type": "paragraph",
           "content": "通常の段落です。ここには記事の本文を記載します。読者に伝えたい情報を分かりやすく説明してください。"
-        }},
-        {{
+        },
+        {
           "type": "paragraph",
           "content": "この方法を使うと効率が大幅に上がります。具体的には作業時間を半分に削減できます。",
           "decorationId": "ba-point",
           "title": "効率化のポイント"
-        }},
-        {{
+        },
+        {
           "type": "paragraph",
           "content": "文中の**重要なフレーズ**のみに適用",
           "decorationId": "ba-highlight"
-        }},
-        {{
+        },
+        {
           "type": "list",
           "listType": "unordered",
           "items": ["項目1の説明文", "項目2の説明文", "項目3の説明文"]
-        }},
-        {{
+        },
+        {
           "type": "list",
           "listType": "ordered",
           "items": ["まとめ項目1", "まとめ項目2", "まとめ項目3"],
           "decorationId": "ba-summary-list",
           "title": "この記事のまとめ"
-        }},
-        {{
+        },
+        {
           "type": "subsection",
           "heading": "H3見出し",
           "blocks": [
-            {{
+            {
               "type": "paragraph",
               "content": "小見出し内の詳細な説明を記載します。"
-            }}
+            }
           ]
-        }},
-        {{
+        },
+        {
           "type": "table",
           "headers": ["項目", "内容", "備考"],
           "rows": [
@@ -744,54 +767,25 @@ def build_structure_prompt(body: ArticleInput, settings: Optional[UserSettings]
             ["項目2", "説明文2", "補足2"]
           ],
           "decorationId": "ba-table"
-        }},
-        {{
+        },
+        {
           "type": "callout",
           "content": "今すぐ始めたい方は、こちらのリンクからお申し込みください。",
           "buttonText": "詳細を見る",
           "buttonUrl": "https://example.com",
           "decorationId": "ba-callout",
           "title": "お得な情報"
-        }}
+        }
       ]
-    }}
+    }
   ],
-  "meta": {{
+  "meta": {
     "metaDescription": "メタディスクリプション（140文字以内）"
-  }}
-}}
+  }
+}
 ```
 
-## ブロックタイプ
-- "paragraph": 通常の段落（decorationIdで装飾可能）
-- "list": リスト（listType: "unordered" または "ordered"、decorationIdで装飾可能）
-- "subsection": H3小見出しセクション（blocks配列を含む）
-- "table": 表（headers: 列見出しの配列、rows: 行データの2次元配列、decorationIdで装飾可能）
-- "callout": コールアウト（content: 本文、buttonText: ボタンテキスト、buttonUrl: ボタンURL、decorationIdで装飾可能）
-
-## 装飾の指定方法
-- paragraphへのbox装飾:
-  - decorationIdとtitleを両方指定
-  - title: 短い見出し（10〜20文字）
-  - content: **2〜3文で簡潔にまとめる**
-- listへのbox装飾（まとめリストなど）:
-  - decorationIdとtitleを両方指定
-  - title: 短い見出し（10〜20文字）
-  - items: リスト項目の配列
-- paragraphスキーマの装飾（ハイライト）:
-  - decorationIdのみ指定（titleは不要）
-  - content: **文中の強調したいフレーズのみ**（一文全体ではなく、数語〜10語程度）
-- tableへの装飾:
-  - decorationId: "ba-table"
-  - headers: 列見出しの配列（例: ["項目", "内容", "備考"]）
-  - rows: 行データの2次元配列（例: [["項目1", "説明1", "補足1"], ["項目2", "説明2", "補足2"]]）
-- calloutへの装飾:
-  - decorationId: "ba-callout"
-  - content: コールアウトの本文
-  - buttonText: ボタンに表示するテキスト
-  - buttonUrl: ボタンのリンク先URL
-  - title: オプションで見出しを付けられる
-- 装飾なし: decorationIdを省略
+""" + BLOCK_FORMAT_INSTRUCTIONS + """
 
 ## 制約条件
 - sections数（H2見出し）: 3〜6個
@@ -799,11 +793,610 @@ def build_structure_prompt(body: ArticleInput, settings: Optional[UserSettings]
 - 装飾付きブロック: 記事全体で2〜5箇所
 - 同じdecorationIdの連続使用禁止
 - 同じdecorationIdは記事内で最大3回
-- **利用可能な装飾リストにないdecorationIdは絶対に使用しない**
+- **利用可能な装飾リストにないdecorationIdは絶対に使用しない**"""
+
+
+# 構造化出力用のツール定義（tool_choiceで強制し、入力JSONとして記事構造を受け取る）
+STRUCTURE_TOOL_NAME = 'submit_article_structure'
+
+STRUCTURE_BLOCK_SCHEMA = {
+    'type': 'object',
+    'properties': {
+        'type': {'type': 'string', 'enum': ['paragraph', 'list', 'subsection', 'table', 'callout']},
+        'content': {'type': 'string'},
+        'title': {'type': 'string'},
+        'decorationId': {'type': 'string'},
+        'listType': {'type': 'string', 'enum': ['unordered', 'ordered']},
+        'items': {'type': 'array', 'items': {'type': 'string'}},
+        'heading': {'type': 'string'},
+        # subsection内のブロック（同じ形式。スキーマの再帰は避けて緩く定義する）
+        'blocks': {'type': 'array', 'items': {'type': 'object'}},
+        'headers': {'type': 'array', 'items': {'type': 'string'}},
+        'rows': {'type': 'array', 'items': {'type': 'array', 'items': {'type': 'string'}}},
+        'buttonText': {'type': 'string'},
+        'buttonUrl': {'type': 'string'},
+    },
+    'required': ['type'],
+}
+
+STRUCTURE_TOOL = {
+    'name': STRUCTURE_TOOL_NAME,
+    'description': '生成した記事構造を提出する。出力形式の説明に従ったJSONを入力として渡す。',
+    'input_schema': {
+        'type': 'object',
+        'properties': {
+            'title': {'type': 'string'},
+            'sections': {
+                'type': 'array',
+                'items': {
+                    'type': 'object',
+                    'properties': {
+                        'heading': {'type': 'string'},
+                        'blocks': {'type': 'array', 'items': STRUCTURE_BLOCK_SCHEMA},
+                    },
+                    'required': ['heading', 'blocks'],
+                },
+            },
+            'meta': {
+                'type': 'object',
+                'properties': {'metaDescription': {'type': 'string'}},
+            },
+        },
+        'required': ['title', 'sections'],
+    },
+}
+
+
+def build_cached_system(*parts: str) -> List[dict]:
+    """
+    プロンプトキャッシュ用のsystemブロックを構築
+    空でない各パートの末尾にcache_controlのブレークポイントを置く
+    """
+    return [
+        {'type': 'text', 'text': part, 'cache_control': {'type': 'ephemeral'}}
+        for part in parts
+        if part
+    ]
+
+
+def join_prompt_parts(parts: dict) -> str:
+    """systemブロックとユーザープロンプトを1つの文字列に連結"""
+    texts = [block['text'] for block in parts['system']]
+    texts.append(parts['prompt'])
+    return '\n\n'.join(texts)
+
+
+def build_decorations_explanation(enabled_decorations: List[dict]) -> str:
+    """利用可能な装飾の説明を構築"""
+    if not enabled_decorations:
+        return ""
+
+    decoration_list = []
+    for dec in enabled_decorations:
+        schema = dec.get('schema', 'paragraph')
+        schema_desc = SCHEMA_DESCRIPTIONS.get(schema, '')
+        roles = ', '.join(dec.get('roles', []))
+        decoration_list.append(f'''- **{dec["id"]}** ({dec["label"]})
+  - スキーマ: {schema} - {schema_desc}
+  - 用途: {roles}''')
+
+    return f"""## 利用可能な装飾（重要）
+以下の装飾のみ使用できます。**これ以外の装飾IDは使用禁止です。**
+
+{chr(10).join(decoration_list)}
+
+### 装飾使用のガイドライン
+- 装飾を使う場合は、上記リストのdecorationIdを指定する
+- スキーマの種類に応じて適切に使い分ける:
+  - paragraph（ハイライト）: **文中の強調したいフレーズやキーワードのみに適用**（一文全体ではなく、数語〜10語程度の短い表現）
+  - box: まとまった情報をボックスで囲みたい場合
+- 同じdecorationIdを連続して使わない
+- 1記事内で同じdecorationIdは最大3回まで
+- 装飾が不要な通常の段落はdecorationIdを省略する
+
+### boxスキーマの装飾について（重要）
+- **title**: 内容を短く要約した見出し（10〜20文字程度）
+- **content**: ボックス内の本文。**2〜3文で簡潔にまとめる、または箇条書きで整理する**
+  - 長々と書かず、要点を絞って記述する
+  - 箇条書きの場合は3〜5項目程度"""
+
+
+def build_structure_settings_context(settings: UserSettings) -> str:
+    """
+    構造生成用のユーザー設定由来の指示（装飾・文体・サンプル記事）
+    同じユーザー設定であればジョブ間でバイト単位で同一になる（組み立て済みの断片を再利用する）
+    """
+    return get_prompt_fragment('structure', settings, lambda: _build_structure_settings_context(settings))
+
+
+def _build_structure_settings_context(settings: UserSettings) -> str:
+    fragments = build_settings_fragments(settings, 'wordpress')
+    return '\n\n'.join(part for part in fragments.values() if part)
+
+
+def build_settings_fragments(settings: UserSettings, output_format: str = 'wordpress') -> dict:
+    """
+    ユーザー設定由来の指示を断片ごとに取得（トークン内訳の集計にも使う）
+    WordPress用は装飾・文体・サンプル記事、Markdown用は文体・サンプル記事
+
+    Returns:
+        dict: {断片名: テキスト}（settings context 内の並び順）
+    """
+    fragments = {}
+    if output_format != 'markdown':
+        fragments['decorations'] = get_prompt_fragment(
+            'decorations', settings, lambda: _build_decorations_fragment(settings)
+        )
+    fragments['style'] = build_style_settings_context(settings)
+    fragments['samples'] = get_prompt_fragment(
+        f'samples:{output_format}', settings, lambda: build_sample_style_context(settings, output_format)
+    )
+    return fragments
+
+
+def _build_decorations_fragment(settings: UserSettings) -> str:
+    decorations = settings.get('decorations', [])
+
+    # 有効な装飾の詳細を取得
+    enabled_decorations = get_enabled_decorations(decorations) if isinstance(decorations, list) else []
+    return build_decorations_explanation(enabled_decorations)
+
+
+def build_style_settings_context(settings: UserSettings) -> str:
+    """アウトライン生成用のユーザー設定由来の指示（文体のみ）"""
+    return get_prompt_fragment(
+        'style', settings,
+        lambda: f"## 文体・スタイル\n{build_style_instructions(settings.get('articleStyle', {}))}"
+    )
+
+
+def build_article_request_context(body: ArticleInput) -> str:
+    """記事ごとに変わる指示（記事情報・内容要件・記事タイプ・内部リンク）"""
+    title = body.get('title', '')
+    target_audience = body.get('targetAudience', '一般')
+    purpose = body.get('purpose', '情報提供')
+    keywords = body.get('keywords', [])
+    content_points = body.get('contentPoints', '')
+    word_count = body.get('wordCount', 1500)
+    article_type = body.get('articleType', 'info')
+    internal_links = body.get('internalLinks', [])
+
+    article_type_instructions = build_article_type_instructions(article_type)
+    internal_link_instructions = build_internal_links_instructions(internal_links)
+
+    return f"""## 記事情報
+- タイトル: {title}
+- 対象読者: {target_audience}
+- 記事の目的: {purpose}
+- キーワード: {', '.join(keywords) if keywords else 'なし'}
+- 目標文字数: {word_count}文字程度
+
+## 内容要件
+{content_points}
+
+{article_type_instructions}
+
+{internal_link_instructions}"""
+
+
+def build_request_fragments(body: ArticleInput) -> dict:
+    """記事ごとに変わる指示のうちトークン内訳で区別する断片（本文の要点・内部リンク）"""
+    return {
+        'contentPoints': body.get('contentPoints', ''),
+        'links': build_internal_links_instructions(body.get('internalLinks', [])),
+    }
+
+
+def build_prompt_fragments(
+    system_prompt: str,
+    settings_fragments: dict,
+    body: ArticleInput,
+    **extra: str
+) -> dict:
+    """
+    プロンプト全体の断片（トークン内訳用）を組み立てる
+
+    Args:
+        system_prompt: 固定のシステムプロンプト
+        settings_fragments: ユーザー設定由来の断片
+        body: 記事生成リクエスト
+        **extra: その他の断片（アウトライン・要約など）
+
+    Returns:
+        dict: {断片名: テキスト}
+    """
+    return {
+        'instructions': system_prompt,
+        **settings_fragments,
+        **build_request_fragments(body),
+        **extra,
+    }
+
+
+def build_structure_prompt_parts(body: ArticleInput, settings: Optional[UserSettings] = None) -> dict:
+    """
+    Step 1: 記事構造生成プロンプトをキャッシュ可能な形で構築
+
+    Returns:
+        dict: {
+            'system': cache_control付きsystemブロックのリスト,
+            'prompt': リクエスト固有のユーザープロンプト,
+            'fragments': トークン内訳用の断片（断片名 -> テキスト）
+        }
+    """
+    settings = settings or {}
+
+    prompt = f"""以下の情報をもとに、記事の構造をJSON形式で生成してください。
+
+{build_article_request_context(body)}
 
 **重要: JSONのみを出力してください。説明文や前置きは不要です。**"""
 
-    return prompt
+    return {
+        'system': build_cached_system(
+            STRUCTURE_SYSTEM_PROMPT,
+            build_structure_settings_context(settings)
+        ),
+        'prompt': prompt,
+        'fragments': build_prompt_fragments(
+            STRUCTURE_SYSTEM_PROMPT, build_settings_fragments(settings, 'wordpress'), body
+        )
+    }
+
+
+def count_structure_text(blocks: List[dict]) -> int:
+    """ブロック配列に含まれる本文テキストの文字数を数える（subsectionは再帰）"""
+    total = 0
+    for block in blocks:
+        if not isinstance(block, dict):
+            continue
+        total += len(block.get('content', '') or '')
+        total += sum(len(item) for item in block.get('items', []) if isinstance(item, str))
+        total += sum(len(cell) for row in block.get('rows', []) for cell in row if isinstance(cell, str))
+        total += count_structure_text(block.get('blocks', []))
+    return total
+
+
+def build_structure_tail_prompt_parts(
+    body: ArticleInput,
+    settings: Optional[UserSettings],
+    completed_sections: List[dict]
+) -> dict:
+    """
+    途中で途切れた構造生成の続き（残りのセクション）を生成するプロンプトを構築
+    systemブロックは通常の構造生成と共通にし、プロンプトキャッシュを再利用する
+
+    Args:
+        body: 記事生成リクエスト
+        settings: ユーザー設定
+        completed_sections: 生成済みのセクション
+
+    Returns:
+        dict: {'system': systemブロックのリスト, 'prompt': ユーザープロンプト, 'fragments': 断片}
+    """
+    parts = build_structure_prompt_parts(body, settings)
+
+    written_chars = sum(count_structure_text(section.get('blocks', [])) for section in completed_sections)
+    remaining_chars = max(int(body.get('wordCount', 1500)) - written_chars, 0)
+    headings = '\n'.join(
+        f'{i + 1}. {section.get("heading", "")}' for i, section in enumerate(completed_sections)
+    )
+
+    parts['prompt'] += f"""
+
+## 続きの生成
+前回の出力は途中で途切れました。以下のセクションは生成済みです。
+
+{headings}
+
+生成済みのセクションは繰り返さず、**続きのセクションのみ**を sections に含めて出力してください。
+残りの本文は約{remaining_chars}文字を目安に構成し、最後のセクションで記事を締めくくってください。
+titleは元の記事タイトル、metaも含めてください。"""
+    parts['fragments']['history'] = headings
+
+    return parts
+
+
+def build_structure_prompt(body: ArticleInput, settings: Optional[UserSettings] = None) -> str:
+    """
+    Step 1: 記事構造をJSON形式で生成
+    Claudeは利用可能な装飾の中から適切なものを選び、decorationIdを直接指定する
+    boxスキーマの装飾にはtitleを付ける
+    """
+    return join_prompt_parts(build_structure_prompt_parts(body, settings))
+
+
+# ============================================================
+# アウトライン → セクション並列生成モード
+# Step 1: 見出しと概要のみのアウトラインを生成（軽量）
+# Step 2: 各セクション本文を並列に生成し、構造JSONにマージ
+# ============================================================
+
+OUTLINE_SYSTEM_PROMPT = """あなたはブログ記事の構成作家です。ユーザーから与えられる記事情報をもとに、記事のアウトライン（見出しと各セクションの概要）のみをJSON形式で生成してください。本文は書かないでください。
+
+## 出力形式（JSON）
+```json
+{
+  "title": "記事タイトル",
+  "sections": [
+    {
+      "heading": "H2見出し",
+      "brief": "このセクションで書く内容の要約（2〜3文）",
+      "targetChars": 800
+    }
+  ],
+  "meta": {
+    "metaDescription": "メタディスクリプション（140文字以内）"
+  }
+}
+```
+
+## 制約条件
+- sections数（H2見出し）: 3〜6個
+- 導入から始まり、最後のセクションは必ずまとめにする
+- 各セクションのtargetCharsの合計が目標文字数と同程度になるように配分する
+- briefにはセクション同士で内容が重複しないよう、扱う論点を具体的に書く"""
+
+
+SECTION_SYSTEM_PROMPT = """あなたはブログ記事生成の専門家です。記事全体のアウトラインのうち、指定された1セクションの本文のみをJSON形式で生成してください。
+
+## 出力形式（JSON）
+```json
+{
+  "heading": "H2見出し（指定された見出しをそのまま使う）",
+  "blocks": [
+    {
+      "type": "paragraph",
+      "content": "本文の段落"
+    },
+    {
+      "type": "paragraph",
+      "content": "要点を2〜3文で簡潔にまとめた内容",
+      "decorationId": "ba-point",
+      "title": "ポイント"
+    }
+  ]
+}
+```
+
+""" + BLOCK_FORMAT_INSTRUCTIONS + """
+
+## 制約条件
+- blocks: 2〜5個
+- 装飾付きブロック: このセクション内で最大2箇所
+- 同じdecorationIdの連続使用禁止
+- 他のセクションの内容を先取りしたり繰り返したりしない
+- **利用可能な装飾リストにないdecorationIdは絶対に使用しない**"""
+
+
+def build_outline_prompt_parts(body: ArticleInput, settings: Optional[UserSettings] = None) -> dict:
+    """
+    並列生成モード Step 1: アウトライン生成プロンプト
+    本文を書かないため、サンプル記事や装飾の説明は含めない
+    """
+    settings = settings or {}
+
+    prompt = f"""以下の情報をもとに、記事のアウトラインをJSON形式で生成してください。
+
+{build_article_request_context(body)}
+
+**重要: JSONのみを出力してください。説明文や前置きは不要です。**"""
+
+    return {
+        'system': build_cached_system(
+            OUTLINE_SYSTEM_PROMPT,
+            build_style_settings_context(settings)
+        ),
+        'prompt': prompt,
+        'fragments': build_prompt_fragments(
+            OUTLINE_SYSTEM_PROMPT, {'style': build_style_settings_context(settings)}, body
+        )
+    }
+
+
+def build_section_prompt_parts(
+    body: ArticleInput,
+    settings: Optional[UserSettings],
+    outline: dict,
+    section_index: int
+) -> dict:
+    """
+    並列生成モード Step 2: 1セクション分の本文生成プロンプト
+    systemは全セクションで共通のため、2件目以降はキャッシュが効く
+    """
+    settings = settings or {}
+    sections = outline.get('sections', [])
+    section = sections[section_index]
+
+    outline_lines = []
+    for i, outline_section in enumerate(sections):
+        marker = '→ ' if i == section_index else '  '
+        outline_lines.append(
+            f"{marker}{i + 1}. {outline_section.get('heading', '')}: {outline_section.get('brief', '')}"
+        )
+
+    target_chars = section.get('targetChars') or body.get('wordCount', 1500) // max(len(sections), 1)
+
+    prompt = f"""以下の記事のうち、指定されたセクションの本文をJSON形式で生成してください。
+
+{build_article_request_context(body)}
+
+## 記事全体のアウトライン
+記事タイトル: {outline.get('title', body.get('title', ''))}
+{chr(10).join(outline_lines)}
+
+## 今回生成するセクション（{section_index + 1}/{len(sections)}）
+- 見出し: {section.get('heading', '')}
+- 内容: {section.get('brief', '')}
+- 文字数: {target_chars}文字程度
+
+**重要: このセクションのJSONのみを出力してください。説明文や前置きは不要です。**"""
+
+    return {
+        'system': build_cached_system(
+            SECTION_SYSTEM_PROMPT,
+            build_structure_settings_context(settings)
+        ),
+        'prompt': prompt,
+        'fragments': build_prompt_fragments(
+            SECTION_SYSTEM_PROMPT, build_settings_fragments(settings, 'wordpress'), body,
+            outline='\n'.join(outline_lines)
+        )
+    }
+
+
+LONGFORM_OUTLINE_SYSTEM_PROMPT = """あなたは長文記事の構成作家です。ユーザーから与えられる記事情報をもとに、数万文字規模の記事のアウトライン（見出しと各セクションの概要）のみをJSON形式で生成してください。本文は書かないでください。
+
+## 出力形式（JSON）
+```json
+{
+  "title": "記事タイトル",
+  "sections": [
+    {
+      "heading": "H2見出し",
+      "brief": "このセクションで書く内容の要約（2〜3文）",
+      "targetChars": 2500
+    }
+  ],
+  "meta": {
+    "metaDescription": "メタディスクリプション（140文字以内）"
+  }
+}
+```
+
+## 制約条件
+- sections数（H2見出し）: 指定された範囲内
+- 導入から始まり、最後のセクションは必ずまとめにする
+- 各セクションのtargetCharsの合計が目標文字数と同程度になるように配分する
+- briefにはセクション同士で内容が重複しないよう、扱う論点を具体的に書く
+- セクションは前から順に書かれるため、前提となる説明を先のセクションに置く"""
+
+
+LONGFORM_CHUNK_SYSTEM_PROMPT = """あなたは長文ブログ記事の執筆者です。記事全体のアウトラインのうち、指定された連続するセクションの本文のみをJSON形式で生成してください。
+記事は複数回に分けて前から順に執筆しています。これまでの本文の代わりに「これまでの要約」を渡します。
+
+## 出力形式（JSON）
+```json
+{
+  "sections": [
+    {
+      "heading": "H2見出し（指定された見出しをそのまま使う）",
+      "blocks": [
+        {
+          "type": "paragraph",
+          "content": "本文の段落"
+        }
+      ]
+    }
+  ],
+  "summary": "これまでの要約に今回のセクションの要点を加えた、記事冒頭からの要約"
+}
+```
+
+""" + BLOCK_FORMAT_INSTRUCTIONS + """
+
+## 制約条件
+- 指定されたセクションをすべて、指定された順に出力する
+- 装飾付きブロック: 1セクションあたり最大2箇所
+- 同じdecorationIdの連続使用禁止
+- 要約で扱い済みの内容を繰り返さず、後のセクションの内容も先取りしない
+- summaryは後続の執筆で前提として使うため、用語の定義・結論・数値などの要点を残す
+- **利用可能な装飾リストにないdecorationIdは絶対に使用しない**"""
+
+
+def build_longform_outline_prompt_parts(
+    body: ArticleInput,
+    settings: Optional[UserSettings],
+    min_sections: int,
+    max_sections: int
+) -> dict:
+    """
+    長文モード Step 1: アウトライン生成プロンプト
+    セクション数は目標文字数から決めた範囲を指定する
+    """
+    settings = settings or {}
+
+    prompt = f"""以下の情報をもとに、記事のアウトラインをJSON形式で生成してください。
+
+{build_article_request_context(body)}
+
+## セクション数
+{min_sections}〜{max_sections}個のH2見出しで構成してください。
+
+**重要: JSONのみを出力してください。説明文や前置きは不要です。**"""
+
+    return {
+        'system': build_cached_system(
+            LONGFORM_OUTLINE_SYSTEM_PROMPT,
+            build_style_settings_context(settings)
+        ),
+        'prompt': prompt,
+        'fragments': build_prompt_fragments(
+            LONGFORM_OUTLINE_SYSTEM_PROMPT, {'style': build_style_settings_context(settings)}, body
+        )
+    }
+
+
+def build_longform_chunk_prompt_parts(
+    body: ArticleInput,
+    settings: Optional[UserSettings],
+    outline: dict,
+    start: int,
+    end: int,
+    summary: str,
+    summary_max_chars: int
+) -> dict:
+    """
+    長文モード Step 2: 連続するセクション（outline['sections'][start:end]）の本文生成プロンプト
+    生成済みの本文の代わりに要約を渡すため、プロンプトの長さは記事の長さに依存しない
+    """
+    settings = settings or {}
+    sections = outline.get('sections', [])
+
+    outline_lines = []
+    for i, outline_section in enumerate(sections):
+        marker = '→ ' if start <= i < end else '  '
+        outline_lines.append(
+            f"{marker}{i + 1}. {outline_section.get('heading', '')}: {outline_section.get('brief', '')}"
+        )
+
+    targets = '\n'.join(
+        f"- {i + 1}. {sections[i].get('heading', '')}（{sections[i].get('targetChars', 2500)}文字程度）: "
+        f"{sections[i].get('brief', '')}"
+        for i in range(start, end)
+    )
+    summary_text = summary or '（まだ何も書いていません。記事の冒頭から書き始めてください）'
+
+    prompt = f"""以下の記事のうち、指定されたセクションの本文をJSON形式で生成してください。
+
+{build_article_request_context(body)}
+
+## 記事全体のアウトライン
+記事タイトル: {outline.get('title', body.get('title', ''))}
+{chr(10).join(outline_lines)}
+
+## これまでの要約
+{summary_text}
+
+## 今回生成するセクション（{start + 1}〜{end}/{len(sections)}）
+{targets}
+
+summaryは{summary_max_chars}文字以内にまとめてください。
+
+**重要: JSONのみを出力してください。説明文や前置きは不要です。**"""
+
+    return {
+        'system': build_cached_system(
+            LONGFORM_CHUNK_SYSTEM_PROMPT,
+            build_structure_settings_context(settings)
+        ),
+        'prompt': prompt,
+        'fragments': build_prompt_fragments(
+            LONGFORM_CHUNK_SYSTEM_PROMPT, build_settings_fragments(settings, 'wordpress'), body,
+            outline='\n'.join(outline_lines),
+            history=summary_text
+        )
+    }
 
 
 def build_output_prompt(
@@ -892,64 +1485,7 @@ def build_prompt_two_step(body: ArticleInput, settings: Optional[UserSettings] =
     }
 
 
-def build_markdown_prompt(body: ArticleInput, settings: Optional[UserSettings] = None) -> str:
-    """
-    Markdown形式で直接記事を生成するプロンプト
-    装飾なし、純粋なMarkdownのみ
-    """
-    settings = settings or {}
-
-    # 基本情報
-    title = body.get('title', '')
-    target_audience = body.get('targetAudience', '一般')
-    purpose = body.get('purpose', '情報提供')
-    keywords = body.get('keywords', [])
-    content_points = body.get('contentPoints', '')
-    word_count = body.get('wordCount', 1500)
-    article_type = body.get('articleType', 'info')
-    internal_links = body.get('internalLinks', [])
-
-    # 設定から取得
-    article_style = settings.get('articleStyle', {})
-    sample_articles = settings.get('sampleArticles', [])
-
-    # 各セクションを構築
-    style_instructions = build_style_instructions(article_style)
-    sample_context = build_sample_article_context(sample_articles, 'markdown')
-    internal_link_instructions = build_internal_links_instructions(internal_links)
-    article_type_instructions = build_article_type_instructions(article_type)
-
-    # キーワード指示
-    keyword_text = ''
-    if keywords:
-        keyword_text = f"""
-### キーワードの活用
-以下のキーワードを記事内で自然に使用してください：
-{', '.join(keywords)}
-"""
-
-    prompt = f"""あなたはブログ記事生成の専門家です。以下の情報をもとに、Markdown形式で記事を生成してください。
-
-## 記事情報
-- タイトル: {title}
-- 対象読者: {target_audience}
-- 記事の目的: {purpose}
-- キーワード: {', '.join(keywords) if keywords else 'なし'}
-- 目標文字数: {word_count}文字程度
-
-## 内容要件
-{content_points}
-
-## 文体・スタイル
-{style_instructions}
-
-{article_type_instructions}
-
-{sample_context}
-
-{internal_link_instructions}
-
-{keyword_text}
+MARKDOWN_SYSTEM_PROMPT = """あなたはブログ記事生成の専門家です。ユーザーから与えられる記事情報をもとに、Markdown形式で記事を生成してください。
 
 ## 出力形式（重要）
 - **純粋なMarkdown形式で出力**
@@ -995,7 +1531,7 @@ def build_markdown_prompt(body: ArticleInput, settings: Optional[UserSettings] =
 3. まとめ（要点整理、次のアクションを促す）
 
 ## 制約条件
-- 文字数: {word_count}文字程度（±10%の範囲内で）
+- 文字数: 目標文字数の±10%の範囲内で
 - 見出し（h2）数: 3〜6個
 - 口調: 「です・ます調」を一貫して使用
 - **必ず「まとめ」セクションで締めくくる**
@@ -1003,8 +1539,69 @@ def build_markdown_prompt(body: ArticleInput, settings: Optional[UserSettings] =
 ## 注意事項
 - 嘘や不正確な情報は書かない
 - 専門用語は初出時に簡単な説明を添える
-- 読者を見下すような表現は避ける
+- 読者を見下すような表現は避ける"""
+
+
+def build_markdown_settings_context(settings: UserSettings) -> str:
+    """Markdown生成用のユーザー設定由来の指示（文体・サンプル記事）"""
+    return get_prompt_fragment('markdown', settings, lambda: _build_markdown_settings_context(settings))
+
+
+def _build_markdown_settings_context(settings: UserSettings) -> str:
+    fragments = build_settings_fragments(settings, 'markdown')
+    return '\n\n'.join(part for part in fragments.values() if part)
+
+
+def build_markdown_prompt_parts(body: ArticleInput, settings: Optional[UserSettings] = None) -> dict:
+    """
+    Markdown直接生成プロンプトをキャッシュ可能な形で構築
+
+    Returns:
+        dict: {
+            'system': cache_control付きsystemブロックのリスト,
+            'prompt': リクエスト固有のユーザープロンプト,
+            'fragments': トークン内訳用の断片（断片名 -> テキスト）
+        }
+    """
+    settings = settings or {}
+
+    keywords = body.get('keywords', [])
+    word_count = body.get('wordCount', 1500)
+
+    # キーワード指示
+    keyword_text = ''
+    if keywords:
+        keyword_text = f"""
+### キーワードの活用
+以下のキーワードを記事内で自然に使用してください：
+{', '.join(keywords)}
+"""
+
+    prompt = f"""以下の情報をもとに、Markdown形式で記事を生成してください。
+
+{build_article_request_context(body)}
+
+{keyword_text}
+
+文字数は{word_count}文字程度（±10%の範囲内で）にしてください。
 
 **重要: Markdownのみを出力してください。説明文や前置き、コードブロック（```）で囲むことは不要です。**"""
 
-    return prompt
+    return {
+        'system': build_cached_system(
+            MARKDOWN_SYSTEM_PROMPT,
+            build_markdown_settings_context(settings)
+        ),
+        'prompt': prompt,
+        'fragments': build_prompt_fragments(
+            MARKDOWN_SYSTEM_PROMPT, build_settings_fragments(settings, 'markdown'), body
+        )
+    }
+
+
+def build_markdown_prompt(body: ArticleInput, settings: Optional[UserSettings] = None) -> str:
+    """
+    Markdown形式で直接記事を生成するプロンプト
+    装飾なし、純粋なMarkdownのみ
+    """
+    return join_prompt_parts(build_markdown_prompt_parts(body, settings))
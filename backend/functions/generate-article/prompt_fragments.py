@@ -0,0 +1,81 @@
+"""
+プロンプト断片のキャッシュ
+
+文体・装飾・サンプル記事から組み立てるsystemプロンプトの断片は、ユーザー設定が
+変わらない限り同じ文字列になる。設定のフィンガープリントをキーにプロセス内LRUで保持し、
+ウォームコンテナ内の後続ジョブ（並列生成の各セクションを含む）で再利用する。
+
+フィンガープリントは設定保存時に manage-settings が書き込む promptVersion を優先する。
+保存のたびに値が変わるため、古い断片は参照されなくなりLRUから押し出される。
+promptVersion がない設定（デフォルト設定・保存前の設定）は内容のハッシュを使う。
+"""
+
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional
+
+
+# 環境変数
+PROMPT_FRAGMENT_MAX_ENTRIES = int(os.environ.get('PROMPT_FRAGMENT_MAX_ENTRIES', '128'))
+
+# プロンプトの断片に影響する設定項目
+PROMPT_SETTINGS_KEYS = ('articleStyle', 'decorations', 'sampleArticles', 'sampleArticleMode', 'sampleDigest')
+
+
+def get_settings_fingerprint(settings: Optional[Dict[str, Any]]) -> str:
+    """
+    ユーザー設定のうちプロンプトに影響する項目のフィンガープリントを算出
+
+    Returns:
+        'v:<promptVersion>' または 'h:<内容のハッシュ>'
+    """
+    settings = settings or {}
+    version = settings.get('promptVersion')
+    if version:
+        return f'v:{version}'
+
+    payload = json.dumps(
+        {key: settings.get(key) for key in PROMPT_SETTINGS_KEYS},
+        sort_keys=True, ensure_ascii=False, default=str
+    )
+    return 'h:' + hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+_fragments: 'OrderedDict[str, str]' = OrderedDict()
+_fragments_lock = threading.Lock()
+
+
+def get_prompt_fragment(kind: str, settings: Optional[Dict[str, Any]], build: Callable[[], str]) -> str:
+    """
+    設定由来のプロンプト断片を取得（同じ設定では組み立て済みのものを再利用）
+
+    Args:
+        kind: 断片の種類（'structure' / 'markdown' / 'style' など）
+        settings: ユーザー設定
+        build: キャッシュにない場合に断片を組み立てる関数
+
+    Returns:
+        プロンプト断片の文字列
+    """
+    key = f'{kind}:{get_settings_fingerprint(settings)}'
+    with _fragments_lock:
+        fragment = _fragments.get(key)
+        if fragment is not None:
+            _fragments.move_to_end(key)
+            return fragment
+
+    fragment = build()
+    with _fragments_lock:
+        _fragments[key] = fragment
+        while len(_fragments) > PROMPT_FRAGMENT_MAX_ENTRIES:
+            _fragments.popitem(last=False)
+    return fragment
+
+
+def clear_fragment_cache():
+    """プロセス内の断片キャッシュを破棄（テスト用）"""
+    with _fragments_lock:
+        _fragments.clear()
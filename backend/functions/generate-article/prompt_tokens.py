@@ -0,0 +1,187 @@
+"""
+プロンプトのトークン内訳
+
+プロンプトを構成する断片（文体・サンプル記事・装飾・内部リンク・本文の要点・会話履歴など）ごとに
+入力トークン数をオフラインで推定し、API応答の usage の実測値と突き合わせて構造化ログに出力する。
+どの断片が入力トークンを押し上げているかを把握し、削減の対象を決めるために使う。
+
+推定は文字種ごとの係数による概算（トークナイザーは使わない）:
+- 漢字: 1文字 ≒ 1トークン
+- ひらがな・カタカナ: 1文字 ≒ 0.75トークン
+- 英数字: 連続する4文字 ≒ 1トークン
+- ASCIIの記号: 連続する2文字 ≒ 1トークン（Markdown・JSONの記号）
+- 改行: 連続する改行 ≒ 1トークン（空白は前後の語に含める）
+- その他（全角記号・絵文字など）: 1文字 ≒ 1トークン
+
+実測値との比（estimateRatio）をログに残し、推定の精度と係数の見直しに使う。
+断片ごとの実測値への按分（attributedTokens）は推定値の比で配分したもの。
+
+generate-article/prompt_tokens.py と chat-edit/prompt_tokens.py は同一内容。
+Lambda関数ごとにデプロイされるため、同じファイルを配置する。
+"""
+
+import json
+import re
+from functools import lru_cache
+from typing import Any, Dict, Optional
+
+from utils import log_info, log_warning
+
+
+# 文字種ごとのトークン係数
+KANJI_TOKENS_PER_CHAR = 1.0
+KANA_TOKENS_PER_CHAR = 0.75
+ALNUM_CHARS_PER_TOKEN = 4
+SYMBOL_CHARS_PER_TOKEN = 2
+
+# 推定に含めなかった部分（見出しや定型文など）の断片名
+OTHER_FRAGMENT = 'other'
+
+_KANJI_PATTERN = re.compile(r'[\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff\u3005\u3006]')
+_KANA_PATTERN = re.compile(r'[\u3040-\u30ff\uff66-\uff9f]')
+_ALNUM_RUN_PATTERN = re.compile(r'[A-Za-z0-9]+')
+_SYMBOL_RUN_PATTERN = re.compile(r'[!-/:-@\[-`{-~]+')
+_NEWLINE_RUN_PATTERN = re.compile(r'\n+')
+_ASCII_WHITESPACE_PATTERN = re.compile(r'[ \t\r\n]')
+
+
+@lru_cache(maxsize=256)
+def estimate_tokens(text: str) -> int:
+    """
+    テキストの入力トークン数を推定
+
+    同じ文字列（設定由来の断片など）は推定済みの値を再利用する。
+
+    Args:
+        text: 推定対象のテキスト
+
+    Returns:
+        推定トークン数
+    """
+    if not text:
+        return 0
+
+    kanji = len(_KANJI_PATTERN.findall(text))
+    kana = len(_KANA_PATTERN.findall(text))
+    alnum_runs = _ALNUM_RUN_PATTERN.findall(text)
+    symbol_runs = _SYMBOL_RUN_PATTERN.findall(text)
+    newline_runs = len(_NEWLINE_RUN_PATTERN.findall(text))
+    whitespace = len(_ASCII_WHITESPACE_PATTERN.findall(text))
+
+    alnum_chars = sum(len(run) for run in alnum_runs)
+    symbol_chars = sum(len(run) for run in symbol_runs)
+    other = len(text) - kanji - kana - alnum_chars - symbol_chars - whitespace
+
+    tokens = (
+        kanji * KANJI_TOKENS_PER_CHAR
+        + kana * KANA_TOKENS_PER_CHAR
+        + sum(-(-len(run) // ALNUM_CHARS_PER_TOKEN) for run in alnum_runs)
+        + sum(-(-len(run) // SYMBOL_CHARS_PER_TOKEN) for run in symbol_runs)
+        + newline_runs
+        + other
+    )
+    return int(round(tokens))
+
+
+def _content_text(content: Any) -> str:
+    """system・messagesのcontent（文字列またはブロックのリスト）からテキストを取り出す"""
+    if isinstance(content, str):
+        return content
+    if isinstance(content, list):
+        return '\n\n'.join(
+            block.get('text', '') for block in content if isinstance(block, dict)
+        )
+    return ''
+
+
+def estimate_request_tokens(request: Dict[str, Any]) -> int:
+    """
+    messages API のリクエスト全体（system・messages・tools）の入力トークン数を推定
+
+    Args:
+        request: messages.create / messages.stream に渡す引数
+
+    Returns:
+        推定トークン数
+    """
+    total = estimate_tokens(_content_text(request.get('system')))
+    for message in request.get('messages') or []:
+        total += estimate_tokens(_content_text(message.get('content')))
+    if request.get('tools'):
+        total += estimate_tokens(json.dumps(request['tools'], ensure_ascii=False))
+    return total
+
+
+def build_token_breakdown(request: Dict[str, Any], fragments: Dict[str, str]) -> Dict[str, Any]:
+    """
+    リクエストの推定トークン数を断片ごとに内訳化
+
+    fragments に含まれない部分（定型の指示・見出し・プレフィルなど）は 'other' にまとめる。
+
+    Args:
+        request: messages API に渡す引数
+        fragments: 断片名 -> プロンプト内のテキスト
+
+    Returns:
+        {'estimatedTokens': 推定合計, 'fragmentTokens': {断片名: 推定トークン数}}
+    """
+    estimated_total = estimate_request_tokens(request)
+    fragment_tokens = {name: estimate_tokens(text or '') for name, text in fragments.items()}
+    fragment_tokens[OTHER_FRAGMENT] = max(estimated_total - sum(fragment_tokens.values()), 0)
+    return {
+        'estimatedTokens': estimated_total,
+        'fragmentTokens': fragment_tokens,
+    }
+
+
+def reconcile_token_breakdown(breakdown: Dict[str, Any], metrics: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    推定の内訳をAPIの実測値（キャッシュ分を含む入力トークン数）と突き合わせる
+
+    Args:
+        breakdown: build_token_breakdown の結果
+        metrics: claude_api の計測値
+
+    Returns:
+        内訳に actualInputTokens・estimateRatio・attributedTokens を加えた辞書
+    """
+    actual = (
+        (metrics.get('inputTokens') or 0)
+        + (metrics.get('cacheCreationInputTokens') or 0)
+        + (metrics.get('cacheReadInputTokens') or 0)
+    )
+    estimated = breakdown['estimatedTokens']
+    ratio = actual / estimated if estimated > 0 else 0.0
+
+    return {
+        **breakdown,
+        'actualInputTokens': actual,
+        'estimateRatio': round(ratio, 3),
+        'attributedTokens': {
+            name: int(round(tokens * ratio)) for name, tokens in breakdown['fragmentTokens'].items()
+        },
+    }
+
+
+def log_prompt_token_breakdown(
+    task: str,
+    request: Dict[str, Any],
+    fragments: Dict[str, str],
+    metrics: Dict[str, Any]
+) -> Optional[Dict[str, Any]]:
+    """
+    1回のAPI呼び出しのプロンプトのトークン内訳をログに出力
+
+    計測用の処理のため、失敗しても呼び出し元の処理は継続させる。
+
+    Returns:
+        出力した内訳（失敗時はNone）
+    """
+    try:
+        breakdown = reconcile_token_breakdown(build_token_breakdown(request, fragments), metrics)
+    except Exception as e:
+        log_warning('Failed to build prompt token breakdown', task=task, error=str(e))
+        return None
+
+    log_info('Prompt token breakdown', task=task, model=metrics.get('model', ''), **breakdown)
+    return breakdown
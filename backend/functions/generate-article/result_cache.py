@@ -0,0 +1,147 @@
+"""
+同期生成エンドポイント（/titles, /meta）の結果キャッシュ
+
+同一入力の再リクエストでClaudeを呼ばないよう、2段のキャッシュを持つ。
+  1. プロセス内LRU（ウォームコンテナ内で有効）
+  2. DynamoDBテーブル（TTL付き、コンテナ間で共有）
+
+キーは正規化したプロンプト入力とモデルのハッシュ（コンテンツアドレス）。
+"""
+
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+from aws_clients import lazy_table
+from utils import log_info, log_warning
+
+
+# 環境変数
+DYNAMODB_TABLE_RESULT_CACHE = os.environ.get('DYNAMODB_TABLE_RESULT_CACHE', '')
+RESULT_CACHE_TTL_SECONDS = int(os.environ.get('RESULT_CACHE_TTL_SECONDS', '86400'))
+RESULT_CACHE_MAX_ENTRIES = int(os.environ.get('RESULT_CACHE_MAX_ENTRIES', '256'))
+LOCAL_DEV = os.environ.get('LOCAL_DEV', 'false').lower() == 'true'
+
+# キャッシュキーのバージョン（プロンプトや出力形式を変えたら更新する）
+CACHE_KEY_VERSION = 'v1'
+
+# クライアント初期化（テーブル未設定時はLRUのみで動作、初回の利用時に生成）
+if DYNAMODB_TABLE_RESULT_CACHE and not LOCAL_DEV:
+    result_cache_table = lazy_table(DYNAMODB_TABLE_RESULT_CACHE)
+else:
+    result_cache_table = None
+
+_lru: 'OrderedDict[str, Dict[str, Any]]' = OrderedDict()
+_lru_lock = threading.Lock()
+
+
+def normalize_text(text: str) -> str:
+    """行末の空白と連続する空行を除去し、意味の変わらない差分をキーから除く"""
+    lines = [line.rstrip() for line in text.strip().splitlines()]
+    return re.sub(r'\n{3,}', '\n\n', '\n'.join(lines))
+
+
+def build_cache_key(task: str, user_id: str, model: str, prompt: str, params: Dict[str, Any]) -> str:
+    """
+    キャッシュキーを生成
+
+    Args:
+        task: 生成種別（titles, meta）
+        user_id: ユーザーID（キャッシュはユーザー単位で分離する）
+        model: 使用モデル
+        prompt: 組み立て済みプロンプト（ユーザー設定を含む）
+        params: temperature, max_tokens などの生成パラメータ
+
+    Returns:
+        SHA-256ハッシュ文字列
+    """
+    payload = json.dumps({
+        'version': CACHE_KEY_VERSION,
+        'task': task,
+        'userId': user_id,
+        'model': model,
+        'params': params,
+        'prompt': normalize_text(prompt),
+    }, ensure_ascii=False, sort_keys=True)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def _lru_get(key: str) -> Optional[Dict[str, Any]]:
+    with _lru_lock:
+        entry = _lru.get(key)
+        if entry is None:
+            return None
+        if entry['expiresAt'] <= time.time():
+            del _lru[key]
+            return None
+        _lru.move_to_end(key)
+        return entry['result']
+
+
+def _lru_put(key: str, result: Dict[str, Any], expires_at: float):
+    with _lru_lock:
+        _lru[key] = {'result': result, 'expiresAt': expires_at}
+        _lru.move_to_end(key)
+        while len(_lru) > RESULT_CACHE_MAX_ENTRIES:
+            _lru.popitem(last=False)
+
+
+def get_cached_result(key: str) -> Optional[Dict[str, Any]]:
+    """
+    キャッシュから結果を取得（LRU → DynamoDB の順）
+
+    DynamoDBの障害時はキャッシュミスとして扱い、生成処理を継続させる。
+    """
+    result = _lru_get(key)
+    if result is not None:
+        log_info('Result cache hit', tier='memory')
+        return result
+
+    if result_cache_table is None:
+        return None
+
+    try:
+        item = result_cache_table.get_item(Key={'cacheKey': key}).get('Item')
+    except Exception as e:
+        log_warning('Failed to read result cache', error=str(e))
+        return None
+
+    # TTLによる削除は即時ではないため、期限切れは自前で判定する
+    if not item or int(item.get('ttl', 0)) <= int(time.time()):
+        return None
+
+    result = json.loads(item['result'])
+    _lru_put(key, result, float(item['ttl']))
+    log_info('Result cache hit', tier='dynamodb')
+    return result
+
+
+def put_cached_result(key: str, task: str, result: Dict[str, Any]):
+    """結果をLRUとDynamoDBの両方に保存"""
+    expires_at = int(time.time()) + RESULT_CACHE_TTL_SECONDS
+    _lru_put(key, result, expires_at)
+
+    if result_cache_table is None:
+        return
+
+    try:
+        result_cache_table.put_item(Item={
+            'cacheKey': key,
+            'task': task,
+            # float等を含んでもよいようJSON文字列で保存する
+            'result': json.dumps(result, ensure_ascii=False),
+            'ttl': expires_at,
+        })
+    except Exception as e:
+        log_warning('Failed to write result cache', error=str(e))
+
+
+def clear_memory_cache():
+    """プロセス内LRUを空にする（テスト用）"""
+    with _lru_lock:
+        _lru.clear()
@@ -0,0 +1,161 @@
+"""
+Claude API呼び出しの再試行ポリシーとサーキットブレーカー
+
+一時的なエラー（429・過負荷・5xx・接続エラー）を判定し、
+retry-after を考慮したジッター付き指数バックオフで待ち時間を決める。
+APIの過負荷が続く間はプロセス全体でサーキットを開き、呼び出しを止める。
+"""
+
+import os
+import random
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Callable, Optional
+
+from utils import log_info, log_warning
+
+
+# 環境変数
+MAX_GENERATION_ATTEMPTS = int(os.environ.get('MAX_GENERATION_ATTEMPTS', '5'))
+RETRY_BASE_DELAY_SECONDS = float(os.environ.get('RETRY_BASE_DELAY_SECONDS', '2'))
+# SQSのDelaySecondsの上限（15分）
+RETRY_MAX_DELAY_SECONDS = float(os.environ.get('RETRY_MAX_DELAY_SECONDS', '900'))
+CIRCUIT_FAILURE_THRESHOLD = int(os.environ.get('CIRCUIT_FAILURE_THRESHOLD', '3'))
+CIRCUIT_COOLDOWN_SECONDS = float(os.environ.get('CIRCUIT_COOLDOWN_SECONDS', '60'))
+# サーキットが開いているためにジョブを再投入する回数の上限（再試行回数とは別に数える）
+MAX_CIRCUIT_DEFERRALS = int(os.environ.get('MAX_CIRCUIT_DEFERRALS', '10'))
+
+# サーキットブレーカーの対象とする過負荷系のステータス
+OVERLOAD_STATUS_CODES = (429, 503, 529)
+
+
+def is_retryable_api_error(error: Exception) -> bool:
+    """再試行で回復が見込めるClaude APIエラーか（接続エラー・429・5xx/529）"""
+    import anthropic
+
+    if isinstance(error, anthropic.APIConnectionError):
+        return True
+    if isinstance(error, anthropic.APIStatusError):
+        return error.status_code == 429 or error.status_code >= 500
+    return False
+
+
+def is_overload_error(error: Exception) -> bool:
+    """APIの過負荷・レート制限を示すエラーか"""
+    import anthropic
+
+    return isinstance(error, anthropic.APIStatusError) and error.status_code in OVERLOAD_STATUS_CODES
+
+
+def get_retry_after(error: Exception) -> Optional[float]:
+    """
+    エラーレスポンスの retry-after(-ms) ヘッダーから待ち秒数を取得
+
+    Returns:
+        待ち秒数（ヘッダーがない・解釈できない場合はNone）
+    """
+    response = getattr(error, 'response', None)
+    headers = getattr(response, 'headers', None)
+    if not headers:
+        return None
+
+    retry_after_ms = headers.get('retry-after-ms')
+    if retry_after_ms:
+        try:
+            return max(float(retry_after_ms) / 1000, 0.0)
+        except ValueError:
+            pass
+
+    retry_after = headers.get('retry-after')
+    if not retry_after:
+        return None
+    try:
+        return max(float(retry_after), 0.0)
+    except ValueError:
+        pass
+
+    # HTTP-date形式
+    try:
+        retry_at = parsedate_to_datetime(retry_after)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max((retry_at - datetime.now(timezone.utc)).total_seconds(), 0.0)
+
+
+def compute_backoff(attempt: int, retry_after: Optional[float] = None) -> float:
+    """
+    再試行までの待ち秒数を算出（等ジッター付き指数バックオフ）
+
+    待ち秒数は上限の半分〜上限の一様乱数とし、同時に失敗したジョブの再試行時刻を分散しつつ
+    最低限の待ちを確保する。
+
+    Args:
+        attempt: 何回目の再試行か（1始まり）
+        retry_after: サーバーが指定した待ち秒数
+
+    Returns:
+        待ち秒数（retry-after 未満にはしない）
+    """
+    ceiling = min(RETRY_MAX_DELAY_SECONDS, RETRY_BASE_DELAY_SECONDS * (2 ** max(attempt - 1, 0)))
+    delay = random.uniform(ceiling / 2, ceiling)
+    if retry_after is not None:
+        delay = max(delay, retry_after)
+    return min(delay, RETRY_MAX_DELAY_SECONDS)
+
+
+class CircuitBreaker:
+    """
+    プロセス全体で共有するサーキットブレーカー
+
+    過負荷エラーが連続して閾値に達するとサーキットを開き、
+    クールダウン（またはretry-after）の間は呼び出しを止める。
+    クールダウン後の呼び出しが成功すれば閉じ、失敗すれば再び開く。
+    """
+
+    def __init__(
+        self,
+        failure_threshold: int = CIRCUIT_FAILURE_THRESHOLD,
+        cooldown_seconds: float = CIRCUIT_COOLDOWN_SECONDS,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        self.failure_threshold = failure_threshold
+        self.cooldown_seconds = cooldown_seconds
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._consecutive_failures = 0
+        self._open_until = 0.0
+
+    def remaining_open_seconds(self) -> float:
+        """サーキットが開いている残り秒数（閉じていれば0）"""
+        with self._lock:
+            return max(self._open_until - self._clock(), 0.0)
+
+    def record_success(self):
+        """呼び出し成功を記録してサーキットを閉じる"""
+        with self._lock:
+            was_open = self._consecutive_failures >= self.failure_threshold
+            self._consecutive_failures = 0
+            self._open_until = 0.0
+        if was_open:
+            log_info('Circuit breaker closed')
+
+    def record_failure(self, retry_after: Optional[float] = None):
+        """過負荷エラーを記録し、閾値に達したらサーキットを開く"""
+        with self._lock:
+            self._consecutive_failures += 1
+            if self._consecutive_failures < self.failure_threshold:
+                return
+            cooldown = max(self.cooldown_seconds, retry_after or 0.0)
+            self._open_until = max(self._open_until, self._clock() + cooldown)
+            failures = self._consecutive_failures
+        log_warning('Circuit breaker opened',
+                    consecutive_failures=failures,
+                    cooldown_seconds=cooldown)
+
+
+# ウォームコンテナ内の全ワーカースレッドで共有する
+circuit_breaker = CircuitBreaker()
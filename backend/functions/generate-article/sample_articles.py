@@ -9,9 +9,17 @@ Phase 5: 記事生成時のスタイル参照用
 - テーブルやリストで情報を整理
 - 段落ごとに1-2文、余白を大事にする
 - 読者に語りかけるトーン
+
+記事本文は sample_articles.json.gz（{"wordpress": 記事, "markdown": 記事}）に格納し、
+初めて参照したときに読み込む（モジュールのimport時には読み込まない）。
+内容を変更する場合は gzip -dk で展開して編集し、gzip -9n で圧縮し直す。
 """
 
-from typing import TypedDict, Literal, List, Optional
+import gzip
+import json
+import threading
+from pathlib import Path
+from typing import Dict, TypedDict, Literal, List, Optional
 
 
 class SampleArticle(TypedDict):
@@ -21,1266 +29,26 @@ class SampleArticle(TypedDict):
     format: Literal['wordpress', 'markdown']
 
 
-# 標準サンプル記事（WordPress Gutenberg形式）
-DEFAULT_SAMPLE_ARTICLE_WORDPRESS: SampleArticle = {
-    "id": "default-sample-wordpress",
-    "title": "ブログ開設で失敗しない！選び方から設定まで5ステップで完了",
-    "format": "wordpress",
-    "content": """<!-- wp:paragraph -->
-<p>「ブログを始めてみたいけど、情報が多すぎて何から手をつけていいかわからない」</p>
-<!-- /wp:paragraph -->
-
-<!-- wp:paragraph -->
-<p>「設定項目が多すぎて、途中で挫折してしまいそう」</p>
-<!-- /wp:paragraph -->
-
-<!-- wp:paragraph -->
-<p>そんな悩みを抱えている皆さんへ。</p>
-<!-- /wp:paragraph -->
-
-<!-- wp:paragraph -->
-<p>実は、<span class="ba-highlight">ポイントを押さえれば、ブログ開設は思ったよりシンプルで、誰でも気軽に始められます</span>。</p>
-<!-- /wp:paragraph -->
-
-<!-- wp:paragraph -->
-<p>僕も最初は不安でいっぱいでした。</p>
-<!-- /wp:paragraph -->
-
-<!-- wp:paragraph -->
-<p>でも、正しい手順を踏むことで、スムーズにブログを開設することができたんです。</p>
-<!-- /wp:paragraph -->
-
-<!-- wp:html -->
-<div class="ba-summary-list">
-<p class="box-title">ブログ初心者が抱える4つの悩み</p>
-<ul>
-<li>たくさんのブログサービスがあって選べない</li>
-<li>設定項目が多くて挫折しそう</li>
-<li>何を書けばいいか分からない</li>
-<li>続けられるか不安</li>
-</ul>
-</div>
-<!-- /wp:html -->
-
-<!-- wp:paragraph -->
-<p>今回は、ブログ開設で失敗しないための5つのステップを、初心者の方にもわかりやすく解説していきます。</p>
-<!-- /wp:paragraph -->
-
-<!-- wp:paragraph -->
-<p>この記事を読み終わる頃には、自信を持ってブログ開設に取り組めるようになっているはずです。</p>
-<!-- /wp:paragraph -->
-
-<!-- wp:paragraph -->
-<p>それでは早速見ていきましょう。</p>
-<!-- /wp:paragraph -->
-
-<!-- wp:heading -->
-<h2 class="wp-block-heading">ブログ開設前に知っておきたい基礎知識</h2>
-<!-- /wp:heading -->
-
-<!-- wp:paragraph -->
-<p>ブログを始める前に、まず基本的な知識を整理しておきましょう。</p>
-<!-- /wp:paragraph -->
-
-<!-- wp:paragraph -->
-<p>ここを理解しておくことで、後々の判断がスムーズになります。</p>
-<!-- /wp:paragraph -->
-
-<!-- wp:heading {"level":3} -->
-<h3 class="wp-block-heading">無料ブログと有料ブログの違い</h3>
-<!-- /wp:heading -->
-
-<!-- wp:paragraph -->
-<p>ブログサービスには大きく分けて<strong>無料ブログ</strong>と<strong>有料ブログ</strong>の2種類があります。</p>
-<!-- /wp:paragraph -->
-
-<!-- wp:paragraph -->
-<p>それぞれに特徴があるので、自分の目的に合わせて選びましょう。</p>
-<!-- /wp:paragraph -->
-
-<!-- wp:table -->
-<figure class="wp-block-table"><table><thead><tr><th>種類</th><th>代表的なサービス</th><th>特徴</th><th>向いている人</th></tr></thead><tbody><tr><td>無料ブログ</td><td>はてなブログ、アメブロ、note</td><td>初期費用0円、手軽に始められる</td><td>趣味で書きたい人</td></tr><tr><td>有料ブログ</td><td>WordPress（レンタルサーバー）</td><td>カスタマイズ自由、収益化しやすい</td><td>本格的に運営したい人</td></tr></tbody></table></figure>
-<!-- /wp:table -->
-
-<!-- wp:html -->
-<div class="ba-point">
-<p class="box-title">趣味なら無料、収益化なら有料がおすすめ</p>
-<p>趣味で気軽に始めるなら無料ブログ、将来的に収益化を目指すなら有料ブログがおすすめです。ただし、無料ブログでも有料プランにアップグレードすれば、ある程度の収益化は可能です。</p>
-</div>
-<!-- /wp:html -->
-
-<!-- wp:paragraph -->
-<p>無料ブログは初期費用がかからず、すぐに始められるのが最大のメリット。</p>
-<!-- /wp:paragraph -->
-
-<!-- wp:paragraph -->
-<p>一方で、デザインのカスタマイズに制限があったり、運営側の広告が表示されたりします。</p>
-<!-- /wp:paragraph -->
-
-<!-- wp:paragraph -->
-<p>有料ブログは月額数百円〜のコストがかかりますが、自由度が高く、本格的な運営が可能です。</p>
-<!-- /wp:paragraph -->
-
-<!-- wp:heading {"level":3} -->
-<h3 class="wp-block-heading">目的に応じたサービス選び</h3>
-<!-- /wp:heading -->
-
-<!-- wp:paragraph -->
-<p>ブログサービスを選ぶ際は、以下の3つのポイントを考えましょう。</p>
-<!-- /wp:paragraph -->
-
-<!-- wp:list -->
-<ul>
-<li><strong>収益化を考えているか</strong> - アフィリエイトや広告収入を得たいか</li>
-<li><strong>どこまでカスタマイズしたいか</strong> - デザインや機能の自由度</li>
-<li><strong>技術的な知識がどの程度あるか</strong> - HTMLやCSSの知識の有無</li>
-</ul>
-<!-- /wp:list -->
-
-<!-- wp:paragraph -->
-<p>これらを明確にすることで、自分に最適なサービスが見えてきます。</p>
-<!-- /wp:paragraph -->
-
-<!-- wp:paragraph -->
-<p>最初から完璧に決める必要はありません。</p>
-<!-- /wp:paragraph -->
-
-<!-- wp:paragraph -->
-<p>まずは無料ブログで始めて、慣れてきたら有料ブログに移行するのもありです。</p>
-<!-- /wp:paragraph -->
-
-<!-- wp:html -->
-<div class="ba-explain">
-<p class="box-title">無料から有料への移行も可能</p>
-<p>多くのブログサービスは、記事のエクスポート機能を提供しています。そのため、無料ブログで慣れてから、記事を引き継いで有料ブログに移行することも可能です。最初は気軽に無料で始めてみましょう。</p>
-</div>
-<!-- /wp:html -->
-
-<!-- wp:heading -->
-<h2 class="wp-block-heading">ステップ1: ブログサービスを選ぶ</h2>
-<!-- /wp:heading -->
-
-<!-- wp:paragraph -->
-<p>まずは、数あるブログサービスの中から、自分の目的に合ったものを選びましょう。</p>
-<!-- /wp:paragraph -->
-
-<!-- wp:paragraph -->
-<p>選択肢が多すぎて迷うかもしれませんが、大丈夫です。</p>
-<!-- /wp:paragraph -->
-
-<!-- wp:paragraph -->
-<p>初心者におすすめのサービスに絞って紹介します。</p>
-<!-- /wp:paragraph -->
-
-<!-- wp:heading {"level":3} -->
-<h3 class="wp-block-heading">初心者におすすめのサービス3選</h3>
-<!-- /wp:heading -->
-
-<!-- wp:paragraph -->
-<p>初心者の方には、以下の3つのサービスがおすすめです。</p>
-<!-- /wp:paragraph -->
-
-<!-- wp:table -->
-<figure class="wp-block-table"><table><thead><tr><th>サービス名</th><th>おすすめポイント</th><th>料金</th><th>難易度</th></tr></thead><tbody><tr><td>はてなブログ</td><td>コミュニティが活発で読者が増えやすい</td><td>無料〜月1,008円</td><td>★☆☆</td></tr><tr><td>WordPress.com</td><td>カスタマイズ性が高く将来性◎</td><td>無料〜月500円</td><td>★★☆</td></tr><tr><td>note</td><td>デザインがシンプルで書くことに集中できる</td><td>無料〜月500円</td><td>★☆☆</td></tr></tbody></table></figure>
-<!-- /wp:table -->
-
-<!-- wp:paragraph -->
-<p>はてなブログは、SNS的な要素が強く、他のブロガーとの交流がしやすいのが特徴。</p>
-<!-- /wp:paragraph -->
-
-<!-- wp:paragraph -->
-<p>記事を書くとはてなブックマークで拡散されやすく、初期からアクセスを集めやすいメリットがあります。</p>
-<!-- /wp:paragraph -->
-
-<!-- wp:paragraph -->
-<p>WordPress.comは、世界中で使われているWordPressの公式サービス。</p>
-<!-- /wp:paragraph -->
-
-<!-- wp:paragraph -->
-<p>無料プランでも基本的な機能は使えますが、有料プランにすると本格的なカスタマイズが可能になります。</p>
-<!-- /wp:paragraph -->
-
-<!-- wp:paragraph -->
-<p>noteは、デザインが統一されていて、書くことだけに集中できるのが魅力。</p>
-<!-- /wp:paragraph -->
-
-<!-- wp:paragraph -->
-<p>有料記事の販売機能もあり、クリエイター向けのプラットフォームとして人気です。</p>
-<!-- /wp:paragraph -->
-
-<!-- wp:html -->
-<div class="ba-explain">
-<p class="box-title">WordPress.comとWordPress（レンタルサーバー版）は別物</p>
-<p>WordPress.comとWordPress（レンタルサーバー版）は別物です。後者の方がカスタマイズ性が高いですが、サーバーの契約や設定が必要なため、初心者にはWordPress.comから始めるのがおすすめです。慣れてきたら、レンタルサーバー版に移行することもできます。</p>
-</div>
-<!-- /wp:html -->
-
-<!-- wp:heading {"level":3} -->
-<h3 class="wp-block-heading">選ぶ際の比較ポイント</h3>
-<!-- /wp:heading -->
-
-<!-- wp:paragraph -->
-<p>サービスを比較する際は、以下の点をチェックしましょう。</p>
-<!-- /wp:paragraph -->
-
-<!-- wp:list -->
-<ul>
-<li><strong>デザインのカスタマイズ性</strong> - テーマやレイアウトの変更可否</li>
-<li><strong>SEO対策のしやすさ</strong> - 検索エンジンに見つけてもらいやすいか</li>
-<li><strong>広告の有無</strong> - 無料プランでは運営側の広告が表示されるか</li>
-<li><strong>独自ドメインの設定</strong> - プロフェッショナルな印象を与えられるか</li>
-<li><strong>収益化の可否</strong> - アフィリエイトや広告掲載ができるか</li>
-<li><strong>データのエクスポート</strong> - 記事を他のサービスに移行できるか</li>
-</ul>
-<!-- /wp:list -->
-
-<!-- wp:paragraph -->
-<p>これらの項目を一つずつチェックしていくことで、自分に合ったサービスが見つかります。</p>
-<!-- /wp:paragraph -->
-
-<!-- wp:html -->
-<div class="ba-warning">
-<p class="box-title">無料プランは機能制限に注意</p>
-<p>無料プランでは機能が制限されることが多いです。例えば、独自ドメインが使えなかったり、広告が表示されたり、デザインのカスタマイズに制限があったりします。本格的に運営したい場合は、最初から有料プランを検討するか、途中でアップグレードすることを念頭に置いておきましょう。</p>
-</div>
-<!-- /wp:html -->
-
-<!-- wp:heading -->
-<h2 class="wp-block-heading">ステップ2: アカウントを作成する</h2>
-<!-- /wp:heading -->
-
-<!-- wp:paragraph -->
-<p>サービスを決めたら、次はアカウント作成です。</p>
-<!-- /wp:paragraph -->
-
-<!-- wp:paragraph -->
-<p>ここでは、実際の登録の流れを詳しく見ていきましょう。</p>
-<!-- /wp:paragraph -->
-
-<!-- wp:heading {"level":3} -->
-<h3 class="wp-block-heading">アカウント作成の基本的な流れ</h3>
-<!-- /wp:heading -->
-
-<!-- wp:paragraph -->
-<p>基本的な流れは以下の通りです。</p>
-<!-- /wp:paragraph -->
-
-<!-- wp:list {"ordered":true} -->
-<ol>
-<li>メールアドレスを登録</li>
-<li>ユーザー名（ブログURL）を決定</li>
-<li>パスワードを設定</li>
-<li>プロフィール情報を入力</li>
-<li>メール認証を完了</li>
-</ol>
-<!-- /wp:list -->
-
-<!-- wp:paragraph -->
-<p>ほとんどのサービスで、この流れは共通しています。</p>
-<!-- /wp:paragraph -->
-
-<!-- wp:paragraph -->
-<p>各ステップで注意すべきポイントを見ていきましょう。</p>
-<!-- /wp:paragraph -->
-
-<!-- wp:heading {"level":3} -->
-<h3 class="wp-block-heading">ユーザー名（ブログURL）の決め方</h3>
-<!-- /wp:heading -->
-
-<!-- wp:paragraph -->
-<p>ユーザー名は、あなたのブログのURLの一部になります。</p>
-<!-- /wp:paragraph -->
-
-<!-- wp:paragraph -->
-<p>例えば、はてなブログなら「https://ユーザー名.hatenablog.com」という形になります。</p>
-<!-- /wp:paragraph -->
-
-<!-- wp:html -->
-<div class="ba-point">
-<p class="box-title">後から変更できないので慎重に選ぼう</p>
-<p>ユーザー名は後から変更できないサービスが多いので、慎重に選びましょう。短くて覚えやすく、ブログのテーマを連想させる名前がおすすめです。例えば、料理ブログなら「cooking-diary」、旅行ブログなら「travel-notes」など、テーマが一目でわかる名前が良いでしょう。</p>
-</div>
-<!-- /wp:html -->
-
-<!-- wp:paragraph -->
-<p>ユーザー名を決める際のポイントは以下の通りです。</p>
-<!-- /wp:paragraph -->
-
-<!-- wp:list -->
-<ul>
-<li><strong>短くて覚えやすい</strong> - 10文字以内が理想</li>
-<li><strong>ブログのテーマを連想させる</strong> - 何のブログか分かりやすい</li>
-<li><strong>数字や記号を多用しない</strong> - シンプルで分かりやすく</li>
-<li><strong>他のSNSと統一する</strong> - TwitterやInstagramと同じ名前にすると認知されやすい</li>
-</ul>
-<!-- /wp:list -->
-
-<!-- wp:heading {"level":3} -->
-<h3 class="wp-block-heading">パスワード設定の注意点</h3>
-<!-- /wp:heading -->
-
-<!-- wp:paragraph -->
-<p>パスワードは、セキュリティの要です。</p>
-<!-- /wp:paragraph -->
-
-<!-- wp:paragraph -->
-<p>以下のポイントを押さえて、安全なパスワードを設定しましょう。</p>
-<!-- /wp:paragraph -->
-
-<!-- wp:html -->
-<div class="ba-summary-list">
-<p class="box-title">安全なパスワードの5つの条件</p>
-<ul>
-<li>12文字以上の長さにする</li>
-<li>大文字・小文字・数字・記号を組み合わせる</li>
-<li>辞書に載っている単語を避ける</li>
-<li>他のサービスと同じパスワードを使わない</li>
-<li>定期的に変更する</li>
-</ul>
-</div>
-<!-- /wp:html -->
-
-<!-- wp:paragraph -->
-<p>パスワード管理ツール（1PasswordやLastPassなど）を使うと、複雑なパスワードを安全に管理できます。</p>
-<!-- /wp:paragraph -->
-
-<!-- wp:heading -->
-<h2 class="wp-block-heading">ステップ3: 基本設定を行う</h2>
-<!-- /wp:heading -->
-
-<!-- wp:paragraph -->
-<p>アカウントができたら、ブログの基本設定を行います。</p>
-<!-- /wp:paragraph -->
-
-<!-- wp:paragraph -->
-<p>ここでの設定が、ブログの印象を大きく左右します。</p>
-<!-- /wp:paragraph -->
-
-<!-- wp:heading {"level":3} -->
-<h3 class="wp-block-heading">必ず設定すべき項目</h3>
-<!-- /wp:heading -->
-
-<!-- wp:paragraph -->
-<p>最低限、以下の項目は設定しておきましょう。</p>
-<!-- /wp:paragraph -->
-
-<!-- wp:html -->
-<div class="ba-summary-list">
-<p class="box-title">ブログ開設時の必須設定4項目</p>
-<ul>
-<li>ブログタイトル - 何について書くブログか明確に（30文字以内推奨）</li>
-<li>ブログ説明文 - 検索結果に表示される重要な要素（120文字以内推奨）</li>
-<li>プロフィール - 読者に自分を知ってもらう（簡潔で親しみやすく）</li>
-<li>プライバシー設定 - 公開範囲を決める（最初は限定公開もあり）</li>
-</ul>
-</div>
-<!-- /wp:html -->
-
-<!-- wp:heading {"level":3} -->
-<h3 class="wp-block-heading">ブログタイトルの付け方</h3>
-<!-- /wp:heading -->
-
-<!-- wp:paragraph -->
-<p>ブログタイトルは、読者が最初に目にする重要な要素です。</p>
-<!-- /wp:paragraph -->
-
-<!-- wp:paragraph -->
-<p>以下のポイントを意識して、魅力的なタイトルを付けましょう。</p>
-<!-- /wp:paragraph -->
-
-<!-- wp:table -->
-<figure class="wp-block-table"><table><thead><tr><th>タイプ</th><th>例</th><th>特徴</th></tr></thead><tbody><tr><td>テーマ直球型</td><td>「料理初心者のレシピブログ」</td><td>分かりやすさ重視</td></tr><tr><td>個性アピール型</td><td>「30代ワーママの時短料理日記」</td><td>差別化しやすい</td></tr><tr><td>キャッチー型</td><td>「10分で作れる絶品レシピ」</td><td>興味を引きやすい</td></tr></tbody></table></figure>
-<!-- /wp:table -->
-
-<!-- wp:paragraph -->
-<p>タイトルは後から変更できるサービスが多いので、最初は仮でもOKです。</p>
-<!-- /wp:paragraph -->
-
-<!-- wp:paragraph -->
-<p>記事を書いていくうちに、ブログの方向性が固まってきたら、改めて考え直しましょう。</p>
-<!-- /wp:paragraph -->
-
-<!-- wp:heading {"level":3} -->
-<h3 class="wp-block-heading">デザインテーマの選び方</h3>
-<!-- /wp:heading -->
-
-<!-- wp:paragraph -->
-<p>デザインテーマは、ブログの第一印象を決める重要な要素です。</p>
-<!-- /wp:paragraph -->
-
-<!-- wp:paragraph -->
-<p>選ぶ際のポイントは以下の通りです。</p>
-<!-- /wp:paragraph -->
-
-<!-- wp:list -->
-<ul>
-<li><strong>読みやすいフォントとレイアウト</strong> - 文字サイズや行間が適切か</li>
-<li><strong>スマートフォンでの表示に対応</strong> - レスポンシブデザインか</li>
-<li><strong>自分のブログの雰囲気に合ったデザイン</strong> - テーマとマッチしているか</li>
-<li><strong>カスタマイズのしやすさ</strong> - 色やレイアウトを変更できるか</li>
-<li><strong>読み込み速度</strong> - ページが重すぎないか</li>
-</ul>
-<!-- /wp:list -->
-
-<!-- wp:html -->
-<div class="ba-explain">
-<p class="box-title">最初は標準テーマで始めて後で変更もOK</p>
-<p>最初は標準のテーマでも十分です。記事を書き慣れてから、自分好みのテーマに変更するのもおすすめです。デザインにこだわりすぎて記事が書けなくなるより、まずは記事を書くことを優先しましょう。テーマは後からいつでも変更できます。</p>
-</div>
-<!-- /wp:html -->
-
-<!-- wp:paragraph -->
-<p>デザインテーマを選ぶ際は、実際にプレビューで確認してから決めるのがおすすめ。</p>
-<!-- /wp:paragraph -->
-
-<!-- wp:paragraph -->
-<p>スマートフォンでの表示も必ずチェックしましょう。</p>
-<!-- /wp:paragraph -->
-
-<!-- wp:paragraph -->
-<p>今は、ブログ閲覧の6〜7割がスマホからと言われています。</p>
-<!-- /wp:paragraph -->
-
-<!-- wp:heading {"level":3} -->
-<h3 class="wp-block-heading">SEO設定の基本</h3>
-<!-- /wp:heading -->
-
-<!-- wp:paragraph -->
-<p>SEO（検索エンジン最適化）は、検索結果で上位表示されるための施策です。</p>
-<!-- /wp:paragraph -->
-
-<!-- wp:paragraph -->
-<p>初心者でもできる基本的なSEO設定を紹介します。</p>
-<!-- /wp:paragraph -->
-
-<!-- wp:html -->
-<div class="ba-summary-list">
-<p class="box-title">初心者でもできるSEO基本設定</p>
-<ul>
-<li>タイトルにキーワードを含める</li>
-<li>メタディスクリプション（説明文）を設定する</li>
-<li>見出しタグ（H2、H3）を適切に使う</li>
-<li>画像にalt属性（代替テキスト）を設定する</li>
-<li>URLを分かりやすくする</li>
-</ul>
-</div>
-<!-- /wp:html -->
-
-<!-- wp:paragraph -->
-<p>SEOは奥が深いですが、最初はこれらの基本を押さえておけば十分です。</p>
-<!-- /wp:paragraph -->
-
-<!-- wp:heading -->
-<h2 class="wp-block-heading">ステップ4: 最初の記事を書く</h2>
-<!-- /wp:heading -->
-
-<!-- wp:paragraph -->
-<p>設定が終わったら、いよいよ記事を書き始めましょう。</p>
-<!-- /wp:paragraph -->
-
-<!-- wp:paragraph -->
-<p>最初の一歩が一番重要です。</p>
-<!-- /wp:paragraph -->
-
-<!-- wp:heading {"level":3} -->
-<h3 class="wp-block-heading">最初の記事は自己紹介がおすすめ</h3>
-<!-- /wp:heading -->
-
-<!-- wp:paragraph -->
-<p>一番最初の記事は、<span class="ba-highlight">自己紹介記事</span>にするのがおすすめです。</p>
-<!-- /wp:paragraph -->
-
-<!-- wp:paragraph -->
-<p>なぜなら、読者はまず「誰が書いているのか」を知りたいからです。</p>
-<!-- /wp:paragraph -->
-
-<!-- wp:paragraph -->
-<p>以下の内容を含めると、読者に親しみを持ってもらえます。</p>
-<!-- /wp:paragraph -->
-
-<!-- wp:list -->
-<ul>
-<li><strong>簡単な自己紹介</strong> - 名前、年齢、職業など</li>
-<li><strong>このブログで何を書いていくか</strong> - ブログのテーマや方向性</li>
-<li><strong>なぜブログを始めたのか</strong> - きっかけや動機</li>
-<li><strong>読者へのメッセージ</strong> - どんな人に読んでほしいか</li>
-<li><strong>趣味や興味</strong> - 人柄が伝わるエピソード</li>
-</ul>
-<!-- /wp:list -->
-
-<!-- wp:html -->
-<div class="ba-point">
-<p class="box-title">自己開示することで読者との距離が縮まる</p>
-<p>最初から完璧を目指さなくて大丈夫です。自分のことを素直に書くことで、読者との距離が縮まります。「この人の記事、また読みたい」と思ってもらえるような、親しみやすい自己紹介を心がけましょう。</p>
-</div>
-<!-- /wp:html -->
-
-<!-- wp:heading {"level":3} -->
-<h3 class="wp-block-heading">記事作成の基本的な流れ</h3>
-<!-- /wp:heading -->
-
-<!-- wp:paragraph -->
-<p>記事を書く際は、以下の流れを意識しましょう。</p>
-<!-- /wp:paragraph -->
-
-<!-- wp:list {"ordered":true} -->
-<ol>
-<li><strong>タイトルを決める</strong> - 読者の興味を引くキャッチーなタイトル</li>
-<li><strong>見出しを作る</strong> - 記事の骨組みを先に作る</li>
-<li><strong>各セクションの本文を書く</strong> - 見出しに沿って肉付けしていく</li>
-<li><strong>画像を挿入する</strong> - 視覚的に分かりやすく</li>
-<li><strong>内部リンクを設定する</strong> - 他の記事への導線を作る</li>
-<li><strong>プレビューで確認</strong> - 誤字脱字や表示崩れをチェック</li>
-<li><strong>公開</strong> - 勇気を出して公開ボタンを押す</li>
-</ol>
-<!-- /wp:list -->
-
-<!-- wp:paragraph -->
-<p>この流れを習慣化することで、記事作成がスムーズになります。</p>
-<!-- /wp:paragraph -->
-
-<!-- wp:heading {"level":3} -->
-<h3 class="wp-block-heading">読まれる記事を書くコツ</h3>
-<!-- /wp:heading -->
-
-<!-- wp:paragraph -->
-<p>せっかく記事を書くなら、多くの人に読んでもらいたいですよね。</p>
-<!-- /wp:paragraph -->
-
-<!-- wp:paragraph -->
-<p>読まれる記事を書くためのコツを紹介します。</p>
-<!-- /wp:paragraph -->
-
-<!-- wp:html -->
-<div class="ba-summary-list">
-<p class="box-title">読まれる記事の5つの特徴</p>
-<ul>
-<li>タイトルで興味を引く - 具体的な数字や問いかけを入れる</li>
-<li>冒頭で読むメリットを示す - この記事を読むと何が得られるか</li>
-<li>見出しで内容が分かる - 見出しを読むだけで全体像が掴める</li>
-<li>一文を短くする - 50文字以内を目安に</li>
-<li>具体例や体験談を入れる - 抽象的な説明より具体例が分かりやすい</li>
-</ul>
-</div>
-<!-- /wp:html -->
-
-<!-- wp:paragraph -->
-<p>また、画像や表、リストを効果的に使うことで、読みやすさが格段にアップします。</p>
-<!-- /wp:paragraph -->
-
-<!-- wp:html -->
-<div class="ba-point">
-<p class="box-title">完璧を目指すより公開することが大事</p>
-<p>最初から完璧を目指さなくて大丈夫です。書き慣れるまでは、短い記事でも構いません。継続することが最も重要です。1000文字の記事を月に10本書くより、500文字の記事を週に3本書く方が、ライティングスキルは早く向上します。</p>
-</div>
-<!-- /wp:html -->
-
-<!-- wp:heading -->
-<h2 class="wp-block-heading">ステップ5: 継続のための工夫</h2>
-<!-- /wp:heading -->
-
-<!-- wp:paragraph -->
-<p>ブログは開設よりも、<strong>継続すること</strong>の方が難しいものです。</p>
-<!-- /wp:paragraph -->
-
-<!-- wp:paragraph -->
-<p>多くの人が、最初の1ヶ月で挫折してしまいます。</p>
-<!-- /wp:paragraph -->
-
-<!-- wp:paragraph -->
-<p>ここでは、ブログを継続するためのコツを紹介します。</p>
-<!-- /wp:paragraph -->
-
-<!-- wp:heading {"level":3} -->
-<h3 class="wp-block-heading">更新頻度の目安</h3>
-<!-- /wp:heading -->
-
-<!-- wp:paragraph -->
-<p>無理のない更新頻度を設定しましょう。</p>
-<!-- /wp:paragraph -->
-
-<!-- wp:paragraph -->
-<p>自分のライフスタイルに合った頻度が一番です。</p>
-<!-- /wp:paragraph -->
-
-<!-- wp:table -->
-<figure class="wp-block-table"><table><thead><tr><th>目的</th><th>おすすめ頻度</th><th>1ヶ月の記事数</th></tr></thead><tbody><tr><td>趣味で楽しむ</td><td>週1回程度</td><td>4〜5記事</td></tr><tr><td>アクセスを増やしたい</td><td>週2〜3回</td><td>8〜12記事</td></tr><tr><td>本格的に収益化</td><td>週3回以上</td><td>12記事以上</td></tr></tbody></table></figure>
-<!-- /wp:table -->
-
-<!-- wp:paragraph -->
-<p>最初は週1回から始めて、慣れてきたら徐々に頻度を上げていくのがおすすめです。</p>
-<!-- /wp:paragraph -->
-
-<!-- wp:html -->
-<div class="ba-warning">
-<p class="box-title">最初から高頻度は挫折のもと</p>
-<p>最初から「毎日更新する」と意気込むと、ほぼ確実に挫折します。まずは週1回を3ヶ月続けることを目標にしましょう。習慣化してから、徐々に頻度を上げていく方が、結果的に長く続けられます。</p>
-</div>
-<!-- /wp:html -->
-
-<!-- wp:heading {"level":3} -->
-<h3 class="wp-block-heading">ネタ切れを防ぐコツ</h3>
-<!-- /wp:heading -->
-
-<!-- wp:paragraph -->
-<p>記事のネタに困ったときは、以下の方法を試してみてください。</p>
-<!-- /wp:paragraph -->
-
-<!-- wp:html -->
-<div class="ba-summary-list">
-<p class="box-title">ネタ切れを防ぐ7つのアイデア源</p>
-<ul>
-<li>日常の気づきをメモする習慣をつける</li>
-<li>他のブログやニュースからヒントを得る</li>
-<li>過去の記事を深堀りする（関連記事を書く）</li>
-<li>読者からの質問に答える（コメント欄を活用）</li>
-<li>季節やイベントに関連した話題を書く</li>
-<li>失敗談や体験談を記事にする</li>
-<li>よくある質問をまとめる（FAQスタイル）</li>
-</ul>
-</div>
-<!-- /wp:html -->
-
-<!-- wp:paragraph -->
-<p>特におすすめなのが、日常の気づきをメモする習慣です。</p>
-<!-- /wp:paragraph -->
-
-<!-- wp:paragraph -->
-<p>「これ、ブログに書けそう」と思ったら、すぐにスマホのメモアプリに記録しておきましょう。</p>
-<!-- /wp:paragraph -->
-
-<!-- wp:html -->
-<div class="ba-point">
-<p class="box-title">ネタ帳を作ってストックしておこう</p>
-<p>アイデアは突然浮かぶものです。スマホのメモアプリなどに、思いついたネタをすぐに記録する習慣をつけましょう。「ネタがない」と焦る前に、ストックしたアイデアを見返すことで、スムーズに記事が書けるようになります。</p>
-</div>
-<!-- /wp:html -->
-
-<!-- wp:heading {"level":3} -->
-<h3 class="wp-block-heading">モチベーション維持の秘訣</h3>
-<!-- /wp:heading -->
-
-<!-- wp:paragraph -->
-<p>ブログを継続する上で、モチベーションの維持は重要な課題です。</p>
-<!-- /wp:paragraph -->
-
-<!-- wp:paragraph -->
-<p>以下の方法を試してみてください。</p>
-<!-- /wp:paragraph -->
-
-<!-- wp:list -->
-<ul>
-<li><strong>小さな目標を設定する</strong> - 「まずは10記事書く」など達成可能な目標</li>
-<li><strong>アクセス数にこだわりすぎない</strong> - 最初の3ヶ月は見ない勇気も大事</li>
-<li><strong>ブロガー仲間を作る</strong> - SNSでつながって励まし合う</li>
-<li><strong>記録をつける</strong> - 記事数やPV数をグラフ化してみる</li>
-<li><strong>ご褒美を設定する</strong> - 10記事書いたら好きなものを買うなど</li>
-</ul>
-<!-- /wp:list -->
-
-<!-- wp:paragraph -->
-<p>特に重要なのが、「小さな目標」を設定すること。</p>
-<!-- /wp:paragraph -->
-
-<!-- wp:paragraph -->
-<p>最初から「月10万PV」のような大きな目標を立てると、挫折しやすくなります。</p>
-<!-- /wp:paragraph -->
-
-<!-- wp:html -->
-<div class="ba-explain">
-<p class="box-title">最初の3ヶ月はアクセス数を気にしない</p>
-<p>ブログを始めたばかりの頃は、アクセス数がほとんどないのが普通です。これは誰もが通る道なので、気にする必要はありません。最初の3ヶ月は「記事を書く習慣をつける」ことだけに集中しましょう。アクセス数は後からついてきます。</p>
-</div>
-<!-- /wp:html -->
-
-<!-- wp:heading -->
-<h2 class="wp-block-heading">ブログ開設後にやるべきこと</h2>
-<!-- /wp:heading -->
-
-<!-- wp:paragraph -->
-<p>ブログを開設して記事を書き始めたら、次のステップに進みましょう。</p>
-<!-- /wp:paragraph -->
-
-<!-- wp:heading {"level":3} -->
-<h3 class="wp-block-heading">SNSと連携する</h3>
-<!-- /wp:heading -->
-
-<!-- wp:paragraph -->
-<p>ブログとSNSを連携させることで、アクセスを増やすことができます。</p>
-<!-- /wp:paragraph -->
-
-<!-- wp:paragraph -->
-<p>特にTwitter（X）やInstagramとの相性が良いです。</p>
-<!-- /wp:paragraph -->
-
-<!-- wp:list -->
-<ul>
-<li>記事を書いたらSNSでシェアする</li>
-<li>ブログ用のSNSアカウントを作成する</li>
-<li>他のブロガーとつながる</li>
-<li>ハッシュタグを活用する</li>
-</ul>
-<!-- /wp:list -->
-
-<!-- wp:heading {"level":3} -->
-<h3 class="wp-block-heading">アクセス解析を導入する</h3>
-<!-- /wp:heading -->
-
-<!-- wp:paragraph -->
-<p>Googleアナリティクスなどのアクセス解析ツールを導入しましょう。</p>
-<!-- /wp:paragraph -->
-
-<!-- wp:paragraph -->
-<p>どの記事が読まれているか、どこからアクセスが来ているかが分かります。</p>
-<!-- /wp:paragraph -->
-
-<!-- wp:html -->
-<div class="ba-point">
-<p class="box-title">データを見て改善につなげよう</p>
-<p>アクセス解析を見ることで、読者のニーズが分かります。よく読まれている記事のテーマを深堀りしたり、人気のない記事をリライトしたりすることで、ブログの質が向上します。</p>
-</div>
-<!-- /wp:html -->
-
-<!-- wp:heading -->
-<h2 class="wp-block-heading">まとめ</h2>
-<!-- /wp:heading -->
-
-<!-- wp:paragraph -->
-<p>ブログ開設の5つのステップをご紹介しました。</p>
-<!-- /wp:paragraph -->
-
-<!-- wp:html -->
-<div class="ba-summary-box">
-<p class="box-title">ブログ開設5ステップの完全ガイド</p>
-<p>1. 目的に合ったブログサービスを選ぶ（無料 or 有料）<br>
-2. アカウントを作成し、ユーザー名を慎重に決める<br>
-3. ブログタイトル・説明文など基本設定を行う<br>
-4. 最初は自己紹介記事から始める<br>
-5. 無理のない更新頻度で継続する工夫をする</p>
-</div>
-<!-- /wp:html -->
-
-<!-- wp:paragraph -->
-<p>ブログは、始めるのも続けるのも、思っているほど難しくありません。</p>
-<!-- /wp:paragraph -->
-
-<!-- wp:paragraph -->
-<p>大事なのは、完璧を目指さず、まず一歩踏み出すこと。</p>
-<!-- /wp:paragraph -->
-
-<!-- wp:paragraph -->
-<p>この記事を参考に、ぜひブログを開設して、あなたの考えや経験を発信してみてください。</p>
-<!-- /wp:paragraph -->
-
-<!-- wp:paragraph -->
-<p>きっと素敵な出会いや発見が待っているはずです。</p>
-<!-- /wp:paragraph -->
-
-<!-- wp:paragraph -->
-<p>それでは、良いブログライフを!</p>
-<!-- /wp:paragraph -->"""
-}
-
-
-# 標準サンプル記事（Markdown形式）
-DEFAULT_SAMPLE_ARTICLE_MARKDOWN: SampleArticle = {
-    "id": "default-sample-markdown",
-    "title": "ブログ開設で失敗しない！選び方から設定まで5ステップで完了",
-    "format": "markdown",
-    "content": """「ブログを始めてみたいけど、情報が多すぎて何から手をつけていいかわからない」
-
-「設定項目が多すぎて、途中で挫折してしまいそう」
-
-そんな悩みを抱えている皆さんへ。
-
-実は、**ポイントを押さえれば、ブログ開設は思ったよりシンプルで、誰でも気軽に始められます**。
-
-僕も最初は不安でいっぱいでした。
-
-でも、正しい手順を踏むことで、スムーズにブログを開設することができたんです。
-
----
-
-**📝 ブログ初心者が抱える4つの悩み**
-
-- たくさんのブログサービスがあって選べない
-- 設定項目が多くて挫折しそう
-- 何を書けばいいか分からない
-- 続けられるか不安
-
----
-
-今回は、ブログ開設で失敗しないための5つのステップを、初心者の方にもわかりやすく解説していきます。
-
-この記事を読み終わる頃には、自信を持ってブログ開設に取り組めるようになっているはずです。
-
-それでは早速見ていきましょう。
-
-## ブログ開設前に知っておきたい基礎知識
-
-ブログを始める前に、まず基本的な知識を整理しておきましょう。
-
-ここを理解しておくことで、後々の判断がスムーズになります。
-
-### 無料ブログと有料ブログの違い
-
-ブログサービスには大きく分けて**無料ブログ**と**有料ブログ**の2種類があります。
-
-それぞれに特徴があるので、自分の目的に合わせて選びましょう。
-
-| 種類 | 代表的なサービス | 特徴 | 向いている人 |
-|------|----------------|------|------------|
-| 無料ブログ | はてなブログ、アメブロ、note | 初期費用0円、手軽に始められる | 趣味で書きたい人 |
-| 有料ブログ | WordPress（レンタルサーバー） | カスタマイズ自由、収益化しやすい | 本格的に運営したい人 |
-
----
-
-**💡 趣味なら無料、収益化なら有料がおすすめ**
-
-趣味で気軽に始めるなら無料ブログ、将来的に収益化を目指すなら有料ブログがおすすめです。ただし、無料ブログでも有料プランにアップグレードすれば、ある程度の収益化は可能です。
-
----
-
-無料ブログは初期費用がかからず、すぐに始められるのが最大のメリット。
-
-一方で、デザインのカスタマイズに制限があったり、運営側の広告が表示されたりします。
-
-有料ブログは月額数百円〜のコストがかかりますが、自由度が高く、本格的な運営が可能です。
-
-### 目的に応じたサービス選び
+SAMPLE_ARTICLES_PATH = Path(__file__).with_name('sample_articles.json.gz')
 
-ブログサービスを選ぶ際は、以下の3つのポイントを考えましょう。
+_default_samples: Optional[Dict[str, SampleArticle]] = None
+_default_samples_lock = threading.Lock()
 
-- **収益化を考えているか** - アフィリエイトや広告収入を得たいか
-- **どこまでカスタマイズしたいか** - デザインや機能の自由度
-- **技術的な知識がどの程度あるか** - HTMLやCSSの知識の有無
 
-これらを明確にすることで、自分に最適なサービスが見えてきます。
-
-最初から完璧に決める必要はありません。
-
-まずは無料ブログで始めて、慣れてきたら有料ブログに移行するのもありです。
-
----
-
-**📌 無料から有料への移行も可能**
-
-多くのブログサービスは、記事のエクスポート機能を提供しています。そのため、無料ブログで慣れてから、記事を引き継いで有料ブログに移行することも可能です。最初は気軽に無料で始めてみましょう。
-
----
-
-## ステップ1: ブログサービスを選ぶ
-
-まずは、数あるブログサービスの中から、自分の目的に合ったものを選びましょう。
-
-選択肢が多すぎて迷うかもしれませんが、大丈夫です。
-
-初心者におすすめのサービスに絞って紹介します。
-
-### 初心者におすすめのサービス3選
-
-初心者の方には、以下の3つのサービスがおすすめです。
-
-| サービス名 | おすすめポイント | 料金 | 難易度 |
-|-----------|----------------|------|--------|
-| はてなブログ | コミュニティが活発で読者が増えやすい | 無料〜月1,008円 | ★☆☆ |
-| WordPress.com | カスタマイズ性が高く将来性◎ | 無料〜月500円 | ★★☆ |
-| note | デザインがシンプルで書くことに集中できる | 無料〜月500円 | ★☆☆ |
-
-はてなブログは、SNS的な要素が強く、他のブロガーとの交流がしやすいのが特徴。
-
-記事を書くとはてなブックマークで拡散されやすく、初期からアクセスを集めやすいメリットがあります。
-
-WordPress.comは、世界中で使われているWordPressの公式サービス。
-
-無料プランでも基本的な機能は使えますが、有料プランにすると本格的なカスタマイズが可能になります。
-
-noteは、デザインが統一されていて、書くことだけに集中できるのが魅力。
-
-有料記事の販売機能もあり、クリエイター向けのプラットフォームとして人気です。
-
----
-
-**📌 WordPress.comとWordPress（レンタルサーバー版）は別物**
-
-WordPress.comとWordPress（レンタルサーバー版）は別物です。後者の方がカスタマイズ性が高いですが、サーバーの契約や設定が必要なため、初心者にはWordPress.comから始めるのがおすすめです。慣れてきたら、レンタルサーバー版に移行することもできます。
-
----
-
-### 選ぶ際の比較ポイント
-
-サービスを比較する際は、以下の点をチェックしましょう。
-
-- **デザインのカスタマイズ性** - テーマやレイアウトの変更可否
-- **SEO対策のしやすさ** - 検索エンジンに見つけてもらいやすいか
-- **広告の有無** - 無料プランでは運営側の広告が表示されるか
-- **独自ドメインの設定** - プロフェッショナルな印象を与えられるか
-- **収益化の可否** - アフィリエイトや広告掲載ができるか
-- **データのエクスポート** - 記事を他のサービスに移行できるか
-
-これらの項目を一つずつチェックしていくことで、自分に合ったサービスが見つかります。
-
----
-
-**⚠️ 無料プランは機能制限に注意**
-
-無料プランでは機能が制限されることが多いです。例えば、独自ドメインが使えなかったり、広告が表示されたり、デザインのカスタマイズに制限があったりします。本格的に運営したい場合は、最初から有料プランを検討するか、途中でアップグレードすることを念頭に置いておきましょう。
-
----
-
-## ステップ2: アカウントを作成する
-
-サービスを決めたら、次はアカウント作成です。
-
-ここでは、実際の登録の流れを詳しく見ていきましょう。
-
-### アカウント作成の基本的な流れ
-
-基本的な流れは以下の通りです。
-
-1. メールアドレスを登録
-2. ユーザー名（ブログURL）を決定
-3. パスワードを設定
-4. プロフィール情報を入力
-5. メール認証を完了
-
-ほとんどのサービスで、この流れは共通しています。
-
-各ステップで注意すべきポイントを見ていきましょう。
-
-### ユーザー名（ブログURL）の決め方
-
-ユーザー名は、あなたのブログのURLの一部になります。
-
-例えば、はてなブログなら「https://ユーザー名.hatenablog.com」という形になります。
-
----
-
-**💡 後から変更できないので慎重に選ぼう**
-
-ユーザー名は後から変更できないサービスが多いので、慎重に選びましょう。短くて覚えやすく、ブログのテーマを連想させる名前がおすすめです。例えば、料理ブログなら「cooking-diary」、旅行ブログなら「travel-notes」など、テーマが一目でわかる名前が良いでしょう。
-
----
-
-ユーザー名を決める際のポイントは以下の通りです。
-
-- **短くて覚えやすい** - 10文字以内が理想
-- **ブログのテーマを連想させる** - 何のブログか分かりやすい
-- **数字や記号を多用しない** - シンプルで分かりやすく
-- **他のSNSと統一する** - TwitterやInstagramと同じ名前にすると認知されやすい
-
-### パスワード設定の注意点
-
-パスワードは、セキュリティの要です。
-
-以下のポイントを押さえて、安全なパスワードを設定しましょう。
-
----
-
-**📝 安全なパスワードの5つの条件**
-
-- 12文字以上の長さにする
-- 大文字・小文字・数字・記号を組み合わせる
-- 辞書に載っている単語を避ける
-- 他のサービスと同じパスワードを使わない
-- 定期的に変更する
-
----
-
-パスワード管理ツール（1PasswordやLastPassなど）を使うと、複雑なパスワードを安全に管理できます。
-
-## ステップ3: 基本設定を行う
-
-アカウントができたら、ブログの基本設定を行います。
-
-ここでの設定が、ブログの印象を大きく左右します。
-
-### 必ず設定すべき項目
-
-最低限、以下の項目は設定しておきましょう。
-
----
-
-**📝 ブログ開設時の必須設定4項目**
-
-- ブログタイトル - 何について書くブログか明確に（30文字以内推奨）
-- ブログ説明文 - 検索結果に表示される重要な要素（120文字以内推奨）
-- プロフィール - 読者に自分を知ってもらう（簡潔で親しみやすく）
-- プライバシー設定 - 公開範囲を決める（最初は限定公開もあり）
-
----
-
-### ブログタイトルの付け方
-
-ブログタイトルは、読者が最初に目にする重要な要素です。
-
-以下のポイントを意識して、魅力的なタイトルを付けましょう。
-
-| タイプ | 例 | 特徴 |
-|-------|---|------|
-| テーマ直球型 | 「料理初心者のレシピブログ」 | 分かりやすさ重視 |
-| 個性アピール型 | 「30代ワーママの時短料理日記」 | 差別化しやすい |
-| キャッチー型 | 「10分で作れる絶品レシピ」 | 興味を引きやすい |
-
-タイトルは後から変更できるサービスが多いので、最初は仮でもOKです。
-
-記事を書いていくうちに、ブログの方向性が固まってきたら、改めて考え直しましょう。
-
-### デザインテーマの選び方
-
-デザインテーマは、ブログの第一印象を決める重要な要素です。
-
-選ぶ際のポイントは以下の通りです。
-
-- **読みやすいフォントとレイアウト** - 文字サイズや行間が適切か
-- **スマートフォンでの表示に対応** - レスポンシブデザインか
-- **自分のブログの雰囲気に合ったデザイン** - テーマとマッチしているか
-- **カスタマイズのしやすさ** - 色やレイアウトを変更できるか
-- **読み込み速度** - ページが重すぎないか
-
----
-
-**📌 最初は標準テーマで始めて後で変更もOK**
-
-最初は標準のテーマでも十分です。記事を書き慣れてから、自分好みのテーマに変更するのもおすすめです。デザインにこだわりすぎて記事が書けなくなるより、まずは記事を書くことを優先しましょう。テーマは後からいつでも変更できます。
-
----
-
-デザインテーマを選ぶ際は、実際にプレビューで確認してから決めるのがおすすめ。
-
-スマートフォンでの表示も必ずチェックしましょう。
-
-今は、ブログ閲覧の6〜7割がスマホからと言われています。
-
-### SEO設定の基本
-
-SEO（検索エンジン最適化）は、検索結果で上位表示されるための施策です。
-
-初心者でもできる基本的なSEO設定を紹介します。
-
----
-
-**📝 初心者でもできるSEO基本設定**
-
-- タイトルにキーワードを含める
-- メタディスクリプション（説明文）を設定する
-- 見出しタグ（H2、H3）を適切に使う
-- 画像にalt属性（代替テキスト）を設定する
-- URLを分かりやすくする
-
----
-
-SEOは奥が深いですが、最初はこれらの基本を押さえておけば十分です。
-
-## ステップ4: 最初の記事を書く
-
-設定が終わったら、いよいよ記事を書き始めましょう。
-
-最初の一歩が一番重要です。
-
-### 最初の記事は自己紹介がおすすめ
-
-一番最初の記事は、**自己紹介記事**にするのがおすすめです。
-
-なぜなら、読者はまず「誰が書いているのか」を知りたいからです。
-
-以下の内容を含めると、読者に親しみを持ってもらえます。
-
-- **簡単な自己紹介** - 名前、年齢、職業など
-- **このブログで何を書いていくか** - ブログのテーマや方向性
-- **なぜブログを始めたのか** - きっかけや動機
-- **読者へのメッセージ** - どんな人に読んでほしいか
-- **趣味や興味** - 人柄が伝わるエピソード
-
----
-
-**💡 自己開示することで読者との距離が縮まる**
-
-最初から完璧を目指さなくて大丈夫です。自分のことを素直に書くことで、読者との距離が縮まります。「この人の記事、また読みたい」と思ってもらえるような、親しみやすい自己紹介を心がけましょう。
-
----
-
-### 記事作成の基本的な流れ
-
-記事を書く際は、以下の流れを意識しましょう。
-
-1. **タイトルを決める** - 読者の興味を引くキャッチーなタイトル
-2. **見出しを作る** - 記事の骨組みを先に作る
-3. **各セクションの本文を書く** - 見出しに沿って肉付けしていく
-4. **画像を挿入する** - 視覚的に分かりやすく
-5. **内部リンクを設定する** - 他の記事への導線を作る
-6. **プレビューで確認** - 誤字脱字や表示崩れをチェック
-7. **公開** - 勇気を出して公開ボタンを押す
-
-この流れを習慣化することで、記事作成がスムーズになります。
-
-### 読まれる記事を書くコツ
-
-せっかく記事を書くなら、多くの人に読んでもらいたいですよね。
-
-読まれる記事を書くためのコツを紹介します。
-
----
-
-**📝 読まれる記事の5つの特徴**
-
-- タイトルで興味を引く - 具体的な数字や問いかけを入れる
-- 冒頭で読むメリットを示す - この記事を読むと何が得られるか
-- 見出しで内容が分かる - 見出しを読むだけで全体像が掴める
-- 一文を短くする - 50文字以内を目安に
-- 具体例や体験談を入れる - 抽象的な説明より具体例が分かりやすい
-
----
-
-また、画像や表、リストを効果的に使うことで、読みやすさが格段にアップします。
-
----
-
-**💡 完璧を目指すより公開することが大事**
-
-最初から完璧を目指さなくて大丈夫です。書き慣れるまでは、短い記事でも構いません。継続することが最も重要です。1000文字の記事を月に10本書くより、500文字の記事を週に3本書く方が、ライティングスキルは早く向上します。
-
----
-
-## ステップ5: 継続のための工夫
-
-ブログは開設よりも、**継続すること**の方が難しいものです。
-
-多くの人が、最初の1ヶ月で挫折してしまいます。
-
-ここでは、ブログを継続するためのコツを紹介します。
-
-### 更新頻度の目安
-
-無理のない更新頻度を設定しましょう。
-
-自分のライフスタイルに合った頻度が一番です。
-
-| 目的 | おすすめ頻度 | 1ヶ月の記事数 |
-|------|------------|-------------|
-| 趣味で楽しむ | 週1回程度 | 4〜5記事 |
-| アクセスを増やしたい | 週2〜3回 | 8〜12記事 |
-| 本格的に収益化 | 週3回以上 | 12記事以上 |
-
-最初は週1回から始めて、慣れてきたら徐々に頻度を上げていくのがおすすめです。
-
----
-
-**⚠️ 最初から高頻度は挫折のもと**
-
-最初から「毎日更新する」と意気込むと、ほぼ確実に挫折します。まずは週1回を3ヶ月続けることを目標にしましょう。習慣化してから、徐々に頻度を上げていく方が、結果的に長く続けられます。
-
----
-
-### ネタ切れを防ぐコツ
-
-記事のネタに困ったときは、以下の方法を試してみてください。
-
----
-
-**📝 ネタ切れを防ぐ7つのアイデア源**
-
-- 日常の気づきをメモする習慣をつける
-- 他のブログやニュースからヒントを得る
-- 過去の記事を深堀りする（関連記事を書く）
-- 読者からの質問に答える（コメント欄を活用）
-- 季節やイベントに関連した話題を書く
-- 失敗談や体験談を記事にする
-- よくある質問をまとめる（FAQスタイル）
-
----
-
-特におすすめなのが、日常の気づきをメモする習慣です。
-
-「これ、ブログに書けそう」と思ったら、すぐにスマホのメモアプリに記録しておきましょう。
-
----
-
-**💡 ネタ帳を作ってストックしておこう**
-
-アイデアは突然浮かぶものです。スマホのメモアプリなどに、思いついたネタをすぐに記録する習慣をつけましょう。「ネタがない」と焦る前に、ストックしたアイデアを見返すことで、スムーズに記事が書けるようになります。
-
----
-
-### モチベーション維持の秘訣
-
-ブログを継続する上で、モチベーションの維持は重要な課題です。
-
-以下の方法を試してみてください。
-
-- **小さな目標を設定する** - 「まずは10記事書く」など達成可能な目標
-- **アクセス数にこだわりすぎない** - 最初の3ヶ月は見ない勇気も大事
-- **ブロガー仲間を作る** - SNSでつながって励まし合う
-- **記録をつける** - 記事数やPV数をグラフ化してみる
-- **ご褒美を設定する** - 10記事書いたら好きなものを買うなど
-
-特に重要なのが、「小さな目標」を設定すること。
-
-最初から「月10万PV」のような大きな目標を立てると、挫折しやすくなります。
-
----
-
-**📌 最初の3ヶ月はアクセス数を気にしない**
-
-ブログを始めたばかりの頃は、アクセス数がほとんどないのが普通です。これは誰もが通る道なので、気にする必要はありません。最初の3ヶ月は「記事を書く習慣をつける」ことだけに集中しましょう。アクセス数は後からついてきます。
-
----
-
-## ブログ開設後にやるべきこと
-
-ブログを開設して記事を書き始めたら、次のステップに進みましょう。
-
-### SNSと連携する
-
-ブログとSNSを連携させることで、アクセスを増やすことができます。
-
-特にTwitter（X）やInstagramとの相性が良いです。
-
-- 記事を書いたらSNSでシェアする
-- ブログ用のSNSアカウントを作成する
-- 他のブロガーとつながる
-- ハッシュタグを活用する
-
-### アクセス解析を導入する
-
-Googleアナリティクスなどのアクセス解析ツールを導入しましょう。
-
-どの記事が読まれているか、どこからアクセスが来ているかが分かります。
-
----
-
-**💡 データを見て改善につなげよう**
-
-アクセス解析を見ることで、読者のニーズが分かります。よく読まれている記事のテーマを深堀りしたり、人気のない記事をリライトしたりすることで、ブログの質が向上します。
-
----
-
-## まとめ
-
-ブログ開設の5つのステップをご紹介しました。
-
----
-
-**📝 ブログ開設5ステップの完全ガイド**
-
-1. 目的に合ったブログサービスを選ぶ（無料 or 有料）
-2. アカウントを作成し、ユーザー名を慎重に決める
-3. ブログタイトル・説明文など基本設定を行う
-4. 最初は自己紹介記事から始める
-5. 無理のない更新頻度で継続する工夫をする
-
----
-
-ブログは、始めるのも続けるのも、思っているほど難しくありません。
-
-大事なのは、完璧を目指さず、まず一歩踏み出すこと。
-
-この記事を参考に、ぜひブログを開設して、あなたの考えや経験を発信してみてください。
-
-きっと素敵な出会いや発見が待っているはずです。
+def load_default_sample_articles() -> Dict[str, SampleArticle]:
+    """
+    標準サンプル記事をデータファイルから読み込む（コンテナ内で1度だけ）
 
-それでは、良いブログライフを!"""
-}
+    Returns:
+        {'wordpress': 記事, 'markdown': 記事}
+    """
+    global _default_samples
+    if _default_samples is None:
+        with _default_samples_lock:
+            if _default_samples is None:
+                with gzip.open(SAMPLE_ARTICLES_PATH, 'rt', encoding='utf-8') as f:
+                    _default_samples = json.load(f)
+    return _default_samples
 
 
 def get_default_sample_article(format: Literal['wordpress', 'markdown'] = 'wordpress') -> SampleArticle:
@@ -1293,9 +61,10 @@ def get_default_sample_article(format: Literal['wordpress', 'markdown'] = 'wordp
     Returns:
         指定された形式のサンプル記事
     """
+    samples = load_default_sample_articles()
     if format == 'markdown':
-        return DEFAULT_SAMPLE_ARTICLE_MARKDOWN
-    return DEFAULT_SAMPLE_ARTICLE_WORDPRESS
+        return samples['markdown']
+    return samples['wordpress']
 
 
 def get_sample_article_for_generation(
@@ -0,0 +1,193 @@
+"""
+記事構造JSONのインクリメンタルパーサー
+ストリーミング受信中のテキストから、完成したセクションを逐次取り出す
+途中で途切れた・壊れた出力から完成済みのセクション（セクション単位の出力ではブロック）を
+回収する用途にも使う
+"""
+
+import json
+import re
+from typing import Any, Dict, List, Tuple
+
+from utils import log_warning
+
+
+# "sections": [ の開始位置を検出
+SECTIONS_ARRAY_PATTERN = re.compile(r'"sections"\s*:\s*\[')
+# セクション単位の出力の "blocks": [ の開始位置を検出
+BLOCKS_ARRAY_PATTERN = re.compile(r'"blocks"\s*:\s*\[')
+# トップレベルの "title": "..." と "meta": { を検出
+TITLE_PATTERN = re.compile(r'"title"\s*:\s*("(?:[^"\\]|\\.)*")')
+META_PATTERN = re.compile(r'"meta"\s*:\s*(?=\{)')
+# セクション単位の出力の "heading": "..." を検出
+HEADING_PATTERN = re.compile(r'"heading"\s*:\s*("(?:[^"\\]|\\.)*")')
+
+
+class SectionStreamParser:
+    """
+    sections配列の要素（セクション）が閉じた時点で1件ずつ返すパーサー
+
+    Claudeの出力テキストを feed() で断片的に渡すと、
+    新たに完成したセクションのリストが返る。
+    文字列リテラル内の括弧やエスケープを考慮して深さを追跡する。
+    array_pattern を指定すると、sections配列の代わりにその配列の要素を返す。
+    """
+
+    def __init__(self, array_pattern: 're.Pattern[str]' = SECTIONS_ARRAY_PATTERN):
+        self._array_pattern = array_pattern
+        self._buffer = ''
+        self._pos = 0
+        self._in_array = False
+        self._finished = False
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._section_start = -1
+        self.sections_count = 0
+
+    @property
+    def finished(self) -> bool:
+        """sections配列の終端まで読み終えたかどうか"""
+        return self._finished
+
+    def feed(self, text: str) -> List[Dict[str, Any]]:
+        """
+        テキスト断片を追加し、新たに完成したセクションを返す
+
+        Args:
+            text: ストリームから受信したテキスト断片
+
+        Returns:
+            完成したセクションのリスト（なければ空リスト）
+        """
+        if self._finished or not text:
+            return []
+
+        self._buffer += text
+
+        if not self._in_array:
+            match = self._array_pattern.search(self._buffer, max(0, self._pos - 16))
+            if not match:
+                # キーが断片の境界をまたぐ可能性があるため末尾は再走査する
+                self._pos = len(self._buffer)
+                return []
+            self._in_array = True
+            self._pos = match.end()
+
+        return self._scan()
+
+    def _scan(self) -> List[Dict[str, Any]]:
+        """バッファを走査して閉じたセクションを取り出す"""
+        completed = []
+        buffer = self._buffer
+        i = self._pos
+
+        while i < len(buffer):
+            char = buffer[i]
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == '\\':
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+            elif char == '"':
+                self._in_string = True
+            elif char == '{':
+                if self._depth == 0:
+                    self._section_start = i
+                self._depth += 1
+            elif char == '}':
+                self._depth -= 1
+                if self._depth == 0 and self._section_start >= 0:
+                    section = self._decode(buffer[self._section_start:i + 1])
+                    if section is not None:
+                        completed.append(section)
+                    self._section_start = -1
+            elif char == ']' and self._depth == 0:
+                self._finished = True
+                i += 1
+                break
+
+            i += 1
+
+        self._pos = i
+        return completed
+
+    def _decode(self, raw: str) -> Any:
+        """セクション1件分のJSONをデコード"""
+        try:
+            section = json.loads(raw)
+        except json.JSONDecodeError as e:
+            log_warning('Failed to decode streamed section', error=str(e))
+            return None
+
+        if not isinstance(section, dict):
+            return None
+
+        self.sections_count += 1
+        return section
+
+
+def salvage_structure(raw_text: str) -> Tuple[Dict[str, Any], bool]:
+    """
+    途中で途切れた・壊れた構造JSONから、完成済みの部分を回収する
+
+    Args:
+        raw_text: Claudeの出力テキスト（前後の説明文やコードブロックを含んでもよい）
+
+    Returns:
+        (回収した構造, sections配列が閉じていたか)
+        sections配列が閉じていない場合、末尾のセクションが欠けている
+    """
+    parser = SectionStreamParser()
+    sections = parser.feed(raw_text)
+    structure: Dict[str, Any] = {'sections': sections}
+
+    # titleはsections配列より前にあるもの（ブロックのtitleと区別する）
+    sections_match = SECTIONS_ARRAY_PATTERN.search(raw_text)
+    head = raw_text[:sections_match.start()] if sections_match else raw_text
+    title_match = TITLE_PATTERN.search(head)
+    if title_match:
+        try:
+            structure['title'] = json.loads(title_match.group(1))
+        except json.JSONDecodeError:
+            pass
+
+    # metaはsections配列の後ろにある最後の出現を使う
+    meta_matches = list(META_PATTERN.finditer(raw_text))
+    if parser.finished and meta_matches:
+        try:
+            meta, _ = json.JSONDecoder().raw_decode(raw_text, meta_matches[-1].end())
+            if isinstance(meta, dict):
+                structure['meta'] = meta
+        except json.JSONDecodeError:
+            pass
+
+    return structure, parser.finished
+
+
+def salvage_section(raw_text: str) -> Dict[str, Any]:
+    """
+    途中で途切れた・壊れたセクション単位のJSONから、完成済みのブロックを回収する
+
+    Args:
+        raw_text: Claudeの出力テキスト（{"heading": ..., "blocks": [...]} 形式）
+
+    Returns:
+        回収したセクション（blocksは完成済みのブロックのみ）
+    """
+    parser = SectionStreamParser(BLOCKS_ARRAY_PATTERN)
+    section: Dict[str, Any] = {'blocks': parser.feed(raw_text)}
+
+    blocks_match = BLOCKS_ARRAY_PATTERN.search(raw_text)
+    head = raw_text[:blocks_match.start()] if blocks_match else raw_text
+    heading_match = HEADING_PATTERN.search(head)
+    if heading_match:
+        try:
+            section['heading'] = json.loads(heading_match.group(1))
+        except json.JSONDecodeError:
+            pass
+
+    return section
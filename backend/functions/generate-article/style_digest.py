@@ -0,0 +1,333 @@
+"""
+サンプル記事のスタイルダイジェスト
+
+サンプル記事の全文（1件あたり最大20,000文字）の代わりに記事生成プロンプトへ渡す要約。
+代表的な抜粋・一文の長さの分布・文末表現の分布・装飾の使い方を出力形式ごとに集計する。
+設定保存時に manage-settings で1回だけ算出して設定に保存し、記事生成時はそれを参照する。
+
+- build_sample_digest(): サンプル記事のリストからダイジェストを算出
+- get_format_digest(): 設定から出力形式のダイジェストを取得（未保存・旧バージョンなら算出）
+
+数値はDynamoDBにそのまま保存できるよう整数のみとする（割合は百分率）。
+
+generate-article/style_digest.py と manage-settings/style_digest.py は同一内容。
+Lambda関数ごとにデプロイされるため、同じファイルを配置する。
+"""
+
+import re
+from collections import Counter
+from typing import Any, Dict, List, Optional, Tuple
+
+
+# ダイジェストの形式のバージョン（算出方法を変えたら上げる。古いダイジェストは記事生成時に再算出する）
+DIGEST_VERSION = 1
+
+# 抜粋（導入・まとめ）の目安の文字数
+EXCERPT_CHARS = 300
+# 装飾の使用例の最大文字数
+DECORATION_EXAMPLE_CHARS = 80
+# 文末表現の上位件数
+TOP_ENDINGS = 8
+# 短い文・長い文とみなす文字数
+SHORT_SENTENCE_CHARS = 30
+LONG_SENTENCE_CHARS = 60
+
+# 文末表現（長いものから判定する）
+SENTENCE_ENDINGS = (
+    'ですよね', 'ますよね', 'でしょうか', 'でしょう', 'ましょう', 'ませんか', 'ません', 'ください',
+    'ました', 'でした', 'ですね', 'ますね', 'ですよ', 'ますよ', 'です', 'ます',
+    'である', 'よね', 'んだ', 'だ', 'ね', 'よ',
+)
+SENTENCE_SPLIT_PATTERN = re.compile(r'(?<=[。！？!?])')
+# 文として数える末尾の文字（見出し・リスト項目・表のセルなどの体言の断片は文の統計から除く）
+SENTENCE_TERMINALS = ('。', '！', '？', '!', '?', '」', '』')
+SENTENCE_TRAILING_CHARS = '。！？!?」』）)…〜ー 　'
+
+# WordPress（Gutenberg HTML）
+HTML_COMMENT_PATTERN = re.compile(r'<!--.*?-->', re.DOTALL)
+HTML_TAG_PATTERN = re.compile(r'<[^>]+>')
+WP_TEXT_BLOCK_PATTERN = re.compile(r'<(p|li|td|th)(?:\s[^>]*)?>(.*?)</\1>', re.DOTALL)
+WP_HEADING_PATTERN = re.compile(r'<h([2-3])(?:\s[^>]*)?>(.*?)</h\1>', re.DOTALL)
+WP_DECORATION_PATTERN = re.compile(
+    r'<(span|div)\s+class="((?:ba-|box-|balloon)[\w-]*)"[^>]*>(.*?)</\1>', re.DOTALL
+)
+WP_TABLE_PATTERN = re.compile(r'<table\b')
+WP_LIST_PATTERN = re.compile(r'<(?:ul|ol)\b')
+
+# Markdown
+MD_HEADING_PATTERN = re.compile(r'(#{2,3})\s+(.+)')
+MD_DECORATION_PATTERN = re.compile(r':::(\w+)(?:\s+type="(\w+)")?')
+MD_LIST_PATTERN = re.compile(r'(?:[-+*]|\d+\.)\s+')
+MD_INLINE_PATTERN = re.compile(r'`[^`]+`|!\[[^\]]*\]\([^)]+\)|\*+|_{2,}')
+MD_LINK_PATTERN = re.compile(r'\[([^\]]+)\]\([^)]+\)')
+
+
+def _html_text(html: str) -> str:
+    """HTML断片からタグを除いたテキスト"""
+    return ' '.join(HTML_TAG_PATTERN.sub('', html).split())
+
+
+def _markdown_text(line: str) -> str:
+    """Markdownの1行から記法を除いたテキスト"""
+    line = MD_LINK_PATTERN.sub(r'\1', line)
+    return ' '.join(MD_INLINE_PATTERN.sub('', line).split())
+
+
+def _parse_wordpress(content: str) -> Dict[str, Any]:
+    """WordPress形式のサンプルから段落・見出し・装飾を抽出"""
+    content = HTML_COMMENT_PATTERN.sub('', content)
+    decorations: List[Tuple[str, str]] = []
+    for match in WP_DECORATION_PATTERN.finditer(content):
+        decorations.append((match.group(2), _html_text(match.group(3))))
+
+    paragraphs = [
+        text for text in (_html_text(m.group(2)) for m in WP_TEXT_BLOCK_PATTERN.finditer(content)) if text
+    ]
+    if not paragraphs:
+        # ブロックのマークアップがない場合は行単位で扱う
+        paragraphs = [text for text in (_html_text(line) for line in content.split('\n')) if text]
+
+    headings = Counter(f'h{m.group(1)}' for m in WP_HEADING_PATTERN.finditer(content))
+    return {
+        'paragraphs': paragraphs,
+        'decorations': decorations,
+        'structure': {
+            'h2': headings['h2'],
+            'h3': headings['h3'],
+            'lists': len(WP_LIST_PATTERN.findall(content)),
+            'tables': len(WP_TABLE_PATTERN.findall(content)),
+        },
+    }
+
+
+def _parse_markdown(content: str) -> Dict[str, Any]:
+    """Markdown形式のサンプルから段落・見出し・装飾を抽出（コードブロックは除外）"""
+    paragraphs: List[str] = []
+    decorations: List[Tuple[str, str]] = []
+    structure = {'h2': 0, 'h3': 0, 'lists': 0, 'tables': 0}
+
+    current: List[str] = []
+    decoration: Optional[str] = None
+    decoration_lines: List[str] = []
+    in_code = False
+    in_list = False
+    in_table = False
+
+    def flush():
+        if current:
+            paragraphs.append(' '.join(current))
+            current.clear()
+
+    for line in content.split('\n'):
+        stripped = line.strip()
+        if stripped.startswith(('```', '~~~')):
+            in_code = not in_code
+            flush()
+            continue
+        if in_code:
+            continue
+
+        if not stripped or set(stripped) <= set('-*_'):
+            # 空行・区切り線
+            flush()
+            in_list = in_table = False
+            continue
+
+        if stripped.startswith(':::'):
+            flush()
+            match = MD_DECORATION_PATTERN.match(stripped)
+            if match:
+                decoration = f'{match.group(1)}:{match.group(2)}' if match.group(2) else match.group(1)
+                decoration_lines = []
+            elif decoration:
+                decorations.append((decoration, ' '.join(decoration_lines)))
+                decoration = None
+            continue
+
+        heading = MD_HEADING_PATTERN.fullmatch(stripped)
+        if heading:
+            flush()
+            structure[f'h{len(heading.group(1))}'] += 1
+            continue
+
+        if stripped.startswith('|'):
+            flush()
+            if not in_table:
+                structure['tables'] += 1
+                in_table = True
+            continue
+
+        if stripped.startswith('>'):
+            flush()
+            text = _markdown_text(stripped.lstrip('> '))
+            decorations.append(('quote', text))
+            if text:
+                paragraphs.append(text)
+            continue
+
+        list_item = MD_LIST_PATTERN.match(stripped)
+        if list_item:
+            flush()
+            if not in_list:
+                structure['lists'] += 1
+                in_list = True
+            text = _markdown_text(stripped[list_item.end():])
+            if text:
+                paragraphs.append(text)
+            continue
+
+        text = _markdown_text(stripped)
+        if decoration:
+            decoration_lines.append(text)
+        if text:
+            current.append(text)
+
+    flush()
+    return {'paragraphs': paragraphs, 'decorations': decorations, 'structure': structure}
+
+
+def split_sentences(text: str) -> List[str]:
+    """段落を文に分割（句点・感嘆符・疑問符・閉じかぎ括弧で終わるもののみ）"""
+    sentences = (sentence.strip() for sentence in SENTENCE_SPLIT_PATTERN.split(text))
+    return [sentence for sentence in sentences if sentence.endswith(SENTENCE_TERMINALS)]
+
+
+def classify_ending(sentence: str) -> str:
+    """文末表現を分類（該当しない場合は「その他」。体言止めなど）"""
+    body = sentence.rstrip(SENTENCE_TRAILING_CHARS)
+    for ending in SENTENCE_ENDINGS:
+        if body.endswith(ending):
+            return ending
+    if body.endswith(('か', 'かな')):
+        return 'か'
+    return 'その他'
+
+
+def _percent(count: int, total: int) -> int:
+    return round(count * 100 / total) if total else 0
+
+
+def _percentile(sorted_values: List[int], ratio: float) -> int:
+    if not sorted_values:
+        return 0
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * ratio))]
+
+
+def _excerpt(paragraphs: List[str], from_end: bool = False) -> str:
+    """先頭（または末尾）から目安の文字数に達するまで段落を集めた抜粋（長い段落は目安の2倍で切る）"""
+    picked: List[str] = []
+    total = 0
+    for paragraph in (reversed(paragraphs) if from_end else paragraphs):
+        picked.append(paragraph)
+        total += len(paragraph)
+        if total >= EXCERPT_CHARS:
+            break
+    if from_end:
+        picked.reverse()
+        return '\n'.join(picked)[-EXCERPT_CHARS * 2:]
+    return '\n'.join(picked)[:EXCERPT_CHARS * 2]
+
+
+def _digest_for_format(samples: List[Dict[str, Any]], output_format: str) -> Optional[Dict[str, Any]]:
+    """同じ出力形式のサンプル記事をまとめてダイジェストを算出"""
+    if not samples:
+        return None
+
+    sentence_lengths: List[int] = []
+    endings: Counter = Counter()
+    questions = exclamations = 0
+    paragraph_count = 0
+    decoration_counts: Counter = Counter()
+    decoration_examples: Dict[str, str] = {}
+    structure: Counter = Counter()
+    excerpts = []
+
+    for sample in samples:
+        content = sample.get('content', '') or ''
+        parsed = _parse_wordpress(content) if output_format == 'wordpress' else _parse_markdown(content)
+        paragraphs = parsed['paragraphs']
+        paragraph_count += len(paragraphs)
+        structure.update(parsed['structure'])
+
+        for paragraph in paragraphs:
+            for sentence in split_sentences(paragraph):
+                sentence_lengths.append(len(sentence))
+                endings[classify_ending(sentence)] += 1
+                if sentence.endswith(('？', '?')):
+                    questions += 1
+                elif sentence.endswith(('！', '!')):
+                    exclamations += 1
+
+        for name, text in parsed['decorations']:
+            decoration_counts[name] += 1
+            if text and name not in decoration_examples:
+                decoration_examples[name] = text[:DECORATION_EXAMPLE_CHARS]
+
+        excerpts.append({
+            'title': sample.get('title', ''),
+            'intro': _excerpt(paragraphs),
+            'closing': _excerpt(paragraphs, from_end=True),
+        })
+
+    sentence_count = len(sentence_lengths)
+    sorted_lengths = sorted(sentence_lengths)
+    return {
+        'sampleCount': len(samples),
+        'sentences': {
+            'count': sentence_count,
+            'avgChars': round(sum(sentence_lengths) / sentence_count) if sentence_count else 0,
+            'medianChars': _percentile(sorted_lengths, 0.5),
+            'p90Chars': _percentile(sorted_lengths, 0.9),
+            'shortPercent': _percent(sum(1 for n in sentence_lengths if n <= SHORT_SENTENCE_CHARS), sentence_count),
+            'longPercent': _percent(sum(1 for n in sentence_lengths if n > LONG_SENTENCE_CHARS), sentence_count),
+            'questionPercent': _percent(questions, sentence_count),
+            'exclamationPercent': _percent(exclamations, sentence_count),
+        },
+        'paragraphs': {
+            'count': paragraph_count,
+            'avgSentences': round(sentence_count / paragraph_count) if paragraph_count else 0,
+        },
+        'endings': [
+            {'ending': ending, 'percent': _percent(count, sentence_count)}
+            for ending, count in endings.most_common(TOP_ENDINGS)
+        ],
+        'decorations': [
+            {'name': name, 'count': count, 'example': decoration_examples.get(name, '')}
+            for name, count in decoration_counts.most_common()
+        ],
+        'structure': dict(structure),
+        'excerpts': excerpts,
+    }
+
+
+def build_sample_digest(samples: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    サンプル記事のリストから出力形式ごとのダイジェストを算出
+
+    Returns:
+        {'version': DIGEST_VERSION, 'wordpress': ダイジェストまたはNone, 'markdown': ダイジェストまたはNone}
+    """
+    by_format: Dict[str, List[Dict[str, Any]]] = {'wordpress': [], 'markdown': []}
+    for sample in samples or []:
+        sample_format = 'markdown' if sample.get('format') == 'markdown' else 'wordpress'
+        by_format[sample_format].append(sample)
+
+    return {
+        'version': DIGEST_VERSION,
+        'wordpress': _digest_for_format(by_format['wordpress'], 'wordpress'),
+        'markdown': _digest_for_format(by_format['markdown'], 'markdown'),
+    }
+
+
+def get_format_digest(settings: Dict[str, Any], output_format: str) -> Optional[Dict[str, Any]]:
+    """
+    設定から出力形式のダイジェストを取得
+
+    設定保存時に算出したダイジェストを使う。保存されていない場合
+    （デフォルトのサンプル記事・ダイジェスト導入前に保存した設定）や形式のバージョンが古い場合は算出する。
+    """
+    target_format = 'markdown' if output_format == 'markdown' else 'wordpress'
+    digest = settings.get('sampleDigest')
+    if not isinstance(digest, dict) or digest.get('version') != DIGEST_VERSION:
+        digest = build_sample_digest(settings.get('sampleArticles', []))
+    return digest.get(target_format)
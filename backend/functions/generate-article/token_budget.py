@@ -0,0 +1,150 @@
+"""
+出力トークン予算プランナー
+
+依頼された文字数（日本語）と記事タイプから max_tokens を決定する。
+文字数あたりのトークン数は、保存済み記事の実績（依頼文字数と outputTokens）で
+ユーザーごとに補正する。実績は記事タイプの補正を除いた値に揃えてから集計するため、
+補正値を使う場合も記事タイプの補正は予算の算出時に1回だけ掛かる。
+"""
+
+import math
+import os
+import statistics
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+from utils import log_info, log_warning
+
+
+# 1トークンあたりの依頼文字数（実績がない場合の既定値）
+# WordPressはJSON構造（キー・装飾ID）の分だけトークンを多く消費する
+DEFAULT_CHARS_PER_TOKEN = {
+    'wordpress': 0.6,
+    'markdown': 0.9,
+}
+
+# 記事タイプごとの補正（手順・比較表などのマークアップ分）
+ARTICLE_TYPE_FACTORS = {
+    'info': 1.0,
+    'howto': 1.1,
+    'review': 1.15,
+}
+
+# タイトル・メタ情報などの本文以外の出力
+FIXED_OVERHEAD_TOKENS = 400
+# 指定文字数を超過する生成に備えた余裕
+BUDGET_HEADROOM = 1.3
+
+MIN_OUTPUT_TOKENS = 1500
+MAX_OUTPUT_TOKENS = int(os.environ.get('MAX_OUTPUT_TOKENS', '20000'))
+
+# 補正に使う実績の件数と、補正を有効にする最小件数
+CALIBRATION_SAMPLE_LIMIT = 20
+CALIBRATION_MIN_SAMPLES = 3
+CALIBRATION_CACHE_SECONDS = 3600
+
+_calibration_cache: Dict[str, Dict[str, Any]] = {}
+_calibration_lock = threading.Lock()
+
+
+def plan_output_tokens(
+    target_chars: int,
+    output_format: str = 'wordpress',
+    article_type: str = 'info',
+    chars_per_token: Optional[float] = None,
+    include_overhead: bool = True
+) -> int:
+    """
+    依頼文字数から出力トークン予算を算出
+
+    Args:
+        target_chars: 依頼された本文の文字数
+        output_format: 出力形式（wordpress / markdown）
+        article_type: 記事タイプ（info / howto / review）
+        chars_per_token: 補正済みの1トークンあたり文字数（記事タイプの補正を除いた値。未指定時は既定値）
+        include_overhead: タイトル・メタ情報分を加えるか（セクション単位の生成ではFalse）
+
+    Returns:
+        max_tokens に指定する値
+    """
+    ratio = chars_per_token or DEFAULT_CHARS_PER_TOKEN.get(output_format, DEFAULT_CHARS_PER_TOKEN['wordpress'])
+    factor = ARTICLE_TYPE_FACTORS.get(article_type, 1.0)
+
+    tokens = math.ceil(target_chars / ratio * factor * BUDGET_HEADROOM)
+    if include_overhead:
+        tokens += FIXED_OVERHEAD_TOKENS
+
+    return max(MIN_OUTPUT_TOKENS, min(tokens, MAX_OUTPUT_TOKENS))
+
+
+def calculate_chars_per_token(samples: List[Dict[str, Any]]) -> Optional[float]:
+    """
+    実績から1トークンあたりの依頼文字数を推定（外れ値に強い中央値）
+
+    記事タイプごとにマークアップ分のトークン数が異なるため、各実績を記事タイプの補正で
+    割り戻し、info 相当の値に揃えてから中央値を取る。
+
+    Args:
+        samples: {'targetChars': int, 'outputTokens': int, 'articleType': str} のリスト
+
+    Returns:
+        推定値（実績が不足する場合はNone）
+    """
+    ratios = [
+        int(s['targetChars']) * ARTICLE_TYPE_FACTORS.get(s.get('articleType'), 1.0) / int(s['outputTokens'])
+        for s in samples
+        if s.get('targetChars') and s.get('outputTokens')
+    ]
+    if len(ratios) < CALIBRATION_MIN_SAMPLES:
+        return None
+    return statistics.median(ratios)
+
+
+def get_calibrated_chars_per_token(articles_table: Any, user_id: str, output_format: str) -> Optional[float]:
+    """
+    ユーザーの直近の記事から1トークンあたり文字数を取得（コンテナ内で1時間キャッシュ）
+
+    取得に失敗した場合は既定値を使うためNoneを返す。
+    """
+    if articles_table is None:
+        return None
+
+    cache_key = f'{user_id}:{output_format}'
+    with _calibration_lock:
+        cached = _calibration_cache.get(cache_key)
+        if cached and cached['expiresAt'] > time.time():
+            return cached['value']
+
+    from boto3.dynamodb.conditions import Key
+
+    try:
+        response = articles_table.query(
+            IndexName='CreatedAtIndex',
+            KeyConditionExpression=Key('userId').eq(user_id),
+            ProjectionExpression='outputFormat, metadata.tokenBudget, metadata.articleType',
+            ScanIndexForward=False,
+            Limit=CALIBRATION_SAMPLE_LIMIT
+        )
+    except Exception as e:
+        log_warning('Failed to load token calibration samples', user_id=user_id, error=str(e))
+        return None
+
+    # 実際に生成した形式で絞り込む（dualFormatの記事は構造生成＝wordpressとして扱う）
+    samples = []
+    for item in response.get('Items', []):
+        metadata = item.get('metadata', {})
+        budget = metadata.get('tokenBudget')
+        if budget and (budget.get('generationFormat') or item.get('outputFormat')) == output_format:
+            samples.append({'articleType': metadata.get('articleType', 'info'), **budget})
+    value = calculate_chars_per_token(samples)
+    if value is not None:
+        log_info('Token budget calibrated',
+                 user_id=user_id,
+                 output_format=output_format,
+                 samples=len(samples),
+                 chars_per_token=round(value, 3))
+
+    with _calibration_lock:
+        _calibration_cache[cache_key] = {'value': value, 'expiresAt': time.time() + CALIBRATION_CACHE_SECONDS}
+    return value
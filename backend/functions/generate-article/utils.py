@@ -9,6 +9,8 @@ from datetime import datetime
 from decimal import Decimal
 from typing import Any, Dict, Optional
 
+from markdown_stats import get_markdown_stats, reading_time_for_characters
+
 
 class DecimalEncoder(json.JSONEncoder):
     """Decimal型をJSON シリアライズ可能にするエンコーダー"""
@@ -102,7 +104,8 @@ def create_response(
     status_code: int,
     data: Optional[Dict[str, Any]] = None,
     error_code: Optional[str] = None,
-    error_message: Optional[str] = None
+    error_message: Optional[str] = None,
+    extra_headers: Optional[Dict[str, str]] = None
 ) -> Dict[str, Any]:
     """
     API Gatewayレスポンスを作成
@@ -112,6 +115,7 @@ def create_response(
         data: レスポンスデータ（成功時）
         error_code: エラーコード（エラー時）
         error_message: エラーメッセージ（エラー時）
+        extra_headers: 追加のレスポンスヘッダー（ETagなど）
 
     Returns:
         API Gatewayレスポンス形式の辞書
@@ -122,6 +126,16 @@ def create_response(
         'Access-Control-Allow-Headers': 'Content-Type,Authorization',
         'Access-Control-Allow-Methods': 'GET,POST,PUT,DELETE,OPTIONS'
     }
+    if extra_headers:
+        headers.update(extra_headers)
+
+    # 304 Not Modified は本文を返さない
+    if status_code == 304:
+        return {
+            'statusCode': status_code,
+            'headers': headers,
+            'body': ''
+        }
 
     if error_code:
         body = {
@@ -188,10 +202,44 @@ def get_user_id(event: Dict[str, Any]) -> Optional[str]:
     return authorizer.get('principalId') or authorizer.get('claims', {}).get('sub')
 
 
+def get_header(event: Dict[str, Any], name: str) -> Optional[str]:
+    """
+    API Gatewayイベントからリクエストヘッダーを取得（大文字小文字を区別しない）
+
+    Args:
+        event: API Gatewayイベント
+        name: ヘッダー名
+
+    Returns:
+        ヘッダーの値、またはNone
+    """
+    name = name.lower()
+    for key, value in (event.get('headers') or {}).items():
+        if key.lower() == name:
+            return value
+    return None
+
+
+def get_query_parameter(event: Dict[str, Any], name: str) -> Optional[str]:
+    """
+    API Gatewayイベントからクエリパラメータを取得
+
+    Args:
+        event: API Gatewayイベント
+        name: パラメータ名
+
+    Returns:
+        パラメータの値、またはNone
+    """
+    return (event.get('queryStringParameters') or {}).get(name)
+
+
 def count_characters(text: str) -> int:
     """
     テキストの文字数をカウント（日本語対応）
 
+    Markdownの記法・コードブロック・空白を除いた文字数（markdown_stats の走査結果）
+
     Args:
         text: カウント対象のテキスト
 
@@ -200,23 +248,7 @@ def count_characters(text: str) -> int:
     """
     if not text:
         return 0
-    # Markdownの装飾を除いた純粋な文字数
-    import re
-    # コードブロックを除去
-    text = re.sub(r'```.*?```', '', text, flags=re.DOTALL)
-    # インラインコードを除去
-    text = re.sub(r'`[^`]+`', '', text)
-    # リンクをテキストのみに
-    text = re.sub(r'\[([^\]]+)\]\([^)]+\)', r'\1', text)
-    # 画像を除去
-    text = re.sub(r'!\[[^\]]*\]\([^)]+\)', '', text)
-    # 見出し記号を除去
-    text = re.sub(r'^#{1,6}\s*', '', text, flags=re.MULTILINE)
-    # 強調記号を除去
-    text = re.sub(r'[*_]{1,3}([^*_]+)[*_]{1,3}', r'\1', text)
-    # 空白を除去してカウント
-    text = re.sub(r'\s+', '', text)
-    return len(text)
+    return get_markdown_stats(text)['charCount']
 
 
 def estimate_reading_time(text: str, chars_per_minute: int = 400) -> int:
@@ -230,34 +262,20 @@ def estimate_reading_time(text: str, chars_per_minute: int = 400) -> int:
     Returns:
         推定読了時間（分）
     """
-    char_count = count_characters(text)
-    minutes = char_count / chars_per_minute
-    return max(1, round(minutes))
+    return reading_time_for_characters(count_characters(text), chars_per_minute)
 
 
 def extract_headings(markdown: str) -> list:
     """
-    Markdownから見出しを抽出
+    Markdownから見出しを抽出（コードブロック内は除く）
 
     Args:
         markdown: Markdownテキスト
 
     Returns:
-        見出しのリスト [{'level': 2, 'text': '見出し'}, ...]
+        見出しのリスト [{'level': 2, 'text': '見出し', 'line': 行番号}, ...]
     """
-    import re
-    headings = []
-    pattern = r'^(#{1,6})\s+(.+)$'
-
-    for match in re.finditer(pattern, markdown, re.MULTILINE):
-        level = len(match.group(1))
-        text = match.group(2).strip()
-        headings.append({
-            'level': level,
-            'text': text
-        })
-
-    return headings
+    return [dict(heading) for heading in get_markdown_stats(markdown)['headings']]
 
 
 def validate_markdown_structure(markdown: str) -> Dict[str, Any]:
@@ -270,31 +288,10 @@ def validate_markdown_structure(markdown: str) -> Dict[str, Any]:
     Returns:
         検証結果 {'valid': bool, 'issues': [...]}
     """
-    issues = []
-    headings = extract_headings(markdown)
-
-    # H1チェック（使用禁止）
-    h1_headings = [h for h in headings if h['level'] == 1]
-    if h1_headings:
-        issues.append('H1見出しは使用しないでください')
-
-    # 見出し数チェック
-    h2_headings = [h for h in headings if h['level'] == 2]
-    if len(h2_headings) < 2:
-        issues.append('H2見出しは最低2つ必要です')
-    elif len(h2_headings) > 8:
-        issues.append('H2見出しが多すぎます（8個以下推奨）')
-
-    # 見出し階層チェック
-    prev_level = 1
-    for heading in headings:
-        if heading['level'] > prev_level + 1:
-            issues.append(f'見出し階層がスキップされています: {heading["text"]}')
-        prev_level = heading['level']
-
+    stats = get_markdown_stats(markdown)
     return {
-        'valid': len(issues) == 0,
-        'issues': issues,
-        'headingCount': len(headings),
-        'h2Count': len(h2_headings)
+        'valid': stats['valid'],
+        'issues': list(stats['issues']),
+        'headingCount': stats['headingCount'],
+        'h2Count': stats['h2Count']
     }
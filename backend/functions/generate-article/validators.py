@@ -6,6 +6,11 @@ from decimal import Decimal
 from typing import Optional, Dict, Any, List
 
 
+# 文字数の上限（長文モードはセクションを分割して生成するため上限が大きい）
+MAX_WORD_COUNT = 10000
+MAX_LONGFORM_WORD_COUNT = 50000
+
+
 def is_int_like(value) -> bool:
     """intまたはDecimal（整数値）かどうかを判定"""
     if isinstance(value, int):
@@ -69,6 +74,12 @@ def validate_article_input(body: Dict[str, Any]) -> Optional[str]:
         if len(keyword) > 50:
             return 'キーワードは50文字以内にしてください'
 
+    # 生成モード検証
+    generation_mode = body.get('generationMode', 'single')
+    valid_modes = ['single', 'parallel', 'longform']
+    if generation_mode not in valid_modes:
+        return f'生成モードは {", ".join(valid_modes)} のいずれかを指定してください'
+
     # 文字数制限
     word_count = body.get('wordCount', 1500)
     if not is_int_like(word_count):
@@ -78,8 +89,9 @@ def validate_article_input(body: Dict[str, Any]) -> Optional[str]:
     if word_count < 500:
         return '文字数は500文字以上を指定してください'
 
-    if word_count > 10000:
-        return '文字数は10000文字以下を指定してください'
+    max_word_count = MAX_LONGFORM_WORD_COUNT if generation_mode == 'longform' else MAX_WORD_COUNT
+    if word_count > max_word_count:
+        return f'文字数は{max_word_count}文字以下を指定してください'
 
     # 記事タイプ検証
     article_type = body.get('articleType', 'info')
@@ -87,6 +99,10 @@ def validate_article_input(body: Dict[str, Any]) -> Optional[str]:
     if article_type not in valid_types:
         return f'記事タイプは {", ".join(valid_types)} のいずれかを指定してください'
 
+    # 両形式出力
+    if not isinstance(body.get('dualFormat', False), bool):
+        return 'dualFormatは真偽値で指定してください'
+
     # 対象読者
     target_audience = body.get('targetAudience', '')
     if target_audience and len(target_audience) > 100:
@@ -187,6 +203,11 @@ def validate_settings(settings: Dict[str, Any]) -> Optional[str]:
             if len(article['content']) > 100000:
                 return f'サンプル記事{i+1}の内容は100KB以内にしてください'
 
+    valid_sample_modes = ['digest', 'full']
+    sample_mode = settings.get('sampleArticleMode')
+    if sample_mode is not None and sample_mode not in valid_sample_modes:
+        return f'サンプル記事の参照方法は {", ".join(valid_sample_modes)} のいずれかを指定してください'
+
     return None
 
 
@@ -6,11 +6,14 @@
 import os
 import json
 import time
+import uuid
 from decimal import Decimal
 from typing import Any
 import boto3
 from botocore.exceptions import ClientError
 
+from style_digest import build_sample_digest
+
 
 def decimal_default(obj):
     """JSON encoder for Decimal types"""
@@ -24,6 +27,12 @@ def decimal_default(obj):
 USERS_TABLE = os.environ.get("DYNAMODB_TABLE_SETTINGS") or os.environ.get("USERS_TABLE", "blog-agent-settings")
 REGION = os.environ.get("AWS_REGION", "ap-northeast-1")
 
+# 記事生成プロンプトに影響する設定項目（保存時に promptVersion を更新する）
+PROMPT_SETTINGS_KEYS = ("articleStyle", "decorations", "sampleArticles", "sampleArticleMode")
+
+# サンプル記事の参照方法（digest: ダイジェスト / full: 全文）
+SAMPLE_ARTICLE_MODES = {"digest", "full"}
+
 # 有効なRole/Schema定義
 VALID_ROLES = {"attention", "warning", "summarize", "explain", "action"}
 VALID_SCHEMAS = {"paragraph", "box", "list", "steps", "table", "callout"}
@@ -142,7 +151,8 @@ DEFAULT_SETTINGS = {
         "metaDescriptionLength": 140,
         "maxKeywords": 7
     },
-    "sampleArticles": []
+    "sampleArticles": [],
+    "sampleArticleMode": "digest"
 }
 
 
@@ -250,6 +260,7 @@ def get_settings(user_id: str) -> dict:
             "seo": item.get("seo") or DEFAULT_SETTINGS["seo"],
             "baseClass": item.get("baseClass") or DEFAULT_SETTINGS["baseClass"],
             "sampleArticles": item.get("sampleArticles") if item.get("sampleArticles") is not None else DEFAULT_SETTINGS["sampleArticles"],
+            "sampleArticleMode": item.get("sampleArticleMode") or DEFAULT_SETTINGS["sampleArticleMode"],
         }
     except ClientError as e:
         raise Exception(f"DynamoDB error: {e.response['Error']['Message']}")
@@ -289,12 +300,28 @@ def save_settings(user_id: str, settings: dict) -> dict:
             expression_values[":sampleArticles"] = settings["sampleArticles"]
             expression_names["#sampleArticles"] = "sampleArticles"
 
+            # 記事生成で全文の代わりに参照するダイジェストを保存時に1回だけ算出する
+            update_parts.append("#sampleDigest = :sampleDigest")
+            expression_values[":sampleDigest"] = build_sample_digest(settings["sampleArticles"] or [])
+            expression_names["#sampleDigest"] = "sampleDigest"
+
+        # sampleArticleMode
+        if "sampleArticleMode" in settings:
+            update_parts.append("#sampleArticleMode = :sampleArticleMode")
+            expression_values[":sampleArticleMode"] = settings["sampleArticleMode"]
+            expression_names["#sampleArticleMode"] = "sampleArticleMode"
+
         # baseClass
         if "baseClass" in settings:
             update_parts.append("#baseClass = :baseClass")
             expression_values[":baseClass"] = settings["baseClass"]
             expression_names["#baseClass"] = "baseClass"
 
+        # プロンプトに影響する項目を保存した場合は、記事生成側のプロンプト断片キャッシュを無効化する
+        if any(key in settings for key in PROMPT_SETTINGS_KEYS):
+            update_parts.append("promptVersion = :promptVersion")
+            expression_values[":promptVersion"] = uuid.uuid4().hex
+
         update_parts.append("updatedAt = :updatedAt")
 
         update_expression = "SET " + ", ".join(update_parts)
@@ -314,6 +341,7 @@ def save_settings(user_id: str, settings: dict) -> dict:
             "seo": updated_item.get("seo") or DEFAULT_SETTINGS["seo"],
             "baseClass": updated_item.get("baseClass") or DEFAULT_SETTINGS["baseClass"],
             "sampleArticles": updated_item.get("sampleArticles") if updated_item.get("sampleArticles") is not None else DEFAULT_SETTINGS["sampleArticles"],
+            "sampleArticleMode": updated_item.get("sampleArticleMode") or DEFAULT_SETTINGS["sampleArticleMode"],
             "updatedAt": updated_item.get("updatedAt"),
         }
     except ClientError as e:
@@ -350,6 +378,11 @@ def handler(event: dict[str, Any], context: Any) -> dict:
         # PUT: 設定保存
         if http_method == "PUT":
             body = json.loads(event.get("body", "{}"))
+            if "sampleArticleMode" in body and body["sampleArticleMode"] not in SAMPLE_ARTICLE_MODES:
+                return create_response(400, {
+                    "success": False,
+                    "error": {"code": "VALIDATION_002", "message": "サンプル記事の参照方法は digest または full を指定してください"}
+                })
             settings = save_settings(user_id, body)
             return create_response(200, {
                 "success": True,
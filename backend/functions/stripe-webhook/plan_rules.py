@@ -12,6 +12,8 @@ PLAN_RULES = {
         "features": {
             "export": True,
             "advanced_prompt": False,
+            "parallel_generation": False,
+            "longform_generation": False,
         },
     },
     "starter": {
@@ -20,6 +22,8 @@ PLAN_RULES = {
         "features": {
             "export": True,
             "advanced_prompt": False,
+            "parallel_generation": True,
+            "longform_generation": False,
         },
     },
     "pro": {
@@ -28,6 +32,8 @@ PLAN_RULES = {
         "features": {
             "export": True,
             "advanced_prompt": True,
+            "parallel_generation": True,
+            "longform_generation": True,
         },
     },
     "canceled": {
@@ -36,6 +42,8 @@ PLAN_RULES = {
         "features": {
             "export": True,
             "advanced_prompt": False,
+            "parallel_generation": False,
+            "longform_generation": False,
         },
     },
 }
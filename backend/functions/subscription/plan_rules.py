@@ -13,6 +13,8 @@ PLAN_RULES = {
         "features": {
             "export": True,
             "advanced_prompt": False,
+            "parallel_generation": False,
+            "longform_generation": False,
         },
     },
     "starter": {
@@ -21,6 +23,8 @@ PLAN_RULES = {
         "features": {
             "export": True,
             "advanced_prompt": False,
+            "parallel_generation": True,
+            "longform_generation": False,
         },
     },
     "pro": {
@@ -29,6 +33,8 @@ PLAN_RULES = {
         "features": {
             "export": True,
             "advanced_prompt": True,
+            "parallel_generation": True,
+            "longform_generation": True,
         },
     },
     "canceled": {
@@ -37,6 +43,8 @@ PLAN_RULES = {
         "features": {
             "export": True,  # 閲覧・エクスポートは可能
             "advanced_prompt": False,
+            "parallel_generation": False,
+            "longform_generation": False,
         },
     },
 }
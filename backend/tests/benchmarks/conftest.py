@@ -0,0 +1,131 @@
+"""
+ベンチマーク共通設定
+
+RUN_BENCHMARKS=1 のときのみ実行し、終了時に結果をJSONファイルへ書き出す。
+
+環境変数:
+    RUN_BENCHMARKS: 1 でベンチマークを実行
+    BENCHMARK_RESULTS_PATH: 結果ファイルの出力先（既定: backend/.benchmarks/results.json）
+    BENCHMARK_BASELINE_PATH: 比較対象の過去の結果ファイル（指定時は回帰を検出）
+    BENCHMARK_REGRESSION_THRESHOLD: 回帰とみなす中央値の倍率（既定: 1.5）
+"""
+
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+import pytest
+
+
+RUN_BENCHMARKS = os.environ.get('RUN_BENCHMARKS', '') == '1'
+RESULTS_PATH = Path(os.environ.get(
+    'BENCHMARK_RESULTS_PATH',
+    str(Path(__file__).parent.parent.parent / '.benchmarks' / 'results.json')
+))
+BASELINE_PATH = os.environ.get('BENCHMARK_BASELINE_PATH', '')
+REGRESSION_THRESHOLD = float(os.environ.get('BENCHMARK_REGRESSION_THRESHOLD', '1.5'))
+
+# 1ケースあたりの計測時間の目安と回数の上下限
+TIME_BUDGET_SECONDS = 0.5
+MIN_ROUNDS = 3
+MAX_ROUNDS = 50
+
+
+def pytest_collection_modifyitems(config, items):
+    """RUN_BENCHMARKS=1 でない場合はスキップ"""
+    if RUN_BENCHMARKS:
+        return
+    skip = pytest.mark.skip(reason='RUN_BENCHMARKS=1 を指定すると実行されます')
+    for item in items:
+        if 'benchmarks' in str(item.fspath):
+            item.add_marker(skip)
+
+
+def load_baseline() -> Dict[str, Dict[str, Any]]:
+    """過去の結果を (name, sizeLabel) をキーに読み込む"""
+    if not BASELINE_PATH:
+        return {}
+    with open(BASELINE_PATH, encoding='utf-8') as f:
+        data = json.load(f)
+    return {f"{r['name']}:{r['sizeLabel']}": r for r in data.get('results', [])}
+
+
+class BenchmarkRecorder:
+    """計測を実行し、結果を蓄積する"""
+
+    def __init__(self):
+        self.results: List[Dict[str, Any]] = []
+        self.baseline = load_baseline()
+
+    def measure(self, name: str, size_label: str, size_bytes: int, func: Callable[[], Any]) -> Dict[str, Any]:
+        """
+        関数の処理時間を計測（時間の目安に達するまで繰り返す）
+
+        Returns:
+            計測結果（ベースラインがあれば比率を含む）
+        """
+        timings = []
+        started = time.perf_counter()
+        while len(timings) < MAX_ROUNDS:
+            t0 = time.perf_counter()
+            func()
+            timings.append(time.perf_counter() - t0)
+            if len(timings) >= MIN_ROUNDS and time.perf_counter() - started >= TIME_BUDGET_SECONDS:
+                break
+
+        median = statistics.median(timings)
+        result = {
+            'name': name,
+            'sizeLabel': size_label,
+            'sizeBytes': size_bytes,
+            'rounds': len(timings),
+            'minMs': round(min(timings) * 1000, 4),
+            'medianMs': round(median * 1000, 4),
+            'meanMs': round(statistics.mean(timings) * 1000, 4),
+            'bytesPerSecond': round(size_bytes / median) if median else None,
+        }
+
+        baseline = self.baseline.get(f'{name}:{size_label}')
+        if baseline and baseline.get('medianMs'):
+            result['baselineMedianMs'] = baseline['medianMs']
+            result['ratioToBaseline'] = round(result['medianMs'] / baseline['medianMs'], 3)
+
+        self.results.append(result)
+        return result
+
+    def check_regression(self, result: Dict[str, Any]) -> Optional[str]:
+        """ベースラインより閾値以上遅くなっていればメッセージを返す"""
+        ratio = result.get('ratioToBaseline')
+        if ratio is not None and ratio > REGRESSION_THRESHOLD:
+            return (f"{result['name']} ({result['sizeLabel']}) is {ratio}x slower than baseline "
+                    f"({result['medianMs']}ms vs {result['baselineMedianMs']}ms)")
+        return None
+
+    def write(self, path: Path):
+        """結果をJSONファイルに書き出す"""
+        path.parent.mkdir(parents=True, exist_ok=True)
+        payload = {
+            'generatedAt': datetime.now(timezone.utc).isoformat(),
+            'python': sys.version.split()[0],
+            'platform': platform.platform(),
+            'regressionThreshold': REGRESSION_THRESHOLD,
+            'results': sorted(self.results, key=lambda r: (r['name'], r['sizeBytes'])),
+        }
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(payload, f, ensure_ascii=False, indent=2)
+
+
+@pytest.fixture(scope='session')
+def benchmark_recorder():
+    """セッション全体の計測結果を集め、終了時にファイルへ書き出す"""
+    recorder = BenchmarkRecorder()
+    yield recorder
+    if recorder.results:
+        recorder.write(RESULTS_PATH)
+        print(f'\nBenchmark results written to {RESULTS_PATH}')
@@ -0,0 +1,82 @@
+"""
+generate-article のコールドスタート（初期化時間）のベンチマーク
+
+ルートごとに新しいPythonプロセスで app を読み込み、そのルートが使うクライアントを初期化するまでの
+時間を計測する。-X importtime の出力から、読み込みに時間のかかったモジュールも表示する。
+AWSへの通信は行わない（boto3のリソース・クライアントの生成とClaudeクライアントの生成まで）。
+
+実行方法:
+    cd backend && RUN_BENCHMARKS=1 python -m pytest -q tests/benchmarks/test_cold_start.py -s
+"""
+
+import os
+import re
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+import pytest
+
+FUNCTION_DIR = Path(__file__).parent.parent.parent / 'functions' / 'generate-article'
+
+# ルートごとの初期化処理（Lambdaの初回呼び出しで行われるものに相当）
+ROUTES = {
+    'import': 'import app',
+    'job_status': 'import app; app.jobs_table.table_name',
+    'submit_job': 'import app; app.settings_table.table_name; app.jobs_table.table_name; app.sqs.meta',
+    'titles': 'import app, claude_api; app.settings_table.table_name; claude_api.get_claude_client()',
+    'sqs_worker': (
+        'import app, claude_api; app.jobs_table.table_name; app.articles_table.table_name; '
+        'app.get_default_settings(); claude_api.get_claude_client()'
+    ),
+}
+
+# 表示する重いモジュールの件数
+TOP_MODULES = 8
+
+_IMPORTTIME_LINE = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)')
+
+
+def run_cold_start(code: str) -> Tuple[float, List[Tuple[str, int]]]:
+    """
+    新しいプロセスで初期化処理を実行
+
+    Returns:
+        (所要時間ms, [(モジュール名, 累積の読み込み時間μs)]（トップレベルのimportのみ、降順）)
+    """
+    env = {
+        **os.environ,
+        'AWS_DEFAULT_REGION': os.environ.get('AWS_DEFAULT_REGION', 'ap-northeast-1'),
+        'LOCAL_DEV': 'false',
+        'PYTHONDONTWRITEBYTECODE': '1',
+    }
+    started = time.perf_counter()
+    completed = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', code],
+        cwd=FUNCTION_DIR, env=env, capture_output=True, text=True, check=True
+    )
+    elapsed_ms = (time.perf_counter() - started) * 1000
+
+    modules: Dict[str, int] = {}
+    for line in completed.stderr.splitlines():
+        match = _IMPORTTIME_LINE.match(line)
+        # インデントが1段（スペース1つ）のものが -c のコードから直接importされたモジュール
+        if match and len(match.group(3)) == 1:
+            modules[match.group(4)] = int(match.group(2))
+    return elapsed_ms, sorted(modules.items(), key=lambda item: item[1], reverse=True)
+
+
+@pytest.mark.parametrize('route', list(ROUTES))
+def test_cold_start(benchmark_recorder, route):
+    code = ROUTES[route]
+    result = benchmark_recorder.measure(f'cold_start:{route}', 'process', 0, lambda: run_cold_start(code))
+
+    _, modules = run_cold_start(code)
+    print(f"\n{route}: median {result['medianMs']}ms")
+    for name, cumulative_us in modules[:TOP_MODULES]:
+        print(f'  {name}: {cumulative_us / 1000:.1f}ms')
+
+    regression = benchmark_recorder.check_regression(result)
+    assert regression is None, regression
@@ -0,0 +1,224 @@
+"""
+記事の描画・解析のホットパスのベンチマーク
+
+1KB〜1MBの合成データで各関数の処理時間を計測し、サイズに対するスケールを記録する。
+インラインMarkdownの変換は標準サンプル記事の各行でも計測する。
+
+実行方法:
+    cd backend && RUN_BENCHMARKS=1 python -m pytest -q tests/benchmarks -s
+
+変更前の実装と比べる場合は、変更前のコミット（git worktree などで取り出したもの）で
+結果を書き出し、そのファイルを BENCHMARK_BASELINE_PATH に指定して実行する。
+"""
+
+import importlib.util
+import json
+import math
+import os
+import sys
+from pathlib import Path
+from typing import Any, Callable, Dict, List
+
+import pytest
+
+FUNCTIONS_DIR = Path(__file__).parent.parent.parent / 'functions'
+sys.path.insert(0, str(FUNCTIONS_DIR / 'generate-article'))
+os.environ.setdefault('AWS_DEFAULT_REGION', 'ap-northeast-1')
+
+from app import validate_and_filter_decorations, get_default_settings
+from article_renderer import structure_to_wordpress, structure_to_markdown
+from inline_markdown import convert_inline_markdown
+from markdown_stats import _scan as scan_markdown
+from sample_articles import get_default_sample_article
+from utils import count_characters, validate_markdown_structure
+
+
+def _load_chat_edit_module(name: str):
+    """chat-editのモジュールを別名で読み込む（generate-articleと同名モジュールの衝突を避ける）"""
+    spec = importlib.util.spec_from_file_location(f'chat_edit_{name}', FUNCTIONS_DIR / 'chat-edit' / f'{name}.py')
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+diff_utils = _load_chat_edit_module('diff_utils')
+
+SIZES = {
+    '1KB': 1_000,
+    '10KB': 10_000,
+    '100KB': 100_000,
+    '1MB': 1_000_000,
+}
+
+DECORATIONS = get_default_settings()['decorations']
+DECORATION_IDS = [d['id'] for d in DECORATIONS] + ['ba-unknown']
+
+# 合成ブロックのひな形（生成記事に近い記法・装飾の混在比率）
+BLOCK_TEMPLATES = [
+    {'type': 'paragraph', 'content': 'ブログを始めるときは、まず**目的**を決めておきましょう。'},
+    {'type': 'paragraph', 'content': '詳しくは[公式ガイド](https://example.com/guide)を参考にしてください。'},
+    {'type': 'paragraph', 'content': '一文を短くすると、読者は*ストレスなく*読み進められます。'},
+    {'type': 'list', 'listType': 'unordered', 'items': ['**手順1**: 登録する', '手順2: 設定する', '[確認](/check)する']},
+    {'type': 'table', 'headers': ['項目', '内容'], 'rows': [['料金', '**月額1,000円**'], ['容量', '*無制限*']]},
+    {'type': 'subsection', 'heading': '小見出し', 'blocks': [
+        {'type': 'paragraph', 'content': 'サーバーは*表示速度*と**サポート体制**で比べます。'},
+    ]},
+    {'type': 'callout', 'content': 'まずは無料で試してみましょう。', 'buttonText': '公式サイト', 'buttonUrl': 'https://example.com'},
+]
+BLOCKS_PER_SECTION = 20
+
+
+def build_structure(block_count: int) -> Dict[str, Any]:
+    """指定ブロック数の合成構造を生成（3ブロックに1つは装飾付き）"""
+    blocks = []
+    for i in range(block_count):
+        block = json.loads(json.dumps(BLOCK_TEMPLATES[i % len(BLOCK_TEMPLATES)]))
+        if i % 3 == 0:
+            block['decorationId'] = DECORATION_IDS[i % len(DECORATION_IDS)]
+            block['title'] = 'ポイント'
+        blocks.append(block)
+
+    sections = [
+        {'heading': f'見出し{i // BLOCKS_PER_SECTION + 1}', 'blocks': blocks[i:i + BLOCKS_PER_SECTION]}
+        for i in range(0, block_count, BLOCKS_PER_SECTION)
+    ]
+    return {'title': 'ベンチマーク記事', 'sections': sections, 'meta': {'metaDescription': 'ベンチマーク'}}
+
+
+def scale_to(target_bytes: int, measure: Callable[[Dict[str, Any]], int]) -> Dict[str, Any]:
+    """指定バイト数に近い合成構造を生成（少数ブロックでの実測から必要数を推定）"""
+    probe_blocks = len(BLOCK_TEMPLATES) * 6
+    bytes_per_block = measure(build_structure(probe_blocks)) / probe_blocks
+    return build_structure(max(1, math.ceil(target_bytes / bytes_per_block)))
+
+
+def utf8_size(text: str) -> int:
+    return len(text.encode('utf-8'))
+
+
+def json_size(structure: Dict[str, Any]) -> int:
+    return utf8_size(json.dumps(structure, ensure_ascii=False))
+
+
+def markdown_size(structure: Dict[str, Any]) -> int:
+    return utf8_size(structure_to_markdown(structure))
+
+
+def collect_inline_texts(structure: Dict[str, Any]) -> List[str]:
+    """convert_inline_markdown の入力となるテキストを収集"""
+    texts = []
+
+    def walk(blocks):
+        for block in blocks:
+            if block.get('content'):
+                texts.append(block['content'])
+            texts.extend(block.get('items', []))
+            for row in block.get('rows', []):
+                texts.extend(row)
+            walk(block.get('blocks', []))
+
+    for section in structure['sections']:
+        walk(section['blocks'])
+    return texts
+
+
+def edit_every_nth_line(text: str, n: int = 25) -> str:
+    """n行ごとに1行を書き換えた文書（差分計算の入力）"""
+    lines = text.split('\n')
+    for i in range(0, len(lines), n):
+        lines[i] = lines[i] + '（追記）'
+    return '\n'.join(lines)
+
+
+_structures: Dict[str, Dict[str, Any]] = {}
+_documents: Dict[str, str] = {}
+
+
+def structure_for(size_label: str) -> Dict[str, Any]:
+    """構造JSONのサイズが指定サイズになる合成構造（サイズごとに1度だけ生成）"""
+    if size_label not in _structures:
+        _structures[size_label] = scale_to(SIZES[size_label], json_size)
+    return _structures[size_label]
+
+
+def document_for(size_label: str) -> str:
+    """Markdownのサイズが指定サイズになる合成文書"""
+    if size_label not in _documents:
+        _documents[size_label] = structure_to_markdown(scale_to(SIZES[size_label], markdown_size))
+    return _documents[size_label]
+
+
+def run(recorder, name: str, size_label: str, size_bytes: int, func: Callable[[], Any]):
+    result = recorder.measure(name, size_label, size_bytes, func)
+    regression = recorder.check_regression(result)
+    assert regression is None, regression
+
+
+@pytest.mark.parametrize('size_label', list(SIZES))
+def test_validate_and_filter_decorations(benchmark_recorder, size_label):
+    structure = structure_for(size_label)
+    run(benchmark_recorder, 'validate_and_filter_decorations', size_label, json_size(structure),
+        lambda: validate_and_filter_decorations(structure, DECORATIONS))
+
+
+@pytest.mark.parametrize('size_label', list(SIZES))
+def test_structure_to_wordpress(benchmark_recorder, size_label):
+    structure = validate_and_filter_decorations(structure_for(size_label), DECORATIONS)
+    run(benchmark_recorder, 'structure_to_wordpress', size_label, json_size(structure),
+        lambda: structure_to_wordpress(structure, DECORATIONS))
+
+
+@pytest.mark.parametrize('size_label', list(SIZES))
+def test_convert_inline_markdown(benchmark_recorder, size_label):
+    texts = collect_inline_texts(structure_for(size_label))
+    run(benchmark_recorder, 'convert_inline_markdown', size_label, sum(utf8_size(t) for t in texts),
+        lambda: [convert_inline_markdown(t) for t in texts])
+
+
+def test_convert_inline_markdown_sample_articles(benchmark_recorder):
+    """標準サンプル記事の各行（実際の記事に近い記法の密度）"""
+    texts = [
+        line
+        for article in (get_default_sample_article('markdown'), get_default_sample_article('wordpress'))
+        for line in article['content'].splitlines()
+        if line.strip()
+    ] * 20
+    run(benchmark_recorder, 'convert_inline_markdown', 'sample_articles', sum(utf8_size(t) for t in texts),
+        lambda: [convert_inline_markdown(t) for t in texts])
+
+
+@pytest.mark.parametrize('size_label', list(SIZES))
+def test_scan_markdown(benchmark_recorder, size_label):
+    """統計の走査（メモ化を通さない）"""
+    document = document_for(size_label)
+    run(benchmark_recorder, 'scan_markdown', size_label, utf8_size(document),
+        lambda: scan_markdown(document))
+
+
+@pytest.mark.parametrize('size_label', list(SIZES))
+def test_count_characters(benchmark_recorder, size_label):
+    document = document_for(size_label)
+    run(benchmark_recorder, 'count_characters', size_label, utf8_size(document),
+        lambda: count_characters(document))
+
+
+@pytest.mark.parametrize('size_label', list(SIZES))
+def test_validate_markdown_structure(benchmark_recorder, size_label):
+    document = document_for(size_label)
+    run(benchmark_recorder, 'validate_markdown_structure', size_label, utf8_size(document),
+        lambda: validate_markdown_structure(document))
+
+
+@pytest.mark.parametrize('size_label', list(SIZES))
+def test_split_markdown_sections(benchmark_recorder, size_label):
+    document = document_for(size_label)
+    run(benchmark_recorder, 'split_markdown_sections', size_label, utf8_size(document),
+        lambda: diff_utils.split_markdown_sections(document))
+
+
+@pytest.mark.parametrize('size_label', list(SIZES))
+def test_calculate_line_diff(benchmark_recorder, size_label):
+    document = document_for(size_label)
+    edited = edit_every_nth_line(document)
+    run(benchmark_recorder, 'calculate_line_diff', size_label, utf8_size(document),
+        lambda: diff_utils.calculate_line_diff(document, edited))
@@ -25,6 +25,7 @@ from diff_utils import (
 from prompt_builder import (
     build_chat_edit_system_prompt,
     build_chat_edit_prompt,
+    build_chat_edit_prompt_fragments,
     build_section_edit_prompt,
     build_follow_up_prompt
 )
@@ -71,6 +72,16 @@ class TestDiffUtils:
         assert any(s.get('heading_text') == 'セクション1' for s in sections)
         assert any(s.get('heading_text') == 'セクション2' for s in sections)
 
+    def test_split_markdown_sections_ignores_code_blocks(self):
+        """コードブロック内の # 行ではセクションを分割しない"""
+        markdown = "## 手順\n```bash\n# インストール\n```\n## まとめ\n内容"
+
+        sections = split_markdown_sections(markdown)
+
+        assert [s['heading_text'] for s in sections] == ['手順', 'まとめ']
+        assert '# インストール' in sections[0]['content']
+        assert sections[1]['start_line'] == 4
+
     def test_find_section_by_heading(self):
         """見出しでセクションを検索"""
         sections = [
@@ -262,6 +273,21 @@ class TestPromptBuilder:
         assert '直近の変更履歴' in prompt
         assert '導入部分を追加' in prompt
 
+    def test_build_chat_edit_prompt_fragments(self):
+        """トークン内訳用に記事・指示・会話履歴を断片に分ける"""
+        fragments = build_chat_edit_prompt_fragments(
+            instruction="さらに詳しく",
+            current_article="## 記事\n本文",
+            conversation_history=[{'role': 'user', 'content': '導入を追加して'}],
+            previous_changes=[{'explanation': '導入部分を追加'}]
+        )
+
+        assert fragments['article'] == "## 記事\n本文"
+        assert fragments['instruction'] == "さらに詳しく"
+        assert '導入を追加して' in fragments['history']
+        assert '導入部分を追加' in fragments['history']
+        assert fragments['instructions'] == build_chat_edit_system_prompt()
+
 
 class TestValidators:
     """バリデーターのテスト"""
@@ -4,6 +4,7 @@ Phase 2: P2-14 記事生成エンドツーエンドテスト
 """
 
 import json
+import os
 import pytest
 import sys
 from pathlib import Path
@@ -26,6 +27,12 @@ from prompt_builder import (
     build_internal_links_instructions,
     build_title_generation_prompt,
     build_meta_generation_prompt,
+    build_structure_prompt_parts,
+    build_markdown_prompt_parts,
+    build_outline_prompt_parts,
+    build_section_prompt_parts,
+    build_sample_style_context,
+    join_prompt_parts,
 )
 from utils import (
     generate_article_id,
@@ -124,6 +131,18 @@ class TestValidators:
         error = validate_article_input(body)
         assert error == '文字数は500文字以上を指定してください'
 
+    def test_validate_article_input_longform_word_count(self):
+        """長文モードのみ10000文字を超える文字数を指定できる"""
+        body = {
+            'title': 'テスト記事',
+            'contentPoints': '本文の要点です。これは十分な長さの内容です。',
+            'wordCount': 30000,
+        }
+        assert validate_article_input(body) == '文字数は10000文字以下を指定してください'
+        assert validate_article_input({**body, 'generationMode': 'longform'}) is None
+        assert validate_article_input({**body, 'generationMode': 'longform', 'wordCount': 50001}) == \
+            '文字数は50000文字以下を指定してください'
+
     def test_validate_article_input_internal_links(self):
         """内部リンクの検証"""
         body = {
@@ -147,6 +166,26 @@ class TestValidators:
         error = validate_article_input(body)
         assert 'URL' in error
 
+    def test_validate_article_input_invalid_generation_mode(self):
+        """無効な生成モードの検証"""
+        body = {
+            'title': 'テスト記事',
+            'contentPoints': '本文の要点です。これは十分な長さの内容です。',
+            'generationMode': 'turbo',
+        }
+        error = validate_article_input(body)
+        assert 'single, parallel' in error
+
+    def test_validate_article_input_invalid_dual_format(self):
+        """dualFormatは真偽値のみ許可"""
+        body = {
+            'title': 'テスト記事',
+            'contentPoints': '本文の要点です。これは十分な長さの内容です。',
+            'dualFormat': 'yes',
+        }
+        assert 'dualFormat' in validate_article_input(body)
+        assert validate_article_input({**body, 'dualFormat': True}) is None
+
     def test_sanitize_input_removes_script(self):
         """スクリプトタグ除去の検証"""
         text = 'テスト<script>alert("xss")</script>テスト'
@@ -345,6 +384,149 @@ class TestPromptBuilder:
         assert '7' in result
         assert 'JSON' in result
 
+    def test_build_structure_prompt_parts_cacheable_prefix(self):
+        """構造生成プロンプトは固定プレフィックスとリクエスト固有部分に分割される"""
+        settings = {
+            'articleStyle': {'taste': 'formal', 'firstPerson': 'hissha'},
+            'decorations': [
+                {'id': 'ba-point', 'label': 'ポイント', 'roles': ['attention'], 'schema': 'box', 'enabled': True},
+            ],
+            'sampleArticles': [
+                {'id': '1', 'title': 'サンプル', 'content': 'サンプル本文', 'format': 'wordpress'},
+            ],
+        }
+        body1 = {'title': '記事A', 'contentPoints': '要点A', 'wordCount': 2000}
+        body2 = {'title': '記事B', 'contentPoints': '要点B', 'articleType': 'howto'}
+
+        parts1 = build_structure_prompt_parts(body1, settings)
+        parts2 = build_structure_prompt_parts(body2, settings)
+
+        assert len(parts1['system']) == 2
+        assert all(block['cache_control'] == {'type': 'ephemeral'} for block in parts1['system'])
+        # 同じ設定ならsystemはバイト単位で同一
+        assert parts1['system'] == parts2['system']
+        system_text = ''.join(block['text'] for block in parts1['system'])
+        assert 'ba-point' in system_text
+        assert 'サンプル本文' in system_text
+        assert '筆者' in system_text
+        # リクエスト固有の情報はsystemに含まれない
+        assert '記事A' not in system_text
+        assert '記事A' in parts1['prompt']
+        assert '2000' in parts1['prompt']
+        assert 'ハウツー型' in parts2['prompt']
+
+    def test_build_markdown_prompt_parts_cacheable_prefix(self):
+        """Markdown生成プロンプトも固定プレフィックスに分割される"""
+        body = {'title': '記事タイトル', 'contentPoints': '要点', 'keywords': ['SEO']}
+        parts = build_markdown_prompt_parts(body, {})
+
+        assert parts['system'][0]['cache_control'] == {'type': 'ephemeral'}
+        assert '記事タイトル' not in parts['system'][0]['text']
+        assert '記事タイトル' in parts['prompt']
+        assert 'SEO' in parts['prompt']
+
+    def test_build_outline_prompt_parts_excludes_samples(self):
+        """アウトライン生成プロンプトはサンプル記事を含まない"""
+        settings = {
+            'sampleArticles': [
+                {'id': '1', 'title': 'サンプル', 'content': 'サンプル本文', 'format': 'wordpress'},
+            ],
+        }
+        parts = build_outline_prompt_parts({'title': '記事', 'contentPoints': '要点'}, settings)
+        system_text = ''.join(block['text'] for block in parts['system'])
+
+        assert 'brief' in system_text
+        assert 'サンプル本文' not in system_text
+        assert '記事' in parts['prompt']
+
+    def test_build_section_prompt_parts_shares_system(self):
+        """セクション生成プロンプトは全セクションでsystemが共通"""
+        outline = {
+            'title': '記事タイトル',
+            'sections': [
+                {'heading': '導入', 'brief': '導入の概要'},
+                {'heading': 'まとめ', 'brief': 'まとめの概要', 'targetChars': 600},
+            ],
+        }
+        body = {'title': '記事', 'contentPoints': '要点'}
+        first = build_section_prompt_parts(body, {}, outline, 0)
+        second = build_section_prompt_parts(body, {}, outline, 1)
+
+        assert first['system'] == second['system']
+        assert '- 見出し: まとめ' in second['prompt']
+        assert '600文字程度' in second['prompt']
+        assert '（2/2）' in second['prompt']
+
+    def test_sample_digest_summarizes_style(self):
+        """ダイジェストは文の長さ・文末表現・装飾の使い方・抜粋を出力形式ごとに集計する"""
+        from style_digest import build_sample_digest
+
+        wordpress = (
+            '<!-- wp:paragraph -->\n<p>ブログは楽しいです。毎日書きましょう！</p>\n<!-- /wp:paragraph -->\n'
+            '<h2 class="wp-block-heading">始め方</h2>\n'
+            '<p>まずは<span class="ba-highlight">目的を決める</span>のが大切です。</p>\n'
+            '<ul><li>手順1</li></ul>'
+        )
+        digest = build_sample_digest([
+            {'title': 'WP', 'content': wordpress, 'format': 'wordpress'},
+            {'title': 'MD', 'content': '## 見出し\n\n本文です。\n\n:::box type="info"\n補足です。\n:::', 'format': 'markdown'},
+        ])
+
+        wp = digest['wordpress']
+        assert wp['sentences']['count'] == 3
+        assert wp['sentences']['exclamationPercent'] == 33
+        assert wp['endings'][0] == {'ending': 'です', 'percent': 67}
+        assert wp['decorations'] == [{'name': 'ba-highlight', 'count': 1, 'example': '目的を決める'}]
+        assert wp['structure'] == {'h2': 1, 'h3': 0, 'lists': 1, 'tables': 0}
+        assert wp['excerpts'][0]['intro'].startswith('ブログは楽しいです。')
+        assert digest['markdown']['decorations'][0]['name'] == 'box:info'
+        assert digest['markdown']['structure']['h2'] == 1
+
+    def test_sample_context_uses_digest_unless_full_mode(self):
+        """参考スタイルは既定でダイジェストを使い、sampleArticleMode が full なら全文を使う"""
+        from style_digest import build_sample_digest
+
+        content = '<p>' + 'サンプルの文章です。' * 3000 + '</p>'
+        samples = [{'id': '1', 'title': 'サンプル', 'content': content, 'format': 'wordpress'}]
+        body = {'title': '記事', 'contentPoints': '要点'}
+
+        digest_text = build_sample_style_context({'sampleArticles': samples})
+        full_text = build_sample_style_context({'sampleArticles': samples, 'sampleArticleMode': 'full'})
+        assert '文末表現の割合' in digest_text
+        assert len(digest_text) * 10 < len(full_text)
+        assert full_text in join_prompt_parts(
+            build_structure_prompt_parts(body, {'sampleArticles': samples, 'sampleArticleMode': 'full'})
+        )
+
+        # 保存済みのダイジェストがあればそれを使う
+        stored = build_sample_digest(samples)
+        stored['wordpress']['excerpts'][0]['title'] = '保存済み'
+        parts = build_structure_prompt_parts(body, {'sampleArticles': samples, 'sampleDigest': stored})
+        assert '保存済み' in join_prompt_parts(parts)
+
+    def test_settings_fragments_are_reused_until_settings_change(self):
+        """設定由来の断片は同じ設定で再利用し、promptVersionや内容が変わると組み直す"""
+        import prompt_builder
+        from prompt_fragments import clear_fragment_cache, get_settings_fingerprint
+
+        clear_fragment_cache()
+        settings = {'articleStyle': {'taste': 'formal'}, 'decorations': [], 'promptVersion': 'v1'}
+        body = {'title': '記事', 'contentPoints': '要点'}
+
+        with patch.object(prompt_builder, 'build_style_instructions', wraps=build_style_instructions) as build:
+            first = build_structure_prompt_parts(body, settings)
+            second = build_structure_prompt_parts({**body, 'title': '別の記事'}, dict(settings))
+            assert build.call_count == 1
+            assert first['system'] == second['system']
+
+            build_structure_prompt_parts(body, {**settings, 'promptVersion': 'v2'})
+            assert build.call_count == 2
+
+        # promptVersionがない設定は内容のハッシュで区別する
+        assert get_settings_fingerprint({'articleStyle': {'taste': 'formal'}}) != \
+            get_settings_fingerprint({'articleStyle': {'taste': 'casual'}})
+        assert get_settings_fingerprint(settings) == 'v:v1'
+
 
 class TestUtils:
     """ユーティリティ関数のテスト"""
@@ -439,6 +621,37 @@ class TestUtils:
         assert result['valid'] is False
         assert any('H2' in issue and '最低' in issue for issue in result['issues'])
 
+    def test_markdown_stats_single_pass(self):
+        """1回の走査で文字数・見出しの階層・問題点・コードブロックを求める"""
+        from markdown_stats import get_markdown_stats, clear_stats_cache
+
+        clear_stats_cache()
+        markdown = '''## はじめに
+- **要点**は[こちら](https://example.com)
+
+```bash
+# コメント
+```
+
+#### 深い見出し
+本文
+'''
+        stats = get_markdown_stats(markdown)
+
+        # はじめに・要点はこちら・深い見出し・本文（コードブロックと記号は数えない）
+        assert stats['charCount'] == 4 + 6 + 5 + 2
+        assert stats['readingTime'] == 1
+        assert [h['text'] for h in stats['headings']] == ['はじめに', '深い見出し']
+        assert stats['headingTree'][0]['children'][0]['line'] == 8
+        assert stats['codeBlocks'] == [{'startLine': 4, 'endLine': 6}]
+        assert stats['issues'] == ['H2見出しは最低2つ必要です', '見出し階層がスキップされています: 深い見出し']
+
+        # 同じ内容は再走査しない
+        with patch('markdown_stats._scan', side_effect=AssertionError('not memoized')):
+            assert get_markdown_stats(markdown) is stats
+            assert count_characters(markdown) == stats['charCount']
+            assert validate_markdown_structure(markdown)['h2Count'] == 1
+
     def test_create_response_success(self):
         """成功レスポンス作成"""
         result = create_response(200, data={'key': 'value'})
@@ -580,6 +793,19 @@ class TestMarkdownGeneration:
         assert '1. 手順1' in result
         assert '2. 手順2' in result
 
+    def test_resolve_generation_mode_respects_plan(self):
+        """並列生成はプランで許可されている場合のみ選択される"""
+        sys.path.insert(0, str(Path(__file__).parent.parent / 'functions' / 'generate-article'))
+        from app import resolve_generation_mode
+        from plan_rules import PLAN_RULES
+
+        body = {'generationMode': 'parallel'}
+        assert resolve_generation_mode(body, PLAN_RULES['pro']) == 'parallel'
+        assert resolve_generation_mode(body, PLAN_RULES['trialing']) == 'single'
+        assert resolve_generation_mode({}, PLAN_RULES['pro']) == 'single'
+        assert resolve_generation_mode({'generationMode': 'longform'}, PLAN_RULES['pro']) == 'longform'
+        assert resolve_generation_mode({'generationMode': 'longform'}, PLAN_RULES['starter']) == 'parallel'
+
     def test_structure_to_markdown_no_decorations(self):
         """構造からMarkdown生成（装飾なし）"""
         sys.path.insert(0, str(Path(__file__).parent.parent / 'functions' / 'generate-article'))
@@ -595,12 +821,1510 @@ class TestMarkdownGeneration:
                 }
             ]
         }
-        result = structure_to_markdown(structure, [])
+        result = structure_to_markdown(structure)
         assert '## はじめに' in result
         assert '導入文です。' in result
         # 装飾タグが含まれていないことを確認
         assert ':::box' not in result
 
 
+class TestStructureParser:
+    """構造JSONインクリメンタルパーサーのテスト"""
+
+    def test_sections_emitted_as_they_close(self):
+        """セクションが閉じた時点で1件ずつ返される"""
+        from structure_parser import SectionStreamParser
+
+        text = json.dumps({
+            'title': 'タイトル',
+            'sections': [
+                {'heading': '見出し1', 'blocks': [{'type': 'paragraph', 'content': '本文{1}'}]},
+                {'heading': '見出し2', 'blocks': []},
+            ],
+            'meta': {'metaDescription': '説明'}
+        }, ensure_ascii=False)
+
+        parser = SectionStreamParser()
+        emitted = []
+        for i in range(0, len(text), 7):
+            emitted.extend(parser.feed(text[i:i + 7]))
+
+        assert [s['heading'] for s in emitted] == ['見出し1', '見出し2']
+        assert emitted[0]['blocks'][0]['content'] == '本文{1}'
+        assert parser.finished is True
+
+    def test_handles_fenced_json_and_escaped_quotes(self):
+        """コードブロックやエスケープされた引用符を含む出力"""
+        from structure_parser import SectionStreamParser
+
+        text = '```json\n{"title": "\\"sections\\" の話", "sections": [{"heading": "A\\"}", "blocks": []}]}\n```'
+        parser = SectionStreamParser()
+        emitted = parser.feed(text)
+
+        assert len(emitted) == 1
+        assert emitted[0]['heading'] == 'A"}'
+
+    def test_incomplete_section_not_emitted(self):
+        """途中で途切れたセクションは返さない"""
+        from structure_parser import SectionStreamParser
+
+        parser = SectionStreamParser()
+        emitted = parser.feed('{"title": "t", "sections": [{"heading": "完成", "blocks": []}, {"heading": "途中')
+
+        assert [s['heading'] for s in emitted] == ['完成']
+        assert parser.finished is False
+
+    def test_salvage_truncated_structure(self):
+        """途切れた出力から完成済みのセクションとタイトルを回収する"""
+        from structure_parser import salvage_structure
+
+        text = ('{"title": "記事タイトル", "sections": ['
+                '{"heading": "A", "blocks": [{"type": "paragraph", "title": "ブロック", "content": "本文"}]}, '
+                '{"heading": "B", "blocks": [{"type": "para')
+        structure, complete = salvage_structure(text)
+
+        assert structure['title'] == '記事タイトル'
+        assert [s['heading'] for s in structure['sections']] == ['A']
+        assert complete is False
+
+    def test_salvage_keeps_meta_after_closed_sections(self):
+        """sections配列が閉じていればmetaも回収する"""
+        from structure_parser import salvage_structure
+
+        text = '説明文 {"title": "t", "sections": [{"heading": "A", "blocks": []}], "meta": {"metaDescription": "m"}} 以上'
+        structure, complete = salvage_structure(text)
+
+        assert complete is True
+        assert structure['meta'] == {'metaDescription': 'm'}
+
+
+class TestStructureGeneration:
+    """構造生成（構造化出力・途中回収）のテスト"""
+
+    def test_truncated_output_regenerates_only_tail(self):
+        """途切れた場合は回収したセクションを残し、続きのみ生成して結合する"""
+        import app
+
+        truncated = '{"title": "t", "sections": [{"heading": "A", "blocks": []}, {"heading": "B", "blo'
+        tail = '{"title": "t", "sections": [{"heading": "B", "blocks": []}], "meta": {"metaDescription": "m"}}'
+        responses = [
+            (truncated, True, [{'task': 'structure'}]),
+            (tail, False, [{'task': 'structure_tail'}]),
+        ]
+
+        with patch.object(app, 'request_structure_json', side_effect=responses) as request, \
+                patch.object(app, 'publish_section_progress'):
+            structure, calls = app.generate_structure(
+                {'title': 't', 'wordCount': 2000}, {}, {'system': [], 'prompt': 'p'},
+                'job-1', [], max_tokens=1000
+            )
+
+        assert [s['heading'] for s in structure['sections']] == ['A', 'B']
+        assert structure['meta'] == {'metaDescription': 'm'}
+        assert len(calls) == 2
+        tail_prompt = request.call_args_list[1].args[1]['prompt']
+        assert '続きのセクションのみ' in tail_prompt
+        assert '1. A' in tail_prompt
+
+    def test_non_object_tail_keeps_recovered_sections(self):
+        """続きの応答がオブジェクト以外でも、回収済みのセクションで生成を続ける"""
+        import app
+
+        truncated = '{"title": "t", "sections": [{"heading": "A", "blocks": []}, {"heading": "B", "blo'
+        responses = [
+            (truncated, True, [{'task': 'structure'}]),
+            ('["B"]', False, [{'task': 'structure_tail'}]),
+        ]
+
+        with patch.object(app, 'request_structure_json', side_effect=responses):
+            structure, calls = app.generate_structure(
+                {'title': 't'}, {}, {'system': [], 'prompt': 'p'}, 'job-1', [], 1000, stream_progress=False
+            )
+
+        assert [s['heading'] for s in structure['sections']] == ['A']
+        assert len(calls) == 2
+
+    def test_parallel_section_salvaged_or_regenerated(self):
+        """並列生成で壊れたセクションは完成済みのブロックを回収し、回収できなければそのセクションのみ生成し直す"""
+        import app
+
+        outline = {'title': 't', 'sections': [{'heading': 'A', 'targetChars': 500}, {'heading': 'B', 'targetChars': 500}]}
+        outline_message = Mock(content=[Mock(text=json.dumps(outline))])
+        responses = {
+            'A': ['{"heading": "A", "blocks": [{"type": "paragraph", "content": "a"}, {"type": "para'],
+            'B': ['["B"]', '{"heading": "B", "blocks": [{"type": "paragraph", "content": "b"}]}'],
+        }
+
+        def generate(task, prompt_parts, max_tokens, model=None):
+            return responses[prompt_parts['section_heading']].pop(0), [{'task': task}]
+
+        def section_prompt(body, user_settings, outline, index):
+            return {'section_heading': outline['sections'][index]['heading']}
+
+        with patch.object(app, 'create_message', return_value=(outline_message, {'task': 'outline'})), \
+                patch.object(app, 'build_section_prompt_parts', side_effect=section_prompt), \
+                patch.object(app, 'generate_text_with_continuation', side_effect=generate), \
+                patch.object(app, 'publish_section_progress'):
+            structure, calls = app.generate_structure_parallel({'title': 't'}, {}, 'job-1', [])
+
+        assert structure['sections'] == [
+            {'heading': 'A', 'blocks': [{'type': 'paragraph', 'content': 'a'}]},
+            {'heading': 'B', 'blocks': [{'type': 'paragraph', 'content': 'b'}]},
+        ]
+        assert len(calls) == 4
+
+    def test_valid_output_is_used_as_is(self):
+        """正常な出力は追加の呼び出しをしない"""
+        import app
+
+        text = '{"title": "t", "sections": [{"heading": "A", "blocks": []}]}'
+        with patch.object(app, 'request_structure_json', return_value=(text, False, [{}])) as request:
+            structure, calls = app.generate_structure(
+                {'title': 't'}, {}, {'system': [], 'prompt': 'p'}, 'job-1', [], 1000, stream_progress=False
+            )
+
+        assert request.call_count == 1
+        assert structure['sections'] == [{'heading': 'A', 'blocks': []}]
+
+    def test_unrecoverable_output_raises_decode_error(self):
+        """回収できるセクションがない場合はパースエラーとする"""
+        import app
+
+        with patch.object(app, 'request_structure_json', return_value=('申し訳ありません', False, [{}])):
+            with pytest.raises(json.JSONDecodeError):
+                app.generate_structure({'title': 't'}, {}, {'system': [], 'prompt': 'p'}, 'job-1', [], 1000)
+
+    def test_dual_format_renders_both_from_one_structure(self):
+        """dualFormat指定時は構造を1回だけ生成し、両形式を記事に保存する"""
+        import app
+
+        structure = {'title': 't', 'sections': [{'heading': '見出し', 'blocks': [{'type': 'paragraph', 'content': '本文'}]}]}
+        calls = [{'task': 'structure', 'model': 'm', 'outputTokens': 10, 'stopReason': 'end_turn'}]
+        articles_table = MagicMock()
+        body = {'title': 'テスト記事', 'contentPoints': 'x', 'outputFormat': 'markdown', 'dualFormat': True}
+
+        with patch.object(app, 'articles_table', articles_table), \
+                patch.object(app, 'get_user_settings', return_value=None), \
+                patch.object(app, 'get_calibrated_chars_per_token', return_value=None), \
+                patch.object(app, 'generate_structure', return_value=(structure, calls)) as generate, \
+                patch.object(app, 'generate_text_with_continuation') as generate_markdown, \
+                patch.object(app, 'update_job_status') as update:
+            app.run_article_generation('job-1', 'user-1', body)
+
+        assert generate.call_count == 1
+        generate_markdown.assert_not_called()
+
+        item = articles_table.put_item.call_args.kwargs['Item']
+        assert item['outputFormat'] == 'markdown'
+        assert item['markdown'].startswith('## 見出し')
+        assert '<h2 class="wp-block-heading">見出し</h2>' in item['alternateContents']['wordpress']
+        assert item['metadata']['tokenBudget']['generationFormat'] == 'wordpress'
+        # 構造の検証はASTの集計値（WordPressの描画時に集計）から作成する
+        assert item['metadata']['structureValidation'] == app.build_structure_validation(
+            app.render_article_with_metrics(app.parse_structure(structure, []), app.PlainMarkdownRenderer())[1]
+        )
+        assert update.call_args.kwargs['result']['alternateContents'] == item['alternateContents']
+
+
+class FakeJobsTable:
+    """ジョブテーブルの代わり（get_item / put_item / update_item のSET・REMOVEのみ）"""
+
+    def __init__(self):
+        self.items = {}
+
+    def get_item(self, Key, **kwargs):
+        item = self.items.get(Key['jobId'])
+        return {'Item': item} if item is not None else {}
+
+    def put_item(self, Item):
+        self.items[Item['jobId']] = Item
+
+    def update_item(self, Key, UpdateExpression, ExpressionAttributeValues, ExpressionAttributeNames=None, **kwargs):
+        item = self.items.setdefault(Key['jobId'], {'jobId': Key['jobId']})
+        names = ExpressionAttributeNames or {}
+        set_expr, _, remove_expr = UpdateExpression[len('SET '):].partition(' REMOVE ')
+        for assignment in set_expr.split(','):
+            name, value = (part.strip() for part in assignment.split('='))
+            item[names.get(name, name)] = ExpressionAttributeValues[value]
+        for name in filter(None, (part.strip() for part in remove_expr.split(','))):
+            item.pop(names.get(name, name), None)
+
+
+class TestLongformGeneration:
+    """長文モード（アウトライン → チャンクごとの執筆 → 結合）のテスト"""
+
+    OUTLINE = {
+        'title': '長文記事',
+        'sections': [{'heading': f'見出し{i + 1}', 'brief': '概要', 'targetChars': 2000} for i in range(4)],
+    }
+
+    def _chunk_response(self, start, end):
+        return json.dumps({
+            'sections': [
+                {'heading': f'見出し{i + 1}', 'blocks': [{'type': 'paragraph', 'content': f'本文{i + 1}'}]}
+                for i in range(start, end)
+            ],
+            'summary': f'セクション{end}までの要約',
+        }, ensure_ascii=False)
+
+    def test_plan_chunks_respects_chunk_size(self):
+        """チャンクは上限文字数以下に詰め、上限を超える1セクションは単独にする"""
+        from longform import plan_chunks, plan_section_range
+
+        sections = [{'targetChars': c} for c in (1000, 1500, 500, 4000, 1000)]
+        assert plan_chunks(sections, 8000) == [[0, 3], [3, 4], [4, 5]]
+        min_sections, max_sections = plan_section_range(50000)
+        assert 4 <= min_sections <= max_sections <= 30
+
+    def test_chains_next_step_when_time_runs_out(self):
+        """残り時間が足りなくなったら状態を保存してSQSの次のステップへ引き継ぐ"""
+        import app
+
+        jobs = FakeJobsTable()
+        outline_message = Mock(content=[Mock(text=json.dumps(self.OUTLINE, ensure_ascii=False))])
+        context = Mock()
+        context.get_remaining_time_in_millis.return_value = 10_000
+        sqs_client = Mock()
+
+        with patch.object(app, 'jobs_table', jobs), \
+                patch.object(app, 'sqs', sqs_client), \
+                patch.object(app, 'create_message', return_value=(outline_message, {'task': 'outline'})), \
+                patch.object(app, 'generate_text_with_continuation') as generate_chunk:
+            result = app.generate_structure_longform(
+                'job-1', 'user-1', {'title': 't', 'wordCount': 8000}, {}, [], context=context
+            )
+
+        assert result is None
+        generate_chunk.assert_not_called()
+        state = jobs.items['job-1']['longform']
+        assert state['chunks'] == [[0, 1], [1, 2], [2, 3], [3, 4]]
+        assert state['nextChunk'] == 0
+        message = json.loads(sqs_client.send_message.call_args.kwargs['MessageBody'])
+        assert message['jobId'] == 'job-1'
+        assert 'attempt' not in message
+
+    def test_resumes_and_stitches_chunks(self):
+        """保存済みの状態から再開し、要約を引き継いで全チャンクを結合する"""
+        import app
+        from longform import to_dynamodb_value
+
+        jobs = FakeJobsTable()
+        jobs.items['job-1'] = {'jobId': 'job-1', 'longform': to_dynamodb_value({
+            'outline': self.OUTLINE,
+            'chunks': [[0, 2], [2, 4]],
+            'nextChunk': 0,
+            'summary': '',
+            'calls': [{'task': 'outline', 'outputTokens': 5}],
+        })}
+        responses = [
+            (self._chunk_response(0, 2), [{'task': 'section', 'outputTokens': 10}]),
+            (self._chunk_response(2, 4), [{'task': 'section', 'outputTokens': 20}]),
+        ]
+
+        with patch.object(app, 'jobs_table', jobs), \
+                patch.object(app, 'generate_text_with_continuation', side_effect=responses) as generate_chunk:
+            structure, calls = app.generate_structure_longform(
+                'job-1', 'user-1', {'title': 't', 'wordCount': 8000}, {}, []
+            )
+
+        assert [s['heading'] for s in structure['sections']] == ['見出し1', '見出し2', '見出し3', '見出し4']
+        assert [c['outputTokens'] for c in calls] == [5, 10, 20]
+        second_prompt = generate_chunk.call_args_list[1].args[1]['prompt']
+        assert 'セクション2までの要約' in second_prompt
+        assert '→ 3. 見出し3' in second_prompt
+        assert jobs.items['job-1']['hasPartialResult'] is True
+        partial = jobs.items['job-1#partial']['payload']
+        assert (partial['sectionsCompleted'], partial['sectionsTotal']) == (4, 4)
+        assert '見出し3' in partial['markdown'] and '見出し1' not in partial['markdown']
+
+    def test_short_chunk_is_rewritten_without_failing_job(self):
+        """出力が不足・途切れたチャンクは書き終えたチャンクを残したまま同じチャンクだけ書き直す"""
+        import app
+        from longform import to_dynamodb_value
+
+        jobs = FakeJobsTable()
+        jobs.items['job-1'] = {'jobId': 'job-1', 'longform': to_dynamodb_value({
+            'outline': self.OUTLINE,
+            'chunks': [[0, 2], [2, 4]],
+            'nextChunk': 0,
+            'summary': '',
+            'calls': [],
+        })}
+        short = json.dumps({'sections': [{'heading': '見出し1', 'blocks': []}]}, ensure_ascii=False)
+        truncated = self._chunk_response(2, 4)[:60]
+        responses = [
+            (short, [{'task': 'section', 'outputTokens': 1}]),
+            (self._chunk_response(0, 2), [{'task': 'section', 'outputTokens': 10}]),
+            (truncated, [{'task': 'section', 'outputTokens': 2}]),
+            (self._chunk_response(2, 4), [{'task': 'section', 'outputTokens': 20}]),
+        ]
+
+        with patch.object(app, 'jobs_table', jobs), \
+                patch.object(app, 'generate_text_with_continuation', side_effect=responses) as generate_chunk:
+            structure, calls = app.generate_structure_longform(
+                'job-1', 'user-1', {'title': 't', 'wordCount': 8000}, {}, []
+            )
+
+        assert generate_chunk.call_count == 4
+        assert generate_chunk.call_args_list[1].args[1]['prompt'] == generate_chunk.call_args_list[0].args[1]['prompt']
+        assert [s['heading'] for s in structure['sections']] == ['見出し1', '見出し2', '見出し3', '見出し4']
+        assert sorted(c['outputTokens'] for c in calls) == [1, 2, 10, 20]
+
+    def test_short_chunk_salvaged_after_max_attempts(self):
+        """書き直しの上限に達したら出力に含まれていたセクションで続ける"""
+        import app
+        from longform import to_dynamodb_value
+
+        jobs = FakeJobsTable()
+        jobs.items['job-1'] = {'jobId': 'job-1', 'longform': to_dynamodb_value({
+            'outline': self.OUTLINE,
+            'chunks': [[0, 2], [2, 4]],
+            'nextChunk': 0,
+            'summary': '',
+            'calls': [],
+        })}
+        short = json.dumps({'sections': [{'heading': 'x', 'blocks': []}], 'summary': '要約'}, ensure_ascii=False)
+        responses = [(short, []), (short, []), (self._chunk_response(2, 4), [])]
+
+        with patch.object(app, 'jobs_table', jobs), \
+                patch.object(app, 'LONGFORM_MAX_CHUNK_ATTEMPTS', 2), \
+                patch.object(app, 'generate_text_with_continuation', side_effect=responses):
+            structure, _ = app.generate_structure_longform(
+                'job-1', 'user-1', {'title': 't', 'wordCount': 8000}, {}, []
+            )
+
+        assert [s['heading'] for s in structure['sections']] == ['見出し1', '見出し3', '見出し4']
+
+    def test_missing_sections_raise_for_retry(self):
+        """チャンクの出力が指定セクション数に満たない場合はエラー（同じチャンクを再試行）"""
+        from longform import merge_chunk_sections
+
+        with pytest.raises(ValueError):
+            merge_chunk_sections(self.OUTLINE['sections'], 0, 2, [{'heading': '見出し1', 'blocks': []}])
+
+
+class TestJobStatus:
+    """ジョブ状態の取得（ETag・ロングポーリング・結果の別項目保存）のテスト"""
+
+    def _event(self, headers=None, wait=None):
+        event = {
+            'requestContext': {'authorizer': {'lambda': {'userId': 'user-1'}}},
+            'pathParameters': {'jobId': 'job-1'},
+            'headers': headers or {},
+        }
+        if wait is not None:
+            event['queryStringParameters'] = {'wait': str(wait)}
+        return event
+
+    def _jobs(self, status='processing'):
+        jobs = FakeJobsTable()
+        jobs.items['job-1'] = {
+            'jobId': 'job-1', 'userId': 'user-1', 'status': status,
+            'createdAt': '2026-01-01T00:00:00', 'updatedAt': '2026-01-01T00:00:00',
+        }
+        return jobs
+
+    def test_returns_304_when_etag_matches(self):
+        """If-None-Match がETagと一致すれば本文なしの304を返す"""
+        import app
+
+        jobs = self._jobs()
+        with patch.object(app, 'jobs_table', jobs):
+            first = app.get_job_status(self._event(), None)
+            etag = first['headers']['ETag']
+            second = app.get_job_status(self._event(headers={'if-none-match': f'W/{etag}'}), None)
+
+        assert first['statusCode'] == 200
+        assert json.loads(first['body'])['data']['status'] == 'processing'
+        assert second['statusCode'] == 304
+        assert second['body'] == ''
+        assert second['headers']['ETag'] == etag
+
+    def test_wait_returns_when_status_changes(self):
+        """wait 指定時は状態が変わるまで待ち、変わった時点の状態と結果を返す"""
+        import app
+
+        jobs = self._jobs()
+        with patch.object(app, 'jobs_table', jobs):
+            etag = app.get_job_status(self._event(), None)['headers']['ETag']
+
+            def complete_job(seconds):
+                if len(sleeps) == 1:
+                    app.update_job_status('job-1', 'completed', result={'markdown': '本文'})
+                sleeps.append(seconds)
+
+            sleeps = []
+            with patch.object(app.time, 'sleep', side_effect=complete_job):
+                response = app.get_job_status(self._event(headers={'If-None-Match': etag}, wait=20), None)
+
+        data = json.loads(response['body'])['data']
+        assert response['statusCode'] == 200
+        assert data['status'] == 'completed'
+        assert data['result'] == {'markdown': '本文'}
+        assert sleeps == [1.0, 2.0]
+        assert response['headers']['ETag'] != etag
+
+    def test_wait_times_out_with_304(self):
+        """待ち時間内に変わらなければ304を返す（Lambdaの残り時間で待ち時間を切り詰める）"""
+        import app
+
+        jobs = self._jobs()
+        context = Mock()
+        context.get_remaining_time_in_millis.return_value = 7_000
+        clock = [0.0]
+
+        def advance(seconds):
+            clock[0] += seconds
+
+        with patch.object(app, 'jobs_table', jobs):
+            etag = app.get_job_status(self._event(), None)['headers']['ETag']
+            with patch.object(app.time, 'sleep', side_effect=advance), \
+                    patch.object(app.time, 'monotonic', side_effect=lambda: clock[0]):
+                response = app.get_job_status(self._event(headers={'If-None-Match': etag}, wait=60), context)
+
+        assert response['statusCode'] == 304
+        assert clock[0] == pytest.approx(5.0)
+
+    def test_payloads_are_stored_outside_job_item(self):
+        """結果・途中結果はジョブとは別の項目に保存し、ジョブには有無のみを持つ"""
+        import app
+
+        jobs = self._jobs()
+        with patch.object(app, 'jobs_table', jobs):
+            app.update_job_progress('job-1', {'markdown': '途中'})
+            assert json.loads(app.get_job_status(self._event(), None)['body'])['data']['partialResult'] == {
+                'markdown': '途中'
+            }
+            app.update_job_status('job-1', 'completed', result={'markdown': '完成'})
+
+        job = jobs.items['job-1']
+        assert 'result' not in job and 'partialResult' not in job and 'hasPartialResult' not in job
+        assert job['hasResult'] is True
+        assert jobs.items['job-1#result']['payload'] == {'markdown': '完成'}
+
+    def test_auxiliary_items_are_not_jobs(self):
+        """ジョブと並べて保存した項目（結果・購読者など）のキーはジョブとして返さない"""
+        import app
+
+        jobs = self._jobs()
+        jobs.items['job-1#subscribers'] = {'jobId': 'job-1#subscribers', 'userId': 'user-1'}
+        jobs.items['job-2'] = {'jobId': 'job-2', 'userId': 'user-1'}
+        with patch.object(app, 'jobs_table', jobs):
+            app.update_job_status('job-1', 'completed', result={'markdown': '完成'})
+            for job_id in ('job-1#result', 'job-1#subscribers', 'job-2'):
+                event = {**self._event(), 'pathParameters': {'jobId': job_id}}
+                assert app.get_job_status(event, None)['statusCode'] == 404
+
+
+class TestJobEvents:
+    """ジョブイベントの配信（プロセス内の代わり・WebSocket・購読）のテスト"""
+
+    def test_worker_updates_publish_events_in_process(self):
+        """状態の更新・途中結果の保存がイベントとして順に配信される（本文は含めない）"""
+        import app
+        import job_events
+
+        jobs = FakeJobsTable()
+        events = job_events.local_broker.subscribe('job-1')
+        try:
+            with patch.object(app, 'jobs_table', jobs), \
+                    patch.object(job_events, 'JOB_EVENTS_TRANSPORT', 'local'):
+                app.update_job_status('job-1', 'processing')
+                app.update_job_progress('job-1', {'sectionsCompleted': 1, 'markdown': '本文'})
+                app.update_job_status('job-1', 'completed', result={'articleId': 'art-1', 'markdown': '本文'})
+                app.update_job_status('job-2', 'failed', error='エラー')
+        finally:
+            job_events.local_broker.unsubscribe('job-1', events)
+
+        received = [events.get_nowait() for _ in range(events.qsize())]
+        assert [e['type'] for e in received] == ['processing', 'section_ready', 'completed']
+        assert received[1]['sectionsCompleted'] == 1 and 'markdown' not in received[1]
+        assert received[2]['articleId'] == 'art-1'
+
+    def test_websocket_drops_gone_connections(self):
+        """購読中の接続に送り、切断済みの接続は購読者から削除する"""
+        import job_events
+
+        gone = type('GoneException', (Exception,), {})
+        def post_to_connection(ConnectionId, Data):
+            if ConnectionId == 'conn-2':
+                raise gone()
+
+        management_api = Mock()
+        management_api.exceptions.GoneException = gone
+        management_api.post_to_connection.side_effect = post_to_connection
+        table = Mock()
+        table.get_item.return_value = {'Item': {'connectionIds': {'conn-1', 'conn-2'}}}
+
+        with patch.object(job_events, 'JOB_EVENTS_TRANSPORT', 'websocket'), \
+                patch.object(job_events, 'management_api', management_api), \
+                patch.object(job_events, 'subscriptions_table', table):
+            event = job_events.publish_job_event('job-1', job_events.JOB_EVENT_COMPLETED)
+
+        assert event['type'] == 'completed'
+        assert json.loads(management_api.post_to_connection.call_args_list[0].kwargs['Data'])['jobId'] == 'job-1'
+        removed = table.update_item.call_args.kwargs
+        assert removed['Key'] == {'jobId': 'job-1#subscribers'}
+        assert removed['ExpressionAttributeValues'] == {':ids': {'conn-2'}}
+
+    def test_subscribe_requires_job_owner(self):
+        """購読は自分のジョブのみ（購読時に現在のステータスを返す）"""
+        import app
+
+        jobs = FakeJobsTable()
+        jobs.items['job-1'] = {'jobId': 'job-1', 'userId': 'user-1', 'status': 'processing'}
+
+        def ws_event(user_id):
+            return {
+                'requestContext': {
+                    'eventType': 'MESSAGE', 'routeKey': 'subscribe', 'connectionId': 'conn-1',
+                    'authorizer': {'principalId': user_id, 'userId': user_id},
+                },
+                'body': json.dumps({'action': 'subscribe', 'jobId': 'job-1'}),
+            }
+
+        with patch.object(app, 'jobs_table', jobs), \
+                patch.object(app, 'add_subscriber') as add_subscriber, \
+                patch.object(app, 'send_to_connection') as send:
+            denied = app.lambda_handler(ws_event('user-2'), None)
+            accepted = app.lambda_handler(ws_event('user-1'), None)
+
+        assert denied['statusCode'] == 403
+        assert accepted['statusCode'] == 200
+        add_subscriber.assert_called_once_with('job-1', 'conn-1')
+        assert send.call_args.args[1]['type'] == 'subscribed'
+        assert send.call_args.args[1]['status'] == 'processing'
+
+
+class TestClaudeApi:
+    """Claude APIクライアント共通モジュールのテスト"""
+
+    def test_client_is_shared(self):
+        """クライアントはコンテナ内で1度だけ生成される"""
+        import claude_api
+
+        with patch.object(claude_api, '_client', None):
+            first = claude_api.get_claude_client()
+            second = claude_api.get_claude_client()
+
+        assert first is second
+        assert first.max_retries == claude_api.CLAUDE_MAX_RETRIES
+
+    def test_concurrent_calls_limited_to_connection_pool(self):
+        """同時API呼び出し数はコネクションプールの大きさを超えない"""
+        import threading
+        import time
+        from concurrent.futures import ThreadPoolExecutor
+        import claude_api
+
+        active = {'now': 0, 'max': 0}
+        lock = threading.Lock()
+
+        def create(**kwargs):
+            with lock:
+                active['now'] += 1
+                active['max'] = max(active['max'], active['now'])
+            time.sleep(0.02)
+            with lock:
+                active['now'] -= 1
+            raw = Mock(headers={})
+            raw.parse.return_value = Mock(
+                usage=Mock(input_tokens=1, output_tokens=1,
+                           cache_creation_input_tokens=0, cache_read_input_tokens=0),
+                model='claude-test', stop_reason='end_turn')
+            return raw
+
+        client = Mock()
+        client.messages.with_raw_response.create.side_effect = create
+        with patch.object(claude_api, '_client', client), \
+             patch.object(claude_api, '_call_slots', threading.BoundedSemaphore(2)):
+            with ThreadPoolExecutor(max_workers=6) as executor:
+                list(executor.map(lambda _: claude_api.create_message('test', model='m'), range(6)))
+
+        assert active['max'] == 2
+
+    def test_build_call_metrics(self):
+        """TTFT・トークン/秒・キャッシュ使用量を計測値に含める"""
+        from claude_api import build_call_metrics
+
+        usage = Mock(input_tokens=1000, output_tokens=500,
+                     cache_creation_input_tokens=None, cache_read_input_tokens=800)
+        message = Mock(usage=usage, model='claude-test', stop_reason='end_turn')
+
+        with patch('claude_api.time.monotonic', return_value=12.0):
+            metrics = build_call_metrics('structure', message, started_at=2.0, first_token_at=7.0, retries=1)
+
+        assert metrics['latencyMs'] == 10000
+        assert metrics['timeToFirstTokenMs'] == 5000
+        assert metrics['outputTokensPerSecond'] == 100.0
+        assert metrics['retries'] == 1
+        assert metrics['cacheCreationInputTokens'] == 0
+        assert metrics['cacheReadInputTokens'] == 800
+        json.dumps(metrics)
+
+    def test_get_retry_count(self):
+        """SDKのリトライ回数ヘッダーを読み取る"""
+        from claude_api import get_retry_count
+
+        assert get_retry_count(Mock(headers={'x-stainless-retry-count': '2'})) == 2
+        assert get_retry_count(Mock(headers={})) == 0
+        assert get_retry_count(None) == 0
+
+    def test_summarize_call_metrics(self):
+        """複数呼び出しの計測値を合算（レイテンシは最大値）"""
+        from claude_api import summarize_call_metrics
+
+        calls = [
+            {'inputTokens': 100, 'outputTokens': 50, 'cacheCreationInputTokens': 10,
+             'cacheReadInputTokens': 0, 'retries': 0, 'latencyMs': 1200, 'timeToFirstTokenMs': None},
+            {'inputTokens': 200, 'outputTokens': 80, 'cacheCreationInputTokens': 0,
+             'cacheReadInputTokens': 90, 'retries': 2, 'latencyMs': 3400, 'timeToFirstTokenMs': 600},
+        ]
+        summary = summarize_call_metrics(calls)
+
+        assert summary['inputTokens'] == 300
+        assert summary['outputTokens'] == 130
+        assert summary['cacheReadInputTokens'] == 90
+        assert summary['apiCalls'] == 2
+        assert summary['apiRetries'] == 2
+        assert summary['apiLatencyMs'] == 3400
+        assert summary['timeToFirstTokenMs'] == 600
+
+
+class TestPromptTokens:
+    """プロンプトのトークン内訳のテスト"""
+
+    def test_estimate_tokens_by_character_class(self):
+        """文字種ごとの係数で推定する（漢字は1文字1トークン、英数字は4文字1トークン）"""
+        from prompt_tokens import estimate_tokens
+
+        assert estimate_tokens('') == 0
+        assert estimate_tokens('文章構成') == 4
+        assert estimate_tokens('abcdefgh') == 2
+        assert estimate_tokens('ひらがなです') == 4
+        assert estimate_tokens('## 見出し\n\n本文') == 1 + 3 + 1 + 2
+
+    def test_prompt_parts_report_fragment_breakdown(self):
+        """各断片の推定トークン数を内訳化し、実測値との比で按分する"""
+        from app import get_default_settings
+        from prompt_builder import build_structure_prompt_parts, build_markdown_prompt_parts
+        from prompt_tokens import build_token_breakdown, reconcile_token_breakdown
+
+        body = {
+            'title': 'テスト',
+            'contentPoints': '要点を詳しく説明する',
+            'internalLinks': [{'title': '関連記事', 'url': 'https://example.com/a'}],
+        }
+        parts = build_structure_prompt_parts(body, get_default_settings())
+        fragments = parts['fragments']
+
+        for name in ('instructions', 'decorations', 'style', 'samples', 'contentPoints', 'links'):
+            assert fragments[name]
+            assert fragments[name] in join_prompt_parts(parts)
+        assert 'decorations' not in build_markdown_prompt_parts(body, get_default_settings())['fragments']
+
+        request = {'system': parts['system'], 'messages': [{'role': 'user', 'content': parts['prompt']}]}
+        breakdown = build_token_breakdown(request, fragments)
+        assert sum(breakdown['fragmentTokens'].values()) == breakdown['estimatedTokens']
+        assert breakdown['fragmentTokens']['samples'] > breakdown['fragmentTokens']['links']
+
+        reconciled = reconcile_token_breakdown(breakdown, {
+            'inputTokens': 100, 'cacheReadInputTokens': breakdown['estimatedTokens'] * 2 - 100
+        })
+        assert reconciled['actualInputTokens'] == breakdown['estimatedTokens'] * 2
+        assert reconciled['estimateRatio'] == 2.0
+        assert reconciled['attributedTokens']['samples'] == breakdown['fragmentTokens']['samples'] * 2
+
+    def test_create_message_logs_breakdown_without_passing_fragments(self):
+        """断片はSDKに渡さず、呼び出し後に内訳をログへ出力する"""
+        import claude_api
+
+        usage = Mock(input_tokens=40, output_tokens=10,
+                     cache_creation_input_tokens=0, cache_read_input_tokens=0)
+        raw_response = Mock(http_request=Mock(headers={}))
+        raw_response.parse.return_value = Mock(usage=usage, model='claude-test', stop_reason='end_turn')
+        client = Mock()
+        client.messages.with_raw_response.create.return_value = raw_response
+
+        with patch.object(claude_api, 'get_claude_client', return_value=client), \
+                patch('prompt_tokens.log_info') as mock_log:
+            claude_api.create_message(
+                'titles',
+                model='claude-test',
+                messages=[{'role': 'user', 'content': '要点: 文章の書き方'}],
+                prompt_fragments={'contentPoints': '文章の書き方'},
+            )
+
+        assert 'prompt_fragments' not in client.messages.with_raw_response.create.call_args.kwargs
+        message, fields = mock_log.call_args.args[0], mock_log.call_args.kwargs
+        assert message == 'Prompt token breakdown'
+        assert fields['actualInputTokens'] == 40
+        assert set(fields['fragmentTokens']) == {'contentPoints', 'other'}
+
+
+class TestColdStart:
+    """コールドスタートの遅延初期化のテスト"""
+
+    def test_api_routes_defer_heavy_imports(self):
+        """app の読み込み時には anthropic・boto3・標準サンプル記事を読み込まない"""
+        import subprocess
+
+        code = (
+            'import json, sys, app, sample_articles; '
+            'before = {m: m in sys.modules for m in ("anthropic", "boto3")}; '
+            'before["samples"] = sample_articles._default_samples is not None; '
+            'app.jobs_table.table_name; '
+            'after = {m: m in sys.modules for m in ("anthropic", "boto3")}; '
+            'print(json.dumps([before, after]))'
+        )
+        env = {**os.environ, 'AWS_DEFAULT_REGION': 'ap-northeast-1', 'LOCAL_DEV': 'false'}
+        completed = subprocess.run(
+            [sys.executable, '-c', code],
+            cwd=Path(__file__).parent.parent / 'functions' / 'generate-article',
+            env=env, capture_output=True, text=True, check=True
+        )
+        before, after = json.loads(completed.stdout)
+
+        assert before == {'anthropic': False, 'boto3': False, 'samples': False}
+        # ジョブ状態の取得に必要なのはDynamoDBのみ
+        assert after == {'anthropic': False, 'boto3': True}
+
+    def test_default_sample_articles_load_from_data_file(self):
+        """標準サンプル記事はデータファイルから読み込み、以降は同じものを返す"""
+        from sample_articles import get_default_sample_article
+
+        wordpress = get_default_sample_article('wordpress')
+        markdown = get_default_sample_article('markdown')
+
+        assert wordpress['format'] == 'wordpress' and '<!-- wp:' in wordpress['content']
+        assert markdown['format'] == 'markdown' and markdown['content'].count('## ') >= 2
+        assert get_default_sample_article('wordpress') is wordpress
+
+    def test_table_proxy_resolves_per_thread(self):
+        """テーブルの代理オブジェクトはスレッドごとに実体を生成し、同じスレッド内では共有する"""
+        import threading
+        from aws_clients import LazyClient
+
+        table = LazyClient('test-table', lambda: Mock(), per_thread=True)
+        main = table._resolve()
+        other = {}
+        thread = threading.Thread(target=lambda: other.setdefault('table', table._resolve()))
+        thread.start()
+        thread.join()
+
+        assert table._resolve() is main
+        assert other['table'] is not main
+
+
+class TestResultCache:
+    """タイトル・メタ生成結果キャッシュのテスト"""
+
+    def setup_method(self):
+        from result_cache import clear_memory_cache
+        clear_memory_cache()
+
+    def test_cache_key_normalizes_whitespace(self):
+        """末尾空白や空行の違いは同じキーになる"""
+        from result_cache import build_cache_key
+
+        params = {'max_tokens': 1000, 'temperature': 0.8}
+        key1 = build_cache_key('titles', 'user-1', 'model-a', '要点\n\n\n\nキーワード  ', params)
+        key2 = build_cache_key('titles', 'user-1', 'model-a', '  要点\n\nキーワード', params)
+
+        assert key1 == key2
+        assert key1 != build_cache_key('titles', 'user-1', 'model-b', '要点\n\nキーワード', params)
+        assert key1 != build_cache_key('titles', 'user-2', 'model-a', '要点\n\nキーワード', params)
+        assert key1 != build_cache_key('meta', 'user-1', 'model-a', '要点\n\nキーワード', params)
+
+    def test_memory_roundtrip_and_lru_eviction(self):
+        """LRUの上限を超えると最も古いエントリが追い出される"""
+        import result_cache
+
+        with patch.object(result_cache, 'RESULT_CACHE_MAX_ENTRIES', 2):
+            result_cache.put_cached_result('a', 'titles', {'titles': ['A']})
+            result_cache.put_cached_result('b', 'titles', {'titles': ['B']})
+            assert result_cache.get_cached_result('a') == {'titles': ['A']}
+            result_cache.put_cached_result('c', 'titles', {'titles': ['C']})
+
+            assert result_cache.get_cached_result('b') is None
+            assert result_cache.get_cached_result('a') == {'titles': ['A']}
+
+    def test_dynamodb_tier_skips_expired_items(self):
+        """DynamoDBのTTL削除前の期限切れアイテムは使わない"""
+        import result_cache
+
+        table = Mock()
+        table.get_item.return_value = {'Item': {'cacheKey': 'k', 'result': '{"titles": []}', 'ttl': 1}}
+        with patch.object(result_cache, 'result_cache_table', table):
+            assert result_cache.get_cached_result('k') is None
+
+            table.get_item.return_value['Item']['ttl'] = 9999999999
+            assert result_cache.get_cached_result('k') == {'titles': []}
+
+
+class TestSqsWorker:
+    """SQSバッチ処理のテスト"""
+
+    def test_reports_only_failed_records(self):
+        """失敗したレコードのみ batchItemFailures に含める"""
+        import app
+
+        records = [{'messageId': f'm{i}', 'body': '{}'} for i in range(5)]
+        with patch.object(app, 'process_sqs_record', side_effect=lambda r, context: r['messageId'] not in ('m1', 'm3')):
+            result = app.process_sqs_message({'Records': records}, None)
+
+        failed = sorted(f['itemIdentifier'] for f in result['batchItemFailures'])
+        assert failed == ['m1', 'm3']
+
+    def test_unhandled_worker_error_is_reported(self):
+        """ワーカー内の想定外例外もレコード失敗として扱う"""
+        import app
+
+        with patch.object(app, 'process_sqs_record', side_effect=RuntimeError('boom')):
+            result = app.process_sqs_message({'Records': [{'messageId': 'm0', 'body': '{}'}]}, None)
+
+        assert result == {'batchItemFailures': [{'itemIdentifier': 'm0'}]}
+
+    def _record(self, attempt=0):
+        message = {'jobId': 'job-1', 'userId': 'user-1', 'body': {'title': 't'}, 'attempt': attempt}
+        return {'messageId': 'm0', 'body': json.dumps(message), 'attributes': {'ApproximateReceiveCount': '1'}}
+
+    def _overloaded(self, headers=None):
+        import anthropic
+        return anthropic.APIStatusError('overloaded', response=Mock(status_code=529, headers=headers or {}), body=None)
+
+    def test_short_backoff_retries_in_process(self):
+        """短い待ちはその場でバックオフして再試行する"""
+        import app
+        from retry_policy import CircuitBreaker
+
+        with patch.object(app, 'circuit_breaker', CircuitBreaker(failure_threshold=10)), \
+                patch.object(app, 'run_article_generation', side_effect=[self._overloaded(), None]) as run, \
+                patch.object(app, 'record_job_retry') as record_retry, \
+                patch.object(app.time, 'sleep') as sleep:
+            assert app.process_sqs_record(self._record()) is True
+
+        assert run.call_count == 2
+        assert run.call_args.args[3] == 1
+        assert record_retry.call_args.args[1] == 1
+        assert 0 < sleep.call_args.args[0] <= app.INLINE_RETRY_MAX_SECONDS
+
+    def test_long_retry_after_requeues_with_delay(self):
+        """retry-afterが長い場合は遅延付きでSQSに再投入する"""
+        import app
+        from retry_policy import CircuitBreaker
+
+        sqs_client = Mock()
+        with patch.object(app, 'circuit_breaker', CircuitBreaker(failure_threshold=10)), \
+                patch.object(app, 'sqs', sqs_client), \
+                patch.object(app, 'run_article_generation', side_effect=self._overloaded({'retry-after': '120'})), \
+                patch.object(app, 'record_job_retry') as record_retry:
+            assert app.process_sqs_record(self._record()) is True
+
+        sent = sqs_client.send_message.call_args.kwargs
+        assert sent['DelaySeconds'] == 120
+        assert json.loads(sent['MessageBody'])['attempt'] == 1
+        assert record_retry.call_args.args[:2] == ('job-1', 1)
+
+    def test_job_fails_after_max_attempts(self):
+        """試行回数の上限に達したらジョブを失敗にする"""
+        import app
+        from retry_policy import CircuitBreaker, MAX_GENERATION_ATTEMPTS
+
+        with patch.object(app, 'circuit_breaker', CircuitBreaker(failure_threshold=10)), \
+                patch.object(app, 'run_article_generation', side_effect=self._overloaded()), \
+                patch.object(app, 'update_job_status') as update_status:
+            assert app.process_sqs_record(self._record(MAX_GENERATION_ATTEMPTS - 1)) is True
+
+        assert update_status.call_args.args == ('job-1', 'failed')
+
+    def test_open_circuit_defers_without_calling_api(self):
+        """サーキットが開いている間はClaudeを呼ばずに再投入する"""
+        import app
+        from retry_policy import CircuitBreaker
+
+        breaker = CircuitBreaker(failure_threshold=1, cooldown_seconds=30)
+        breaker.record_failure()
+        with patch.object(app, 'circuit_breaker', breaker), \
+                patch.object(app, 'sqs', Mock()) as sqs_client, \
+                patch.object(app, 'run_article_generation') as run, \
+                patch.object(app, 'record_job_retry'):
+            assert app.process_sqs_record(self._record(2)) is True
+
+        run.assert_not_called()
+        message = json.loads(sqs_client.send_message.call_args.kwargs['MessageBody'])
+        assert message['attempt'] == 2
+        assert message['deferrals'] == 1
+
+    def test_open_circuit_deferrals_are_capped(self):
+        """サーキットが開いたままの再投入は上限回数でジョブを失敗にする"""
+        import app
+        from retry_policy import CircuitBreaker
+
+        breaker = CircuitBreaker(failure_threshold=1, cooldown_seconds=30)
+        breaker.record_failure()
+        record = self._record()
+        record['body'] = json.dumps({**json.loads(record['body']), 'deferrals': app.MAX_CIRCUIT_DEFERRALS})
+        with patch.object(app, 'circuit_breaker', breaker), \
+                patch.object(app, 'sqs', Mock()) as sqs_client, \
+                patch.object(app, 'run_article_generation') as run, \
+                patch.object(app, 'update_job_status') as update_status:
+            assert app.process_sqs_record(record) is True
+
+        run.assert_not_called()
+        sqs_client.send_message.assert_not_called()
+        assert update_status.call_args.args[:2] == ('job-1', 'failed')
+
+
+    def test_record_returned_when_invocation_time_is_short(self):
+        """残り時間で生成を終えられない場合は生成を始めずにSQSへ戻す"""
+        import app
+
+        context = Mock()
+        context.get_remaining_time_in_millis.return_value = (app.MIN_GENERATION_SECONDS - 1) * 1000
+        record = {**self._record(), 'receiptHandle': 'rh-1'}
+        with patch.object(app, 'sqs', Mock()) as sqs_client, \
+                patch.object(app, 'run_article_generation') as run:
+            assert app.process_sqs_record(record, context) is False
+
+        run.assert_not_called()
+        assert sqs_client.change_message_visibility.call_args.kwargs['ReceiptHandle'] == 'rh-1'
+        assert sqs_client.change_message_visibility.call_args.kwargs['VisibilityTimeout'] == 0
+
+    def test_short_time_on_last_receive_fails_job(self):
+        """最後の受信で時間が足りない場合はDLQに移さずジョブを失敗にする"""
+        import app
+
+        context = Mock()
+        context.get_remaining_time_in_millis.return_value = (app.MIN_GENERATION_SECONDS - 1) * 1000
+        record = self._record()
+        record['attributes']['ApproximateReceiveCount'] = str(app.SQS_MAX_RECEIVE_COUNT)
+        with patch.object(app, 'sqs', Mock()) as sqs_client, \
+                patch.object(app, 'run_article_generation') as run, \
+                patch.object(app, 'update_job_status') as update_status:
+            assert app.process_sqs_record(record, context) is True
+
+        run.assert_not_called()
+        sqs_client.change_message_visibility.assert_not_called()
+        assert update_status.call_args.args[:2] == ('job-1', 'failed')
+
+    def test_redelivered_completed_job_is_not_regenerated(self):
+        """完了済みのジョブのメッセージが再配信されても生成し直さない"""
+        import app
+
+        with patch.object(app, 'update_job_status', return_value=False), \
+                patch.object(app, 'get_user_settings') as get_settings:
+            app.run_article_generation('job_abc', 'user-1', {'title': 't'})
+
+        get_settings.assert_not_called()
+
+    def test_article_saved_once_per_job(self):
+        """記事IDはジョブごとに決まり、保存済みの場合は上書きせずに保存済みの記事を使う"""
+        import app
+
+        conflict = Exception('conditional check failed')
+        conflict.response = {'Error': {'Code': 'ConditionalCheckFailedException'}}
+        saved = {'userId': 'user-1', 'articleId': 'art_abc', 'markdown': '先に保存した本文'}
+        articles_table = Mock()
+        articles_table.put_item.side_effect = conflict
+        articles_table.get_item.return_value = {'Item': saved}
+
+        article = {'userId': 'user-1', 'articleId': app.article_id_for_job('job_abc'), 'markdown': '本文'}
+        with patch.object(app, 'articles_table', articles_table):
+            assert app.save_article_once(article) == saved
+
+        assert article['articleId'] == 'art_abc'
+        assert articles_table.put_item.call_args.kwargs['ConditionExpression'] == 'attribute_not_exists(articleId)'
+
+
+class TestRetryPolicy:
+    """再試行ポリシーとサーキットブレーカーのテスト"""
+
+    def test_backoff_grows_and_honors_retry_after(self):
+        """指数的に増え、retry-after未満にならない"""
+        from retry_policy import compute_backoff, RETRY_BASE_DELAY_SECONDS, RETRY_MAX_DELAY_SECONDS
+
+        assert RETRY_BASE_DELAY_SECONDS / 2 <= compute_backoff(1) <= RETRY_BASE_DELAY_SECONDS
+        assert compute_backoff(4) >= RETRY_BASE_DELAY_SECONDS * 4
+        assert compute_backoff(1, retry_after=30) >= 30
+        assert compute_backoff(50) <= RETRY_MAX_DELAY_SECONDS
+
+    def test_get_retry_after(self):
+        """retry-after(-ms)ヘッダーを秒数として読み取る"""
+        from retry_policy import get_retry_after
+
+        assert get_retry_after(Mock(response=Mock(headers={'retry-after': '12'}))) == 12
+        assert get_retry_after(Mock(response=Mock(headers={'retry-after-ms': '1500'}))) == 1.5
+        assert get_retry_after(Mock(response=Mock(headers={'retry-after': 'Wed, 21 Oct 2015 07:28:00 GMT'}))) == 0
+        assert get_retry_after(Mock(response=Mock(headers={}))) is None
+        assert get_retry_after(ValueError()) is None
+
+    def test_retryable_classification(self):
+        """429・5xx・接続エラーのみ再試行対象"""
+        import anthropic
+        from retry_policy import is_retryable_api_error, is_overload_error
+
+        def status_error(code):
+            return anthropic.APIStatusError('e', response=Mock(status_code=code, headers={}), body=None)
+
+        assert is_retryable_api_error(status_error(529))
+        assert is_retryable_api_error(status_error(429))
+        assert is_retryable_api_error(anthropic.APIConnectionError(request=Mock()))
+        assert not is_retryable_api_error(status_error(400))
+        assert is_overload_error(status_error(529))
+        assert not is_overload_error(status_error(500))
+
+    def test_circuit_breaker_opens_and_closes(self):
+        """連続した失敗で開き、クールダウン後の成功で閉じる"""
+        from retry_policy import CircuitBreaker
+
+        now = [100.0]
+        breaker = CircuitBreaker(failure_threshold=2, cooldown_seconds=30, clock=lambda: now[0])
+
+        breaker.record_failure()
+        assert breaker.remaining_open_seconds() == 0
+        breaker.record_failure(retry_after=45)
+        assert breaker.remaining_open_seconds() == 45
+
+        now[0] += 50
+        assert breaker.remaining_open_seconds() == 0
+        breaker.record_success()
+        breaker.record_failure()
+        assert breaker.remaining_open_seconds() == 0
+
+class TestTokenBudget:
+    """出力トークン予算プランナーのテスト"""
+
+    def test_budget_scales_with_requested_chars(self):
+        """文字数・記事タイプに応じて予算が増え、上下限で丸められる"""
+        from token_budget import plan_output_tokens, MIN_OUTPUT_TOKENS, MAX_OUTPUT_TOKENS
+
+        short = plan_output_tokens(1000, 'wordpress', 'info')
+        long = plan_output_tokens(5000, 'wordpress', 'info')
+        review = plan_output_tokens(5000, 'wordpress', 'review')
+
+        assert short < long < review
+        assert plan_output_tokens(5000, 'markdown', 'info') < long
+        assert plan_output_tokens(100, 'markdown', 'info', include_overhead=False) == MIN_OUTPUT_TOKENS
+        assert plan_output_tokens(100000, 'wordpress', 'info') == MAX_OUTPUT_TOKENS
+
+    def test_calibration_uses_median_of_samples(self):
+        """実績の中央値で補正し、件数不足の場合は補正しない"""
+        from token_budget import calculate_chars_per_token, plan_output_tokens
+
+        samples = [
+            {'targetChars': 3000, 'outputTokens': 3000},
+            {'targetChars': 3000, 'outputTokens': 6000},
+            {'targetChars': 3000, 'outputTokens': 100},
+        ]
+        ratio = calculate_chars_per_token(samples)
+
+        assert ratio == 1.0
+        assert calculate_chars_per_token(samples[:2]) is None
+        assert plan_output_tokens(3000, 'wordpress', 'info', ratio) < plan_output_tokens(3000, 'wordpress', 'info')
+
+    def test_calibration_normalizes_article_type(self):
+        """実績は記事タイプの補正を割り戻して集計し、予算では記事タイプの補正を1回だけ掛ける"""
+        from token_budget import calculate_chars_per_token, plan_output_tokens, ARTICLE_TYPE_FACTORS, BUDGET_HEADROOM
+
+        factor = ARTICLE_TYPE_FACTORS['review']
+        # review記事のみの実績（info相当で1文字=1トークン、review分だけトークンが多い）
+        samples = [{'targetChars': 3000, 'outputTokens': round(3000 * factor), 'articleType': 'review'}] * 3
+        ratio = calculate_chars_per_token(samples)
+
+        assert ratio == pytest.approx(1.0)
+        # 同じ条件のreview記事の予算は実績のトークン数に余裕分を掛けたものになる
+        assert plan_output_tokens(3000, 'wordpress', 'review', ratio, include_overhead=False) == \
+            pytest.approx(3000 * factor * BUDGET_HEADROOM, abs=1)
+        assert plan_output_tokens(3000, 'wordpress', 'info', ratio) < plan_output_tokens(3000, 'wordpress', 'review', ratio)
+
+    def test_continues_when_max_tokens_reached(self):
+        """max_tokensで途切れた出力はプレフィルで続きを生成して連結する"""
+        import app
+
+        first = Mock(content=[Mock(text='{"title": "t", "sections": [  ')], stop_reason='max_tokens')
+        second = Mock(content=[Mock(text=']}')], stop_reason='end_turn')
+
+        with patch.object(app, 'create_message', side_effect=[(first, {}), (second, {})]) as create:
+            text, calls = app.generate_text_with_continuation(
+                'structure', {'system': [], 'prompt': 'p'}, max_tokens=100
+            )
+
+        assert json.loads(text) == {'title': 't', 'sections': []}
+        assert len(calls) == 2
+        continuation_messages = create.call_args.kwargs['messages']
+        assert continuation_messages[-1] == {'role': 'assistant', 'content': '{"title": "t", "sections": ['}
+
+
+class TestModelRouter:
+    """タスク別モデルルーティングのテスト"""
+
+    def test_light_tasks_use_fast_model(self):
+        """タイトル・メタ情報は高速モデル、本文は大きなモデル"""
+        from model_router import resolve_model, FAST_MODEL, LARGE_MODEL
+
+        assert resolve_model('titles', 'starter') == FAST_MODEL
+        assert resolve_model('meta', 'trialing') == FAST_MODEL
+        assert resolve_model('section', 'starter') == LARGE_MODEL
+        assert resolve_model('chat_edit', 'pro') == LARGE_MODEL
+
+    def test_pro_outline_uses_large_model(self):
+        """proプランのアウトラインは大きなモデル"""
+        from model_router import resolve_model, FAST_MODEL, LARGE_MODEL
+
+        assert resolve_model('outline', 'starter') == FAST_MODEL
+        assert resolve_model('outline', 'pro') == LARGE_MODEL
+
+    def test_unknown_plan_and_task_fallback(self):
+        """未知のプランはcanceled、未知のタスクは大きなモデル"""
+        from model_router import resolve_model, MODEL_ROUTES, LARGE_MODEL
+
+        assert resolve_model('titles', 'enterprise') == MODEL_ROUTES['canceled']['titles']
+        assert resolve_model('unknown_task', 'pro') == LARGE_MODEL
+
+    def test_env_overrides(self):
+        """環境変数の上書きは default → プラン の順に適用"""
+        import model_router
+
+        overrides = json.dumps({'default': {'titles': 'model-a'}, 'pro': {'titles': 'model-b'}})
+        with patch.object(model_router, 'MODEL_ROUTING_OVERRIDES', overrides):
+            table = model_router.build_routing_table()
+        assert table['starter']['titles'] == 'model-a'
+        assert table['pro']['titles'] == 'model-b'
+
+        with patch.object(model_router, 'MODEL_ROUTING_OVERRIDES', '{invalid'):
+            assert model_router.build_routing_table() == model_router.MODEL_ROUTES
+
+    def test_summary_records_model_per_task(self):
+        """計測値の集計にタスクごとの使用モデルを含める"""
+        from claude_api import summarize_call_metrics
+
+        summary = summarize_call_metrics([
+            {'task': 'outline', 'model': 'fast', 'inputTokens': 1, 'outputTokens': 1},
+            {'task': 'section', 'model': 'large', 'inputTokens': 1, 'outputTokens': 1},
+        ])
+        assert summary['models'] == {'outline': 'fast', 'section': 'large'}
+
+
+class TestInlineMarkdown:
+    """インラインMarkdown変換のテスト"""
+
+    def test_basic_syntax(self):
+        """リンク・太字・イタリックを変換し、記法のないテキストはそのまま返す"""
+        from inline_markdown import convert_inline_markdown
+
+        assert convert_inline_markdown('記法なし') == '記法なし'
+        assert convert_inline_markdown('**重要**です') == '<strong>重要</strong>です'
+        assert convert_inline_markdown('*注意*') == '<em>注意</em>'
+        assert convert_inline_markdown('[公式](https://example.com)') == '<a href="https://example.com">公式</a>'
+
+    def test_nested_emphasis_and_links(self):
+        """入れ子の強調とリンク内の強調を変換する"""
+        from inline_markdown import convert_inline_markdown
+
+        assert convert_inline_markdown('**太字の *斜体* を含む**') == '<strong>太字の <em>斜体</em> を含む</strong>'
+        assert convert_inline_markdown('***両方***') == '<em><strong>両方</strong></em>'
+        assert convert_inline_markdown('**[リンク](/page)**') == '<strong><a href="/page">リンク</a></strong>'
+        assert convert_inline_markdown('[**強調**](https://a.com/*x*)') == '<a href="https://a.com/*x*"><strong>強調</strong></a>'
+
+    def test_strong_inside_emphasis(self):
+        """イタリックの中の太字も入れ子にする（3の規則で ** が外側の * を閉じない）"""
+        from inline_markdown import convert_inline_markdown
+
+        assert convert_inline_markdown('*a**b**c*') == '<em>a<strong>b</strong>c</em>'
+        assert convert_inline_markdown('**a *b* c**') == '<strong>a <em>b</em> c</strong>'
+        assert convert_inline_markdown('*x** y') == '<em>x</em>* y'
+
+    def test_unmatched_and_disallowed(self):
+        """閉じられていない記法と許可されないURLは文字列のまま残す"""
+        from inline_markdown import convert_inline_markdown
+
+        assert convert_inline_markdown('**閉じない') == '**閉じない'
+        assert convert_inline_markdown('3 * 4 = 12') == '3 * 4 = 12'
+        assert convert_inline_markdown('[x](javascript:alert(1))') == '[x](javascript:alert(1))'
+
+
+class TestDecorationRegistry:
+    """装飾レジストリのテスト"""
+
+    def setup_method(self):
+        from decoration_registry import clear_registry_cache
+        clear_registry_cache()
+
+    def test_registry_reused_per_settings_version(self):
+        """同じ内容の装飾設定ではコンパイル済みのレジストリを再利用する"""
+        from decoration_registry import get_decoration_registry
+
+        decorations = [{'id': 'ba-point', 'schema': 'box', 'class': 'ba-point', 'enabled': True}]
+        first = get_decoration_registry(decorations)
+
+        assert get_decoration_registry([dict(decorations[0])]) is first
+        assert get_decoration_registry(first) is first
+        assert get_decoration_registry([dict(decorations[0], enabled=False)]) is not first
+
+    def test_lookup_and_enabled(self):
+        """先頭の定義を優先し、無効な装飾は有効IDに含めない"""
+        from decoration_registry import DecorationRegistry
+
+        registry = DecorationRegistry([
+            {'id': 'ba-point', 'schema': 'box', 'class': 'box-point'},
+            {'id': 'ba-point', 'schema': 'paragraph', 'class': 'other'},
+            {'id': 'ba-old', 'schema': 'box', 'enabled': False},
+        ])
+
+        assert registry.get('ba-point')['class'] == 'box-point'
+        assert registry.get('ba-old')['class'] == 'ba-old'
+        assert registry.get('missing') is None
+        assert registry.is_enabled('ba-point')
+        assert not registry.is_enabled('ba-old')
+
+    def test_render_with_registry(self):
+        """schemaに応じてspanまたはdivで描画する"""
+        import app
+
+        decorations = [
+            {'id': 'ba-highlight', 'schema': 'paragraph', 'class': 'ba-highlight'},
+            {'id': 'ba-point', 'schema': 'box', 'class': 'ba-point'},
+        ]
+        inline = app.block_to_wordpress({'type': 'paragraph', 'content': '強調', 'decorationId': 'ba-highlight'}, decorations)
+        box = app.block_to_wordpress(
+            {'type': 'paragraph', 'content': '本文', 'decorationId': 'ba-point', 'title': 'ポイント'}, decorations
+        )
+
+        assert inline == ['<!-- wp:paragraph -->\n<p><span class="ba-highlight">強調</span></p>\n<!-- /wp:paragraph -->']
+        assert box == [
+            '<!-- wp:html -->\n<div class="ba-point">\n<p class="box-title">ポイント</p>\n'
+            '<p>本文</p>\n</div>\n<!-- /wp:html -->'
+        ]
+
+
+class TestArticleRenderer:
+    """ストリーミングレンダラーのテスト"""
+
+    @staticmethod
+    def _structure(block_count):
+        blocks = [
+            {'type': 'paragraph', 'content': f'段落{i}は**重要**です。'} if i % 3 else
+            {'type': 'list', 'items': ['項目A', '項目B'], 'decorationId': 'ba-point', 'title': 'ポイント'}
+            for i in range(block_count)
+        ]
+        sections = [{'heading': f'見出し{i}', 'blocks': blocks[i:i + 20]} for i in range(0, block_count, 20)]
+        return {'title': 'テスト', 'sections': sections}
+
+    def test_chunks_match_joined_output(self):
+        """チャンクを連結した結果は一括生成と一致する"""
+        import io
+        from article_renderer import iter_wordpress, iter_markdown, render_into, structure_to_wordpress
+
+        decorations = [{'id': 'ba-point', 'schema': 'box', 'class': 'ba-point'}]
+        structure = self._structure(50)
+
+        chunks = list(iter_wordpress(structure, decorations))
+        assert len(chunks) > 1
+        assert ''.join(chunks) == structure_to_wordpress(structure, decorations)
+
+        buffer = io.StringIO()
+        written = render_into(iter_markdown(structure), buffer.write)
+        assert buffer.getvalue().startswith('## 見出し0\n\n**ポイント**\n\n- 項目A')
+        assert written == len(buffer.getvalue())
+
+    def test_streaming_memory_is_flat(self):
+        """ストリーミング時のピークメモリは記事サイズに比例しない"""
+        import hashlib
+        import tracemalloc
+        from article_renderer import iter_wordpress, render_into
+        from decoration_registry import get_decoration_registry
+
+        registry = get_decoration_registry([{'id': 'ba-point', 'schema': 'box', 'class': 'ba-point'}])
+        structure = self._structure(20000)
+        digest = hashlib.sha256()
+
+        tracemalloc.start()
+        written = render_into(iter_wordpress(structure, registry), lambda chunk: digest.update(chunk.encode()))
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        assert written > 2_000_000
+        assert peak < 200_000
+
+
+class TestArticleAst:
+    """記事ASTとビジターレンダラーのテスト"""
+
+    STRUCTURE = {
+        'title': 'タイトル',
+        'sections': [{
+            'heading': '見出し',
+            'blocks': [
+                {'type': 'paragraph', 'content': '**本文**', 'decorationId': 'ba-point', 'title': 'ポイント'},
+                {'type': 'list', 'listType': 'ordered', 'items': ['一', '二'], 'decorationId': 'ba-disabled', 'title': 'x'},
+                {'type': 'subsection', 'heading': '小見出し', 'blocks': [
+                    {'type': 'table', 'headers': ['項目', '内容'], 'rows': [['料金', '無料']]},
+                ]},
+                {'type': 'callout', 'content': '申し込み', 'buttonText': '公式サイト', 'buttonUrl': 'https://example.com'},
+                {'type': 'unknown'},
+            ],
+        }],
+    }
+    DECORATIONS = [
+        {'id': 'ba-point', 'schema': 'box', 'class': 'ba-point'},
+        {'id': 'ba-disabled', 'schema': 'box', 'enabled': False},
+    ]
+
+    def setup_method(self):
+        from article_renderer import clear_render_cache
+        clear_render_cache()
+
+    def test_parse_filters_invalid_decorations(self):
+        """解析時に無効な装飾とそのタイトル、未知のブロックを除去する"""
+        from article_ast import parse_structure, Paragraph, ListBlock, Subsection, Table
+
+        article = parse_structure(self.STRUCTURE, self.DECORATIONS)
+        blocks = article.sections[0].blocks
+
+        assert [type(b) for b in blocks[:3]] == [Paragraph, ListBlock, Subsection]
+        assert len(blocks) == 4
+        assert blocks[0].decoration_id == 'ba-point'
+        assert blocks[1].decoration_id is None and blocks[1].title == ''
+        assert isinstance(blocks[2].blocks[0], Table)
+        assert not hasattr(blocks[0], '__dict__')
+
+        data = article.to_dict()
+        assert 'decorationId' not in data['sections'][0]['blocks'][1]
+        assert parse_structure(data).to_dict() == data
+
+    def test_visitors_render_one_parse(self):
+        """1回の解析から各形式を描画する"""
+        from article_ast import parse_structure
+        from article_renderer import (
+            GutenbergRenderer, MarkdownRenderer, PlainMarkdownRenderer, PlainHtmlRenderer
+        )
+
+        article = parse_structure(self.STRUCTURE, self.DECORATIONS)
+
+        gutenberg = ''.join(GutenbergRenderer(self.DECORATIONS).iter_article(article))
+        assert '<div class="ba-point">\n<p class="box-title">ポイント</p>\n<p><strong>本文</strong></p>' in gutenberg
+        assert '<!-- wp:list {"ordered":true} -->' in gutenberg
+
+        markdown = ''.join(MarkdownRenderer().iter_article(article))
+        assert ':::box id="ba-point" title="ポイント"' in markdown
+
+        plain = ''.join(PlainMarkdownRenderer().iter_article(article))
+        assert '> **ポイント**' in plain
+        assert '| 項目 | 内容 |\n| --- | --- |\n| 料金 | 無料 |' in plain
+        assert '[公式サイト](https://example.com)' in plain
+
+        html = ''.join(PlainHtmlRenderer().iter_article(article))
+        assert '<h2>見出し</h2>' in html
+        assert '<!-- wp:' not in html
+        assert '<ol>\n<li>一</li>\n<li>二</li>\n</ol>' in html
+
+    def test_render_memoized_per_digest(self):
+        """同じ内容のASTとレンダラー設定では描画結果を再利用する"""
+        from article_ast import parse_structure
+        from article_renderer import GutenbergRenderer, PlainMarkdownRenderer, render_article
+
+        first = parse_structure(self.STRUCTURE, self.DECORATIONS)
+        second = parse_structure(self.STRUCTURE, self.DECORATIONS)
+        assert first.digest == second.digest
+
+        rendered = render_article(first, GutenbergRenderer(self.DECORATIONS))
+        with patch.object(GutenbergRenderer, 'iter_article', side_effect=AssertionError('not memoized')):
+            assert render_article(second, GutenbergRenderer(self.DECORATIONS)) is rendered
+
+        assert render_article(first, PlainMarkdownRenderer()) != rendered
+
+    def test_article_accept_renders_whole_article(self):
+        """記事ノードも accept() で描画でき、iter_article() と同じ結果になる"""
+        from article_ast import Node, parse_structure
+        from article_renderer import ArticleRenderer, GutenbergRenderer
+
+        article = parse_structure(self.STRUCTURE, self.DECORATIONS)
+        renderer = GutenbergRenderer(self.DECORATIONS)
+
+        assert ''.join(article.accept(renderer)) == ''.join(renderer.iter_article(article))
+        # 基底クラスは抽象クラスのため、描画処理のないノード・レンダラーは生成できない
+        with pytest.raises(TypeError):
+            Node()
+        with pytest.raises(TypeError):
+            ArticleRenderer()
+
+
+
+class TestArticleMetrics:
+    """記事ASTの計測のテスト"""
+
+    STRUCTURE = TestArticleAst.STRUCTURE
+    DECORATIONS = TestArticleAst.DECORATIONS
+
+    def setup_method(self):
+        from article_renderer import clear_render_cache
+        clear_render_cache()
+
+    def test_inline_text_stats(self):
+        """記法・空白を除いた文字数とリンク数を数える"""
+        from article_metrics import inline_text_stats
+
+        assert inline_text_stats('**太字** と [リンク](https://example.com)') == (6, 1)
+        assert inline_text_stats('[相対](/path) *強調*') == (4, 1)
+        assert inline_text_stats('') == (0, 0)
+
+    def test_metrics_collected_while_rendering(self):
+        """描画と同じ走査で見出し・装飾・リンク・文字数を集計する"""
+        from article_ast import parse_structure
+        from article_renderer import GutenbergRenderer, PlainMarkdownRenderer, render_article_with_metrics
+
+        article = parse_structure(self.STRUCTURE, self.DECORATIONS)
+        content, metrics = render_article_with_metrics(article, GutenbergRenderer(self.DECORATIONS))
+
+        assert '<h3 class="wp-block-heading">小見出し</h3>' in content
+        assert metrics['h2Count'] == 1
+        assert metrics['h3Count'] == 1
+        assert metrics['headingCount'] == 2
+        assert metrics['decorationUsage'] == {'ba-point': 1}
+        assert metrics['linkCount'] == 1
+        # 見出し・ポイント・本文・一・二・小見出し・項目・内容・料金・無料・申し込み・公式サイト
+        assert metrics['bodyChars'] == 3 + 4 + 2 + 1 + 1 + 4 + 2 + 2 + 2 + 2 + 4 + 5
+        assert metrics['readingTime'] == 1
+
+        # 形式によらず同じ値、メモ化された描画でも同じ値を返す
+        assert render_article_with_metrics(article, PlainMarkdownRenderer())[1] == metrics
+        assert render_article_with_metrics(article, GutenbergRenderer(self.DECORATIONS)) == (content, metrics)
+
+    def test_longform_section_count_is_not_too_many_h2(self):
+        """アウトラインで決めたセクション数まではH2が多すぎるとしない（長文モード）"""
+        from article_metrics import build_structure_validation
+
+        metrics = {'h2Count': 16, 'headingCount': 16}
+        assert build_structure_validation(metrics)['issues'] == ['H2見出しが多すぎます（8個以下推奨）']
+        assert build_structure_validation(metrics, expected_sections=16)['valid'] is True
+        assert build_structure_validation({'h2Count': 21, 'headingCount': 21}, expected_sections=16)['issues'] == [
+            'H2見出しが多すぎます（16個以下推奨）'
+        ]
+
+    def test_wordpress_article_gets_structure_validation(self):
+        """WordPress形式でも構造の検証結果と計測値を記事に保存する"""
+        import app
+
+        calls = [{'task': 'structure', 'model': 'm', 'outputTokens': 10, 'stopReason': 'end_turn'}]
+        articles_table = MagicMock()
+        body = {'title': 'テスト記事', 'contentPoints': 'x', 'outputFormat': 'wordpress'}
+        settings = {'decorations': self.DECORATIONS}
+
+        with patch.object(app, 'articles_table', articles_table), \
+                patch.object(app, 'get_user_settings', return_value=settings), \
+                patch.object(app, 'get_calibrated_chars_per_token', return_value=None), \
+                patch.object(app, 'generate_structure', return_value=(self.STRUCTURE, calls)), \
+                patch.object(app, 'update_job_status') as update:
+            app.run_article_generation('job-1', 'user-1', body)
+
+        metadata = articles_table.put_item.call_args.kwargs['Item']['metadata']
+        assert metadata['structureValidation'] == {
+            'valid': False, 'issues': ['H2見出しは最低2つ必要です'], 'headingCount': 2, 'h2Count': 1
+        }
+        assert metadata['wordCount'] == 32
+        assert metadata['articleMetrics']['decorationUsage'] == {'ba-point': 1}
+        assert update.call_args.kwargs['result']['metadata']['structureValidation'] == metadata['structureValidation']
+
 if __name__ == '__main__':
     pytest.main([__file__, '-v'])
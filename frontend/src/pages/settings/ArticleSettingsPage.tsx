@@ -97,6 +97,7 @@ export const ArticleSettingsPage = () => {
     updateSeo,
     addSampleArticle,
     removeSampleArticle,
+    setSampleArticleMode,
     resetToDefaults,
   } = useSettingsStore();
 
@@ -122,7 +123,7 @@ export const ArticleSettingsPage = () => {
   // 設定変更を検知
   useEffect(() => {
     setHasChanges(true);
-  }, [settings.articleStyle, settings.seo, settings.sampleArticles, settings.decorations]);
+  }, [settings.articleStyle, settings.seo, settings.sampleArticles, settings.sampleArticleMode, settings.decorations]);
 
   // 保存処理
   const handleSaveToServer = async () => {
@@ -571,6 +572,21 @@ export const ArticleSettingsPage = () => {
               </div>
             </div>
 
+            <label className="flex items-start gap-2 mb-6 text-sm text-gray-700">
+              <input
+                type="checkbox"
+                checked={settings.sampleArticleMode === 'full'}
+                onChange={(e) => setSampleArticleMode(e.target.checked ? 'full' : 'digest')}
+                className="mt-0.5"
+              />
+              <span>
+                サンプル記事の全文を参照する
+                <span className="block text-xs text-gray-500">
+                  通常は文体の分析結果と抜粋のみを参照します。全文を参照すると生成に時間がかかる場合があります。
+                </span>
+              </span>
+            </label>
+
             {settings.sampleArticles.length > 0 ? (
               <div className="space-y-3">
                 <h3 className="text-sm font-medium text-gray-700">
@@ -4,7 +4,8 @@
  * 非同期SQSパターン対応
  */
 
-import api from './api';
+import api, { ApiError, ApiResponse, getApiClient } from './api';
+import { getValidIdToken } from './cognito';
 
 /**
  * ジョブ投入レスポンスの型
@@ -20,6 +21,17 @@ export interface SubmitJobResponse {
  */
 export type JobStatus = 'pending' | 'processing' | 'completed' | 'failed';
 
+/**
+ * 生成途中の結果の型（完成済みセクションのみ）
+ */
+export interface PartialArticleResult {
+  sectionsCompleted: number;
+  /** 長文モードの全セクション数（長文モードのmarkdownは直近に書き終えた部分のみ） */
+  sectionsTotal?: number;
+  markdown: string;
+  outputFormat: OutputFormat;
+}
+
 /**
  * ジョブステータスレスポンスの型
  */
@@ -28,6 +40,11 @@ export interface JobStatusResponse {
   status: JobStatus;
   progress?: number;
   result?: GenerateArticleResponse;
+  partialResult?: PartialArticleResult;
+  /** 一時的なAPIエラーによる再試行回数 */
+  attempts?: number;
+  /** 再試行待ちの場合の次回実行予定時刻 */
+  nextRetryAt?: string;
   error?: {
     code: string;
     message: string;
@@ -36,6 +53,19 @@ export interface JobStatusResponse {
   updatedAt: string;
 }
 
+/**
+ * ジョブイベント（WebSocket）の型
+ * 通知のみで記事本文は含まない（受けたらジョブステータスを取得する）
+ */
+export interface JobEvent {
+  type: 'subscribed' | 'processing' | 'section_ready' | 'completed' | 'failed';
+  jobId: string;
+  at: string;
+  status?: JobStatus;
+  sectionsCompleted?: number;
+  sectionsTotal?: number;
+}
+
 /**
  * 内部リンクの型
  */
@@ -50,6 +80,13 @@ export interface InternalLink {
  */
 export type OutputFormat = 'wordpress' | 'markdown';
 
+/**
+ * 生成モードの型
+ * parallel: アウトライン生成後にセクションを並列生成
+ * longform: アウトライン生成後にセクションを前から順に分割生成（最大50,000文字）
+ */
+export type GenerationMode = 'single' | 'parallel' | 'longform';
+
 /**
  * 記事生成リクエストの型
  */
@@ -63,6 +100,9 @@ export interface GenerateArticleRequest {
   articleType?: 'info' | 'howto' | 'review';
   internalLinks?: InternalLink[];
   outputFormat?: OutputFormat;
+  generationMode?: GenerationMode;
+  /** 構造を1回だけ生成し、WordPressとMarkdownの両方を出力する */
+  dualFormat?: boolean;
 }
 
 /**
@@ -83,6 +123,8 @@ export interface GenerateArticleResponse {
   title: string;
   markdown: string;  // Markdown形式またはWordPress HTML形式のコンテンツ
   outputFormat?: OutputFormat;
+  /** dualFormat指定時の、本文と別形式のコンテンツ */
+  alternateContents?: Partial<Record<OutputFormat, string>>;
   metadata: {
     wordCount: number;
     readingTime: number;
@@ -104,6 +146,8 @@ export interface TitleSuggestion {
  */
 export interface GenerateTitlesResponse {
   titles: TitleSuggestion[];
+  /** キャッシュから返された結果かどうか */
+  cached?: boolean;
 }
 
 /**
@@ -114,6 +158,8 @@ export interface GenerateTitlesRequest {
   targetAudience?: string;
   keywords?: string[];
   contentPoints: string;
+  /** trueの場合はキャッシュを使わず新しい案を生成 */
+  regenerate?: boolean;
 }
 
 /**
@@ -124,6 +170,8 @@ export interface GenerateMetaResponse {
   keywords: string[];
   suggestedSlug: string;
   estimatedReadingTime: number;
+  /** キャッシュから返された結果かどうか */
+  cached?: boolean;
 }
 
 /**
@@ -158,6 +206,8 @@ export interface ArticleDetail {
   articleId: string;
   title: string;
   markdown: string;
+  /** dualFormat指定時の、本文と別形式のコンテンツ */
+  alternateContents?: Partial<Record<OutputFormat, string>>;
   status: 'draft' | 'published';
   createdAt: number;
   updatedAt: number;
@@ -176,6 +226,13 @@ export interface ArticleDetail {
 /**
  * 記事生成APIサービス
  */
+// ジョブステータスのロングポーリングでサーバー側に待たせる秒数（サーバー側の上限は20秒）
+const JOB_STATUS_WAIT_SECONDS = 20;
+// ジョブステータスのリクエストの最小間隔
+const JOB_STATUS_MIN_INTERVAL_MS = 1000;
+// ジョブイベントのWebSocket API（未設定の場合はロングポーリングのみ）
+const JOB_EVENTS_WS_URL = import.meta.env.VITE_JOB_EVENTS_WS_URL || '';
+
 export const articleApi = {
   /**
    * 記事生成ジョブを投入（非同期）
@@ -193,28 +250,112 @@ export const articleApi = {
   },
 
   /**
-   * 記事を生成（非同期ポーリング）
-   * ジョブを投入し、完了までポーリングして結果を返す
+   * ジョブステータスの変化を待って取得（ロングポーリング）
+   * etag が最新の状態と一致する間はサーバー側で最大 wait 秒待つ。
+   * 待ち時間内に変わらなければ job は null（304 Not Modified）
+   */
+  async waitJobStatus(
+    jobId: string,
+    etag?: string,
+    wait = JOB_STATUS_WAIT_SECONDS
+  ): Promise<{ job: JobStatusResponse | null; etag?: string }> {
+    const response = await getApiClient().get<ApiResponse<JobStatusResponse>>(`/articles/jobs/${jobId}`, {
+      params: { wait },
+      headers: etag ? { 'If-None-Match': etag } : undefined,
+      validateStatus: (status) => (status >= 200 && status < 300) || status === 304,
+    });
+    const nextEtag = (response.headers['etag'] as string | undefined) || etag;
+    if (response.status === 304) {
+      return { job: null, etag: nextEtag };
+    }
+    if (!response.data.success) {
+      throw new ApiError(
+        response.data.error?.code || 'UNKNOWN',
+        response.data.error?.message || 'エラーが発生しました',
+        response.status
+      );
+    }
+    return { job: response.data.data as JobStatusResponse, etag: nextEtag };
+  },
+
+  /**
+   * ジョブイベントを受けるたびに check を呼び、完了するまで待つ
+   * 接続できない・切断された・期限を過ぎた場合は null（呼び出し元はロングポーリングで続ける）
+   */
+  async waitJobEvents(
+    jobId: string,
+    deadline: number,
+    check: () => Promise<GenerateArticleResponse | null>
+  ): Promise<GenerateArticleResponse | null> {
+    const token = await getValidIdToken();
+    if (!token) {
+      return null;
+    }
+
+    return new Promise((resolve, reject) => {
+      const socket = new WebSocket(`${JOB_EVENTS_WS_URL}?token=${encodeURIComponent(token)}`);
+      let settled = false;
+      let checking = Promise.resolve();
+
+      const finish = (settle: () => void) => {
+        if (settled) return;
+        settled = true;
+        clearTimeout(timer);
+        socket.close();
+        settle();
+      };
+      const timer = setTimeout(() => finish(() => resolve(null)), Math.max(deadline - Date.now(), 0));
+
+      socket.onopen = () => {
+        socket.send(JSON.stringify({ action: 'subscribe', jobId }));
+      };
+      socket.onmessage = () => {
+        // イベントは通知のみのため、受けるたびに状態を取得する（取得は1件ずつ順番に行う）
+        checking = checking.then(async () => {
+          if (settled) return;
+          try {
+            const result = await check();
+            if (result) finish(() => resolve(result));
+          } catch (error) {
+            finish(() => reject(error));
+          }
+        });
+      };
+      socket.onerror = () => finish(() => resolve(null));
+      socket.onclose = () => finish(() => resolve(null));
+    });
+  },
+
+  /**
+   * 記事を生成（非同期）
+   * ジョブを投入し、完了まで待って結果を返す。
+   * ジョブイベント（WebSocket）が使える場合はイベントを受けたときだけ状態を取得し、
+   * 使えない場合はロングポーリングで待つ
    */
   async generate(
     request: GenerateArticleRequest,
-    onProgress?: (status: JobStatus, progress?: number) => void
+    onProgress?: (status: JobStatus, progress?: number, partialResult?: PartialArticleResult) => void
   ): Promise<GenerateArticleResponse> {
     // ジョブを投入
     const submitResponse = await this.submitGenerateJob(request);
     const { jobId } = submitResponse;
 
-    // ポーリングで完了を待つ
-    const pollInterval = 2000; // 2秒間隔
-    const maxPolls = 180; // 最大6分 (180 * 2秒)
+    // 最大6分。長文モードは複数のステップに分けて生成するため最大30分
+    const timeoutMs = (request.generationMode === 'longform' ? 30 : 6) * 60 * 1000;
+    const deadline = Date.now() + timeoutMs;
+    let etag: string | undefined;
 
-    for (let i = 0; i < maxPolls; i++) {
-      await new Promise((resolve) => setTimeout(resolve, pollInterval));
+    // 状態を取得し、完了していれば結果を返す（未完了・変化なしは null、失敗は例外）
+    const check = async (wait: number): Promise<GenerateArticleResponse | null> => {
+      const { job: statusResponse, etag: nextEtag } = await this.waitJobStatus(jobId, etag, wait);
+      etag = nextEtag;
 
-      const statusResponse = await this.getJobStatus(jobId);
+      if (!statusResponse) {
+        return null;
+      }
 
       if (onProgress) {
-        onProgress(statusResponse.status, statusResponse.progress);
+        onProgress(statusResponse.status, statusResponse.progress, statusResponse.partialResult);
       }
 
       if (statusResponse.status === 'completed' && statusResponse.result) {
@@ -225,6 +366,32 @@ export const articleApi = {
         const errorMsg = statusResponse.error?.message || '記事生成に失敗しました';
         throw new Error(errorMsg);
       }
+      return null;
+    };
+
+    // ジョブイベントで待つ（状態の取得は状態の変化の回数だけ）
+    if (JOB_EVENTS_WS_URL) {
+      const result = await this.waitJobEvents(jobId, deadline, () => check(0));
+      if (result) {
+        return result;
+      }
+    }
+
+    // ロングポーリングで待つ（状態が変わるまでサーバー側で待つため、リクエストは変化のたびに1回）
+    let lastRequestedAt = 0;
+    while (Date.now() < deadline) {
+      // 状態が立て続けに変わる場合（セクションごとの途中結果）や、サーバーが待たずに
+      // 304を返す場合も含め、どの結果の後でもリクエストの間隔は空ける
+      const elapsed = Date.now() - lastRequestedAt;
+      if (elapsed < JOB_STATUS_MIN_INTERVAL_MS) {
+        await new Promise((resolve) => setTimeout(resolve, JOB_STATUS_MIN_INTERVAL_MS - elapsed));
+      }
+
+      lastRequestedAt = Date.now();
+      const result = await check(JOB_STATUS_WAIT_SECONDS);
+      if (result) {
+        return result;
+      }
     }
 
     throw new Error('記事生成がタイムアウトしました。しばらく経ってから再度お試しください。');
@@ -240,8 +407,8 @@ export const articleApi = {
   /**
    * メタ情報を生成
    */
-  async generateMeta(markdown: string): Promise<GenerateMetaResponse> {
-    return api.post<GenerateMetaResponse>('/articles/generate/meta', { markdown });
+  async generateMeta(markdown: string, regenerate = false): Promise<GenerateMetaResponse> {
+    return api.post<GenerateMetaResponse>('/articles/generate/meta', { markdown, regenerate });
   },
 
   /**
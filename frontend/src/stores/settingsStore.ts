@@ -167,6 +167,9 @@ export interface SampleArticle {
   createdAt: string;
 }
 
+// サンプル記事の参照方法の型
+export type SampleArticleMode = 'digest' | 'full';
+
 // 全設定の型
 export interface UserSettings {
   articleStyle: ArticleStyleSettings;
@@ -174,6 +177,8 @@ export interface UserSettings {
   baseClass?: string;
   seo: SeoSettings;
   sampleArticles: SampleArticle[];
+  /** サンプル記事の参照方法（digest: 文体の分析結果と抜粋 / full: 全文） */
+  sampleArticleMode?: SampleArticleMode;
   lastUpdated: string | null;
 }
 
@@ -286,6 +291,7 @@ const defaultSettings: UserSettings = {
     maxKeywords: 7,
   },
   sampleArticles: [],
+  sampleArticleMode: 'digest',
   lastUpdated: null,
 };
 
@@ -327,6 +333,7 @@ interface SettingsStore {
   updateSeo: (seo: Partial<SeoSettings>) => void;
   addSampleArticle: (article: Omit<SampleArticle, 'id' | 'createdAt'>) => boolean;
   removeSampleArticle: (id: string) => void;
+  setSampleArticleMode: (mode: SampleArticleMode) => void;
   resetToDefaults: () => void;
   setSettings: (settings: UserSettings) => void;
   setLoading: (loading: boolean) => void;
@@ -421,6 +428,15 @@ export const useSettingsStore = create<SettingsStore>()(
           },
         })),
 
+      setSampleArticleMode: (mode) =>
+        set((state) => ({
+          settings: {
+            ...state.settings,
+            sampleArticleMode: mode,
+            lastUpdated: new Date().toISOString(),
+          },
+        })),
+
       resetToDefaults: () =>
         set({
           settings: { ...defaultSettings, lastUpdated: new Date().toISOString() },
@@ -501,6 +517,7 @@ export const settingsApi = {
         baseClass?: string;
         seo: SeoSettings | null;
         sampleArticles: SampleArticle[];
+        sampleArticleMode?: SampleArticleMode;
       }>('/settings');
 
       // サーバーからのデータをマージ
@@ -516,6 +533,7 @@ export const settingsApi = {
           baseClass: response.baseClass || 'ba-article',
           seo: response.seo || store.settings.seo,
           sampleArticles: response.sampleArticles || [],
+          sampleArticleMode: response.sampleArticleMode || 'digest',
           lastUpdated: new Date().toISOString(),
         };
         store.setSettings(newSettings);
@@ -545,6 +563,7 @@ export const settingsApi = {
         baseClass: store.settings.baseClass,
         seo: store.settings.seo,
         sampleArticles: store.settings.sampleArticles,
+        sampleArticleMode: store.settings.sampleArticleMode || 'digest',
       });
 
       return true;